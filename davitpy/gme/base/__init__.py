@@ -11,6 +11,7 @@ Modules
 -----------------------------------------
 fillGmedb   create and populate databases
 gmeBase     base class for gme data
+bulkIngest  bulk writes of gme records to the mongodb
 -----------------------------------------
 
 """
@@ -27,3 +28,9 @@ except Exception,e: logging.exception(e)
 
 try: from fillGmedb import *
 except Exception,e: logging.exception(e)
+
+try: import bulkIngest
+except Exception,e: logging.exception(e)
+
+try: from bulkIngest import *
+except Exception,e: logging.exception(e)
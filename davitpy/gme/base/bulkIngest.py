@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2012  VT SuperDARN Lab
+# Full license can be found in LICENSE.txt
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""bulkIngest module
+
+Routines shared by the map*Mongo functions for writing gme records to the
+mongodb in bulk
+
+Functions
+-----------------------------------------
+bulkUpsert      insert or replace records in batches
+ensureKeyIndex  index the fields records are matched on
+-----------------------------------------
+
+"""
+import logging
+
+
+def ensureKeyIndex(mongoData, keys):
+    """Make sure there is an index on the fields that identify a record, so
+    that the upserts done by bulkUpsert can find existing records quickly.
+
+    Parameters
+    ----------
+    mongoData : pymongo collection
+        the collection being written to
+    keys : list
+        the names of the fields that identify a record, e.g. ['time', 'res']
+
+    Returns
+    -------
+    Nothing
+
+    Example
+    -------
+        gme.base.ensureKeyIndex(mongoData, ['time', 'satnum'])
+
+    """
+    if len(keys) == 1:
+        mongoData.ensure_index(keys[0])
+    else:
+        mongoData.ensure_index([(key, 1) for key in keys])
+
+
+def bulkUpsert(mongoData, recs, keys, batchSize=1000, label=None,
+               stats=None):
+    """Write gme records to the mongodb, replacing any existing record with
+    the same key values and inserting the rest.  Records are sent in
+    unordered batches, one round trip per batch.
+
+    Parameters
+    ----------
+    mongoData : pymongo collection
+        the collection to write to
+    recs : iterable
+        the records to write, as :class:`gmeData` objects (or mongodb
+        dictionaries)
+    keys : list
+        the names of the fields that identify a record, e.g. ['time'] or
+        ['time', 'res']
+    batchSize : Optional[int]
+        the number of records sent to the server at a time.  default=1000
+    label : Optional[str]
+        a name used in the progress messages, e.g. 'omni'.  default=None
+    stats : Optional[dict]
+        the dictionary returned by an earlier call, to keep running totals
+        across several calls.  default=None
+
+    Returns
+    -------
+    stats : dict
+        'records' (number of records sent), 'inserted', 'updated' and
+        'errors' counts, and 'seconds' spent writing
+
+    Notes
+    -----
+    Progress and throughput are reported with logging.info after every
+    batch.  An existing record is replaced completely, as the map*Mongo
+    functions did before.
+
+    Example
+    -------
+        stats = gme.base.bulkUpsert(mongoData, omniList, ['time', 'res'])
+
+    """
+    if stats is None:
+        stats = {'records':0, 'inserted':0, 'updated':0, 'errors':0,
+                 'seconds':0.}
+    if label is None:
+        label = mongoData.name
+
+    batch = []
+    for rec in recs:
+        if isinstance(rec, dict):
+            batch.append(rec)
+        else:
+            batch.append(rec.toDbDict())
+
+        if len(batch) >= batchSize:
+            _writeBatch(mongoData, batch, keys, stats)
+            _logProgress(label, stats)
+            batch = []
+
+    if len(batch) > 0:
+        _writeBatch(mongoData, batch, keys, stats)
+        _logProgress(label, stats)
+
+    return stats
+
+
+def _writeBatch(mongoData, batch, keys, stats):
+    """Send one batch of upserts and add the results to stats"""
+    import time
+    from pymongo.errors import BulkWriteError
+
+    t0 = time.time()
+    try:
+        try:
+            from pymongo import ReplaceOne
+        except ImportError:
+            # pymongo 2.x, which only has the bulk builder
+            ReplaceOne = None
+
+        if ReplaceOne is not None and hasattr(mongoData, 'bulk_write'):
+            ops = [ReplaceOne(dict([(key, dbDict[key]) for key in keys]),
+                              dbDict, upsert=True) for dbDict in batch]
+            result = mongoData.bulk_write(ops, ordered=False)
+            stats['inserted'] += result.upserted_count
+            stats['updated'] += result.matched_count
+        else:
+            bulk = mongoData.initialize_unordered_bulk_op()
+            for dbDict in batch:
+                bulk.find(dict([(key, dbDict[key]) for key in keys])) \
+                    .upsert().replace_one(dbDict)
+            result = bulk.execute()
+            stats['inserted'] += result['nUpserted']
+            stats['updated'] += result['nMatched']
+    except BulkWriteError, e:
+        # the other writes in an unordered batch still go through
+        stats['inserted'] += e.details.get('nUpserted', 0)
+        stats['updated'] += e.details.get('nMatched', 0)
+        stats['errors'] += len(e.details.get('writeErrors', []))
+        logging.error('{:d} records could not be written'.format(
+            len(e.details.get('writeErrors', []))))
+    stats['records'] += len(batch)
+    stats['seconds'] += time.time() - t0
+
+
+def _logProgress(label, stats):
+    """Report the number of records written and the write rate"""
+    rate = stats['records'] / max(stats['seconds'], 1.e-6)
+    logging.info('{:s}: {:d} records written ({:d} new, {:d} updated), '
+                 '{:.0f} records/s'.format(label, stats['records'],
+                                           stats['inserted'], stats['updated'],
+                                           rate))
@@ -364,7 +364,7 @@ def readAeWeb(sTime,eTime=None,res=60):
     else: return None
 
 
-def mapAeMongo(sYear,eYear=None,res=60):
+def mapAeMongo(sYear,eYear=None,res=60,batchSize=1000):
     """This function reads ae data from wdc and puts it in mongodb
     
     Parameters
@@ -375,6 +375,9 @@ def mapAeMongo(sYear,eYear=None,res=60):
         the end year for mapping data.  if this is None, eYear will be sYear
     res : Optional[int]
         the time resolution desired.  either 1 or 60 minutes.  default=60.
+    batchSize : Optional[int]
+        the number of records written to the mongodb at a time.
+        default=1000
 
     Returns
     -------
@@ -393,6 +396,7 @@ def mapAeMongo(sYear,eYear=None,res=60):
     """
     import davitpy.pydarn.sdio.dbUtils as db
     from davitpy import rcParams
+    from davitpy.gme.base.bulkIngest import bulkUpsert, ensureKeyIndex
     import datetime as dt
     
     #check inputs
@@ -412,27 +416,14 @@ def mapAeMongo(sYear,eYear=None,res=60):
     mongoData.ensure_index('au')
     mongoData.ensure_index('ao')
     mongoData.ensure_index('res')
+    ensureKeyIndex(mongoData, ['time', 'res'])
     
+    stats = None
     for yr in range(sYear,eYear+1):
         #1 day at a time, to not fill up RAM
         templist = readAeWeb(dt.datetime(yr,1,1),dt.datetime(yr,1,1)+dt.timedelta(days=366),res=res)
         if(templist == None): continue
-        for rec in templist:
-            #check if a duplicate record exists
-            qry = mongoData.find({'$and':[{'time': rec.time}, {'res': rec.res}]})
-            logging.debug(rec.time)
-            tempRec = rec.toDbDict()
-            cnt = qry.count()
-            #if this is a new record, insert it
-            if(cnt == 0): mongoData.insert(tempRec)
-            #if this is an existing record, update it
-            elif(cnt == 1):
-                logging.debug('foundone!!')
-                dbDict = qry.next()
-                temp = dbDict['_id']
-                dbDict = tempRec
-                dbDict['_id'] = temp
-                mongoData.save(dbDict)
-            else:
-                logging.warning('strange, there is more than 1 AE record for ' + rec.time)
+        #insert new records and replace existing ones, in bulk
+        stats = bulkUpsert(mongoData, templist, ['time', 'res'],
+                           batchSize=batchSize, label='ae', stats=stats)
         del templist
@@ -287,7 +287,7 @@ def readDstWeb(sTime,eTime=None):
     else: return None
 
 
-def mapDstMongo(sYear,eYear=None):
+def mapDstMongo(sYear,eYear=None,batchSize=1000):
     """This function reads dst data from wdc and puts it in mongodb
     
     Parameters
@@ -297,6 +297,9 @@ def mapDstMongo(sYear,eYear=None):
     eYear : Optional[int]
         the end year for mapping data.  if this is None,
         eYear will be sYear
+    batchSize : Optional[int]
+        the number of records written to the mongodb at a time.
+        default=1000
 
     Returns
     -------
@@ -315,6 +318,7 @@ def mapDstMongo(sYear,eYear=None):
     """
     import davitpy.pydarn.sdio.dbUtils as db
     from davitpy import rcParams
+    from davitpy.gme.base.bulkIngest import bulkUpsert
     import datetime as dt
     
     #check inputs
@@ -331,25 +335,12 @@ def mapDstMongo(sYear,eYear=None):
     mongoData.ensure_index('time')
     mongoData.ensure_index('dst')
     
+    stats = None
     for yr in range(sYear,eYear+1):
         #1 year at a time, to not fill up RAM
         templist = readDstWeb(dt.datetime(yr,1,1),dt.datetime(yr,12,31))
-        for rec in templist:
-            #check if a duplicate record exists
-            qry = mongoData.find({'time':rec.time})
-            logging.debug(rec.time)
-            tempRec = rec.toDbDict()
-            cnt = qry.count()
-            #if this is a new record, insert it
-            if(cnt == 0): mongoData.insert(tempRec)
-            #if this is an existing record, update it
-            elif(cnt == 1):
-                logging.debug('foundone!!')
-                dbDict = qry.next()
-                temp = dbDict['_id']
-                dbDict = tempRec
-                dbDict['_id'] = temp
-                mongoData.save(dbDict)
-            else:
-                logging.warning('strange, there is more than 1 DST record for ' + rec.time)
+        if(templist == None): continue
+        #insert new records and replace existing ones, in bulk
+        stats = bulkUpsert(mongoData, templist, ['time'], batchSize=batchSize,
+                           label='dst', stats=stats)
         del templist
@@ -377,7 +377,7 @@ def readKpFtp(sTime, eTime=None):
         return None
 
     
-def mapKpMongo(sYear,eYear=None):
+def mapKpMongo(sYear,eYear=None,batchSize=1000):
     """This function reads kp data from the GFZ Potsdam FTP server via anonymous FTP
     connection and maps it to the mongodb.  
     
@@ -388,6 +388,9 @@ def mapKpMongo(sYear,eYear=None):
     eYear : Optional[int]
         the end year for mapping data.  if this is None, eYear will
         be sYear.  default=None
+    batchSize : Optional[int]
+        the number of records written to the mongodb at a time.
+        default=1000
 
     Returns
     -------
@@ -406,6 +409,7 @@ def mapKpMongo(sYear,eYear=None):
     """
     import davitpy.pydarn.sdio.dbUtils as db
     from davitpy import rcParams
+    from davitpy.gme.base.bulkIngest import bulkUpsert
     import datetime as dt
     
     if(eYear == None): eYear=sYear
@@ -422,25 +426,11 @@ def mapKpMongo(sYear,eYear=None):
     mongoData.ensure_index('apMean')
     mongoData.ensure_index('sunspot')
     
-    #read the kp data from the FTP server
-    datalist = []
+    #read the kp data from the FTP server, and insert or replace the
+    #records in bulk
+    stats = None
     for yr in range(sYear,eYear+1):
         templist = readKpFtp(dt.datetime(yr,1,1), dt.datetime(yr+1,1,1))
         if(templist == None): continue
-        for rec in templist:
-            #check if a duplicate record exists
-            qry = mongoData.find({'time':rec.time})
-            tempRec = rec.toDbDict()
-            cnt = qry.count()
-            #if this is a new record, insert it
-            if(cnt == 0): mongoData.insert(tempRec)
-            #if this is an existing record, update it
-            elif(cnt == 1):
-                logging.debug('foundone!!')
-                dbDict = qry.next()
-                temp = dbDict['_id']
-                dbDict = tempRec
-                dbDict['_id'] = temp
-                mongoData.save(dbDict)
-            else:
-                logging.warning('strange, there is more than 1 record for' + rec.time)
+        stats = bulkUpsert(mongoData, templist, ['time'], batchSize=batchSize,
+                           label='kp', stats=stats)
@@ -433,7 +433,7 @@ def readOmniFtp(sTime,eTime=None,res=5):
     else:
         return None
         
-def mapOmniMongo(sYear,eYear=None,res=5):
+def mapOmniMongo(sYear,eYear=None,res=5,batchSize=1000):
     """This function reads omni data from the NASA SPDF FTP server via
     anonymous FTP connection and maps it to the mongodb.  
     
@@ -448,6 +448,9 @@ def mapOmniMongo(sYear,eYear=None,res=5):
         the end year for mapping data.  if this is None, eYear will be sYear
     res : Optional[int]
         the time resolution for mapping data.  Can be either 1 or 5.  default=5
+    batchSize : Optional[int]
+        the number of records written to the mongodb at a time.
+        default=1000
 
     Returns
     -------
@@ -462,6 +465,7 @@ def mapOmniMongo(sYear,eYear=None,res=5):
     """
     import davitpy.pydarn.sdio.dbUtils as db
     from davitpy import rcParams
+    from davitpy.gme.base.bulkIngest import bulkUpsert, ensureKeyIndex
     import datetime as dt
     
     #check inputs
@@ -486,27 +490,14 @@ def mapOmniMongo(sYear,eYear=None,res=5):
     mongoData.ensure_index('pDyn')
     mongoData.ensure_index('ae')
     mongoData.ensure_index('symh')
+    ensureKeyIndex(mongoData, ['time', 'res'])
         
     #read the omni data from the FTP server
+    stats = None
     for yr in range(sYear,eYear+1):
         for mon in range(1,13):
             templist = readOmniFtp(dt.datetime(yr,mon,1),dt.datetime(yr,mon,1)+dt.timedelta(days=31),res=res)
             if(templist == None): continue
-            for rec in templist:
-                #check if a duplicate record exists
-                qry = mongoData.find({'$and':[{'time':rec.time},{'res':rec.res}]})
-                logging.debug(rec.time)
-                tempRec = rec.toDbDict()
-                cnt = qry.count()
-                #if this is a new record, insert it
-                if(cnt == 0): mongoData.insert(tempRec)
-                #if this is an existing record, update it
-                elif(cnt == 1):
-                    logging.debug('found one!!')
-                    dbDict = qry.next()
-                    temp = dbDict['_id']
-                    dbDict = tempRec
-                    dbDict['_id'] = temp
-                    mongoData.save(dbDict)
-                else:
-                    logging.warning('strange, there is more than 1 record for' + rec.time)
+            #insert new records and replace existing ones, in bulk
+            stats = bulkUpsert(mongoData, templist, ['time', 'res'],
+                               batchSize=batchSize, label='omni', stats=stats)
@@ -313,7 +313,7 @@ def readSymAsyWeb(sTime,eTime=None):
     if(symList != []): return symList
     else: return None
 
-def mapSymAsyMongo(sYear,eYear=None):
+def mapSymAsyMongo(sYear,eYear=None,batchSize=1000):
     """This function reads sym/asy data from wdc and puts it in mongodb
     
     .. warning::
@@ -327,6 +327,9 @@ def mapSymAsyMongo(sYear,eYear=None):
     eYear : Optional[int]
         the end year for mapping data.  if this is None, eYear
         will be sYear
+    batchSize : Optional[int]
+        the number of records written to the mongodb at a time.
+        default=1000
 
     Returns
     -------
@@ -341,6 +344,7 @@ def mapSymAsyMongo(sYear,eYear=None):
     """
     import davitpy.pydarn.sdio.dbUtils as db
     from davitpy import rcParams
+    from davitpy.gme.base.bulkIngest import bulkUpsert
     import datetime as dt
     
     #check inputs
@@ -360,27 +364,13 @@ def mapSymAsyMongo(sYear,eYear=None):
     mongoData.ensure_index('asyh')
     mongoData.ensure_index('asyd')
     
+    stats = None
     for yr in range(sYear,eYear+1):
         #1 day at a time, to not fill up RAM
         templist = readSymAsyWeb(dt.datetime(yr,1,1),dt.datetime(yr,1,1)+dt.timedelta(days=366))
         if(templist == None): continue
-        for rec in templist:
-            #check if a duplicate record exists
-            qry = mongoData.find({'time':rec.time})
-            logging.debug(rec.time)
-            tempRec = rec.toDbDict()
-            cnt = qry.count()
-            #if this is a new record, insert it
-            if(cnt == 0): mongoData.insert(tempRec)
-            #if this is an existing record, update it
-            elif(cnt == 1):
-                logging.debug('found one!!')
-                dbDict = qry.next()
-                temp = dbDict['_id']
-                dbDict = tempRec
-                dbDict['_id'] = temp
-                mongoData.save(dbDict)
-            else:
-                logging.warning('strange, there is more than 1 Sym/Asy record for' + rec.time)
+        #insert new records and replace existing ones, in bulk
+        stats = bulkUpsert(mongoData, templist, ['time'], batchSize=batchSize,
+                           label='symasy', stats=stats)
         del templist
 
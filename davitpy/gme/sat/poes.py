@@ -469,7 +469,7 @@ def readPoesFtp(sTime,eTime=None):
   else: return None
 
 
-def mapPoesMongo(sYear,eYear=None):
+def mapPoesMongo(sYear,eYear=None,batchSize=1000):
   """This function reads poes data from the NOAA NGDC FTP server via anonymous
   FTP connection and maps it to the mongodb.  
 
@@ -479,6 +479,9 @@ def mapPoesMongo(sYear,eYear=None):
     the year to begin mapping data
   eYear : Optional[int or None]
     the end year for mapping data.  if this is None, eYear will be sYear
+  batchSize : Optional[int]
+    the number of records written to the mongodb at a time.
+    default=1000
 
   Returns
   -------
@@ -497,6 +500,7 @@ def mapPoesMongo(sYear,eYear=None):
   """
   import davitpy.pydarn.sdio.dbUtils as db
   from davitpy import rcParams
+  from davitpy.gme.base.bulkIngest import bulkUpsert, ensureKeyIndex
   import datetime as dt
 
   # check inputs
@@ -517,32 +521,19 @@ def mapPoesMongo(sYear,eYear=None):
   mongoData.ensure_index('ted')
   mongoData.ensure_index('echar')
   mongoData.ensure_index('pchar')
+  ensureKeyIndex(mongoData, ['time', 'satnum'])
 
   # read the poes data from the FTP server
+  stats = None
   myTime = dt.datetime(sYear,1,1)
   while(myTime < dt.datetime(eYear+1,1,1)):
     # 10 day at a time, to not fill up RAM
     templist = readPoesFtp(myTime,myTime+dt.timedelta(days=10))
-    if(templist == None): continue
-    for rec in templist:
-      # check if a duplicate record exists
-      qry = mongoData.find({'$and':[{'time':rec.time},{'satnum':rec.satnum}]})
-      print rec.time, rec.satnum
-      tempRec = rec.toDbDict()
-      cnt = qry.count()
-      # if this is a new record, insert it
-      if(cnt == 0): mongoData.insert(tempRec)
-      # if this is an existing record, update it
-      elif(cnt == 1):
-        logging.debug('found one!!')
-        dbDict = qry.next()
-        temp = dbDict['_id']
-        dbDict = tempRec
-        dbDict['_id'] = temp
-        mongoData.save(dbDict)
-      else:
-        logging.info('strange, there is more than 1 record for ' + rec.time)
-    del templist
+    if(templist != None):
+      # insert new records and replace existing ones, in bulk
+      stats = bulkUpsert(mongoData, templist, ['time', 'satnum'],
+                         batchSize=batchSize, label='poes', stats=stats)
+      del templist
     myTime += dt.timedelta(days=10)
 
 
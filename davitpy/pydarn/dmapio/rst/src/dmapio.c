@@ -82,8 +82,8 @@ set_dmap_offset(PyObject *self, PyObject *args)
 static PyObject *
 read_dmap_rec(PyObject *self, PyObject *args)
 {
-  int fd;
-  if(!PyArg_ParseTuple(args, "i", &fd))
+  int fd,fullLtab=0;
+  if(!PyArg_ParseTuple(args, "i|i", &fd, &fullLtab))
     return NULL;
   else
   {
@@ -179,7 +179,8 @@ read_dmap_rec(PyObject *self, PyObject *args)
         if ((strcmp(a->name,"ltab")==0) && (a->type==DATASHORT) && (a->dim==2))
         {
           PyObject *myList = PyList_New(0);
-          for(i=0;i<a->rng[1]-1;i++)
+          /*the last entry ends the table, and is only kept on request*/
+          for(i=0;i<a->rng[1]-(fullLtab ? 0 : 1);i++)
           {
             PyObject *myNum = Py_BuildValue("[i,i]", a->data.sptr[i*2], a->data.sptr[i*2+1]);
             PyList_Append(myList,myNum);
@@ -280,9 +281,191 @@ read_dmap_rec(PyObject *self, PyObject *args)
 }
 
 
+/*
+ * write a dmap record to an open file descriptor.  python usage is
+ * writeDmapRec(fd, scalars, arrays), where scalars is a sequence of
+ * (name, type, value) tuples and arrays is a sequence of
+ * (name, type, rng, values) tuples.  type is one of the DATA* codes in
+ * dmap.h, rng holds the array dimensions in dmap order (fastest varying
+ * first) and values is a flat sequence.  returns the number of bytes
+ * written.
+ */
+static PyObject *
+write_dmap_rec(PyObject *self, PyObject *args)
+{
+  int fd,c,i,n,dim,type,size;
+  char *name;
+  int32 rng[8];
+  PyObject *scalars,*arrays,*scl=NULL,*arr=NULL,*item,*val,*shape,*vals;
+  struct DataMap *ptr;
+  void *data;
+
+  if(!PyArg_ParseTuple(args, "iOO", &fd, &scalars, &arrays))
+    return NULL;
+
+  scl = PySequence_Fast(scalars, "scalars must be a sequence");
+  if(scl == NULL)
+    return NULL;
+  arr = PySequence_Fast(arrays, "arrays must be a sequence");
+  if(arr == NULL)
+  {
+    Py_DECREF(scl);
+    return NULL;
+  }
+
+  ptr = DataMapMake();
+  if(ptr == NULL)
+  {
+    Py_DECREF(scl);
+    Py_DECREF(arr);
+    return PyErr_NoMemory();
+  }
+
+  /*first, store all of the scalars*/
+  for(c=0;c<PySequence_Fast_GET_SIZE(scl);c++)
+  {
+    item = PySequence_Fast_GET_ITEM(scl, c);
+    if(!PyArg_ParseTuple(item, "siO", &name, &type, &val))
+      goto fail;
+    if(type==DATACHAR)
+    {
+      char v = (char)PyInt_AsLong(val);
+      DataMapStoreScalar(ptr,name,type,&v);
+    }
+    else if(type==DATASHORT)
+    {
+      int16 v = (int16)PyInt_AsLong(val);
+      DataMapStoreScalar(ptr,name,type,&v);
+    }
+    else if(type==DATAINT)
+    {
+      int32 v = (int32)PyInt_AsLong(val);
+      DataMapStoreScalar(ptr,name,type,&v);
+    }
+    else if(type==DATAFLOAT)
+    {
+      float v = (float)PyFloat_AsDouble(val);
+      DataMapStoreScalar(ptr,name,type,&v);
+    }
+    else if(type==DATADOUBLE)
+    {
+      double v = PyFloat_AsDouble(val);
+      DataMapStoreScalar(ptr,name,type,&v);
+    }
+    else if(type==DATASTRING)
+    {
+      /*the string is owned by the python object, which outlives ptr*/
+      char *v = PyString_AsString(val);
+      if(v == NULL)
+        goto fail;
+      DataMapStoreScalar(ptr,name,type,&v);
+    }
+    else
+    {
+      PyErr_Format(PyExc_ValueError, "unsupported scalar type %d for %s",
+                   type, name);
+      goto fail;
+    }
+    if(PyErr_Occurred())
+      goto fail;
+  }
+
+  /*now, store the arrays*/
+  for(c=0;c<PySequence_Fast_GET_SIZE(arr);c++)
+  {
+    item = PySequence_Fast_GET_ITEM(arr, c);
+    if(!PyArg_ParseTuple(item, "siOO", &name, &type, &shape, &vals))
+      goto fail;
+
+    shape = PySequence_Fast(shape, "array dimensions must be a sequence");
+    if(shape == NULL)
+      goto fail;
+    dim = PySequence_Fast_GET_SIZE(shape);
+    if(dim < 1 || dim > 8)
+    {
+      Py_DECREF(shape);
+      PyErr_Format(PyExc_ValueError, "bad number of dimensions for %s", name);
+      goto fail;
+    }
+    n = 1;
+    for(i=0;i<dim;i++)
+    {
+      rng[i] = (int32)PyInt_AsLong(PySequence_Fast_GET_ITEM(shape, i));
+      n *= rng[i];
+    }
+    Py_DECREF(shape);
+    if(PyErr_Occurred())
+      goto fail;
+
+    vals = PySequence_Fast(vals, "array values must be a sequence");
+    if(vals == NULL)
+      goto fail;
+    if(PySequence_Fast_GET_SIZE(vals) != n)
+    {
+      Py_DECREF(vals);
+      PyErr_Format(PyExc_ValueError, "size of %s does not match its dimensions",
+                   name);
+      goto fail;
+    }
+    if(type!=DATACHAR && type!=DATASHORT && type!=DATAINT &&
+       type!=DATAFLOAT && type!=DATADOUBLE)
+    {
+      Py_DECREF(vals);
+      PyErr_Format(PyExc_ValueError, "unsupported array type %d for %s",
+                   type, name);
+      goto fail;
+    }
+
+    /*the array buffer is allocated (and later freed) by the datamap*/
+    data = DataMapStoreArray(ptr,name,type,dim,rng,NULL);
+    if(data == NULL)
+    {
+      Py_DECREF(vals);
+      PyErr_NoMemory();
+      goto fail;
+    }
+    for(i=0;i<n;i++)
+    {
+      val = PySequence_Fast_GET_ITEM(vals, i);
+      if(type==DATACHAR)
+        ((char *) data)[i] = (char)PyInt_AsLong(val);
+      else if(type==DATASHORT)
+        ((int16 *) data)[i] = (int16)PyInt_AsLong(val);
+      else if(type==DATAINT)
+        ((int32 *) data)[i] = (int32)PyInt_AsLong(val);
+      else if(type==DATAFLOAT)
+        ((float *) data)[i] = (float)PyFloat_AsDouble(val);
+      else
+        ((double *) data)[i] = PyFloat_AsDouble(val);
+    }
+    Py_DECREF(vals);
+    if(PyErr_Occurred())
+      goto fail;
+  }
+
+  Py_BEGIN_ALLOW_THREADS
+  size = DataMapWrite(fd,ptr);
+  Py_END_ALLOW_THREADS
+
+  DataMapFree(ptr);
+  Py_DECREF(scl);
+  Py_DECREF(arr);
+
+  if(size < 0)
+    return PyErr_SetFromErrno(PyExc_IOError);
+  return PyInt_FromLong(size);
+
+fail:
+  DataMapFree(ptr);
+  Py_DECREF(scl);
+  Py_DECREF(arr);
+  return NULL;
+}
+
 static PyMethodDef dmapioMethods[] = 
 {
-  {"readDmapRec",  read_dmap_rec, METH_VARARGS, "read a dmap record"},
+  {"readDmapRec",  read_dmap_rec, METH_VARARGS, "read a dmap record, keeping the last lag table entry if the second argument is true"},
+  {"writeDmapRec",  write_dmap_rec, METH_VARARGS, "write a dmap record"},
   {"getDmapOffset",  get_dmap_offset, METH_VARARGS, "get current dmap file offset"},
   {"setDmapOffset",  set_dmap_offset, METH_VARARGS, "set dmap file offset"},
 
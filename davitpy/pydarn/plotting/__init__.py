@@ -13,6 +13,7 @@ acfPlot         ACF and XCF data
 fan             fan and field of view data
 iqPlot          IQ voltage data
 mapOverlay      overlay information on maps
+movie           frames of fan and convection movies
 musicPlot       data created with the pydarn.proc.music module
 plotMapGrid     gridded velocities, convection and contour plotting
 printRec        print radar data records to plain text
@@ -59,6 +60,11 @@ try:
 except Exception, e:
     logging.exception(__file__ + ' -> utils.plotMapGrd: ' + str(e))
 
+try:
+    from movie import *
+except Exception, e:
+    logging.exception('problem importing movie: ' + str(e))
+
 try:
     from musicPlot import *
 except Exception, e:
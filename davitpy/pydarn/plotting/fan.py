@@ -21,8 +21,9 @@ Module generating fan plots
 
 Methods
 -----------------------------------------
-plotFan     plot a scan of data
-overlayFan  plot a scan of data on a map
+plotFan       plot a scan of data
+overlayFan    plot a scan of data on a map
+fovMapCoords  project the cells of a fov onto a map
 -----------------------------------------
 
 """
@@ -192,12 +193,7 @@ def plotFan(sTime, rad, interval=60, fileType='fitex', param='velocity',
         assert(tbands[i][1] > tbands[i][0]), 'error, frequency upper bound must \
             be > lower bound'
 
-    if(scale == []):
-        if(param == 'velocity'): scale = [-200, 200]
-        elif(param == 'power'): scale = [0, 30]
-        elif(param == 'width'): scale = [0, 150]
-        elif(param == 'elevation'): scale = [0, 50]
-        elif(param == 'phi0'): scale = [-numpy.pi, numpy.pi]
+    if(scale == []): scale = fanScales[param]
 
     fbase = sTime.strftime("%Y%m%d")
 
@@ -266,38 +262,9 @@ def plotFan(sTime, rad, interval=60, fileType='fitex', param='velocity',
         latC.append(myFov.latFull[b][k])
         lonC.append(myFov.lonFull[b][k])
 
-    # Now that we have 3 points from the FOVs of the radars, calculate the
-    # lat,lon pair to center the map on. We can simply do this by converting
-    # from Spherical coords to Cartesian, taking the mean of each coordinate
-    # and then converting back to get lat_0 and lon_0
-    lonC, latC = (numpy.array(lonC) + 360.) % 360.0, numpy.array(latC)
-    xs = numpy.cos(numpy.deg2rad(latC)) * numpy.cos(numpy.deg2rad(lonC))
-    ys = numpy.cos(numpy.deg2rad(latC)) * numpy.sin(numpy.deg2rad(lonC))
-    zs = numpy.sin(numpy.deg2rad(latC))
-    xc = numpy.mean(xs)
-    yc = numpy.mean(ys)
-    zc = numpy.mean(zs)
-    lon_0 = numpy.rad2deg(numpy.arctan2(yc, xc))
-    lat_0 = numpy.rad2deg(numpy.arctan2(zc, numpy.sqrt(xc * xc + yc * yc)))
-
-    # Now do some stuff in map projection coords to get necessary width and
-    # height of map and also figure out the corners of the map
+    lat_0, lon_0, llcrnrlon, llcrnrlat, urcrnrlon, urcrnrlat, width = \
+        _fanMapBounds(lonFull, latFull, lonC, latC, coords, sTime)
     t1 = dt.datetime.now()
-    lonFull, latFull = (numpy.array(lonFull) + 360.) % 360.0, \
-        numpy.array(latFull)
-
-    tmpmap = utils.mapObj(coords=coords, projection='stere', width=10.0**3,
-                          height=10.0**3, lat_0=lat_0, lon_0=lon_0,
-                          datetime=sTime)
-    x, y = tmpmap(lonFull, latFull)
-    minx = x.min() * 1.05     # since we don't want the map to cut off labels
-    miny = y.min() * 1.05     # or FOVs of the radars we should alter the
-    maxx = x.max() * 1.05     # extrema a bit.
-    maxy = y.max() * 1.05
-    width = (maxx - minx)
-    height = (maxy - miny)
-    llcrnrlon, llcrnrlat = tmpmap(minx, miny, inverse=True)
-    urcrnrlon, urcrnrlat = tmpmap(maxx, maxy, inverse=True)
 
     dist = width / 50.
     cTime = sTime
@@ -327,34 +294,7 @@ def plotFan(sTime, rad, interval=60, fileType='fitex', param='velocity',
     logging.debug(dt.datetime.now() - t1)
     # manually draw the legend
     if((not fill) and legend):
-        # draw the box
-        y = [myMap.urcrnry * .82, myMap.urcrnry * .99]
-        x = [myMap.urcrnrx * .86, myMap.urcrnrx * .99]
-        verts = [x[0], y[0]], [x[0], y[1]], [x[1], y[1]], [x[1], y[0]]
-        poly = patches.Polygon(verts, fc='w', ec='k', zorder=11)
-        myFig.gca().add_patch(poly)
-        labs = ['5 dB', '15 dB', '25 dB', '35 dB', 'gs', '1000 m/s']
-        pts = [5, 15, 25, 35]
-        # plot the icons and labels
-        for w in range(6):
-            myFig.gca().text(x[0] + .35 * (x[1] - x[0]), y[1] * (.98 - w *
-                             .025), labs[w], zorder=15, color='k', size=8,
-                             va='center')
-            xctr = x[0] + .175 * (x[1] - x[0])
-            if(w < 4):
-                myFig.gca().scatter(xctr, y[1] * (.98 - w * .025), s=.1 * pts[w],
-                              zorder=15, marker='o', linewidths=.5,
-                              edgecolor='face', facecolor='k')
-            elif(w == 4):
-                myFig.gca().scatter(xctr, y[1] * (.98 - w * .025), s=.1 * 35.,
-                              zorder=15, marker='o', linewidths=.5,
-                              edgecolor='k', facecolor='w')
-            elif(w == 5):
-                y = LineCollection(numpy.array([((xctr - dist / 2., y[1] *
-                                   (.98 - w * .025)), (xctr + dist / 2., y[1] *
-                                                       (.98 - w * .025)))]),
-                                   linewidths=.5, zorder=15, color='k')
-                myFig.gca().add_collection(y)
+        _fanLegend(myFig, myMap, dist)
 
     bbox = myFig.gca().get_axes().get_position()
     # now, loop through desired time interval
@@ -389,54 +329,11 @@ def plotFan(sTime, rad, interval=60, fileType='fitex', param='velocity',
     # if no data has been found pcoll will not have been set, and the following
     # code will object
     if pcoll:
-        cbar = myFig.colorbar(pcoll, orientation='vertical', shrink=.65,
-                              fraction=.1, drawedges=True)
-
-        l = []
-        # define the colorbar labels
-        for i in range(0, len(bounds)):
-            if(param == 'phi0'):
-                ln = 4
-                if(bounds[i] == 0): ln = 3
-                elif(bounds[i] < 0): ln = 5
-                l.append(str(bounds[i])[:ln])
-                continue
-            if((i == 0 and param == 'velocity') or i == len(bounds) - 1):
-                l.append(' ')
-                continue
-            l.append(str(int(bounds[i])))
-        cbar.ax.set_yticklabels(l)
-        cbar.ax.tick_params(axis='y', direction='out')
-        # set colorbar ticklabel size
-        for ti in cbar.ax.get_yticklabels():
-            ti.set_fontsize(12)
-        if(param == 'velocity'):
-            cbar.set_label('Velocity [m/s]', size=14)
-            cbar.extend = 'max'
-
-        if(param == 'grid'): cbar.set_label('Velocity [m/s]', size=14)
-        if(param == 'power'): cbar.set_label('Power [dB]', size=14)
-        if(param == 'width'): cbar.set_label('Spec Wid [m/s]', size=14)
-        if(param == 'elevation'): cbar.set_label('Elev [deg]', size=14)
-        if(param == 'phi0'): cbar.set_label('Phi0 [rad]', size=14)
+        _fanColorbar(myFig, pcoll, param, bounds)
 
     # myFig.gca().set_rasterized(True)
     # label the plot
-    tx1 = myFig.text((bbox.x0 + bbox.x1) / 2.,
-                     bbox.y1 + .02, cTime.strftime('%Y/%m/%d'), ha='center',
-                     size=14, weight=550)
-    tx2 = myFig.text(bbox.x1 + .02, bbox.y1 + .02, cTime.strftime('%H:%M - ') +
-                     bndTime.strftime('%H:%M      '), ha='right', size=13,
-                     weight=550)
-    tx3 = myFig.text(bbox.x0, bbox.y1 + .02, '[' + ft + ']', ha='left',
-                     size=13, weight=550)
-    # label with frequency bands
-    tx4 = myFig.text(bbox.x1 + .02, bbox.y1, 'Frequency filters:', ha='right',
-                     size=8, weight=550)
-    for i in range(len(rad)):
-        myFig.text(bbox.x1 + .02, bbox.y1 - ((i + 1) * .015), rad[i] + ': ' +
-                   str(tbands[i][0] / 1e3) + ' - ' + str(tbands[i][1] / 1e3) +
-                   ' MHz', ha='right', size=8, weight=550)
+    _fanLabels(myFig, bbox, cTime, bndTime, ft, rad, tbands)
 
     if(overlayPoes):
         pcols = gme.sat.poes.overlayPoesTed(myMap, myFig.gca(), cTime,
@@ -473,9 +370,230 @@ def plotFan(sTime, rad, interval=60, fileType='fitex', param='velocity',
         myFig.show()
 
 
+def _fanLegend(myFig, myMap, dist):
+    """Draw the legend of the point (fill=False) fan plot"""
+    # draw the box
+    y = [myMap.urcrnry * .82, myMap.urcrnry * .99]
+    x = [myMap.urcrnrx * .86, myMap.urcrnrx * .99]
+    verts = [x[0], y[0]], [x[0], y[1]], [x[1], y[1]], [x[1], y[0]]
+    poly = patches.Polygon(verts, fc='w', ec='k', zorder=11)
+    myFig.gca().add_patch(poly)
+    labs = ['5 dB', '15 dB', '25 dB', '35 dB', 'gs', '1000 m/s']
+    pts = [5, 15, 25, 35]
+    # plot the icons and labels
+    for w in range(6):
+        myFig.gca().text(x[0] + .35 * (x[1] - x[0]), y[1] * (.98 - w *
+                         .025), labs[w], zorder=15, color='k', size=8,
+                         va='center')
+        xctr = x[0] + .175 * (x[1] - x[0])
+        if(w < 4):
+            myFig.gca().scatter(xctr, y[1] * (.98 - w * .025), s=.1 * pts[w],
+                          zorder=15, marker='o', linewidths=.5,
+                          edgecolor='face', facecolor='k')
+        elif(w == 4):
+            myFig.gca().scatter(xctr, y[1] * (.98 - w * .025), s=.1 * 35.,
+                          zorder=15, marker='o', linewidths=.5,
+                          edgecolor='k', facecolor='w')
+        elif(w == 5):
+            y = LineCollection(numpy.array([((xctr - dist / 2., y[1] *
+                               (.98 - w * .025)), (xctr + dist / 2., y[1] *
+                                                   (.98 - w * .025)))]),
+                               linewidths=.5, zorder=15, color='k')
+            myFig.gca().add_collection(y)
+
+
+def _fanLabels(myFig, bbox, cTime, bndTime, ft, rad, tbands):
+    """Write the date, time range, file type and frequency filters above the
+    map.  Returns the date, time range and file type text objects."""
+    tx1 = myFig.text((bbox.x0 + bbox.x1) / 2.,
+                     bbox.y1 + .02, cTime.strftime('%Y/%m/%d'), ha='center',
+                     size=14, weight=550)
+    tx2 = myFig.text(bbox.x1 + .02, bbox.y1 + .02, cTime.strftime('%H:%M - ') +
+                     bndTime.strftime('%H:%M      '), ha='right', size=13,
+                     weight=550)
+    tx3 = myFig.text(bbox.x0, bbox.y1 + .02, '[' + ft + ']', ha='left',
+                     size=13, weight=550)
+    # label with frequency bands
+    myFig.text(bbox.x1 + .02, bbox.y1, 'Frequency filters:', ha='right',
+               size=8, weight=550)
+    for i in range(len(rad)):
+        myFig.text(bbox.x1 + .02, bbox.y1 - ((i + 1) * .015), rad[i] + ': ' +
+                   str(tbands[i][0] / 1e3) + ' - ' + str(tbands[i][1] / 1e3) +
+                   ' MHz', ha='right', size=8, weight=550)
+    return tx1, tx2, tx3
+
+
+def _fanColorbar(myFig, mappable, param, bounds):
+    """Add the labelled colorbar of a fan plot of param to myFig"""
+    cbar = myFig.colorbar(mappable, orientation='vertical', shrink=.65,
+                          fraction=.1, drawedges=True)
+
+    l = []
+    # define the colorbar labels
+    for i in range(0, len(bounds)):
+        if(param == 'phi0'):
+            ln = 4
+            if(bounds[i] == 0): ln = 3
+            elif(bounds[i] < 0): ln = 5
+            l.append(str(bounds[i])[:ln])
+            continue
+        if((i == 0 and param == 'velocity') or i == len(bounds) - 1):
+            l.append(' ')
+            continue
+        l.append(str(int(bounds[i])))
+    cbar.ax.set_yticklabels(l)
+    cbar.ax.tick_params(axis='y', direction='out')
+    # set colorbar ticklabel size
+    for ti in cbar.ax.get_yticklabels():
+        ti.set_fontsize(12)
+    if(param == 'velocity'):
+        cbar.set_label('Velocity [m/s]', size=14)
+        cbar.extend = 'max'
+
+    if(param == 'grid'): cbar.set_label('Velocity [m/s]', size=14)
+    if(param == 'power'): cbar.set_label('Power [dB]', size=14)
+    if(param == 'width'): cbar.set_label('Spec Wid [m/s]', size=14)
+    if(param == 'elevation'): cbar.set_label('Elev [deg]', size=14)
+    if(param == 'phi0'): cbar.set_label('Phi0 [rad]', size=14)
+    return cbar
+
+
+def _fanMapBounds(lonFull, latFull, lonC, latC, coords, dateTime):
+    """Work out the centre and corners of a stereographic map holding the
+    given fov points.  lonC, latC are the sites and the far corners of their
+    fovs, used for the centre; lonFull, latFull are all of the points that
+    must fit on the map.  Returns lat_0, lon_0, llcrnrlon, llcrnrlat,
+    urcrnrlon, urcrnrlat and the map width."""
+    # Now that we have 3 points from the FOVs of the radars, calculate the
+    # lat,lon pair to center the map on. We can simply do this by converting
+    # from Spherical coords to Cartesian, taking the mean of each coordinate
+    # and then converting back to get lat_0 and lon_0
+    lonC, latC = (numpy.array(lonC) + 360.) % 360.0, numpy.array(latC)
+    xs = numpy.cos(numpy.deg2rad(latC)) * numpy.cos(numpy.deg2rad(lonC))
+    ys = numpy.cos(numpy.deg2rad(latC)) * numpy.sin(numpy.deg2rad(lonC))
+    zs = numpy.sin(numpy.deg2rad(latC))
+    xc = numpy.mean(xs)
+    yc = numpy.mean(ys)
+    zc = numpy.mean(zs)
+    lon_0 = numpy.rad2deg(numpy.arctan2(yc, xc))
+    lat_0 = numpy.rad2deg(numpy.arctan2(zc, numpy.sqrt(xc * xc + yc * yc)))
+
+    # Now do some stuff in map projection coords to get necessary width and
+    # height of map and also figure out the corners of the map
+    lonFull, latFull = (numpy.array(lonFull) + 360.) % 360.0, \
+        numpy.array(latFull)
+
+    tmpmap = utils.mapObj(coords=coords, projection='stere', width=10.0**3,
+                          height=10.0**3, lat_0=lat_0, lon_0=lon_0,
+                          datetime=dateTime)
+    x, y = tmpmap(lonFull, latFull)
+    minx = x.min() * 1.05     # since we don't want the map to cut off labels
+    miny = y.min() * 1.05     # or FOVs of the radars we should alter the
+    maxx = x.max() * 1.05     # extrema a bit.
+    maxy = y.max() * 1.05
+    width = (maxx - minx)
+    llcrnrlon, llcrnrlat = tmpmap(minx, miny, inverse=True)
+    urcrnrlon, urcrnrlat = tmpmap(maxx, maxy, inverse=True)
+    return lat_0, lon_0, llcrnrlon, llcrnrlat, urcrnrlon, urcrnrlat, width
+
+
+# The default color scale of each param
+fanScales = {'velocity': [-200, 200], 'power': [0, 30], 'width': [0, 150],
+             'elevation': [0, 50], 'phi0': [-numpy.pi, numpy.pi]}
+
+# The fit attribute plotted for each param, and whether it needs xcf data
+fanParams = {'velocity': ('v', False), 'power': ('p_l', False),
+             'width': ('w_l', False), 'elevation': ('elv', True),
+             'phi0': ('phi0', True)}
+
+
+def fovMapCoords(fov, myMap):
+    """Project the cell corners and centres of a radar field of view onto a
+    map, all at once.  The result can be passed to overlayFan again and again
+    (e.g. for the frames of a movie) as long as the map and fov stay the
+    same.
+
+    Parameters
+    ----------
+    fov : pydarn.radar.radFov.fov
+        A radar fov object, in the coordinates of the map
+    myMap : utils.plotUtils.mapObj
+        The map we are plotting on
+
+    Returns
+    -------
+    fovXY : dict
+        'xFull', 'yFull' (beam, gate corner) and 'xCenter', 'yCenter' (beam,
+        gate centre) arrays in map projection coordinates
+
+    Example
+    -------
+        fovXY = fovMapCoords(myFov, myMap)
+        overlayFan(myScan, myMap, myFig, 'velocity', fov=myFov, fovXY=fovXY)
+
+    """
+    lonFull = numpy.asarray(fov.lonFull, dtype=float)
+    latFull = numpy.asarray(fov.latFull, dtype=float)
+    lonCenter = numpy.asarray(fov.lonCenter, dtype=float)
+    latCenter = numpy.asarray(fov.latCenter, dtype=float)
+
+    # one projection call for the corners and centres together
+    x, y = myMap(numpy.concatenate([lonFull.ravel(), lonCenter.ravel()]),
+                 numpy.concatenate([latFull.ravel(), latCenter.ravel()]))
+    x, y = numpy.asarray(x), numpy.asarray(y)
+    nfull = lonFull.size
+    return {'xFull': x[:nfull].reshape(lonFull.shape),
+            'yFull': y[:nfull].reshape(lonFull.shape),
+            'xCenter': x[nfull:].reshape(lonCenter.shape),
+            'yCenter': y[nfull:].reshape(lonCenter.shape)}
+
+
+def _scanCells(myData, param, gates, nbeams):
+    """Gather the range cells with scatter of a list of beams into flat
+    arrays of beam number, gate, the plotted param, power, velocity and gs
+    flag.
+    Cells outside of the fov, or without the param (e.g. elevation of a beam
+    without xcf data), are left out."""
+    attr, needXcf = fanParams.get(param, (None, False))
+    nbeam = numpy.array([len(b.fit.slist) if b.fit.slist is not None else 0
+                         for b in myData], dtype=int)
+    keepBeam = numpy.array([attr is not None and
+                            (not needXcf or bool(b.prm.xcf))
+                            for b in myData], dtype=bool)
+    if nbeam.sum() == 0:
+        empty = numpy.zeros(0)
+        return (empty.astype(int), empty.astype(int), empty, empty, empty,
+                empty.astype(int))
+
+    def gather(name, fill):
+        vals = []
+        for b, n in zip(myData, nbeam):
+            v = getattr(b.fit, name, None)
+            if n == 0:
+                continue
+            if v is None or len(v) != n:
+                vals.append(numpy.zeros(n) + fill)
+            else:
+                vals.append(numpy.asarray(v, dtype=float))
+        return numpy.concatenate(vals)
+
+    bmnum = numpy.repeat([b.bmnum for b in myData], nbeam)
+    slist = gather('slist', -1).astype(int)
+    value = gather(attr, numpy.nan) if attr is not None \
+        else numpy.zeros(len(slist)) + numpy.nan
+    power = gather('p_l', 0.)
+    vel = gather('v', numpy.nan)
+    gflg = gather('gflg', 0).astype(int)
+
+    good = numpy.in1d(slist, gates) & (bmnum >= 0) & (bmnum < nbeams) & \
+        numpy.repeat(keepBeam, nbeam)
+    return (bmnum[good], slist[good], value[good], power[good], vel[good],
+            gflg[good])
+
+
 def overlayFan(myData, myMap, myFig, param, coords='geo', gsct=0, site=None,
                fov=None, gs_flg=[], fill=True, velscl=1000., dist=1000.,
-               cmap=None, norm=None, alpha=1):
+               cmap=None, norm=None, alpha=1, fovXY=None):
 
     """A function of overlay radar scan data on a map
 
@@ -516,6 +634,9 @@ def overlayFan(myData, myMap, myFig, param, coords='geo', gsct=0, site=None,
     dist : Optional [float]
         The length in map projection coords of a velscl length velocity vector.
         default = 1000. km
+    fovXY : Optional[dict]
+        The fov projected onto myMap, as returned by fovMapCoords.  Default:
+        None, project the fov here
 
     Returns
     -------
@@ -531,6 +652,12 @@ def overlayFan(myData, myMap, myFig, param, coords='geo', gsct=0, site=None,
         overlayFan(aBeam,myMap,param,coords,gsct=gsct,site=sites[i],fov=fovs[i],
                    verts=verts,intensities=intensities,gs_flg=gs_flg)
 
+    Notes
+    -----
+    The cells of all of the beams are gathered from the projected fov corners
+    at once, rather than projected one at a time.  Cells of elevation or phi0
+    in beams without xcf data are not plotted.
+
     """
     from davitpy import pydarn
 
@@ -543,133 +670,80 @@ def overlayFan(myData, myMap, myFig, param, coords='geo', gsct=0, site=None,
                                       ngates=myData[0].prm.nrang + 1,
                                       nbeams=site.maxbeam, coords=coords,
                                       date_time=myData[0].time)
+    if(fovXY is None):
+        fovXY = fovMapCoords(fov, myMap)
 
-    gs_flg, lines = [], []
-    if fill: verts, intensities = [], []
-    else: verts, intensities = [[], []], [[], []]
-
-    # loop through gates with scatter
-    for myBeam in myData:
-        for k in range(0, len(myBeam.fit.slist)):
-            if myBeam.fit.slist[k] not in fov.gates: continue
-            r = myBeam.fit.slist[k]
-
-            if fill:
-                x1, y1 = myMap(fov.lonFull[myBeam.bmnum, r],
-                               fov.latFull[myBeam.bmnum, r])
-                x2, y2 = myMap(fov.lonFull[myBeam.bmnum, r + 1],
-                               fov.latFull[myBeam.bmnum, r + 1])
-                x3, y3 = myMap(fov.lonFull[myBeam.bmnum + 1, r + 1],
-                               fov.latFull[myBeam.bmnum + 1, r + 1])
-                x4, y4 = myMap(fov.lonFull[myBeam.bmnum + 1, r],
-                               fov.latFull[myBeam.bmnum + 1, r])
-
-                # save the polygon vertices
-                verts.append(((x1, y1), (x2, y2), (x3, y3), (x4, y4),
-                              (x1, y1)))
-
-                # save the param to use as a color scale
-                if(param == 'velocity'):
-                    intensities.append(myBeam.fit.v[k])
-                elif(param == 'power'):
-                    intensities.append(myBeam.fit.p_l[k])
-                elif(param == 'width'):
-                    intensities.append(myBeam.fit.w_l[k])
-                elif(param == 'elevation' and myBeam.prm.xcf):
-                    intensities.append(myBeam.fit.elv[k])
-                elif(param == 'phi0' and myBeam.prm.xcf):
-                    intensities.append(myBeam.fit.phi0[k])
-
-            else:
-                x1, y1 = myMap(fov.lonCenter[myBeam.bmnum, r],
-                               fov.latCenter[myBeam.bmnum, r])
-                verts[0].append(x1)
-                verts[1].append(y1)
-
-                x2, y2 = myMap(fov.lonCenter[myBeam.bmnum, r + 1],
-                               fov.latCenter[myBeam.bmnum, r + 1])
-
-                theta = math.atan2(y2 - y1, x2 - x1)
-
-                x2, y2 = x1 + myBeam.fit.v[k] / velscl * (-1.0) * \
-                    math.cos(theta) * dist, y1 + myBeam.fit.v[k] / velscl * \
-                    (-1.0) * math.sin(theta) * dist
-
-                lines.append(((x1, y1), (x2, y2)))
-                # save the param to use as a color scale
-                if(param == 'velocity'):
-                    intensities[0].append(myBeam.fit.v[k])
-                elif(param == 'power'):
-                    intensities[0].append(myBeam.fit.p_l[k])
-                elif(param == 'width'):
-                    intensities[0].append(myBeam.fit.w_l[k])
-                elif(param == 'elevation' and myBeam.prm.xcf):
-                    intensities[0].append(myBeam.fit.elv[k])
-                elif(param == 'phi0' and myBeam.prm.xcf):
-                    intensities[0].append(myBeam.fit.phi0[k])
-
-                if(myBeam.fit.p_l[k] > 0):
-                    intensities[1].append(myBeam.fit.p_l[k])
-                else:
-                    intensities[1].append(0.)
-            if(gsct):
-                gs_flg.append(myBeam.fit.gflg[k])
+    # the range cells with scatter of all of the beams
+    b, r, value, power, v, gs_flg = _scanCells(myData, param, fov.gates,
+                                               len(fov.beams))
 
     # do the actual overlay
     if(fill):
         # if we have data
-        if(verts != []):
+        if(len(b) > 0):
+            xf, yf = fovXY['xFull'], fovXY['yFull']
+            # the polygon vertices of each cell, (ncell, 5, 2)
+            verts = numpy.dstack(
+                (numpy.array([xf[b, r], xf[b, r + 1], xf[b + 1, r + 1],
+                              xf[b + 1, r], xf[b, r]]).T,
+                 numpy.array([yf[b, r], yf[b, r + 1], yf[b + 1, r + 1],
+                              yf[b + 1, r], yf[b, r]]).T))
+            intensities = value.tolist()
             if(gsct == 0):
                 inx = numpy.arange(len(verts))
             else:
-                inx = numpy.where(numpy.array(gs_flg) == 0)
-                x = PolyCollection(numpy.array(verts)[numpy.where(
-                                   numpy.array(gs_flg) == 1)], facecolors='.3',
-                                   linewidths=0, zorder=5, alpha=alpha)
+                inx = numpy.where(gs_flg == 0)
+                x = PolyCollection(verts[numpy.where(gs_flg == 1)],
+                                   facecolors='.3', linewidths=0, zorder=5,
+                                   alpha=alpha)
                 myFig.gca().add_collection(x, autolim=True)
 
-            pcoll = PolyCollection(numpy.array(verts)[inx],
+            pcoll = PolyCollection(verts[inx],
                                    edgecolors='face', linewidths=0,
                                    closed=False, zorder=4, alpha=alpha,
                                    cmap=cmap, norm=norm)
             # set color array to intensities
-            pcoll.set_array(numpy.array(intensities)[inx])
+            pcoll.set_array(value[inx])
             myFig.gca().add_collection(pcoll, autolim=True)
             return intensities, pcoll
     else:
         # if we have data
-        if(verts != [[], []]):
+        if(len(b) > 0):
+            xc, yc = fovXY['xCenter'], fovXY['yCenter']
+            x1, y1 = xc[b, r], yc[b, r]
+            theta = numpy.arctan2(yc[b, r + 1] - y1, xc[b, r + 1] - x1)
+            x2 = x1 + v / velscl * (-1.0) * numpy.cos(theta) * dist
+            y2 = y1 + v / velscl * (-1.0) * numpy.sin(theta) * dist
+            lines = numpy.dstack((numpy.array([x1, x2]).T,
+                                  numpy.array([y1, y2]).T))
+            power = numpy.where(power > 0, power, 0.)
+            intensities = [value.tolist(), power.tolist()]
+
             if(gsct == 0):
-                inx = numpy.arange(len(verts[0]))
+                inx = numpy.arange(len(x1))
             else:
-                inx = numpy.where(numpy.array(gs_flg) == 0)
+                inx = numpy.where(gs_flg == 0)
+                gs = numpy.where(gs_flg == 1)
                 # plot the ground scatter as open circles
-                x = myFig.scatter(numpy.array(verts[0])[numpy.where(
-                                  numpy.array(gs_flg) == 1)],
-                                  numpy.array(verts[1])[numpy.where(
-                                      numpy.array(gs_flg) == 1)],
-                                  s=.1 * numpy.array(intensities[1])[
-                                  numpy.where(numpy.array(gs_flg) == 1)],
+                x = myFig.scatter(x1[gs], y1[gs], s=.1 * power[gs],
                                   zorder=5, marker='o', linewidths=.5,
                                   facecolors='w', edgecolors='k')
                 myFig.gca().add_collection(x, autolim=True)
 
             # plot the i-s as filled circles
-            ccoll = myFig.gca().scatter(numpy.array(verts[0])[inx],
-                                        numpy.array(verts[1])[inx],
-                                        s=.1 * numpy.array(
-                                        intensities[1])[inx], zorder=10,
+            ccoll = myFig.gca().scatter(x1[inx], y1[inx],
+                                        s=.1 * power[inx], zorder=10,
                                         marker='o', linewidths=.5,
                                         edgecolors='face', cmap=cmap,
                                         norm=norm)
 
             # set color array to intensities
-            ccoll.set_array(numpy.array(intensities[0])[inx])
+            ccoll.set_array(value[inx])
             myFig.gca().add_collection(ccoll)
             # plot the velocity vectors
-            lcoll = LineCollection(numpy.array(lines)[inx], linewidths=.5,
+            lcoll = LineCollection(lines[inx], linewidths=.5,
                                    zorder=12, cmap=cmap, norm=norm)
-            lcoll.set_array(numpy.array(intensities[0])[inx])
+            lcoll.set_array(value[inx])
             myFig.gca().add_collection(lcoll)
 
             return intensities, lcoll
@@ -0,0 +1,863 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2012  VT SuperDARN Lab
+# Full license can be found in LICENSE.txt
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""The movie module
+
+Render the frames of fan and convection movies as a sequence of png files.
+The map, coastlines, fields of view and colorbar are drawn once, and only
+the data are redrawn for each frame.
+
+Classes
+-----------------------------------------
+fanMovie         frames of fan plots
+convMovie        frames of convection maps
+-----------------------------------------
+
+Functions
+-----------------------------------------
+fanMovieBounds   the map bounds of a fan movie
+renderFanMovie   render fan frames in parallel processes
+renderConvMovie  render convection frames in parallel processes
+-----------------------------------------
+
+"""
+import logging
+
+
+class _movieFrames(object):
+    """The frame loop shared by fanMovie and convMovie.  The subclasses set
+    fig, sTime, eTime, step, outDir, name and dpi, and define drawFrame."""
+
+    def frameTimes(self):
+        """The start times of the frames, every step seconds from sTime up to
+        (not including) eTime."""
+        import datetime as dt
+
+        times = []
+        fTime = self.sTime
+        while fTime < self.eTime:
+            times.append(fTime)
+            fTime += dt.timedelta(seconds=self.step)
+        return times
+
+    def _artists(self):
+        """Everything drawn on the figure, so that what a frame adds can be
+        taken off again"""
+        artists = list(self.fig.texts)
+        for ax in self.fig.axes:
+            artists.extend(ax.collections)
+            artists.extend(ax.lines)
+            artists.extend(ax.texts)
+            artists.extend(ax.patches)
+            artists.extend(ax.artists)
+        return artists
+
+    def _clearFrame(self, axes, artists):
+        """Remove the axes and artists added since the ones given"""
+        for ax in self.fig.axes:
+            if ax not in axes:
+                self.fig.delaxes(ax)
+        old = set([id(a) for a in artists])
+        for a in self._artists():
+            if id(a) not in old:
+                a.remove()
+
+    def render(self, times=None, startIndex=0):
+        """Draw and save the frames.
+
+        Parameters
+        ----------
+        times : Optional[list]
+            the frame start times.  Default is None, all of frameTimes()
+        startIndex : Optional[int]
+            the number of the first frame, used in the file names.
+            Default is 0
+
+        Returns
+        -------
+        stats : dict
+            'frames' (the number of frames), 'files' (the png file names),
+            'seconds' spent and 'fps' (frames per second)
+
+        """
+        import os
+        import time
+
+        if times is None:
+            times = self.frameTimes()
+        if not os.path.isdir(self.outDir):
+            os.makedirs(self.outDir)
+
+        t0 = time.time()
+        files = []
+        for i, fTime in enumerate(times):
+            axes = list(self.fig.axes)
+            artists = self._artists()
+            self.drawFrame(fTime)
+            fname = os.path.join(self.outDir, '{:s}.{:05d}.png'.format(
+                self.name, startIndex + i))
+            self.fig.savefig(fname, dpi=self.dpi)
+            self._clearFrame(axes, artists)
+            files.append(fname)
+        seconds = time.time() - t0
+
+        stats = {'frames': len(files), 'files': files, 'seconds': seconds,
+                 'fps': len(files) / max(seconds, 1.e-6)}
+        logging.info('{:s}: {:d} frames in {:.1f} s, {:.2f} frames/s'.format(
+            self.name, stats['frames'], seconds, stats['fps']))
+        return stats
+
+    def close(self):
+        """Close the figure and the data pointers"""
+        import matplotlib.pyplot as plot
+
+        for ptr in self._ptrs:
+            if ptr is not None:
+                ptr.close()
+        plot.close(self.fig)
+
+
+class fanMovie(_movieFrames):
+    """Draw fan plot frames of one or more radars, every step seconds.
+
+    The map, coastlines, radar fields of view, colorbar and legend are drawn
+    once when the object is made.  Each frame then only adds the data
+    collections (and the time label) and takes them off again once it has
+    been saved.  The data are read in one pass through the files.
+
+    Parameters
+    ----------
+    sTime : datetime
+        the start time of the first frame
+    eTime : datetime
+        the end of the movie; frames start before eTime
+    rad : list
+        3 letter radar codes, e.g. ['bks','fhe','fhw']
+    step : Optional[int]
+        the time between frames, in seconds.  default = 120
+    interval : Optional[int]
+        the time period shown in each frame, in seconds.  default = None,
+        the same as step
+    fileType : Optional[str]
+        the file type to plot, 'fitex', 'fitacf' or 'lmfit'.
+        default = 'fitex'
+    param : Optional[str]
+        the parameter to plot, 'velocity', 'power', 'width', 'elevation' or
+        'phi0'.  default = 'velocity'
+    filtered : Optional[boolean]
+        plot boxcar filtered data.  default = False
+    scale : Optional[list]
+        the min and max of the color scale.  default = [], the plotFan
+        default for param
+    channel : Optional[char]
+        the channel to plot.  default = None
+    coords : Optional[str]
+        the coordinate system, 'geo' or 'mag'.  The map moves with time in
+        'mlt', so it can not be drawn just once.  default = 'geo'
+    colors : Optional[str]
+        the color map, 'lasse' or 'aj'.  default = 'lasse'
+    gsct : Optional[boolean]
+        plot ground scatter as gray.  default = False
+    fov : Optional[boolean]
+        overplot the radar fields of view.  default = True
+    lowGray : Optional[boolean]
+        plot low velocities in gray.  default = False
+    fill : Optional[boolean]
+        plot filled (True) or point (False) range cells.  default = True
+    velscl : Optional[float]
+        the velocity of a standard length vector, if fill=False.
+        default = 1000.
+    legend : Optional[boolean]
+        draw the legend, if fill=False.  default = True
+    tFreqBands : Optional[list]
+        frequency bands in kHz, one [low, high] for each radar, as in
+        plotFan.  default = [], [8000, 20000] for every radar
+    outDir : Optional[str]
+        the directory the png files are written to.  default = '.'
+    name : Optional[str]
+        the start of the png file names, which are name.NNNNN.png.
+        default = None, sTime as YYYYMMDD.HHMM followed by '.fan'
+    figsize : Optional[tuple]
+        the figure size in inches.  default = (12, 8)
+    dpi : Optional[int]
+        dots per inch of the png files.  default = 100
+    src : Optional[str]
+        where to look for the data files, 'local' or 'sftp'.  default = None
+    mapTime : Optional[datetime]
+        the time used to look up the radar sites and to draw the map.
+        default = None, sTime
+    mapBounds : Optional[tuple]
+        the map bounds, as returned by :func:`fanMovieBounds`.  default =
+        None, work them out from the fields of view of all of the radars
+        in rad at mapTime
+
+    Attributes
+    ----------
+    fig : matplotlib.figure.Figure
+        the figure the frames are drawn on
+    myMap : utils.plotUtils.mapObj
+        the map
+    cmap, norm, bounds :
+        the color map, as made by utils.plotUtils.genCmap
+
+    Methods
+    -------
+    frameTimes
+        the start times of the frames
+    drawFrame
+        draw the data of one frame
+    render
+        draw and save the frames, reporting the frames per second
+    close
+        close the figure and the data files
+
+    Example
+    -------
+        import datetime as dt
+        movie = pydarn.plotting.fanMovie(dt.datetime(2013,3,16),
+                                         dt.datetime(2013,3,17),
+                                         ['fhe','fhw'], outDir='frames')
+        stats = movie.render()
+        movie.close()
+
+    """
+
+    def __init__(self, sTime, eTime, rad, step=120, interval=None,
+                 fileType='fitex', param='velocity', filtered=False, scale=[],
+                 channel=None, coords='geo', colors='lasse', gsct=False,
+                 fov=True, lowGray=False, fill=True, velscl=1000.,
+                 legend=True, tFreqBands=[], outDir='.', name=None,
+                 figsize=(12, 8), dpi=100, src=None, mapTime=None,
+                 mapBounds=None):
+        import datetime as dt
+        import matplotlib.pyplot as plot
+        import matplotlib.cm as cm
+        from davitpy import pydarn
+        from davitpy import utils
+        from davitpy.pydarn.sdio.radDataRead import radDataOpen
+        from davitpy.pydarn.plotting import fan
+
+        # check the inputs
+        assert(isinstance(sTime, dt.datetime) and
+               isinstance(eTime, dt.datetime) and eTime > sTime), \
+            logging.error('sTime and eTime must be datetimes, eTime > sTime')
+        assert(isinstance(rad, list) and len(rad) > 0), \
+            logging.error("rad must be a list, eg ['bks'] or ['bks','fhe']")
+        assert(param in fan.fanParams), \
+            logging.error("allowable params are 'velocity', 'power', "
+                          "'width', 'elevation', 'phi0'")
+        assert(coords != 'mlt'), \
+            logging.error("the map moves with time in mlt coordinates, use "
+                          "plotFan for each frame instead")
+        assert(tFreqBands == [] or len(tFreqBands) == len(rad)), \
+            logging.error('tFreqBands must have one band for each radar')
+
+        self.sTime = sTime
+        self.eTime = eTime
+        self.step = step
+        if interval is None:
+            interval = step
+        self.interval = interval
+        self.rad = rad
+        self.param = param
+        self.coords = coords
+        self.gsct = gsct
+        self.fill = fill
+        self.velscl = velscl
+        self.outDir = outDir
+        if name is None:
+            name = sTime.strftime('%Y%m%d.%H%M') + '.fan'
+        self.name = name
+        self.dpi = dpi
+
+        self.tbands = []
+        for i in range(len(rad)):
+            if tFreqBands == [] or tFreqBands[i] == []:
+                self.tbands.append([8000, 20000])
+            else:
+                self.tbands.append(tFreqBands[i])
+
+        if scale == []: scale = fan.fanScales[param]
+        self.cmap, self.norm, self.bounds = \
+            utils.plotUtils.genCmap(param, scale, colors=colors,
+                                    lowGray=lowGray)
+
+        # one pointer for each radar, read through once for the whole movie
+        endTime = eTime + dt.timedelta(seconds=interval)
+        self._ptrs, self._next, self._buffers = [], [], []
+        for r in rad:
+            ptr = radDataOpen(sTime, r, endTime, fileType=fileType,
+                              filtered=filtered, channel=channel, src=src)
+            beam = None
+            if ptr is not None:
+                beam = ptr.readRec()
+                while beam is not None and beam.time < sTime:
+                    beam = ptr.readRec()
+            self._ptrs.append(ptr)
+            self._next.append(beam)
+            self._buffers.append([])
+        if all([ptr is None for ptr in self._ptrs]):
+            logging.warning('no data available for this period')
+
+        # the map and fields of view depend only on the radars asked for, so
+        # every run of frames of a movie is drawn on the same map
+        if mapTime is None:
+            mapTime = sTime
+        if mapBounds is None or fov:
+            siteFovs = _siteFovs(rad, mapTime, coords)
+        if mapBounds is None:
+            mapBounds = _fovBounds(siteFovs, coords, mapTime)
+        lat_0, lon_0, llcrnrlon, llcrnrlat, urcrnrlon, urcrnrlat, width = \
+            mapBounds
+        self.dist = width / 50.
+
+        # the fields of view of the data, kept for each radar set up
+        # (stid, rsep, nrang)
+        self._geometry = {}
+        self._fovs = {}
+
+        # draw everything that stays the same from frame to frame
+        self.fig = plot.figure(figsize=figsize)
+        self.myMap = utils.mapObj(coords=coords, projection='stere',
+                                  lat_0=lat_0, lon_0=lon_0,
+                                  llcrnrlon=llcrnrlon, llcrnrlat=llcrnrlat,
+                                  urcrnrlon=urcrnrlon, urcrnrlat=urcrnrlat,
+                                  coastLineWidth=0.5, coastLineColor='k',
+                                  fillOceans='w', fillContinents='w',
+                                  fillLakes='w', datetime=mapTime)
+        if fov:
+            for r, siteFov in zip(rad, siteFovs):
+                pydarn.plotting.overlayRadar(self.myMap, codes=r,
+                                             dateTime=mapTime)
+                pydarn.plotting.overlayFov(self.myMap, codes=r,
+                                           dateTime=mapTime,
+                                           fovObj=siteFov[1])
+        if (not fill) and legend:
+            fan._fanLegend(self.fig, self.myMap, self.dist)
+
+        mappable = cm.ScalarMappable(cmap=self.cmap, norm=self.norm)
+        mappable.set_array([])
+        bbox = self.fig.gca().get_position()
+        fan._fanColorbar(self.fig, mappable, param, self.bounds)
+        self._tx1, self._tx2, self._tx3 = \
+            fan._fanLabels(self.fig, bbox, sTime,
+                           sTime + dt.timedelta(seconds=interval),
+                           fileType, rad, self.tbands)
+
+    def __repr__(self):
+        return 'fanMovie: {:s} {:s} to {:s}, {:d} frames\n'.format(
+            ','.join(self.rad), str(self.sTime), str(self.eTime),
+            len(self.frameTimes()))
+
+    def _fov(self, beam):
+        """The site and fov of the radar set up of a beam"""
+        from davitpy import pydarn
+
+        key = (beam.stid, beam.prm.rsep, beam.prm.nrang)
+        if key not in self._fovs:
+            site = pydarn.radar.site(radId=beam.stid, dt=beam.time)
+            myFov = pydarn.radar.radFov.fov(site=site, rsep=beam.prm.rsep,
+                                            ngates=beam.prm.nrang + 1,
+                                            nbeams=site.maxbeam,
+                                            coords=self.coords,
+                                            date_time=beam.time)
+            self._fovs[key] = (site, myFov)
+        return self._fovs[key]
+
+    def _fovXY(self, beam):
+        """The fov of the radar set up of a beam, projected onto the map"""
+        from davitpy.pydarn.plotting.fan import fovMapCoords
+
+        key = (beam.stid, beam.prm.rsep, beam.prm.nrang)
+        if key not in self._geometry:
+            self._geometry[key] = fovMapCoords(self._fov(beam)[1], self.myMap)
+        return self._geometry[key]
+
+    def _beams(self, i, fTime, bndTime):
+        """The beams of radar i in [fTime, bndTime), in its frequency band.
+        Beams are kept until they are older than the frame, so frames can
+        overlap (interval > step)."""
+        ptr = self._ptrs[i]
+        band = self.tbands[i]
+        while self._next[i] is not None and self._next[i].time < bndTime:
+            beam = self._next[i]
+            if band[0] <= beam.prm.tfreq <= band[1]:
+                self._buffers[i].append(beam)
+            self._next[i] = ptr.readRec()
+        self._buffers[i] = [b for b in self._buffers[i] if b.time >= fTime]
+        return [b for b in self._buffers[i] if b.time < bndTime]
+
+    def drawFrame(self, fTime):
+        """Draw the data of the frame starting at fTime.  Frames must be
+        drawn in time order.
+
+        Parameters
+        ----------
+        fTime : datetime
+            the start time of the frame
+
+        Returns
+        -------
+        pcolls : list
+            the collections returned by overlayFan
+
+        """
+        import datetime as dt
+        from davitpy.pydarn.plotting.fan import overlayFan
+
+        bndTime = fTime + dt.timedelta(seconds=self.interval)
+        pcolls = []
+        for i in range(len(self._ptrs)):
+            if self._ptrs[i] is None:
+                continue
+            scans = self._beams(i, fTime, bndTime)
+            # the beams of each radar set up are drawn on their own fov
+            groups = {}
+            for beam in scans:
+                key = (beam.stid, beam.prm.rsep, beam.prm.nrang)
+                groups.setdefault(key, []).append(beam)
+            for beams in groups.values():
+                site, myFov = self._fov(beams[0])
+                out = overlayFan(beams, self.myMap, self.fig, self.param,
+                                 self.coords, gsct=self.gsct, site=site,
+                                 fov=myFov, fill=self.fill,
+                                 velscl=self.velscl, dist=self.dist,
+                                 cmap=self.cmap, norm=self.norm,
+                                 fovXY=self._fovXY(beams[0]))
+                if out is not None:
+                    pcolls.append(out[1])
+
+        self._tx1.set_text(fTime.strftime('%Y/%m/%d'))
+        self._tx2.set_text(fTime.strftime('%H:%M - ') +
+                           bndTime.strftime('%H:%M      '))
+        return pcolls
+
+
+def _siteFovs(rad, dateTime, coords):
+    """The site and full fov of each radar in rad at dateTime"""
+    from davitpy import pydarn
+
+    siteFovs = []
+    for r in rad:
+        site = pydarn.radar.site(code=r, dt=dateTime)
+        myFov = pydarn.radar.radFov.fov(site=site, nbeams=site.maxbeam,
+                                        coords=coords, date_time=dateTime)
+        siteFovs.append((site, myFov))
+    return siteFovs
+
+
+def _fovBounds(siteFovs, coords, dateTime):
+    """The map bounds holding the sites and fovs of _siteFovs"""
+    import numpy
+    from davitpy.utils.coordUtils import coord_conv
+    from davitpy.pydarn.plotting import fan
+
+    lonFull, latFull, lonC, latC = [], [], [], []
+    for site, myFov in siteFovs:
+        xlon, xlat = coord_conv(site.geolon, site.geolat, 'geo', coords,
+                                altitude=0., date_time=dateTime)
+        lonFull.append(xlon)
+        latFull.append(xlat)
+        lonC.append(xlon)
+        latC.append(xlat)
+        lonFull.extend(numpy.ravel(myFov.lonFull).tolist())
+        latFull.extend(numpy.ravel(myFov.latFull).tolist())
+        for b in [0, -1]:
+            lonC.append(myFov.lonFull[b][-1])
+            latC.append(myFov.latFull[b][-1])
+
+    return fan._fanMapBounds(lonFull, latFull, lonC, latC, coords, dateTime)
+
+
+def fanMovieBounds(rad, dateTime, coords='geo'):
+    """The map bounds of a fan movie, worked out from the full fields of view
+    of the radars, so no data are needed.
+
+    Parameters
+    ----------
+    rad : list
+        3 letter radar codes, e.g. ['bks','fhe','fhw']
+    dateTime : datetime
+        the time used to look up the radar sites
+    coords : Optional[str]
+        the coordinate system, 'geo' or 'mag'.  default = 'geo'
+
+    Returns
+    -------
+    bounds : tuple
+        lat_0, lon_0, llcrnrlon, llcrnrlat, urcrnrlon, urcrnrlat and the map
+        width, to pass to :class:`fanMovie` as mapBounds
+
+    """
+    return _fovBounds(_siteFovs(rad, dateTime, coords), coords, dateTime)
+
+
+class convMovie(_movieFrames):
+    """Draw convection map frames of one hemisphere, from the records of the
+    mapex files.
+
+    The map, grid and colorbar are drawn once when the object is made.  Each
+    frame draws one map record with :class:`MapConv` and takes it off again
+    once it has been saved.  The records are read in one pass through the
+    files.
+
+    Parameters
+    ----------
+    sTime : datetime
+        the start time of the first frame
+    eTime : datetime
+        the end of the movie; frames start before eTime
+    hemi : Optional[str]
+        'north' or 'south'.  default = 'north'
+    step : Optional[int]
+        the time between frames, in seconds.  Each frame shows the first
+        record starting within it.  default = 120
+    boundinglat : Optional[float]
+        the lowest latitude on the map.  default = None, 50 degrees in the
+        hemisphere plotted
+    coords : Optional[str]
+        'mag' or 'geo'.  default = 'mag'
+    maxVelScale : Optional[float]
+        the top of the velocity color scale.  default = 1000.
+    fitVel : Optional[boolean]
+        draw the fitted velocity vectors.  default = True
+    gridVel : Optional[boolean]
+        draw the gridded line of sight velocities stored in the map record.
+        default = False
+    modelVel : Optional[boolean]
+        draw the model velocity vectors.  default = False
+    contours : Optional[boolean]
+        draw the potential contours.  default = True
+    hmb : Optional[boolean]
+        draw the Heppnard-Maynard boundary.  default = True
+    outDir : Optional[str]
+        the directory the png files are written to.  default = '.'
+    name : Optional[str]
+        the start of the png file names, which are name.NNNNN.png.
+        default = None, sTime as YYYYMMDD.HHMM followed by '.conv'
+    figsize : Optional[tuple]
+        the figure size in inches.  default = (10, 10)
+    dpi : Optional[int]
+        dots per inch of the png files.  default = 100
+    src : Optional[str]
+        where to look for the data files, 'local' or 'sftp'.  default = None
+    fileName : Optional[str]
+        a map file to read, instead of looking one up.  default = None
+
+    Methods
+    -------
+    frameTimes
+        the start times of the frames
+    drawFrame
+        draw the data of one frame
+    render
+        draw and save the frames, reporting the frames per second
+    close
+        close the figure and the data file
+
+    Example
+    -------
+        import datetime as dt
+        movie = pydarn.plotting.convMovie(dt.datetime(2011,4,3),
+                                          dt.datetime(2011,4,4),
+                                          outDir='frames')
+        stats = movie.render()
+        movie.close()
+
+    """
+
+    def __init__(self, sTime, eTime, hemi='north', step=120,
+                 boundinglat=None, coords='mag', maxVelScale=1000.,
+                 fitVel=True, gridVel=False, modelVel=False, contours=True,
+                 hmb=True, outDir='.', name=None, figsize=(10, 10), dpi=100,
+                 src=None, fileName=None):
+        import datetime as dt
+        import matplotlib
+        import matplotlib.pyplot as plot
+        import matplotlib.cm as cm
+        from davitpy import utils
+        from davitpy.pydarn.sdio import sdDataOpen
+
+        assert(isinstance(sTime, dt.datetime) and
+               isinstance(eTime, dt.datetime) and eTime > sTime), \
+            logging.error('sTime and eTime must be datetimes, eTime > sTime')
+        assert(hemi == 'north' or hemi == 'south'), \
+            logging.error("hemi should either be 'north' or 'south'")
+        assert(coords != 'mlt'), \
+            logging.error("the map moves with time in mlt coordinates")
+
+        self.sTime = sTime
+        self.eTime = eTime
+        self.step = step
+        self.hemi = hemi
+        self.maxVelScale = maxVelScale
+        self.fitVel = fitVel
+        self.gridVel = gridVel
+        self.modelVel = modelVel
+        self.contours = contours
+        self.hmb = hmb
+        self.outDir = outDir
+        if name is None:
+            name = sTime.strftime('%Y%m%d.%H%M') + '.conv'
+        self.name = name
+        self.dpi = dpi
+
+        ptr = sdDataOpen(sTime, hemi, eTime=eTime, src=src,
+                         fileName=fileName, fileType='mapex')
+        self._ptrs = [ptr]
+        self._next = None
+        if ptr is not None:
+            self._next = ptr.readRec()
+        if self._next is None:
+            # frames without a record are drawn blank
+            logging.warning('no data available for this period')
+
+        if boundinglat is None:
+            boundinglat = 50. if hemi == 'north' else -50.
+        self.fig = plot.figure(figsize=figsize)
+        self.ax = self.fig.add_subplot(111)
+        self.myMap = utils.mapObj(ax=self.ax, boundinglat=boundinglat,
+                                  gridLabels=True, coords=coords,
+                                  datetime=sTime)
+
+        mappable = cm.ScalarMappable(
+            cmap=cm.jet, norm=matplotlib.colors.Normalize(0, maxVelScale))
+        mappable.set_array([])
+        cbar = self.fig.colorbar(mappable, ax=self.ax,
+                                 orientation='vertical')
+        cbar.set_label('Velocity [m/s]', size=15.)
+
+    def __repr__(self):
+        return 'convMovie: {:s} {:s} to {:s}, {:d} frames\n'.format(
+            self.hemi, str(self.sTime), str(self.eTime),
+            len(self.frameTimes()))
+
+    def _record(self, fTime):
+        """The first map record starting in [fTime, fTime + step), or None"""
+        import datetime as dt
+
+        bndTime = fTime + dt.timedelta(seconds=self.step)
+        while self._next is not None and self._next.sTime < fTime:
+            self._next = self._ptrs[0].readRec()
+        if self._next is None or self._next.sTime >= bndTime:
+            return None
+        return self._next
+
+    def drawFrame(self, fTime):
+        """Draw the map record of the frame starting at fTime.  Frames must
+        be drawn in time order.  A frame without a record is left blank,
+        with only its time written on it.
+
+        Parameters
+        ----------
+        fTime : datetime
+            the start time of the frame
+
+        Returns
+        -------
+        mapDatObj : MapConv or None
+            the MapConv object of the frame's record
+
+        """
+        import matplotlib.pyplot as plot
+        from davitpy.pydarn.plotting.plotMapGrd import MapConv
+
+        # MapConv draws on the current figure
+        plot.figure(self.fig.number)
+        rec = self._record(fTime)
+        if rec is None:
+            self.ax.annotate('{:%Y/%b/%d %H%M} UT, no data'.format(fTime),
+                             xy=(0.5, 1.), fontsize=12, ha='center',
+                             xycoords='axes fraction')
+            return None
+
+        mapDatObj = MapConv(fTime, self.myMap, self.ax, hemi=self.hemi,
+                            maxVelScale=self.maxVelScale, grdData=rec.grid,
+                            mapData=rec)
+        # only one of the overlays writes the time on the frame
+        annotate = True
+        if self.fitVel:
+            mapDatObj.overlayMapFitVel(pltColBar=False, annotateTime=annotate)
+            annotate = False
+        if self.gridVel:
+            mapDatObj.overlayGridVel(pltColBar=False,
+                                     overlayRadNames=not self.fitVel,
+                                     annotateTime=annotate)
+            annotate = False
+        if self.modelVel:
+            mapDatObj.overlayMapModelVel(pltColBar=False,
+                                         annotateTime=annotate)
+        if self.contours:
+            mapDatObj.overlayCnvCntrs()
+        if self.hmb:
+            mapDatObj.overlayHMB()
+        return mapDatObj
+
+
+def _renderChunk(job):
+    """Render a contiguous run of frames in a worker process, with the Agg
+    backend.  The map is drawn once for the run."""
+    import matplotlib.pyplot as plot
+
+    plot.switch_backend('Agg')
+    movieClass, args, kwargs, times, startIndex = job
+    movie = movieClass(*args, **kwargs)
+    try:
+        return movie.render(times=times, startIndex=startIndex)
+    finally:
+        movie.close()
+
+
+def _renderMovie(movieClass, sTime, eTime, args, kwargs, nproc):
+    """Split the frames of a movie between nproc processes, each drawing the
+    map once for a contiguous run of frames, and report the overall frames
+    per second."""
+    import time
+    import datetime as dt
+    import multiprocessing
+
+    step = kwargs.get('step', 120)
+    times = []
+    fTime = sTime
+    while fTime < eTime:
+        times.append(fTime)
+        fTime += dt.timedelta(seconds=step)
+    assert(len(times) > 0), logging.error('no frames between sTime and eTime')
+
+    if nproc is None:
+        nproc = multiprocessing.cpu_count()
+    nproc = max(1, min(nproc, len(times)))
+
+    # contiguous runs of frames, so that each pointer reads forward only
+    jobs = []
+    size = -(-len(times) // nproc)
+    for start in range(0, len(times), size):
+        chunk = times[start:start + size]
+        chunkEnd = min(chunk[-1] + dt.timedelta(seconds=step), eTime)
+        jobs.append((movieClass, (chunk[0], chunkEnd) + args, kwargs, chunk,
+                     start))
+
+    t0 = time.time()
+    if len(jobs) == 1:
+        results = [_renderChunk(jobs[0])]
+    else:
+        pool = multiprocessing.Pool(len(jobs))
+        try:
+            results = pool.map(_renderChunk, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    seconds = time.time() - t0
+
+    files = []
+    for result in results:
+        files.extend(result['files'])
+    stats = {'frames': len(files), 'files': files, 'seconds': seconds,
+             'fps': len(files) / max(seconds, 1.e-6)}
+    logging.info('{:d} frames in {:.1f} s with {:d} processes, {:.2f} '
+                 'frames/s'.format(stats['frames'], seconds, len(jobs),
+                                   stats['fps']))
+    return stats
+
+
+def renderFanMovie(sTime, eTime, rad, nproc=None, **kwargs):
+    """Render the frames of a fan movie as png files, spread over several
+    processes.
+
+    Each process draws the map and fields of view once, for its own
+    contiguous run of frames, using the Agg backend.  The map bounds are
+    worked out once, from the fields of view of all of the radars, so that
+    every frame is drawn on the same map.
+
+    Parameters
+    ----------
+    sTime : datetime
+        the start time of the first frame
+    eTime : datetime
+        the end of the movie; frames start before eTime
+    rad : list
+        3 letter radar codes, e.g. ['bks','fhe','fhw']
+    nproc : Optional[int]
+        the number of processes.  default = None, one per CPU core
+    **kwargs :
+        the other keyword arguments of :class:`fanMovie`, e.g. step, param,
+        outDir
+
+    Returns
+    -------
+    stats : dict
+        'frames' (the number of frames), 'files' (the png file names, in
+        time order), 'seconds' spent and 'fps' (frames per second)
+
+    Example
+    -------
+        import datetime as dt
+        stats = pydarn.plotting.renderFanMovie(dt.datetime(2013,3,16),
+                                               dt.datetime(2013,3,17),
+                                               ['fhe','fhw'], nproc=4,
+                                               outDir='frames')
+        print stats['fps']
+
+    """
+    if kwargs.get('name') is None:
+        kwargs['name'] = sTime.strftime('%Y%m%d.%H%M') + '.fan'
+    if kwargs.get('mapTime') is None:
+        kwargs['mapTime'] = sTime
+    if kwargs.get('mapBounds') is None:
+        kwargs['mapBounds'] = fanMovieBounds(rad, kwargs['mapTime'],
+                                             coords=kwargs.get('coords', 'geo'))
+    return _renderMovie(fanMovie, sTime, eTime, (rad,), kwargs, nproc)
+
+
+def renderConvMovie(sTime, eTime, hemi='north', nproc=None, **kwargs):
+    """Render the frames of a convection movie as png files, spread over
+    several processes.
+
+    Each process draws the map once, for its own contiguous run of frames,
+    using the Agg backend.
+
+    Parameters
+    ----------
+    sTime : datetime
+        the start time of the first frame
+    eTime : datetime
+        the end of the movie; frames start before eTime
+    hemi : Optional[str]
+        'north' or 'south'.  default = 'north'
+    nproc : Optional[int]
+        the number of processes.  default = None, one per CPU core
+    **kwargs :
+        the other keyword arguments of :class:`convMovie`, e.g. step,
+        contours, outDir
+
+    Returns
+    -------
+    stats : dict
+        'frames' (the number of frames), 'files' (the png file names, in
+        time order), 'seconds' spent and 'fps' (frames per second)
+
+    Example
+    -------
+        import datetime as dt
+        stats = pydarn.plotting.renderConvMovie(dt.datetime(2011,4,3),
+                                                dt.datetime(2011,4,4),
+                                                nproc=4, outDir='frames')
+
+    """
+    if kwargs.get('name') is None:
+        kwargs['name'] = sTime.strftime('%Y%m%d.%H%M') + '.conv'
+    return _renderMovie(convMovie, sTime, eTime, (hemi,), kwargs, nproc)
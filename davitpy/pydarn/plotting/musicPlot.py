@@ -29,7 +29,6 @@ Module author: Nathaniel A. Frissell, Fall 2013
 
 Functions
 --------------------------------------------------
-daynight_terminator Calculate day/night terminator
 plotRelativeRanges  cell distances
 rangeBeamPlot       range versus beam
 timeSeriesMultiPlot time series
@@ -64,50 +63,13 @@ from davitpy import utils
 from davitpy.pydarn.radar.radUtils import getParamDict
 
 from davitpy.pydarn.proc.music import getDataSet
+from davitpy.pydarn.plotting.rti import daylight_mask
 
 import logging
 
 #Global Figure Size
 figsize=(20,10)
 
-def daynight_terminator(date, lons):
-    """Calculates the latitude, Greenwich Hour Angle, and solar 
-    declination from a given latitude and longitude.
-
-    This routine is used by musicRTI for terminator calculations.
-
-    Parameters
-    ----------
-    date : datetime.datetime
-        UT date and time of terminator calculation.
-    lons : np.array
-        Longitudes of which to calculate the terminator.
-
-    Returns
-    -------
-    lats : np.array
-        Latitudes of solar terminator.
-    tau : np.array
-        Greenwhich Hour Angle.
-    dec : np.array
-        Solar declination.
-
-    Notes
-    -----
-    Adapted from mpl_toolkits.basemap.solar by Nathaniel A. Frissell, Fall 2013
-
-    """
-    import mpl_toolkits.basemap.solar as solar
-
-    dg2rad = np.pi/180.
-    # compute greenwich hour angle and solar declination
-    # from datetime object (assumed UTC).
-    tau, dec = solar.epem(date)
-    # compute day/night terminator from hour angle, declination.
-    longitude = lons + tau
-    lats = np.arctan(-np.cos(longitude*dg2rad)/np.tan(dec*dg2rad))/dg2rad
-    return lats,tau,dec
-
 class musicFan(object):
     """Class to plot a fan plot using a pydarn.proc.music.musicArray object as the data source.
 
@@ -569,24 +531,11 @@ class musicRTI(object):
         lonCenter   = currentData.fov.lonCenter
         time        = currentData.time
         beamInx     = np.where(currentData.fov.beams == beam)[0]
-        radar_lats  = latCenter[beamInx,:]
         nrTimes, nrBeams, nrGates = np.shape(currentData.data)
 
         # Calculate terminator. ########################################################
         if plotTerminator:
-            daylight = np.ones([nrTimes,nrGates],np.bool)
-            for tm_inx in range(nrTimes):
-                tm                  = time[tm_inx]
-                term_lons           = lonCenter[beamInx,:]
-                term_lats,tau,dec   = daynight_terminator(tm,term_lons)
-
-                if dec > 0: # NH Summer
-                    day_inx = np.where(radar_lats < term_lats)[1]
-                else:
-                    day_inx = np.where(radar_lats > term_lats)[1]
-
-                if day_inx.size != 0:
-                    daylight[tm_inx,day_inx] = False
+            daylight = daylight_mask(time,latCenter[beamInx[0],:],lonCenter[beamInx[0],:])
 
         # Translate parameter information from short to long form.
         paramDict = getParamDict(metadata['param'])
@@ -675,21 +624,16 @@ class musicRTI(object):
         # Plot the terminator! #########################################################
         if plotTerminator:
 #            print 'Terminator functionality is disabled until further testing is completed.'
-            term_verts = []
-            term_scan  = []
-
-            rnge  = currentData.fov.gates
-            xvec  = [matplotlib.dates.date2num(x) for x in currentData.time]
-            for tm in range(nrTimes-1):
-                for rg in range(nrGates-1):
-                    if daylight[tm,rg]: continue
-                    term_scan.append(1)
-
-                    x1,y1 = xvec[tm+0],rnge[rg+0]
-                    x2,y2 = xvec[tm+1],rnge[rg+0]
-                    x3,y3 = xvec[tm+1],rnge[rg+1]
-                    x4,y4 = xvec[tm+0],rnge[rg+1]
-                    term_verts.append(((x1,y1),(x2,y2),(x3,y3),(x4,y4),(x1,y1)))
+            rnge  = np.asarray(currentData.fov.gates)
+            xvec  = matplotlib.dates.date2num(currentData.time)
+            # One polygon for each night time cell.
+            tm,rg = np.nonzero(~daylight[:-1,:-1])
+            x1,y1 = xvec[tm+0],rnge[rg+0]
+            x2,y2 = xvec[tm+1],rnge[rg+0]
+            x3,y3 = xvec[tm+1],rnge[rg+1]
+            x4,y4 = xvec[tm+0],rnge[rg+1]
+            term_verts = np.dstack((np.array([x1,x2,x3,x4,x1]).T,np.array([y1,y2,y3,y4,y1]).T))
+            term_scan  = np.ones(len(tm))
 
             term_pcoll = PolyCollection(np.array(term_verts),facecolors='0.45',linewidth=0,zorder=99,alpha=0.25)
             axis.add_collection(term_pcoll,autolim=False)
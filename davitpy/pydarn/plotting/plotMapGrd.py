@@ -34,6 +34,12 @@ class MapConv(object):
     maxVelScale : Optional[float]
         maximum velocity to be used for plotting, min is zero so scale is
         [0,1000]
+    grdData : Optional[pydarn.sdio.sdDataTypes.gridData]
+        the grid record to plot.  Default is None, read it from the grdex
+        file for startTime
+    mapData : Optional[pydarn.sdio.sdDataTypes.mapData]
+        the map record to plot.  Default is None, read it from the mapex
+        file for startTime
 
     Attributes
     ----------
@@ -101,7 +107,7 @@ class MapConv(object):
 
 
     def __init__(self, startTime, mObj, axisHandle, hemi='north',
-                 maxVelScale=1000.):
+                 maxVelScale=1000., grdData=None, mapData=None):
 
         import datetime
         from davitpy.pydarn.sdio import sdDataOpen
@@ -139,11 +145,19 @@ class MapConv(object):
         # This is the way I'm setting stuff up to avoid confusion of reading
         # and plotting seperately.  Just give the date/hemi and the code reads
         # the corresponding rec
+        # Records that have already been read (e.g. by a movie reading
+        # through a day of files) are used as they are.
         endTime = startTime + datetime.timedelta(minutes=2)
-        grdPtr = sdDataOpen(startTime, hemi, eTime=endTime, fileType='grdex')
-        self.grdData = grdPtr.readRec()
-        mapPtr = sdDataOpen(startTime, hemi, eTime=endTime, fileType='mapex')
-        self.mapData = mapPtr.readRec()
+        if grdData is None:
+            grdPtr = sdDataOpen(startTime, hemi, eTime=endTime,
+                                fileType='grdex')
+            grdData = grdPtr.readRec()
+        self.grdData = grdData
+        if mapData is None:
+            mapPtr = sdDataOpen(startTime, hemi, eTime=endTime,
+                                fileType='mapex')
+            mapData = mapPtr.readRec()
+        self.mapData = mapData
 
     def overlayGridVel(self, pltColBar=True, overlayRadNames=True,
                        annotateTime=True, colorBarLabelSize=15.,
@@ -250,216 +264,44 @@ class MapConv(object):
 
         Returns
         ---------
-        mlatsPlot : NEEDS TYPE
-
-        mlonsPlot : NEEDS TYPE
-
-        velMagn : NEEDS TYPE
-
-        velAzm : NEEDS TYPE
-
-            Arrays of Fitted velocity magnitude and azimuth
+        mlatsPlot : list
+            magnetic latitudes of the gridded vectors
+        mlonsPlot : list
+            magnetic longitudes of the gridded vectors
+        velMagn : numpy.ndarray
+            fitted velocity magnitude [m/s]
+        velAzm : numpy.ndarray
+            fitted velocity azimuth [deg]
 
         Note
         ----
-        Belongs to class MapConv
+        Belongs to class MapConv.  The electric field is evaluated with
+        :mod:`pydarn.proc.conv.shFit`, from operator matrices that only
+        depend on the fit order, so no per-point or per-coefficient loops
+        are run.
 
         Example
         -------
             ( mlat, mlon, magn, azimuth ) = MapConv.calcFitCnvVel()
 
         """
-
-        import datetime
         import numpy
-        import scipy
-
-        if self.hemi == 'north' :
-            hemisphere = 1
-        else :
-            hemisphere = -1
+        from davitpy.pydarn.proc.conv.shFit import shBasis
 
         # get the standard location/LoS(grid) Vel parameters.
         mlatsPlot = self.mapData.grid.vector.mlat
         mlonsPlot = self.mapData.grid.vector.mlon
-        velsPlot = self.mapData.grid.vector.velmedian
-        azmsPlot = self.mapData.grid.vector.kvect
-        stIds = self.mapData.grid.vector.stid
 
-        # Alright we have the parameters but we need to calculate the coeffs
-        # for eField and then calc eField and Fitted Vels.
+        # The vectors are evaluated at their own mlon, without lonshft.  The
+        # points change from record to record, so the basis is not cached.
+        basis = shBasis(self.mapData.fitorder, self.mapData.latmin,
+                        mlatsPlot, mlonsPlot)
+        velMagn, velAzm = basis.velMagnAzm(self.mapData.Np2, hemi=self.hemi)
 
-        # Some important parameters from fitting.
-        coeffFit = numpy.array( [ self.mapData.Np2 ] )
-        orderFit = self.mapData.fitorder
-        latShftFit = self.mapData.latshft
-        lonShftFit = self.mapData.lonshft
-        latMinFit = self.mapData.latmin
-
-        # Set up more parameters for getting the fitted vectors
-        # the absolute part is for the southern hemisphere
-        theta = numpy.deg2rad( 90. - numpy.absolute( mlatsPlot ) )
-        thetaMax = numpy.deg2rad( 90. - numpy.absolute( latMinFit ) )
-
-        # Now we need the adjusted/normalized values of the theta such that
-        # full range of theta runs from 0 to pi.  At this point if you are
-        # wondering why we are doing this, It would be good to refer Mike's
-        # paper
-        alpha = numpy.pi / thetaMax
-        thetaPrime = alpha * theta
-        x = numpy.cos( thetaPrime )
-
-        # Here we evaluate the associated legendre polynomials..from order 0
-        # to orderFit we use scipy.special.lpmn() function to get the assciated
-        # legendre polynomials...but it doesnt accept an array...so do loop
-        # calculate the leg.pol for each value of x and append these arrays to
-        # a new array
-        for j in range(len(x)):
-            plmTemp = scipy.special.lpmn( orderFit, orderFit, x[j] )
-            if j == 0:
-                plmFit = numpy.append( [plmTemp[0]], [plmTemp[0]], axis=0 )
-            else:
-                plmFit = numpy.append( plmFit, [plmTemp[0]], axis=0 )
-
-        # we need to remove the first part/subarray/element (whatever you want
-        # to call it) of this array its there twice....look at j==0 part.
-        plmFit = numpy.delete(plmFit, 0, 0)
-        phi = numpy.deg2rad(mlonsPlot)
-
-        # now do the index legender part,
-        # We are doing Associated Legendre Polynomials but for each polynomial
-        # we have two coefficients one for cos(phi) and the other for sin(phi),
-        # so we do spherical harmonics for a real valued function using
-        # sin(phi) and cos(phi) rather than exp(i*phi).
-
-        # we use a lambda function for the index legender part, since we use
-        # it in other places as well.  A good thing about python is this lambda
-        # functions..u dont have to define another function for this.
-        indexLgndr = lambda l, m : ( m == 0 and l**2 ) or \
-            ( (l != 0 ) and (m != 0) and l**2 + 2 * m - 1 ) or 0
-        kMax = indexLgndr( orderFit, orderFit )
-
-        # set up arrays and small stuff for the eFld coeffs calculation
-        thetaECoeffs = numpy.zeros((kMax + 2, len(theta)))
-        phiECoeffs = numpy.zeros((kMax + 2, len(theta)))
-
-        qPrime = numpy.array( numpy.where( thetaPrime != 0. ) )
-        qPrime = qPrime[0]
-        q = numpy.array( numpy.where( theta != 0. ) )
-        q = q[0]
-
-        # finally get to converting coefficients for the potential into
-        # coefficients for elec. Field
-        coeffFitFlat = coeffFit.flatten()
-        for m in range( orderFit + 1 ):
-            for L in range( m, orderFit + 1 ):
-
-                k3 = indexLgndr( L, m )
-                k4 = indexLgndr( L, m )
-
-                if k3 >= 0:
-                    thetaECoeffs[k4, qPrime] = thetaECoeffs[k4, qPrime] - \
-                        coeffFitFlat[k3] * alpha * L * \
-                        numpy.cos(thetaPrime[qPrime]) \
-                        / numpy.sin(thetaPrime[qPrime]) / self.radEarthMtrs
-                    phiECoeffs[k4, q] = phiECoeffs[k4, q] - \
-                        coeffFitFlat[k3 + 1] * m / numpy.sin(theta[q]) / \
-                        self.radEarthMtrs
-                    phiECoeffs[k4 + 1, q] = phiECoeffs[k4 + 1, q] + \
-                        coeffFitFlat[k3] * m / numpy.sin(theta[q]) / \
-                        self.radEarthMtrs
-
-                if L < orderFit:
-                    k1 = indexLgndr( L+1, m )
-                else:
-                    k1 = -1
-
-                k2 = indexLgndr(L, m )
-
-                if k1 >= 0:
-                    thetaECoeffs[k2, qPrime] = thetaECoeffs[k2, qPrime] + \
-                        coeffFitFlat[k1] * alpha * (L + 1 + m) / \
-                        numpy.sin(thetaPrime[qPrime]) / self.radEarthMtrs
-
-                if m > 0:
-                    if k3 >= 0:
-                        k3 = k3 + 1
-                    k4 = k4 + 1
-
-                    if k1 >= 0:
-                        k1 = k1 + 1
-                    k2 = k2 + 1
-
-                    if k3 >= 0:
-                        thetaECoeffs[k4, qPrime] = thetaECoeffs[k4, qPrime] - \
-                            coeffFitFlat[k3] * alpha * L * \
-                            numpy.cos(thetaPrime[qPrime]) / \
-                            numpy.sin(thetaPrime[qPrime]) / self.radEarthMtrs
-
-                    if k1 >= 0:
-                        thetaECoeffs[k2, qPrime] = thetaECoeffs[k2, qPrime] + \
-                            coeffFitFlat[k1] * alpha * (L + 1 + m) / \
-                            numpy.sin(thetaPrime[qPrime]) / self.radEarthMtrs
-
-        # Calculate the Elec. fld positions where
-        thetaEcomp = numpy.zeros( theta.shape )
-        phiEcomp = numpy.zeros( theta.shape )
-
-        for m in range( orderFit+1 ):
-            for L in range( m, orderFit+1 ):
-
-                k = indexLgndr( L, m )
-                # Now in the IDL code we use plmFit[:,L,m] instead of
-                # plmFit[:,m,L] like here, this is because we have a different
-                # organization of plmFit due to the way scipy.special.lpmn
-                # stores values in arrays...
-                if m == 0:
-                    thetaEcomp = thetaEcomp + thetaECoeffs[k, :] * \
-                        plmFit[:, m, L]
-                    phiEcomp = phiEcomp + phiECoeffs[k, :] * plmFit[:, m, L]
-                else:
-                    thetaEcomp = thetaEcomp + thetaECoeffs[k, :] * \
-                        plmFit[:, m, L] * numpy.cos(m * phi) + \
-                        thetaECoeffs[k + 1, :] * plmFit[:, m, L] * \
-                        numpy.sin(m * phi)
-                    phiEcomp = phiEcomp + phiECoeffs[k, :] * \
-                        plmFit[:, m, L] * numpy.cos(m * phi) + \
-                        phiECoeffs[k + 1, :] * plmFit[:, m, L] * \
-                        numpy.sin(m * phi)
-
-        # Store the two components of EFld into a single array
-        eFieldFit = numpy.append( [thetaEcomp], [phiEcomp], axis=0 )
-
-        # We'll calculate Bfld magnitude now, need to initialize some more
-        # stuff
-        alti = 300. * 1000.
-        bFldPolar = -0.62e-4
-        bFldMagn = bFldPolar * (1. - 3. * alti / self.radEarthMtrs) \
-            * numpy.sqrt( 3.0*numpy.square( numpy.cos( theta ) ) + 1. )/2
-
-        # get the velocity components from E-field
-        velFitVecs = numpy.zeros( eFieldFit.shape )
-        velFitVecs[0, :] = eFieldFit[1, :] / bFldMagn
-        velFitVecs[1, :] = -eFieldFit[0, :] / bFldMagn
-
-        velMagn = numpy.sqrt(numpy.square(velFitVecs[0, :]) +
-                             numpy.square(velFitVecs[1, :]))
-        velChkZeroInds = numpy.where( velMagn != 0. )
-        velChkZeroInds = velChkZeroInds[0]
-
-        velAzm = numpy.zeros( velMagn.shape )
-
-        if len(velChkZeroInds) == 0:
+        if not (velMagn != 0.).any():
             velMagn = numpy.array( [0.] )
             velAzm = numpy.array( [0.] )
-        else:
-            if hemisphere == -1:
-                velAzm[velChkZeroInds] = numpy.rad2deg(numpy.arctan2(velFitVecs[1, velChkZeroInds], 
-                    velFitVecs[0, velChkZeroInds]))
-            else:
-                velAzm[velChkZeroInds] = numpy.rad2deg(numpy.arctan2(velFitVecs[1, velChkZeroInds], 
-                    -velFitVecs[0, velChkZeroInds]))            
-                        
+
         return mlatsPlot, mlonsPlot, velMagn, velAzm
 
     def calcCnvPots(self):
@@ -467,146 +309,47 @@ class MapConv(object):
 
         Returns
         -------
-        latCntr : NEEDS TYPE
-            Array of latitudes
-        lonCntr : NEEDS TYPE
-            Array of longitudes
-        potArr : NEEDS TYPE
-            Array of potentials
+        latCntr : numpy.ndarray
+            (181, 60) array of magnetic latitudes
+        lonCntr : numpy.ndarray
+            (181, 60) array of magnetic longitudes
+        potArr : numpy.ndarray
+            (181, 60) array of potentials [kV]
 
         Note
         ----        
-        Belongs to class MapConv
+        Belongs to class MapConv.  The potential is evaluated with
+        :mod:`pydarn.proc.conv.shFit`, which keeps the basis matrices of the
+        grid, so later records with the same fit order and latmin cost one
+        matrix product.
 
         Example
         -------
             (lats, lons, pots) = MapConv.calcCnvPots()
 
         """
-        import datetime
-        import numpy
-        import scipy
-	from davitpy.utils import *
-    	import davitpy.models.aacgm as aacgm
-
-        if self.hemi == 'north':
-            hemisphere = 1
-            intHemi = 0
-        else:
-            hemisphere = -1
-            intHemi = 1
-
+        from davitpy.pydarn.proc.conv import shFit
 
-        # get the standard location parameters.
-        mlatsPlot = self.mapData.grid.vector.mlat
-        mlonsPlot = self.mapData.grid.vector.mlon
-        stIds = self.mapData.grid.vector.stid
-
-        # Alright we have the parameters but we need to 
-        # calculate the coeffs for eField and then calc eField and Fitted Vels.
-        
         # Some important parameters from fitting.
-        coeffFit = numpy.array( [ self.mapData.Np2 ] )
-        orderFit = self.mapData.fitorder
         latShftFit = self.mapData.latshft
         lonShftFit = self.mapData.lonshft
-        latMinFit = self.mapData.latmin
-
-        # Set up more parameters for getting the fitted vectors
-        thetaMax = numpy.deg2rad( 90.-numpy.absolute( latMinFit ) )
-
-
-        # Set the min plotting latitude...
-        plotLatMin = 30
-
-        # we set up a grid to evaluate potential on...
-        latStep = 1
-        lonStep = 2
-        numLats     =  int( ( 90. - plotLatMin ) / latStep )
-        numLongs    =  int( 360. / lonStep )+1
-        zatArr = numpy.array( range(numLats) * latStep ) + plotLatMin
-        zatArr = zatArr * hemisphere
-        zonArr = numpy.array( range(numLongs) )* lonStep
-
-        # Right now create a grid kinda stuff with lats and lons
-        gridArr = numpy.zeros( (2, numLats * numLongs) )
-        counter1 = 0
-        for lo in zonArr :
-            for la in zatArr :
-                gridArr[0, counter1] = la 
-                gridArr[1, counter1] = lo
-                counter1 = counter1 + 1
-
-        # Now we need to convert a few things to spherical coordinates
-        theta = numpy.deg2rad( 90. - numpy.abs(gridArr[0,:]) )
-        phi = numpy.deg2rad( gridArr[1,:] )
-
-        # Now we need the adjusted/normalized values of the theta such that full range of theta runs from 0 to pi
-        # At this point if you are wondering why we are doing this, It would be good to refer Mike's paper
-        alpha = numpy.pi/thetaMax
-        tPrime = alpha*theta
-        x = numpy.cos(tPrime)
-
-
-        # Here we evaluate the associated legendre polynomials..from order 0 to orderFit
-        # we use scipy.special.lpmn() function to get the assciated legendre polynomials...but it doesnt
-        # accept an array...so do loop calculate the leg.pol for each value of x and append these arrays to a new array
-        for j in range(len(x)):
-            plmTemp = scipy.special.lpmn( orderFit, orderFit, x[j] )
-            
-            if j == 0:
-                plmFit = numpy.append( [plmTemp[0]], [plmTemp[0]], axis = 0 )
-            else:
-                plmFit = numpy.append( plmFit, [plmTemp[0]], axis= 0 )
-
-        # we need to remove the first part/subarray/element (whatever you want to call it) of this array
-        # its there twice, look at j==0 part.
-        plmFit = numpy.delete(plmFit, 0, 0)
-
-        # Get to evaluating the potential
-        lMax = plmFit.shape
-        lMax = lMax[1]
-        v= numpy.zeros( phi.shape )
-
-
-        # we use a lambda function for the index legender part, since we use it in other places as well..
-        # a good thing about python is this lambda functions..u dont have to define another function for this....
-        indexLgndr = lambda l,m :( m == 0 and l**2 ) or \
-            ( (l != 0 ) and (m != 0) and l**2 + 2*m - 1 ) or 0
-
-        coeffFitFlat = coeffFit.flatten()
-        for m in range( lMax ):
-            for L in range( m, lMax ):
-                k = indexLgndr( L, m )
-                if m == 0:
-                    v = v + coeffFitFlat[k]*plmFit[:,0,L]
-                else:
-                    v = v + \
-                        coeffFitFlat[k]*numpy.cos( m*phi )*plmFit[:,m,L] + \
-                        coeffFitFlat[k+1]*numpy.sin( m*phi )*plmFit[:,m,L]
-
-        potArr = numpy.zeros( ( numLongs, numLats ) ) 
-        potArr = numpy.reshape(v, potArr.shape)/1000.
+        if lonShftFit is None:
+            lonShftFit = 0.
 
         # latShftFit and lonShftFit are almost always zero
         # but in case they are not... we print out a message...
         # you need an extra bit of code to account for the lat shift
-        if latShftFit == 0.:
-
-            q = numpy.array( numpy.where( numpy.abs(zatArr) <= numpy.abs(latMinFit) ) )
-            q = q[0]
-            
-            if ( len(q) != 0 ):
-                potArr[:,q] = 0
-                
-        else:
+        if latShftFit != 0. and latShftFit is not None:
             logging.warning('LatShift is not zero, need to rewrite code for that, currently continuing assuming it is zero')
 
-        gridArr[1,:] = ( gridArr[1,:] + lonShftFit ) 
+        # we set up a grid to evaluate potential on, with a min plotting
+        # latitude of 30.  The grid longitudes are in the frame of the fit,
+        # so they are shifted by lonShftFit.
+        latCntr, lonCntr = shFit.mapGrid(self.hemi, latMin=30., latStep=1.,
+                                         lonStep=2.)
+        lonCntr = lonCntr + lonShftFit
+        potArr = shFit.mapPotential(self.mapData, latCntr, lonCntr) / 1000.
 
-        latCntr = gridArr[0,:].reshape( ( 181, 60 ) )
-        lonCntr = gridArr[1,:].reshape( ( 181, 60 ) )
-        
         return latCntr, lonCntr, potArr
 
     def overlayCnvCntrs(self):
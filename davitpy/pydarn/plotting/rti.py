@@ -34,6 +34,7 @@ draw_axes           draw empty axes
 read_data           read data in
 rti_panel           plot the main rti data
 daynight_terminator calculate day/night terminator
+daylight_mask       find where the sun is up along a radar beam
 --------------------------------------------------
 
 """
@@ -347,7 +348,7 @@ def plot_rti(sTime, rad, eTime=None, bmnum=7, fileType='fitacf',
         elif(params[p] == 'phi0'): pArr = data_dict['phi0']
         elif(params[p] == 'velocity_error'):
             pArr = data_dict['velocity_error']
-        if(pArr == []): continue
+        if len(pArr) == 0: continue
 
         # Generate the color map.
 
@@ -1083,16 +1084,23 @@ def read_data(myPtr, bmnum, params, tbands):
 
     Returns
     -------
-    A dictionary of the data. Data is stored in lists and separated in
-    to tbands.
+    A dictionary of the data.  The per-beam values (times, freq, cpid, ...)
+    are stored in lists and the fitted parameters (vel, pow, ..., and
+    gsflg) in (time, range gate) numpy arrays, with NaN (-1 for gsflg) where
+    there is no scatter.  Only the beams in the tbands frequency range are
+    kept.
 
     Example
     -------
         from davitpy import pydarn
         from datetime import datetime
         myPtr = pydarn.sdio.radDataOpen(datetime(2012,11,24),'sas')
-        myBeam = myPtr.readRec()
-        data_dict = read_data(myPtr, myBeam, 7, ['velocity'], [8000,20000])
+        data_dict = read_data(myPtr, 7, ['velocity'], [8000,20000])
+
+    Notes
+    -----
+    Only the records of beam bmnum are turned into columns, and only the
+    fitted parameters in params are kept.
 
     Written by ASR 20150914
 
@@ -1100,50 +1108,40 @@ def read_data(myPtr, bmnum, params, tbands):
 
     import numpy as np
 
-    # Initialize some things.
-    data = dict()
-    data_keys = ['vel', 'pow', 'wid', 'elev', 'phi0', 'times', 'freq', 'cpid',
-                 'nave', 'nsky', 'nsch', 'slist', 'mode', 'rsep', 'nrang',
-                 'frang', 'gsflg', 'velocity_error']
-    for d in data_keys:
-        data[d] = []
+    # The fitted parameter read for each of the params.
+    param_keys = {'velocity': ('vel', 'v'), 'power': ('pow', 'p_l'),
+                  'width': ('wid', 'w_l'), 'elevation': ('elev', 'elv'),
+                  'phi0': ('phi0', 'phi0'),
+                  'velocity_error': ('velocity_error', 'v_e')}
+    fields = ['gflg'] + [param_keys[p][1] for p in params if p in param_keys]
 
     # Read the parameters of interest.
-    myPtr.rewind()
-    myBeam = myPtr.readRec()
-    while(myBeam is not None):
-        if(myBeam.time > myPtr.eTime): break
-        if(myBeam.bmnum == bmnum and (myPtr.sTime <= myBeam.time)):
-            if (myBeam.prm.tfreq >= tbands[0] and
-                    myBeam.prm.tfreq <= tbands[1]):
-                data['times'].append(myBeam.time)
-                data['cpid'].append(myBeam.cp)
-                data['nave'].append(myBeam.prm.nave)
-                data['nsky'].append(myBeam.prm.noisesky)
-                data['rsep'].append(myBeam.prm.rsep)
-                data['nrang'].append(myBeam.prm.nrang)
-                data['frang'].append(myBeam.prm.frang)
-                data['nsch'].append(myBeam.prm.noisesearch)
-                data['freq'].append(myBeam.prm.tfreq / 1e3)
-                data['slist'].append(myBeam.fit.slist)
-                data['mode'].append(myBeam.prm.ifmode)
-                data['gsflg'].append(myBeam.fit.gflg)
-                # To save time and RAM, only keep the data specified
-                # in params.
-                if('velocity' in params):
-                    data['vel'].append(myBeam.fit.v)
-                if('power' in params):
-                    data['pow'].append(myBeam.fit.p_l)
-                if('width' in params):
-                    data['wid'].append(myBeam.fit.w_l)
-                if('elevation' in params):
-                    data['elev'].append(myBeam.fit.elv)
-                if('phi0' in params):
-                    data['phi0'].append(myBeam.fit.phi0)
-                if('velocity_error' in params):
-                    data['velocity_error'].append(myBeam.fit.v_e)
-
-        myBeam = myPtr.readRec()
+    cols = myPtr.readColumns(bmnum=bmnum, fields=fields)
+    freq = cols.beam['tfreq']
+    cols = cols.select((freq >= tbands[0]) & (freq <= tbands[1]))
+    nrang = max(cols.beam['nrang'].max() if len(cols) > 0 else 0,
+                cols.fit['slist'].max() + 1 if len(cols.fit) > 0 else 0)
+
+    data = dict()
+    data['times'] = cols.time.tolist()
+    data['cpid'] = cols.beam['cp'].tolist()
+    data['nave'] = cols.beam['nave'].tolist()
+    data['nsky'] = cols.beam['noisesky'].tolist()
+    data['rsep'] = cols.beam['rsep'].tolist()
+    data['nrang'] = cols.beam['nrang'].tolist()
+    data['frang'] = cols.beam['frang'].tolist()
+    data['nsch'] = cols.beam['noisesearch'].tolist()
+    data['freq'] = (cols.beam['tfreq'] / 1e3).tolist()
+    data['mode'] = cols.beam['ifmode'].tolist()
+    data['slist'] = [cols.recordSlice(i)['slist'] for i in range(len(cols))]
+    data['gsflg'] = cols.gateArray('gflg', nrang=nrang, fill=-1)
+    # To save time and RAM, only keep the data specified in params.
+    for key, field in param_keys.values():
+        data[key] = []
+    for p in params:
+        if p in param_keys:
+            key, field = param_keys[p]
+            data[key] = cols.gateArray(field, nrang=nrang)
     return data
 
 
@@ -1157,9 +1155,9 @@ def rti_panel(ax, data_dict, pArr, gsct, rad, bmnum, coords, cmap,
         a MPL axis object to plot to
     data_dict :
         the data dictionary returned by pydarn.plotting.read_data
-    pArr : list
-        the list of data to be plotted (e.g. data_dict['vel'] for
-        velocity)
+    pArr : numpy.ndarray
+        the (time, range gate) array of data to be plotted (e.g.
+        data_dict['vel'] for velocity)
     gsct : bool
         a boolean stating whether to flag ground scatter data or not
     rad : str
@@ -1193,34 +1191,35 @@ def rti_panel(ax, data_dict, pArr, gsct, rad, bmnum, coords, cmap,
 
     # Initialize things.
     rmax = max(data_dict['nrang'])
-    tmax = (len(data_dict['times'])) * 2
-    data = np.zeros((tmax, rmax)) * np.nan
-    x = np.zeros(tmax)
-    tcnt = 0
+    times = date2num(data_dict['times'])
+    ntime = len(times)
+
+    # An extra time column is put in after each data gap longer than 4
+    # minutes, 1 minute after the last data point before the gap.
+    gaps = np.diff(times) > 4. / 1440.
+    rows = np.arange(ntime)
+    rows[1:] += np.cumsum(gaps)
+    tcnt = ntime + gaps.sum()
+    x = np.zeros(tcnt + 1)
+    x[rows] = times
+    gap_rows = rows[:-1][gaps] + 1
+    x[gap_rows] = times[:-1][gaps] + 1. / 1440.
 
     # Build a list of datetimes to plot each data point at.
-    dt_list = []
-    for i in range(len(data_dict['times'])):
-        x[tcnt] = date2num(data_dict['times'][i])
-        dt_list.append(data_dict['times'][i])
-
-        if(i < len(data_dict['times']) - 1):
-            if(date2num(data_dict['times'][i + 1]) - x[tcnt] > 4. / 1440.):
-                tcnt += 1
-                # 1440 minutes in a day, hardcoded 1 minute step per data point
-                # but only if time between data points is > 4 minutes
-                x[tcnt] = x[tcnt - 1] + 1. / 1440.
-                dt_list.append(num2date(x[tcnt]))
-        tcnt += 1
-
-        if(pArr[i] == [] or pArr[i] is None): continue
-
-        if data_dict['slist'][i] is not None:
-            for j in range(len(data_dict['slist'][i])):
-                if(not gsct or data_dict['gsflg'][i][j] == 0):
-                    data[tcnt][data_dict['slist'][i][j]] = pArr[i][j]
-                elif gsct and data_dict['gsflg'][i][j] == 1:
-                    data[tcnt][data_dict['slist'][i][j]] = -100000.
+    dt_list = np.empty(tcnt, dtype=object)
+    dt_list[rows] = data_dict['times']
+    if len(gap_rows) > 0:
+        dt_list[gap_rows] = num2date(x[gap_rows])
+    dt_list = dt_list.tolist()
+
+    # The data of each beam sounding fill the column after its own.
+    data = np.zeros((tcnt + 1, rmax)) * np.nan
+    nrang = min(rmax, pArr.shape[1])
+    vals = pArr[:, :nrang].copy()
+    if gsct:
+        gs = (data_dict['gsflg'][:, :nrang] == 1) & np.isfinite(vals)
+        vals[gs] = -100000.
+    data[np.append(rows[1:], tcnt), :nrang] = vals
 
     # For geo or mag coords, get radar FOV lats/lons.
     if (coords != 'gate' and coords != 'rng') or plot_terminator is True:
@@ -1249,18 +1248,7 @@ def rti_panel(ax, data_dict, pArr, gsct, rad, bmnum, coords, cmap,
 
     # Calculate terminator as required.
     if plot_terminator:
-        daylight = np.ones([len(dt_list), len(myLat)], np.bool)
-        for tm_inx in range(len(dt_list)):
-            tm = dt_list[tm_inx]
-            term_lats, tau, dec = daynight_terminator(tm, myLon)
-            if dec > 0:
-                # NH Summer
-                day_inx = np.where(myLat < term_lats)[0]
-            else:
-                day_inx = np.where(myLat > term_lats)[0]
-
-            if day_inx.size != 0:
-                daylight[tm_inx, day_inx] = False
+        daylight = daylight_mask(dt_list, myLat, myLon)
         daylight = np.ma.array(daylight, mask=daylight)
         ax.pcolormesh(X, Y, daylight.T, lw=0, alpha=0.10,
                       cmap=matplotlib.cm.binary_r, zorder=99)
@@ -1309,3 +1297,71 @@ def daynight_terminator(date, lons):
     lats = np.arctan(-np.cos(longitude * dg2rad) /
                      np.tan(dec * dg2rad)) / dg2rad
     return lats, tau, dec
+
+
+# Daylight masks already worked out, by beam geometry and then by minute,
+# and the most (geometry, minute) entries kept before it is emptied
+_daylight_cache = {}
+_daylight_cache_size = 100000
+
+
+def daylight_mask(times, lats, lons):
+    """ Find where the sun is up at the range gates of a radar beam, for
+    shading the night side of the terminator in RTI and MUSIC plots.
+
+    Parameters
+    ----------
+    times : list
+        a list of datetime.datetime objects (assumed UTC)
+    lats : numpy.ndarray
+        the latitudes of the range gates
+    lons : numpy.ndarray
+        the longitudes of the range gates
+
+    Returns
+    -------
+    daylight
+        a (len(times), len(lats)) boolean array, True where the solar zenith
+        angle is below 90 degrees
+
+    Notes
+    -----
+    The solar zenith angles are computed for all times at once with
+    utils.calcSun.solar_zenith.  The results are cached for each minute and
+    beam geometry, so redrawing a panel (or drawing the other parameters of
+    the same beam) reuses them.
+
+    """
+    import datetime as dt
+    import numpy as np
+    from davitpy.utils.calcSun import solar_zenith
+
+    lats = np.asarray(lats, dtype=float).ravel()
+    lons = np.asarray(lons, dtype=float).ravel()
+    geometry = (lats.tostring(), lons.tostring())
+    cache = _daylight_cache.get(geometry, {})
+
+    # the minute each time falls in, as whole minutes since 1970
+    t0 = dt.datetime(1970, 1, 1)
+    minutes = [int(round((t.replace(tzinfo=None) - t0).total_seconds() / 60.))
+               for t in times]
+    rows = dict((m, cache[m]) for m in set(minutes).intersection(cache))
+    new = sorted(set(minutes).difference(cache))
+    if len(new) > 0:
+        new_times = [t0 + dt.timedelta(minutes=m) for m in new]
+        zenith = solar_zenith(new_times, lats, lons)
+        rows.update(zip(new, zenith < 90.))
+
+        # keep the total number of (geometry, minute) entries bounded
+        nentries = sum([len(c) for c in _daylight_cache.itervalues()])
+        if nentries + len(new) > _daylight_cache_size:
+            _daylight_cache.clear()
+            cache = {}
+        if len(cache) + len(new) <= _daylight_cache_size:
+            cache.update(zip(new, zenith < 90.))
+            _daylight_cache[geometry] = cache
+
+    daylight = np.empty((len(times), len(lats)), dtype=bool)
+    for i, m in enumerate(minutes):
+        daylight[i] = rows[m]
+    return daylight
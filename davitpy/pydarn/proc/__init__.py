@@ -7,6 +7,7 @@ This subpackage contains various data processing routines for DaViT-py
 
 Modules
 ----------------------------------------
+conv    convection patterns of map files
 fov     field-of-view, propagation paths
 music   wave analysis
 signal  time series data
@@ -16,3 +17,4 @@ signal  time series data
 import signal
 import music
 import fov
+import conv
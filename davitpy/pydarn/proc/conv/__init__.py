@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+# conv module __init__.py
+"""conv module
+
+This subpackage contains utilities to evaluate the convection pattern
+(electrostatic potential, electric field and fitted velocity) of the
+spherical harmonic fits stored in SuperDARN map files.
+
+Modules
+----------------------------------------
+shFit       spherical harmonic potential fits
+convSeries  time series of convection parameters
+----------------------------------------
+
+"""
+from shFit import *
+from convSeries import *
@@ -0,0 +1,418 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2012  VT SuperDARN Lab
+# Full license can be found in LICENSE.txt
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""convSeries module
+
+Time series of convection parameters (cross polar cap potential, the
+potential extremes and where they are, and the fitted velocity at fixed
+points) from map files, without drawing anything.  The map records are read
+as columns and all of the records of a batch sharing a fit set up are
+evaluated with a single matrix product, see :mod:`shFit`.
+
+A series is a dictionary of numpy arrays, one value (or row) per record:
+
+time : (numpy.ndarray)
+    start time of each record (datetime)
+potdrop, potdroperr, potmax, potmin, IMFBx, IMFBy, IMFBz, fitorder,
+latmin, chisqr, rmserr : (numpy.ndarray)
+    the values stored in the map records, nan where missing
+nvec : (numpy.ndarray)
+    the number of gridded vectors in each record
+gridPotMax, gridPotMin : (numpy.ndarray)
+    the largest and smallest potential on the grid [V]
+gridPotMaxLat, gridPotMaxLon, gridPotMinLat, gridPotMinLon : (numpy.ndarray)
+    where they are [deg]
+gridCpcp : (numpy.ndarray)
+    gridPotMax - gridPotMin [V]
+gridMlat, gridMlon : (numpy.ndarray)
+    the grid the potential is evaluated on
+stationMlat, stationMlon : (numpy.ndarray)
+    the fixed points, if any were asked for
+stationPot, stationVelMagn, stationVelAzm : (numpy.ndarray)
+    (records, points) potential [V], speed [m/s] and azimuth [deg] at them
+potential : (numpy.ndarray)
+    (records, longitudes, latitudes) float32 potential on the grid [V], only
+    if keepGrid is set
+
+Functions
+-----------------------------------------
+convTimeSeries   time series for a time range
+convSeriesBatch  time series for many days, in parallel processes
+joinConvSeries   join series end to end
+writeConvSeries  write a series to an HDF5 file
+readConvSeries   read a series written by writeConvSeries
+-----------------------------------------
+
+"""
+import logging
+import numpy
+
+# The values copied from the map records into a series
+seriesScalars = ['potdrop', 'potdroperr', 'potmax', 'potmin', 'IMFBx',
+                 'IMFBy', 'IMFBz', 'fitorder', 'latmin', 'chisqr', 'rmserr']
+
+# The entries of a series that are not one per record
+_fixedKeys = ['stationMlat', 'stationMlon', 'gridMlat', 'gridMlon']
+
+
+def _scalarColumn(cols, name, default=numpy.nan):
+    """A scalar column of an sdColumnData object as floats, with default
+    for records without it"""
+    vals = cols.scalars.get(name)
+    if vals is None:
+        return numpy.zeros(len(cols)) + default
+    return numpy.array([default if v is None else v for v in vals],
+                       dtype=float)
+
+
+def _seriesFromColumns(cols, hemi, mlats, mlons, stations, keepGrid):
+    """Evaluate the series of the records in an sdColumnData object"""
+    from davitpy.pydarn.proc.conv.shFit import getBasis
+
+    nrec = len(cols)
+    series = {'time': numpy.array(cols.sTime, dtype=object),
+              'nvec': cols.counts('vector')}
+    for name in seriesScalars:
+        series[name] = _scalarColumn(cols, name)
+    for name in ['gridPotMax', 'gridPotMin', 'gridPotMaxLat',
+                 'gridPotMaxLon', 'gridPotMinLat', 'gridPotMinLon']:
+        series[name] = numpy.zeros(nrec) + numpy.nan
+    if stations is not None:
+        nst = len(stations[0])
+        for name in ['stationPot', 'stationVelMagn', 'stationVelAzm']:
+            series[name] = numpy.zeros((nrec, nst)) + numpy.nan
+    if keepGrid:
+        series['potential'] = numpy.zeros((nrec,) + mlats.shape,
+                                          dtype=numpy.float32) + numpy.nan
+
+    # records with the same fit set up share their basis matrices
+    orders = _scalarColumn(cols, 'fitorder', -1).astype(int)
+    latmins = _scalarColumn(cols, 'latmin')
+    lonshfts = _scalarColumn(cols, 'lonshft', 0.)
+    ncoeff = cols.counts('coeff')
+    groups = {}
+    for i in range(nrec):
+        if orders[i] < 0 or numpy.isnan(latmins[i]) or \
+                ncoeff[i] < (orders[i] + 1)**2:
+            logging.warning('no fit in the record at {:}'.format(
+                cols.sTime[i]))
+            continue
+        key = (orders[i], latmins[i], lonshfts[i])
+        groups.setdefault(key, []).append(i)
+
+    flatLats, flatLons = mlats.ravel(), mlons.ravel()
+    for (order, latmin, lonshft), recs in groups.iteritems():
+        n = (order + 1)**2
+        coeffs = numpy.array([cols.recordSlice(i, 'coeff')['Np2'][:n]
+                              for i in recs]).T
+
+        basis = getBasis(order, latmin, mlats, mlons, lonshft=lonshft)
+        pots = basis.potential(coeffs).reshape(-1, len(recs))
+        iMax = numpy.argmax(pots, axis=0)
+        iMin = numpy.argmin(pots, axis=0)
+        irec = numpy.arange(len(recs))
+        series['gridPotMax'][recs] = pots[iMax, irec]
+        series['gridPotMin'][recs] = pots[iMin, irec]
+        series['gridPotMaxLat'][recs] = flatLats[iMax]
+        series['gridPotMaxLon'][recs] = flatLons[iMax]
+        series['gridPotMinLat'][recs] = flatLats[iMin]
+        series['gridPotMinLon'][recs] = flatLons[iMin]
+        if keepGrid:
+            series['potential'][recs] = numpy.rollaxis(
+                pots.reshape(mlats.shape + (len(recs),)), -1)
+
+        if stations is not None:
+            stBasis = getBasis(order, latmin, stations[0], stations[1],
+                               lonshft=lonshft)
+            series['stationPot'][recs] = stBasis.potential(coeffs).T
+            magn, azm = stBasis.velMagnAzm(coeffs, hemi=hemi)
+            series['stationVelMagn'][recs] = magn.T
+            series['stationVelAzm'][recs] = azm.T
+
+    series['gridCpcp'] = series['gridPotMax'] - series['gridPotMin']
+    return series
+
+
+def joinConvSeries(seriesList):
+    """Join series end to end.
+
+    Parameters
+    ----------
+    seriesList : list
+        series, as returned by convTimeSeries, in time order.  None entries
+        are skipped.
+
+    Returns
+    -------
+    series : dict or None
+        None if there are no series to join
+
+    """
+    seriesList = [s for s in seriesList if s is not None]
+    if len(seriesList) == 0:
+        return None
+    series = {}
+    for key in seriesList[0].keys():
+        if key in _fixedKeys:
+            series[key] = seriesList[0][key]
+        else:
+            series[key] = numpy.concatenate([s[key] for s in seriesList])
+    return series
+
+
+def convTimeSeries(sTime, eTime, hemi='north', stations=None, grid=None,
+                   keepGrid=False, batchSize=720, fileType='mapex', src=None,
+                   fileName=None):
+    """Time series of convection parameters from the map records in a time
+    range.
+
+    Parameters
+    ----------
+    sTime : datetime
+        the start time
+    eTime : datetime
+        the end time
+    hemi : Optional[str]
+        'north' or 'south'.  default='north'
+    stations : Optional[list]
+        fixed points to evaluate the potential and fitted velocity at, a
+        list of (mlat, mlon) pairs [deg].  default=None
+    grid : Optional[tuple]
+        (mlats, mlons) arrays of the grid the potential extremes are looked
+        for on.  default=None, the grid MapConv draws contours on (see
+        shFit.mapGrid)
+    keepGrid : Optional[bool]
+        keep the potential on the whole grid for every record.
+        default=False
+    batchSize : Optional[int]
+        the number of records read and evaluated at a time.  default=720,
+        a day of 2 minute records
+    fileType : Optional[str]
+        'map' or 'mapex'.  default='mapex'
+    src : Optional[str]
+        where to look for the data files, 'local' or 'sftp'.  default=None
+    fileName : Optional[str]
+        a map file to read, instead of looking one up.  default=None
+
+    Returns
+    -------
+    series : dict or None
+        the series (see the module documentation), None if there is no data
+
+    Example
+    -------
+        import datetime as dt
+        series = pydarn.proc.conv.convTimeSeries(dt.datetime(2011,4,3),
+                                                 dt.datetime(2011,4,4),
+                                                 stations=[(75., 0.)])
+        print series['gridCpcp'].max()
+
+    """
+    from davitpy.pydarn.sdio import sdDataOpen
+    from davitpy.pydarn.sdio.sdDataRead import sdDataReadChunks
+    from davitpy.pydarn.proc.conv.shFit import mapGrid
+
+    assert(hemi == 'north' or hemi == 'south'), \
+        logging.error("hemi should either be 'north' or 'south'")
+
+    if grid is None:
+        mlats, mlons = mapGrid(hemi)
+    else:
+        mlats = numpy.asarray(grid[0], dtype=float)
+        mlons = numpy.asarray(grid[1], dtype=float)
+    if stations is not None:
+        stations = numpy.asarray(stations, dtype=float).reshape(-1, 2)
+        stations = (stations[:, 0], stations[:, 1])
+
+    ptr = sdDataOpen(sTime, hemi, eTime=eTime, src=src, fileName=fileName,
+                     fileType=fileType)
+    if ptr is None:
+        return None
+    pieces = []
+    try:
+        for cols in sdDataReadChunks(ptr, maxRecords=batchSize,
+                                     columns=True):
+            pieces.append(_seriesFromColumns(cols, hemi, mlats, mlons,
+                                             stations, keepGrid))
+    finally:
+        ptr.close()
+
+    series = joinConvSeries(pieces)
+    if series is None:
+        return None
+    series['gridMlat'] = mlats
+    series['gridMlon'] = mlons
+    if stations is not None:
+        series['stationMlat'] = stations[0]
+        series['stationMlon'] = stations[1]
+    return series
+
+
+def writeConvSeries(series, fileName, hemi=None):
+    """Write a series to an HDF5 file, one dataset per entry.  Times are
+    stored as epoch seconds.
+
+    Parameters
+    ----------
+    series : dict
+        a series, as returned by convTimeSeries
+    fileName : str
+        the file to write
+    hemi : Optional[str]
+        stored as an attribute of the file.  default=None
+
+    Returns
+    -------
+    Nothing
+
+    """
+    import h5py
+    import datetime as dt
+
+    t0 = dt.datetime(1970, 1, 1)
+    f = h5py.File(fileName, 'w')
+    try:
+        if hemi is not None:
+            f.attrs['hemi'] = hemi
+        for key, vals in series.iteritems():
+            if key == 'time':
+                vals = numpy.array([(t - t0).total_seconds() for t in vals],
+                                   dtype=numpy.float64)
+            f.create_dataset(key, data=vals, compression='gzip')
+    finally:
+        f.close()
+
+
+def readConvSeries(fileName):
+    """Read a series written by writeConvSeries.
+
+    Parameters
+    ----------
+    fileName : str
+        the file to read
+
+    Returns
+    -------
+    series : dict
+
+    """
+    import h5py
+    import datetime as dt
+
+    t0 = dt.datetime(1970, 1, 1)
+    f = h5py.File(fileName, 'r')
+    try:
+        series = dict([(key, f[key][...]) for key in f.keys()])
+    finally:
+        f.close()
+    series['time'] = numpy.array([t0 + dt.timedelta(seconds=t)
+                                  for t in series['time']], dtype=object)
+    return series
+
+
+def _seriesDay(job):
+    """Work out the series of one day in a worker process, writing it to
+    outDir if given.  Errors are logged, so that the other days carry on."""
+    import os
+    import time
+    import datetime as dt
+
+    day, hemi, outDir, kwargs = job
+    t0 = time.time()
+    dayEnd = day + dt.timedelta(days=1)
+    try:
+        series = convTimeSeries(day, dayEnd, hemi=hemi, **kwargs)
+    except Exception, e:
+        logging.exception(e)
+        series = None
+    if series is not None:
+        # a record starting at dayEnd belongs to the next day
+        keep = numpy.array([t < dayEnd for t in series['time']], dtype=bool)
+        if not keep.any():
+            series = None
+        else:
+            for key in series.keys():
+                if key not in _fixedKeys:
+                    series[key] = series[key][keep]
+    if series is not None and outDir is not None:
+        writeConvSeries(series, os.path.join(
+            outDir, '{:%Y%m%d}.{:s}.conv.h5'.format(day, hemi)), hemi=hemi)
+    return day, series, time.time() - t0
+
+
+def convSeriesBatch(days, hemi='north', nproc=None, outDir=None, **kwargs):
+    """Time series of convection parameters for many days, one day per job
+    in parallel processes.
+
+    Parameters
+    ----------
+    days : list
+        the days (datetimes at 00 UT) to work out
+    hemi : Optional[str]
+        'north' or 'south'.  default='north'
+    nproc : Optional[int]
+        the number of processes.  default=None, one per CPU core
+    outDir : Optional[str]
+        if given, the series of each day is also written there, as
+        YYYYMMDD.hemi.conv.h5.  default=None
+    **kwargs :
+        other keyword arguments of convTimeSeries, e.g. stations or src
+
+    Returns
+    -------
+    series : dict or None
+        the series of all of the days joined in time order, None if there is
+        no data
+
+    Example
+    -------
+        import datetime as dt
+        days = [dt.datetime(2011,4,1) + dt.timedelta(days=i)
+                for i in range(30)]
+        series = pydarn.proc.conv.convSeriesBatch(days, nproc=4,
+                                                  stations=[(75., 0.)])
+
+    """
+    import os
+    import multiprocessing
+
+    if outDir is not None and not os.path.isdir(outDir):
+        os.makedirs(outDir)
+    if nproc is None:
+        nproc = multiprocessing.cpu_count()
+    nproc = max(1, min(nproc, len(days)))
+
+    jobs = [(day, hemi, outDir, kwargs) for day in days]
+    if nproc == 1:
+        results = (_seriesDay(job) for job in jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(nproc)
+        results = pool.imap_unordered(_seriesDay, jobs)
+
+    done = {}
+    try:
+        for day, series, seconds in results:
+            done[day] = series
+            nrec = 0 if series is None else len(series['time'])
+            logging.info('{:d}/{:d} {:%Y%m%d}: {:d} records, {:.1f} '
+                         's'.format(len(done), len(jobs), day, nrec, seconds))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return joinConvSeries([done[day] for day in sorted(done)])
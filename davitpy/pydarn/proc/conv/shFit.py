@@ -0,0 +1,562 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2012  VT SuperDARN Lab
+# Full license can be found in LICENSE.txt
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""shFit module
+
+Evaluate the spherical harmonic fits of the electrostatic potential stored
+in map files (the Np2 coefficients, fitorder, latmin and lonshft of a
+:class:`pydarn.sdio.sdDataTypes.mapData` record) at any points.
+
+The fit is expanded on a basis of associated Legendre functions of the
+stretched colatitude times cos(m*phi) and sin(m*phi).  The basis matrices
+only depend on the fit order, latmin, lonshft and the points, so they are
+worked out once and kept; evaluating a record is then one matrix product,
+and a stack of records with the same fit set up is a single product.
+
+Classes
+-----------------------------------------
+shBasis         basis matrices of a fit at a set of points
+-----------------------------------------
+
+Functions
+-----------------------------------------
+indexLgndr      index of a coefficient in Np2
+legendreTable   associated Legendre functions, for arrays of points
+efieldOperators coefficient matrices of the electric field
+getBasis        a cached shBasis
+mapGrid         the lat/lon grid the potential is drawn on
+mapPotential    potential of a map record
+mapEField       electric field of a map record
+mapVelocity     fitted velocity of a map record
+-----------------------------------------
+
+References
+-----------------------------------------
+Ruohoniemi, J. M., and K. B. Baker (1998), Large-scale imaging of
+high-latitude convection with Super Dual Auroral Radar Network HF radar
+observations, J. Geophys. Res., 103(A9), 20797-20811.
+-----------------------------------------
+
+"""
+import logging
+import numpy
+
+# Earth radius [m]
+radEarthMtrs = 6371. * 1000.
+# Altitude of the E x B drift [m]
+altitude = 300. * 1000.
+# Magnetic field strength at the pole [T]
+bFldPolar = -0.62e-4
+
+# Bases already worked out, by fit set up and points
+_basisCache = {}
+_basisCacheSize = 16
+
+# Electric field operators already worked out, by fit order
+_operatorCache = {}
+
+
+def indexLgndr(l, m):
+    """The index in Np2 of the cos(m*phi) coefficient of P_l^m.  The
+    sin(m*phi) coefficient (m > 0) follows it.
+
+    Parameters
+    ----------
+    l : int
+        degree
+    m : int
+        order, 0 <= m <= l
+
+    Returns
+    -------
+    k : int
+
+    """
+    if m == 0:
+        return l**2
+    return l**2 + 2 * m - 1
+
+
+def legendreTable(order, x):
+    """Associated Legendre functions P_l^m(x) for 0 <= m <= l <= order, at
+    every point of x at once.  The Condon-Shortley phase is included, as in
+    scipy.special.lpmn.
+
+    Parameters
+    ----------
+    order : int
+        the highest degree and order
+    x : numpy.ndarray
+        the points, -1 <= x <= 1
+
+    Returns
+    -------
+    plm : numpy.ndarray
+        (len(x), order+1, order+1) array, plm[:, m, l] is P_l^m(x).  The
+        [m, l] layout is that of scipy.special.lpmn, and terms with m > l
+        are zero.
+
+    """
+    x = numpy.asarray(x, dtype=float).ravel()
+    plm = numpy.zeros((len(x), order + 1, order + 1))
+    s = numpy.sqrt(numpy.maximum(1. - x**2, 0.))
+
+    pmm = numpy.ones(len(x))
+    for m in range(order + 1):
+        if m > 0:
+            pmm = -(2. * m - 1.) * s * pmm
+        plm[:, m, m] = pmm
+        if m < order:
+            plm[:, m, m + 1] = x * (2. * m + 1.) * pmm
+        for l in range(m + 2, order + 1):
+            plm[:, m, l] = ((2. * l - 1.) * x * plm[:, m, l - 1] -
+                            (l + m - 1.) * plm[:, m, l - 2]) / (l - m)
+    return plm
+
+
+def efieldOperators(order):
+    """Matrices turning the potential coefficients of a fit into the
+    coefficients, on the same basis, of the parts of its electric field.
+    They only depend on the fit order, and are kept once made.
+
+    With P the basis functions P_l^m(cos(alpha*theta)) cos/sin(m*phi) of the
+    potential and c its coefficients,
+
+        -dV/dtheta = alpha * (cot(alpha*theta) P.(lDiag*c)
+                              + csc(alpha*theta) P.(shift c))
+        -dV/dphi   = P.(dPhi c)
+
+    Parameters
+    ----------
+    order : int
+        the order of the fit (fitorder)
+
+    Returns
+    -------
+    lDiag : numpy.ndarray
+        (nCoeff) -l of each coefficient
+    shift : numpy.ndarray
+        (nCoeff, nCoeff) moves the coefficient of P_l^m to P_(l-1)^m,
+        times (l + m)
+    dPhi : numpy.ndarray
+        (nCoeff, nCoeff) swaps the cos and sin coefficients of each P_l^m,
+        times m and -m
+
+    """
+    order = int(order)
+    if order in _operatorCache:
+        return _operatorCache[order]
+
+    nCoeff = (order + 1)**2
+    lDiag = numpy.zeros(nCoeff)
+    shift = numpy.zeros((nCoeff, nCoeff))
+    dPhi = numpy.zeros((nCoeff, nCoeff))
+    for m in range(order + 1):
+        for l in range(m, order + 1):
+            k = indexLgndr(l, m)
+            nk = 1 if m == 0 else 2
+            lDiag[k:k + nk] = -l
+            if l > m:
+                kd = indexLgndr(l - 1, m)
+                for j in range(nk):
+                    shift[kd + j, k + j] = l + m
+            if m > 0:
+                # d/dphi of cos(m*phi) is -m sin(m*phi), and of sin(m*phi)
+                # is m cos(m*phi); the field is minus that
+                dPhi[k + 1, k] = m
+                dPhi[k, k + 1] = -m
+
+    _operatorCache[order] = (lDiag, shift, dPhi)
+    return _operatorCache[order]
+
+
+class shBasis(object):
+    """The basis matrices of a spherical harmonic potential fit at a set of
+    points.  The potential, electric field and fitted velocity of a record
+    are the products of these matrices with its coefficients.
+
+    Parameters
+    ----------
+    order : int
+        the order of the fit (fitorder)
+    latmin : float
+        the lowest magnetic latitude of the fit (latmin)
+    mlats : numpy.ndarray
+        magnetic latitudes of the points [deg]
+    mlons : numpy.ndarray
+        magnetic longitudes of the points [deg], the same shape as mlats
+    lonshft : Optional[float]
+        the longitude shift of the fit (lonshft).  default=0.
+
+    Attributes
+    ----------
+    order : int
+    latmin : float
+    lonshft : float
+    shape : tuple
+        the shape of the points
+    nCoeff : int
+        the number of coefficients, (order + 1)**2
+    potMatrix : numpy.ndarray
+        (points, nCoeff) matrix giving the potential [V]
+    inside : numpy.ndarray
+        True at the points poleward of latmin, where the fit applies
+
+    Methods
+    -------
+    potential
+        the potential at the points
+    efield
+        the electric field at the points
+    velocity
+        the E x B velocity at the points
+    velMagnAzm
+        the magnitude and azimuth of the velocity
+
+    Notes
+    -----
+    The longitude of a point in the frame of the fit is its mlon minus
+    lonshft.  coeffs given to the methods may be a single Np2 vector, or an
+    (nCoeff, nRecords) array of them, in which case every result has an
+    extra last dimension of nRecords.
+
+    Example
+    -------
+        basis = shBasis(8, 60., mlats, mlons)
+        pots = basis.potential(numpy.array(mapRecs[0].Np2))
+
+    """
+
+    def __init__(self, order, latmin, mlats, mlons, lonshft=0.):
+        mlats = numpy.asarray(mlats, dtype=float)
+        mlons = numpy.asarray(mlons, dtype=float)
+        assert(mlats.shape == mlons.shape), \
+            logging.error('mlats and mlons must have the same shape')
+
+        self.order = int(order)
+        self.latmin = float(latmin)
+        self.lonshft = float(lonshft)
+        self.shape = mlats.shape
+        self.nCoeff = (self.order + 1)**2
+
+        # the absolute part is for the southern hemisphere.  The colatitude
+        # is stretched so that latmin maps to pi
+        self._theta = numpy.deg2rad(90. - numpy.absolute(mlats.ravel()))
+        thetaMax = numpy.deg2rad(90. - numpy.absolute(self.latmin))
+        self._alpha = numpy.pi / thetaMax
+        self._tPrime = self._alpha * self._theta
+        self._phi = numpy.deg2rad(mlons.ravel() - self.lonshft)
+        self.inside = numpy.absolute(mlats) > numpy.absolute(self.latmin)
+
+        plm = legendreTable(self.order, numpy.cos(self._tPrime))
+        # cos(m*phi) and sin(m*phi) for every m, worked out once
+        m = numpy.arange(self.order + 1)
+        cosm = numpy.cos(numpy.outer(self._phi, m))
+        sinm = numpy.sin(numpy.outer(self._phi, m))
+
+        self.potMatrix = numpy.zeros((len(self._phi), self.nCoeff))
+        for m in range(self.order + 1):
+            for l in range(m, self.order + 1):
+                k = indexLgndr(l, m)
+                if m == 0:
+                    self.potMatrix[:, k] = plm[:, 0, l]
+                else:
+                    self.potMatrix[:, k] = plm[:, m, l] * cosm[:, m]
+                    self.potMatrix[:, k + 1] = plm[:, m, l] * sinm[:, m]
+
+        # the factors of the derivatives that depend on the point; the poles
+        # of the stretched and the true colatitude are left at zero
+        npts = len(self._phi)
+        qPrime = self._tPrime != 0.
+        q = self._theta != 0.
+        self._cotP = numpy.zeros(npts)
+        self._cscP = numpy.zeros(npts)
+        self._cotP[qPrime] = numpy.cos(self._tPrime[qPrime]) / \
+            numpy.sin(self._tPrime[qPrime])
+        self._cscP[qPrime] = 1. / numpy.sin(self._tPrime[qPrime])
+        self._csc = numpy.zeros(npts)
+        self._csc[q] = 1. / numpy.sin(self._theta[q])
+
+    def __repr__(self):
+        return 'shBasis: order {:d}, latmin {:.1f}, {:d} points\n'.format(
+            self.order, self.latmin, len(self._phi))
+
+    def _shaped(self, values):
+        """Give a result the shape of the points"""
+        return values.reshape(self.shape + values.shape[1:])
+
+    def _coeffs(self, coeffs):
+        coeffs = numpy.asarray(coeffs, dtype=float)
+        assert(coeffs.shape[0] == self.nCoeff), \
+            logging.error('expected {:d} coefficients for order {:d}, got '
+                          '{:d}'.format(self.nCoeff, self.order,
+                                        coeffs.shape[0]))
+        return coeffs
+
+    def potential(self, coeffs):
+        """The potential at the points.
+
+        Parameters
+        ----------
+        coeffs : numpy.ndarray
+            the Np2 coefficients of a record, or (nCoeff, nRecords) of them
+
+        Returns
+        -------
+        pot : numpy.ndarray
+            the potential [V], zero equatorward of latmin
+
+        """
+        pot = numpy.dot(self.potMatrix, self._coeffs(coeffs))
+        pot[~self.inside.ravel()] = 0.
+        return self._shaped(pot)
+
+    def efield(self, coeffs):
+        """The electric field at the points.
+
+        Parameters
+        ----------
+        coeffs : numpy.ndarray
+            the Np2 coefficients of a record, or (nCoeff, nRecords) of them
+
+        Returns
+        -------
+        eTheta : numpy.ndarray
+            the colatitude (southward) component [V/m]
+        ePhi : numpy.ndarray
+            the longitude (eastward) component [V/m]
+
+        """
+        coeffs = self._coeffs(coeffs)
+        lDiag, shift, dPhi = efieldOperators(self.order)
+        cotP, cscP, csc = self._cotP, self._cscP, self._csc
+        if coeffs.ndim == 2:
+            cotP, cscP, csc = cotP[:, None], cscP[:, None], csc[:, None]
+
+        # E = -grad(potential).  The derivatives of the basis functions are
+        # sums of basis functions, so they come from the potential basis
+        # applied to transformed coefficients
+        eTheta = self._alpha / radEarthMtrs * \
+            (cotP * numpy.dot(self.potMatrix, (lDiag * coeffs.T).T) +
+             cscP * numpy.dot(self.potMatrix, numpy.dot(shift, coeffs)))
+        ePhi = csc / radEarthMtrs * \
+            numpy.dot(self.potMatrix, numpy.dot(dPhi, coeffs))
+        return self._shaped(eTheta), self._shaped(ePhi)
+
+    def velocity(self, coeffs):
+        """The E x B drift velocity at the points.
+
+        Parameters
+        ----------
+        coeffs : numpy.ndarray
+            the Np2 coefficients of a record, or (nCoeff, nRecords) of them
+
+        Returns
+        -------
+        vTheta : numpy.ndarray
+            the colatitude (southward) component [m/s]
+        vPhi : numpy.ndarray
+            the longitude (eastward) component [m/s]
+
+        """
+        eTheta, ePhi = self.efield(coeffs)
+        bFldMagn = bFldPolar * (1. - 3. * altitude / radEarthMtrs) * \
+            numpy.sqrt(3. * numpy.square(numpy.cos(self._theta)) + 1.) / 2.
+        bFldMagn = self._shaped(bFldMagn)
+        if eTheta.ndim > len(self.shape):
+            bFldMagn = bFldMagn[..., numpy.newaxis]
+        return ePhi / bFldMagn, -eTheta / bFldMagn
+
+    def velMagnAzm(self, coeffs, hemi='north'):
+        """The magnitude and azimuth of the velocity at the points.
+
+        Parameters
+        ----------
+        coeffs : numpy.ndarray
+            the Np2 coefficients of a record, or (nCoeff, nRecords) of them
+        hemi : Optional[str]
+            'north' or 'south'.  default='north'
+
+        Returns
+        -------
+        velMagn : numpy.ndarray
+            the speed [m/s]
+        velAzm : numpy.ndarray
+            the azimuth [deg], as drawn by MapConv; zero where there is no
+            flow
+
+        """
+        vTheta, vPhi = self.velocity(coeffs)
+        velMagn = numpy.sqrt(numpy.square(vTheta) + numpy.square(vPhi))
+        if hemi == 'south':
+            velAzm = numpy.rad2deg(numpy.arctan2(vPhi, vTheta))
+        else:
+            velAzm = numpy.rad2deg(numpy.arctan2(vPhi, -vTheta))
+        velAzm[velMagn == 0.] = 0.
+        return velMagn, velAzm
+
+
+def getBasis(order, latmin, mlats, mlons, lonshft=0.):
+    """The shBasis of a fit set up at a set of points, kept from an earlier
+    call when there is one.
+
+    Parameters
+    ----------
+    order : int
+        the order of the fit (fitorder)
+    latmin : float
+        the lowest magnetic latitude of the fit (latmin)
+    mlats : numpy.ndarray
+        magnetic latitudes of the points [deg]
+    mlons : numpy.ndarray
+        magnetic longitudes of the points [deg]
+    lonshft : Optional[float]
+        the longitude shift of the fit (lonshft).  default=0.
+
+    Returns
+    -------
+    basis : shBasis
+
+    """
+    mlats = numpy.asarray(mlats, dtype=float)
+    mlons = numpy.asarray(mlons, dtype=float)
+    key = (int(order), float(latmin), float(lonshft), mlats.shape,
+           mlats.tostring(), mlons.tostring())
+    if key not in _basisCache:
+        if len(_basisCache) >= _basisCacheSize:
+            _basisCache.clear()
+        _basisCache[key] = shBasis(order, latmin, mlats, mlons,
+                                   lonshft=lonshft)
+    return _basisCache[key]
+
+
+def _recordBasis(mapData, mlats, mlons):
+    """The basis of a map record at a set of points"""
+    lonshft = mapData.lonshft if mapData.lonshft is not None else 0.
+    return getBasis(mapData.fitorder, mapData.latmin, mlats, mlons,
+                    lonshft=lonshft)
+
+
+def mapGrid(hemi='north', latMin=30., latStep=1., lonStep=2.):
+    """The magnetic lat/lon grid MapConv draws potential contours on.
+
+    Parameters
+    ----------
+    hemi : Optional[str]
+        'north' or 'south'.  default='north'
+    latMin : Optional[float]
+        the lowest latitude of the grid [deg].  default=30.
+    latStep : Optional[float]
+        the latitude spacing [deg].  default=1.
+    lonStep : Optional[float]
+        the longitude spacing [deg].  default=2.
+
+    Returns
+    -------
+    mlats : numpy.ndarray
+        (longitudes, latitudes) array of magnetic latitudes
+    mlons : numpy.ndarray
+        (longitudes, latitudes) array of magnetic longitudes, 0 to 360
+
+    """
+    numLats = int((90. - latMin) / latStep)
+    numLongs = int(360. / lonStep) + 1
+    lats = numpy.arange(numLats) * latStep + latMin
+    if hemi == 'south':
+        lats = -lats
+    lons = numpy.arange(numLongs) * lonStep
+    mlons, mlats = numpy.meshgrid(lons, lats, indexing='ij')
+    return mlats, mlons
+
+
+def mapPotential(mapData, mlats, mlons):
+    """The potential of a map record at a set of points.
+
+    Parameters
+    ----------
+    mapData : pydarn.sdio.sdDataTypes.mapData
+        the map record
+    mlats : numpy.ndarray
+        magnetic latitudes of the points [deg]
+    mlons : numpy.ndarray
+        magnetic longitudes of the points [deg]
+
+    Returns
+    -------
+    pot : numpy.ndarray
+        the potential [V], zero equatorward of latmin
+
+    Example
+    -------
+        mlats, mlons = mapGrid('north')
+        pot = mapPotential(mapRec, mlats, mlons)
+
+    """
+    return _recordBasis(mapData, mlats, mlons).potential(mapData.Np2)
+
+
+def mapEField(mapData, mlats, mlons):
+    """The electric field of a map record at a set of points.
+
+    Parameters
+    ----------
+    mapData : pydarn.sdio.sdDataTypes.mapData
+        the map record
+    mlats : numpy.ndarray
+        magnetic latitudes of the points [deg]
+    mlons : numpy.ndarray
+        magnetic longitudes of the points [deg]
+
+    Returns
+    -------
+    eTheta : numpy.ndarray
+        the colatitude (southward) component [V/m]
+    ePhi : numpy.ndarray
+        the longitude (eastward) component [V/m]
+
+    """
+    return _recordBasis(mapData, mlats, mlons).efield(mapData.Np2)
+
+
+def mapVelocity(mapData, mlats, mlons, hemi='north'):
+    """The fitted velocity of a map record at a set of points.
+
+    Parameters
+    ----------
+    mapData : pydarn.sdio.sdDataTypes.mapData
+        the map record
+    mlats : numpy.ndarray
+        magnetic latitudes of the points [deg]
+    mlons : numpy.ndarray
+        magnetic longitudes of the points [deg]
+    hemi : Optional[str]
+        'north' or 'south'.  default='north'
+
+    Returns
+    -------
+    velMagn : numpy.ndarray
+        the speed [m/s]
+    velAzm : numpy.ndarray
+        the azimuth [deg]
+
+    Example
+    -------
+        vec = mapRec.grid.vector
+        magn, azm = mapVelocity(mapRec, vec.mlat, vec.mlon)
+
+    """
+    return _recordBasis(mapData, mlats, mlons).velMagnAzm(mapData.Np2,
+                                                          hemi=hemi)
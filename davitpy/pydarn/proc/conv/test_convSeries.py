@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# test_convSeries.py
+#
+# Comments: Functions to test the convection time series
+#-----------------------------------------------------------------------------
+"""This module contains routines to test the convSeries routines
+
+Functions
+-------------------------------------------------------------------------------
+make_test_columns     Build a small batch of map records as columns
+test_series_columns   Check the grouping and skipping of _seriesFromColumns
+test_series_file      Write a series and read it back
+-------------------------------------------------------------------------------
+"""
+import datetime as dt
+import numpy as np
+
+# Fixed order 3 coefficients, (order + 1)**2 of them
+test_coeffs = np.array([1.8e3, -1.2e4, 7.5e3, 2.9e3, -5.1e3, 1.1e3, 3.8e3,
+                        -2.2e3, 8.1e2, 4.9e2, -9.7e2, 6.6e2, -2.8e2, 2.1e2,
+                        -1.6e2, 1.2e2])
+
+
+def make_test_columns():
+    '''Build an sdColumnData object holding five map records.  Records 0, 2
+    and 4 share a fit set up, record 1 has a different order and latmin and
+    record 3 has no fit.
+
+    Returns
+    --------
+    cols : (sdColumnData)
+        The records as columns
+    fits : (list)
+        (order, latmin, lonshft, coeffs) of each record, None for record 3
+    '''
+    from davitpy.pydarn.sdio.sdDataTypes import sdColumnData
+
+    fits = [(2, 60., 0., test_coeffs[:9]),
+            (3, 58., 0., test_coeffs),
+            (2, 60., 0., 0.5 * test_coeffs[:9]),
+            None,
+            (2, 60., 0., -test_coeffs[:9])]
+
+    cols = sdColumnData(fType='map', hemi='north')
+    t0 = dt.datetime(2013, 1, 1)
+    for i, fit in enumerate(fits):
+        sTime = t0 + dt.timedelta(minutes=2 * i)
+        rec = {'pot.drop': 4.0e4 + i, 'IMF.Bz': -2.5,
+               'vector.mlat': [70. + j for j in range(i + 1)],
+               'vector.mlon': [10. * j for j in range(i + 1)]}
+        if fit is not None:
+            order, latmin, lonshft, coeffs = fit
+            rec.update({'fit.order': order, 'latmin': latmin,
+                        'lon.shft': lonshft, 'N+2': list(coeffs)})
+        cols.appendRecord(sTime, sTime + dt.timedelta(minutes=2), rec)
+    cols.finish()
+
+    return cols, fits
+
+
+def test_series_columns():
+    '''Evaluate a small batch of records, and check that each record with a
+    fit matches its own basis and the record without a fit is skipped
+
+    Returns
+    --------
+    series : (dict)
+        The series of the test records
+
+    Example
+    --------
+    In [1]: import test_convSeries
+    In [2]: series = test_convSeries.test_series_columns()
+    '''
+    from convSeries import _seriesFromColumns
+    from shFit import shBasis
+
+    cols, fits = make_test_columns()
+    mlats, mlons = np.meshgrid(np.arange(60., 90., 2.),
+                               np.arange(0., 360., 15.))
+    stations = (np.array([75., 85.]), np.array([30., 200.]))
+
+    series = _seriesFromColumns(cols, 'north', mlats, mlons, stations, True)
+
+    assert list(series['time']) == list(cols.sTime)
+    np.testing.assert_array_equal(series['nvec'], [1, 2, 3, 4, 5])
+    np.testing.assert_array_equal(series['potdrop'],
+                                  [4.0e4, 4.0e4 + 1, 4.0e4 + 2, 4.0e4 + 3,
+                                   4.0e4 + 4])
+    assert series['potential'].shape == (len(fits),) + mlats.shape
+
+    for i, fit in enumerate(fits):
+        if fit is None:
+            # the record without a fit is left as nan everywhere
+            assert np.isnan(series['fitorder'][i])
+            for key in ['gridPotMax', 'gridPotMin', 'gridCpcp']:
+                assert np.isnan(series[key][i])
+            assert np.isnan(series['stationPot'][i]).all()
+            assert np.isnan(series['potential'][i]).all()
+            continue
+
+        order, latmin, lonshft, coeffs = fit
+        assert series['fitorder'][i] == order
+        assert series['latmin'][i] == latmin
+
+        pots = shBasis(order, latmin, mlats, mlons,
+                       lonshft=lonshft).potential(coeffs)
+        np.testing.assert_allclose(series['potential'][i], pots,
+                                   rtol=1.0e-6)
+        np.testing.assert_allclose(series['gridPotMax'][i], pots.max(),
+                                   rtol=1.0e-12)
+        np.testing.assert_allclose(series['gridPotMin'][i], pots.min(),
+                                   rtol=1.0e-12)
+        iMax = np.argmax(pots)
+        assert series['gridPotMaxLat'][i] == mlats.ravel()[iMax]
+        assert series['gridPotMaxLon'][i] == mlons.ravel()[iMax]
+
+        stBasis = shBasis(order, latmin, stations[0], stations[1],
+                          lonshft=lonshft)
+        magn, azm = stBasis.velMagnAzm(coeffs)
+        np.testing.assert_allclose(series['stationPot'][i],
+                                   stBasis.potential(coeffs), rtol=1.0e-12)
+        np.testing.assert_allclose(series['stationVelMagn'][i], magn,
+                                   rtol=1.0e-12)
+        np.testing.assert_allclose(series['stationVelAzm'][i], azm,
+                                   rtol=1.0e-12)
+
+    np.testing.assert_array_equal(series['gridCpcp'],
+                                  series['gridPotMax'] - series['gridPotMin'])
+
+    return series
+
+
+def test_series_file():
+    '''Write the series of the test records to a file and check that every
+    array reads back unchanged
+
+    Returns
+    --------
+    series : (dict)
+        The series read back from the file
+
+    Example
+    --------
+    In [1]: import test_convSeries
+    In [2]: series = test_convSeries.test_series_file()
+    '''
+    import os
+    import tempfile
+    from convSeries import _seriesFromColumns, writeConvSeries, \
+        readConvSeries
+
+    cols, fits = make_test_columns()
+    mlats, mlons = np.meshgrid(np.arange(60., 90., 5.),
+                               np.arange(0., 360., 30.))
+    stations = (np.array([75., 85.]), np.array([30., 200.]))
+    inseries = _seriesFromColumns(cols, 'north', mlats, mlons, stations,
+                                  True)
+    inseries['gridMlat'], inseries['gridMlon'] = mlats, mlons
+    inseries['stationMlat'], inseries['stationMlon'] = stations
+
+    fd, name = tempfile.mkstemp(suffix='.h5')
+    os.close(fd)
+    try:
+        writeConvSeries(inseries, name, hemi='north')
+        series = readConvSeries(name)
+    finally:
+        os.remove(name)
+
+    assert sorted(series.keys()) == sorted(inseries.keys())
+    assert list(series['time']) == list(inseries['time'])
+    for key, vals in inseries.iteritems():
+        if key != 'time':
+            assert series[key].dtype == vals.dtype, key
+            np.testing.assert_array_equal(series[key], vals)
+
+    return series
@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# test_shFit.py
+#
+# Comments: Functions to test the spherical harmonic fit evaluation
+#-----------------------------------------------------------------------------
+"""This module contains routines to test the shFit routines against the
+per-point, per-coefficient loops MapConv.calcFitCnvVel and
+MapConv.calcCnvPots used before
+
+Functions
+-------------------------------------------------------------------------------
+loop_fit_vel          Fitted velocity from the loops of the old calcFitCnvVel
+test_fit_vel          Compare shBasis.velMagnAzm with loop_fit_vel
+test_legendre_table   Compare legendreTable with scipy.special.lpmn
+loop_potential        Potential from the loops of the old calcCnvPots
+test_potential        Compare shBasis.potential, for stacked coefficients,
+                      with loop_potential
+test_cnv_pots         Compare MapConv.calcCnvPots with loop_potential
+-------------------------------------------------------------------------------
+"""
+import numpy as np
+
+# Fixed order 4 coefficients, (order + 1)**2 of them
+test_coeffs = np.array([2.1e3, -1.5e4, 8.2e3, 3.3e3, -6.0e3, 1.2e3, 4.4e3,
+                        -2.7e3, 9.0e2, 5.5e2, -1.1e3, 7.7e2, -3.2e2, 2.4e2,
+                        -1.9e2, 1.3e2, 6.1e1, -8.8e1, 4.2e1, -2.5e1, 1.7e1,
+                        -9.5, 6.3, -3.1, 1.4])
+
+
+def loop_fit_vel(coeffs, order, latmin, mlats, mlons, hemisphere=1):
+    '''The fitted velocity magnitude and azimuth, worked out point by point
+    and coefficient by coefficient as MapConv.calcFitCnvVel did before it
+    used shFit
+
+    Parameters
+    ----------
+    coeffs : (numpy.ndarray)
+        Np2 coefficients of the fit
+    order : (int)
+        Order of the fit
+    latmin : (float)
+        Lowest magnetic latitude of the fit (degrees)
+    mlats : (numpy.ndarray)
+        Magnetic latitudes of the points (degrees)
+    mlons : (numpy.ndarray)
+        Magnetic longitudes of the points (degrees)
+    hemisphere : (int)
+        1 for the north, -1 for the south (default=1)
+
+    Returns
+    --------
+    velMagn : (numpy.ndarray)
+        Fitted velocity magnitude (m/s)
+    velAzm : (numpy.ndarray)
+        Fitted velocity azimuth (degrees)
+    '''
+    from scipy.special import lpmn
+    from shFit import indexLgndr, radEarthMtrs
+
+    theta = np.deg2rad(90. - np.absolute(mlats))
+    thetaMax = np.deg2rad(90. - np.absolute(latmin))
+    alpha = np.pi / thetaMax
+    thetaPrime = alpha * theta
+    plmFit = np.array([lpmn(order, order, x)[0] for x in np.cos(thetaPrime)])
+    phi = np.deg2rad(mlons)
+
+    kMax = indexLgndr(order, order)
+    thetaECoeffs = np.zeros((kMax + 2, len(theta)))
+    phiECoeffs = np.zeros((kMax + 2, len(theta)))
+    qPrime = np.where(thetaPrime != 0.)[0]
+    q = np.where(theta != 0.)[0]
+
+    for m in range(order + 1):
+        for L in range(m, order + 1):
+            k3 = indexLgndr(L, m)
+            k4 = indexLgndr(L, m)
+
+            thetaECoeffs[k4, qPrime] -= coeffs[k3] * alpha * L * \
+                np.cos(thetaPrime[qPrime]) / np.sin(thetaPrime[qPrime]) / \
+                radEarthMtrs
+            phiECoeffs[k4, q] -= coeffs[k3 + 1] * m / np.sin(theta[q]) / \
+                radEarthMtrs
+            phiECoeffs[k4 + 1, q] += coeffs[k3] * m / np.sin(theta[q]) / \
+                radEarthMtrs
+
+            k1 = indexLgndr(L + 1, m) if L < order else -1
+            k2 = indexLgndr(L, m)
+            if k1 >= 0:
+                thetaECoeffs[k2, qPrime] += coeffs[k1] * alpha * \
+                    (L + 1 + m) / np.sin(thetaPrime[qPrime]) / radEarthMtrs
+
+            if m > 0:
+                k3 += 1
+                k4 += 1
+                if k1 >= 0:
+                    k1 += 1
+                k2 += 1
+
+                thetaECoeffs[k4, qPrime] -= coeffs[k3] * alpha * L * \
+                    np.cos(thetaPrime[qPrime]) / \
+                    np.sin(thetaPrime[qPrime]) / radEarthMtrs
+                if k1 >= 0:
+                    thetaECoeffs[k2, qPrime] += coeffs[k1] * alpha * \
+                        (L + 1 + m) / np.sin(thetaPrime[qPrime]) / \
+                        radEarthMtrs
+
+    thetaEcomp = np.zeros(theta.shape)
+    phiEcomp = np.zeros(theta.shape)
+    for m in range(order + 1):
+        for L in range(m, order + 1):
+            k = indexLgndr(L, m)
+            if m == 0:
+                thetaEcomp += thetaECoeffs[k, :] * plmFit[:, m, L]
+                phiEcomp += phiECoeffs[k, :] * plmFit[:, m, L]
+            else:
+                thetaEcomp += plmFit[:, m, L] * \
+                    (thetaECoeffs[k, :] * np.cos(m * phi) +
+                     thetaECoeffs[k + 1, :] * np.sin(m * phi))
+                phiEcomp += plmFit[:, m, L] * \
+                    (phiECoeffs[k, :] * np.cos(m * phi) +
+                     phiECoeffs[k + 1, :] * np.sin(m * phi))
+
+    bFldMagn = -0.62e-4 * (1. - 3. * 300.e3 / radEarthMtrs) * \
+        np.sqrt(3.0 * np.square(np.cos(theta)) + 1.) / 2
+    vTheta = phiEcomp / bFldMagn
+    vPhi = -thetaEcomp / bFldMagn
+
+    velMagn = np.sqrt(np.square(vTheta) + np.square(vPhi))
+    velAzm = np.zeros(velMagn.shape)
+    nz = velMagn != 0.
+    if hemisphere == -1:
+        velAzm[nz] = np.rad2deg(np.arctan2(vPhi[nz], vTheta[nz]))
+    else:
+        velAzm[nz] = np.rad2deg(np.arctan2(vPhi[nz], -vTheta[nz]))
+
+    return velMagn, velAzm
+
+
+def test_fit_vel(order=4, latmin=60.):
+    '''Compare the fitted velocity of shBasis.velMagnAzm with the loops of
+    the old calcFitCnvVel in both hemispheres, at points that include the
+    pole and latitudes below latmin
+
+    Parameters
+    ----------
+    order : (int)
+        Order of the fit, at most 4 for the fixed coefficients (default=4)
+    latmin : (float)
+        Lowest magnetic latitude of the fit (default=60.0)
+
+    Returns
+    --------
+    maxDiff : (dict)
+        Largest magnitude difference, relative to the largest speed, and
+        absolute azimuth difference (degrees) for each hemisphere
+
+    Example
+    --------
+    In [1]: import test_shFit
+    In [2]: maxDiff = test_shFit.test_fit_vel()
+    '''
+    from shFit import shBasis
+
+    coeffs = test_coeffs[:(order + 1)**2]
+    lats = np.array([90., 89.5, 85., 77.3, 70., 64.2, 60.5, 58., 52.])
+    lons = np.array([0., 37.5, 121., 180., 233.4, -45., 300., 15., 270.])
+
+    maxDiff = dict()
+    for hemi, hemisphere in [('north', 1), ('south', -1)]:
+        mlats = hemisphere * lats
+        basis = shBasis(order, hemisphere * latmin, mlats, lons)
+        velMagn, velAzm = basis.velMagnAzm(coeffs, hemi=hemi)
+        oldMagn, oldAzm = loop_fit_vel(coeffs, order, hemisphere * latmin,
+                                       mlats, lons, hemisphere=hemisphere)
+
+        # azimuths are only compared where there is flow to point
+        flow = oldMagn > 1.0e-6 * oldMagn.max()
+        magnDiff = np.absolute(velMagn - oldMagn) / oldMagn.max()
+        azmDiff = np.absolute((velAzm - oldAzm + 180.) % 360. - 180.)[flow]
+        assert magnDiff.max() < 1.0e-9, \
+            '{:s} magnitudes differ by {:g}'.format(hemi, magnDiff.max())
+        assert azmDiff.max() < 1.0e-7, \
+            '{:s} azimuths differ by {:g}'.format(hemi, azmDiff.max())
+        maxDiff[hemi] = (magnDiff.max(), azmDiff.max())
+
+    return maxDiff
+
+
+def test_legendre_table(order=6):
+    '''Compare the associated Legendre functions of legendreTable with those
+    of scipy.special.lpmn, at points that include both ends and the middle
+
+    Parameters
+    ----------
+    order : (int)
+        Highest degree and order of the functions (default=6)
+
+    Returns
+    --------
+    maxDiff : (float)
+        Largest difference, relative to the largest function value
+
+    Example
+    --------
+    In [1]: import test_shFit
+    In [2]: maxDiff = test_shFit.test_legendre_table()
+    '''
+    from scipy.special import lpmn
+    from shFit import legendreTable
+
+    x = np.array([-1., -0.93, -0.5, -0.1234, 0., 0.3, 0.707, 0.99, 1.])
+    plm = legendreTable(order, x)
+    oldPlm = np.array([lpmn(order, order, xx)[0] for xx in x])
+
+    assert plm.shape == oldPlm.shape
+    maxDiff = np.absolute(plm - oldPlm).max() / np.absolute(oldPlm).max()
+    assert maxDiff < 1.0e-13, \
+        'Legendre functions differ by {:g}'.format(maxDiff)
+
+    return maxDiff
+
+
+def loop_potential(coeffs, order, latmin, mlats, mlons):
+    '''The potential, worked out point by point and coefficient by
+    coefficient as MapConv.calcCnvPots did before it used shFit
+
+    Parameters
+    ----------
+    coeffs : (numpy.ndarray)
+        Np2 coefficients of the fit
+    order : (int)
+        Order of the fit
+    latmin : (float)
+        Lowest magnetic latitude of the fit (degrees)
+    mlats : (numpy.ndarray)
+        Magnetic latitudes of the points (degrees)
+    mlons : (numpy.ndarray)
+        Magnetic longitudes of the points in the frame of the fit (degrees)
+
+    Returns
+    --------
+    pot : (numpy.ndarray)
+        Potential (V), zero at and equatorward of latmin
+    '''
+    from scipy.special import lpmn
+    from shFit import indexLgndr
+
+    theta = np.deg2rad(90. - np.absolute(mlats.ravel()))
+    phi = np.deg2rad(mlons.ravel())
+    alpha = np.pi / np.deg2rad(90. - np.absolute(latmin))
+    plmFit = np.array([lpmn(order, order, x)[0]
+                       for x in np.cos(alpha * theta)])
+
+    v = np.zeros(phi.shape)
+    for m in range(order + 1):
+        for L in range(m, order + 1):
+            k = indexLgndr(L, m)
+            if m == 0:
+                v = v + coeffs[k] * plmFit[:, 0, L]
+            else:
+                v = v + coeffs[k] * np.cos(m * phi) * plmFit[:, m, L] + \
+                    coeffs[k + 1] * np.sin(m * phi) * plmFit[:, m, L]
+    v[np.absolute(mlats.ravel()) <= np.absolute(latmin)] = 0.
+
+    return v.reshape(mlats.shape)
+
+
+def test_potential(order=3, latmin=58.):
+    '''Compare the potential of shBasis.potential with loop_potential for
+    several records at once, passed as stacked coefficients
+
+    Parameters
+    ----------
+    order : (int)
+        Order of the fit, at most 4 for the fixed coefficients (default=3)
+    latmin : (float)
+        Lowest magnetic latitude of the fit (default=58.0)
+
+    Returns
+    --------
+    pots : (numpy.ndarray)
+        (points, records) potential of the stacked records (V)
+
+    Example
+    --------
+    In [1]: import test_shFit
+    In [2]: pots = test_shFit.test_potential()
+    '''
+    from shFit import shBasis
+
+    n = (order + 1)**2
+    stacked = np.array([test_coeffs[:n], -0.5 * test_coeffs[:n],
+                        test_coeffs[:n][::-1]]).T
+    mlats = np.array([90., 89.5, 85., 77.3, 70., 64.2, 58.5, 58., 52.])
+    mlons = np.array([0., 37.5, 121., 180., 233.4, -45., 300., 15., 270.])
+
+    basis = shBasis(order, latmin, mlats, mlons)
+    pots = basis.potential(stacked)
+    assert pots.shape == (len(mlats), stacked.shape[1])
+    for i in range(stacked.shape[1]):
+        oldPot = loop_potential(stacked[:, i], order, latmin, mlats, mlons)
+        np.testing.assert_allclose(pots[:, i], oldPot, rtol=0.,
+                                   atol=1.0e-10 * np.absolute(oldPot).max())
+        # a single record gives the same as its column of the stack
+        np.testing.assert_allclose(basis.potential(stacked[:, i]),
+                                   pots[:, i], rtol=1.0e-12)
+
+    return pots
+
+
+def test_cnv_pots(order=3):
+    '''Compare the potential grid of MapConv.calcCnvPots with loop_potential
+    in both hemispheres, for a fit with a longitude shift
+
+    Parameters
+    ----------
+    order : (int)
+        Order of the fit, at most 4 for the fixed coefficients (default=3)
+
+    Returns
+    --------
+    potArrs : (dict)
+        The calcCnvPots potential (kV) for each hemisphere
+
+    Example
+    --------
+    In [1]: import test_shFit
+    In [2]: potArrs = test_shFit.test_cnv_pots()
+    '''
+    from davitpy.pydarn.plotting.plotMapGrd import MapConv
+
+    class fakeRec(object):
+        pass
+
+    potArrs = dict()
+    for hemi, hemisphere in [('north', 1), ('south', -1)]:
+        conv = fakeRec()
+        conv.hemi = hemi
+        conv.mapData = fakeRec()
+        conv.mapData.Np2 = list(test_coeffs[:(order + 1)**2])
+        conv.mapData.fitorder = order
+        conv.mapData.latmin = hemisphere * 62.
+        conv.mapData.latshft = 0.
+        conv.mapData.lonshft = 7.5
+
+        latCntr, lonCntr, potArr = MapConv.calcCnvPots.im_func(conv)
+
+        # the old grid: 60 latitudes from 30 degrees, 181 longitudes
+        assert potArr.shape == (181, 60)
+        np.testing.assert_array_equal(latCntr[0],
+                                      hemisphere * np.arange(30., 90.))
+        np.testing.assert_array_equal(lonCntr[:, 0],
+                                      np.arange(181) * 2. + 7.5)
+
+        oldPot = loop_potential(np.array(conv.mapData.Np2), order,
+                                conv.mapData.latmin, latCntr,
+                                lonCntr - 7.5) / 1000.
+        np.testing.assert_allclose(potArr, oldPot, rtol=0.,
+                                   atol=1.0e-10 * np.absolute(oldPot).max())
+        potArrs[hemi] = potArr
+
+    return potArrs
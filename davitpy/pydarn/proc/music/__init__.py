@@ -10,6 +10,7 @@ DEV: functions/modules/classes with a * have not been developed yet
 """
 #import sigio
 from music import *
+from musicBatch import *
 #from signal import *
 #from sigproc import *
 #from compare import *
@@ -319,9 +319,14 @@ class musicDataObj(object):
         self.history = {datetime.datetime.now():comment}
 
     def copy(self,newsig,comment):
-        """Copy a musicDataObj object.  This deep copies data and metadata, updates the serial
+        """Copy a musicDataObj object.  This copies the metadata and history, updates the serial
         number, and logs a comment in the history.  Methods such as plot are kept as a reference.
 
+        The time and data arrays and the arrays of the fov are shared with the original (copy-on-write),
+        so a copy costs almost no memory.  Processing routines must replace these arrays on the new object
+        rather than modify them in place.  The fov object itself is copied, so its attributes may be
+        reassigned without affecting the original.
+
         Parameters
         ----------
         newsig : str
@@ -343,9 +348,7 @@ class musicDataObj(object):
         setattr(self.parent,newsig,copy.copy(self))
         newsigobj = getattr(self.parent,newsig)
 
-        newsigobj.time      = copy.deepcopy(self.time)
-        newsigobj.data      = copy.deepcopy(self.data)
-        newsigobj.fov       = copy.deepcopy(self.fov)
+        newsigobj.fov       = copy.copy(self.fov)
         newsigobj.metadata  = copy.deepcopy(self.metadata)
         newsigobj.history   = copy.deepcopy(self.history)
 
@@ -356,11 +359,14 @@ class musicDataObj(object):
         return newsigobj
   
     def setActive(self):
-        """Sets this signal as the currently active signal.
+        """Sets this signal as the currently active signal.  If the parent musicArray has a memoryBudget,
+        older data sets are spilled to disk or dropped to keep within it.
 
         Written by Nathaniel A. Frissell, Fall 2013
         """
         self.parent.active = self
+        if getattr(self.parent,'memoryBudget',None) is not None:
+            self.parent.enforceMemoryBudget()
 
     def nyquistFrequency(self,timeVec=None):
         """Calculate the Nyquist frequency of a vt sigStruct signal.
@@ -419,7 +425,6 @@ class musicDataObj(object):
             logging.warning('   Maximum difference in sampling rates is ' + str(maxDt) + ' sec.')
             logging.warning('   Using average sampling period of ' + str(avg) + ' sec.')
             samplePeriod = avg
-            import ipdb; ipdb.set_trace()
 
         return samplePeriod
 
@@ -501,7 +506,10 @@ class musicArray(object):
     Parameters
     ----------
     myPtr : pydarn.sdio.radDataTypes.radDataPtr
-        contains the pipeline to the data we are after
+        contains the pipeline to the data we are after.  The data are read in one pass with
+        myPtr.readColumns, and grouped into scans as myPtr.readScan would.  Unlike the earlier
+        readScan loop, this respects myPtr.bmnum (only that beam is loaded if it is set), and a
+        patterned scan left empty is skipped rather than ending the loading.
     sTime : Optional[datetime.datetime]
         start time UT (if None myPtr.sTime is used)
     eTime : Optional[datetime.datetime]
@@ -534,16 +542,33 @@ class musicArray(object):
         If False, truncate the array to the maximum dimensions that there is actually data.
         False will save space without throwing out any data, but sometimes it is easier to work
         with the full-size array.
+    memoryBudget : Optional[int]
+        Maximum number of bytes of data cubes to keep in memory.  When a new data set is made active, the data
+        of the oldest data sets are spilled to disk or dropped until the total is within the budget.  The
+        active data set is never released.  None (default) keeps everything in memory.
+    spillDir : Optional[str]
+        Directory in which to spill released data cubes as .npy files, which are then memory mapped
+        (copy-on-write) so that the data sets can still be used for plotting.  If None (default), released
+        data cubes are dropped (data set to None).
 
     Attributes
     ----------
     messages : list
 
     prm : 
+        radar operational parameters (mplgs, nave, noisesky, tfreq, ...) and time of each beam, as numpy arrays
+
+    memoryBudget : int or None
+
+    spillDir : str or None
 
     Methods
     -------
     get_data_sets
+    setMemoryBudget
+    dataBytes
+    releaseData
+    enforceMemoryBudget
 
     Example
     -------
@@ -565,10 +590,12 @@ class musicArray(object):
 
     """
     def __init__(self,myPtr,sTime=None,eTime=None,param='p_l',gscat=1,
-            fovElevation=None,fovModel='GS',fovCoords='geo',full_array=False):
+            fovElevation=None,fovModel='GS',fovCoords='geo',full_array=False,
+            memoryBudget=None,spillDir=None):
         from davitpy import pydarn
         # Create a list that can be used to store top-level messages.
         self.messages   = []
+        self.setMemoryBudget(memoryBudget,spillDir)
 
         no_data_message = 'No data for this time period.'
         # If no data, report and return.
@@ -579,137 +606,70 @@ class musicArray(object):
         if sTime == None: sTime = myPtr.sTime
         if eTime == None: eTime = myPtr.eTime
 
-        scanTimeList = []
-        dataList  = []
-        cpidList  = []
-        #Subscripts of columns in the dataList/dataArray
-        scanInx = 0
-        dateInx = 1
-        beamInx = 2
-        gateInx = 3
-        dataInx = 4
-
-        beamTime    = sTime
-        scanNr      = np.uint64(0)
-        fov         = None
+        #Read the beam soundings as columns, keeping only the fitted parameter we are after.
+        cols = myPtr.readColumns(fields=[param,'gflg'])
+        if cols is None or len(cols) == 0:
+            self.messages.append(no_data_message)
+            return
 
+        #Group the beams into scans, and stop after the first scan that reaches eTime.
+        scanInx     = cols.scanIndex()
+        inScan      = scanInx >= 0
+        beamInx     = np.where(inScan)[0]
+        if len(beamInx) == 0 or sTime >= eTime:
+            self.messages.append(no_data_message)
+            return
+        lastInx     = beamInx[np.append(np.diff(scanInx[beamInx]) != 0,True)]
+        reached     = np.where(cols.time[lastInx] >= eTime)[0]
+        if len(reached) > 0:
+            inScan  = np.logical_and(inScan,scanInx <= reached[0])
+            beamInx = np.where(inScan)[0]
 
-        # Create a place to store the prm data.
+        # Save all of the radar operational parameters.
         prm             = emptyObj()
-        prm.time        = []
-        prm.mplgs       = []
-        prm.nave        = []
-        prm.noisesearch = []
-        prm.scan        = []
-        prm.smsep       = []
-        prm.mplgexs     = []
-        prm.xcf         = []
-        prm.noisesky    = []
-        prm.rsep        = []
-        prm.mppul       = []
-        prm.inttsc      = []
-        prm.frang       = []
-        prm.bmazm       = []
-        prm.lagfr       = []
-        prm.ifmode      = []
-        prm.noisemean   = []
-        prm.tfreq       = []
-        prm.inttus      = []
-        prm.rxrise      = []
-        prm.mpinc       = []
-        prm.nrang       = []
-
-        while beamTime < eTime:
-            #Load one scan into memory.
-#            myScan = pydarn.sdio.radDataRead.radDataReadScan(myPtr)
-            myScan  = myPtr.readScan()
-            if myScan == None: break
-
-            goodScan = False # This flag turns to True as soon as good data is found for the scan.
-            for myBeam in myScan:
-                #Calculate the field of view if it has not yet been calculated.
-                if fov == None:
-                    radStruct = pydarn.radar.radStruct.radar(radId=myPtr.stid)
-                    site      = pydarn.radar.radStruct.site(radId=myPtr.stid,dt=sTime)
-                    fov       = pydarn.radar.radFov.fov(frang=myBeam.prm.frang, rsep=myBeam.prm.rsep, site=site,elevation=fovElevation,model=fovModel,coords=fovCoords)
-
-                #Get information from each beam in the scan.
-                beamTime = myBeam.time 
-                bmnum    = myBeam.bmnum
-
-                # Save all of the radar operational parameters.
-                prm.time.append(beamTime)
-                prm.mplgs.append(myBeam.prm.mplgs)
-                prm.nave.append(myBeam.prm.nave)
-                prm.noisesearch.append(myBeam.prm.noisesearch)
-                prm.scan.append(myBeam.prm.scan)
-                prm.smsep.append(myBeam.prm.smsep)
-                prm.mplgexs.append(myBeam.prm.mplgexs)
-                prm.xcf.append(myBeam.prm.xcf)
-                prm.noisesky.append(myBeam.prm.noisesky)
-                prm.rsep.append(myBeam.prm.rsep)
-                prm.mppul.append(myBeam.prm.mppul)
-                prm.inttsc.append(myBeam.prm.inttsc)
-                prm.frang.append(myBeam.prm.frang)
-                prm.bmazm.append(myBeam.prm.bmazm)
-                prm.lagfr.append(myBeam.prm.lagfr)
-                prm.ifmode.append(myBeam.prm.ifmode)
-                prm.noisemean.append(myBeam.prm.noisemean)
-                prm.tfreq.append(myBeam.prm.tfreq)
-                prm.inttus.append(myBeam.prm.inttus)
-                prm.rxrise.append(myBeam.prm.rxrise)
-                prm.mpinc.append(myBeam.prm.mpinc)
-                prm.nrang.append(myBeam.prm.nrang)
-
-                #Get the fitData.
-                fitDataList = getattr(myBeam.fit,param)
-                slist       = getattr(myBeam.fit,'slist')
-                gflag       = getattr(myBeam.fit,'gflg')
-
-                if len(slist) > 1:
-                    for (gate,data,flag) in zip(slist,fitDataList,gflag):
-                        #Get information from each gate in scan.  Skip record if the chosen ground scatter option is not met.
-                        if (gscat == 1) and (flag == 0): continue
-                        if (gscat == 2) and (flag == 1): continue
-                        tmp = (scanNr,beamTime,bmnum,gate,data)
-                        dataList.append(tmp)
-                        goodScan = True
-                elif len(slist) == 1:
-                    gate,data,flag = (slist[0],fitDataList[0],gflag[0])
-                    #Get information from each gate in scan.  Skip record if the chosen ground scatter option is not met.
-                    if (gscat == 1) and (flag == 0): continue
-                    if (gscat == 2) and (flag == 1): continue
-                    tmp = (scanNr,beamTime,bmnum,gate,data)
-                    dataList.append(tmp)
-                    goodScan = True
-                else:
-                    continue
-
-            if goodScan:
-                #Determine the start time for each scan and save to list.
-                scanTimeList.append(min([x.time for x in myScan]))
-
-                #Advance to the next scan number.
-                scanNr = scanNr + 1
-
-        #Convert lists to numpy arrays.
-        timeArray       = np.array(scanTimeList)
-        dataListArray   = np.array(dataList)
+        prm.time        = cols.time[beamInx]
+        for name in ['mplgs','nave','noisesearch','scan','smsep','mplgexs','xcf','noisesky','rsep','mppul',
+                     'inttsc','frang','bmazm','lagfr','ifmode','noisemean','tfreq','inttus','rxrise','mpinc','nrang']:
+            setattr(prm,name,cols.beam[name][beamInx])
+
+        #Calculate the field of view from the first beam.
+        firstBeam = cols.beam[beamInx[0]]
+        radStruct = pydarn.radar.radStruct.radar(radId=myPtr.stid)
+        site      = pydarn.radar.radStruct.site(radId=myPtr.stid,dt=sTime)
+        fov       = pydarn.radar.radFov.fov(frang=firstBeam['frang'], rsep=firstBeam['rsep'], site=site,elevation=fovElevation,model=fovModel,coords=fovCoords)
+
+        #Select the gates that meet the chosen ground scatter option.
+        recInx  = cols.recordIndex()
+        good    = inScan[recInx]
+        gflag   = cols.fit['gflg']
+        if gscat == 1: good = np.logical_and(good,gflag != 0)
+        if gscat == 2: good = np.logical_and(good,gflag != 1)
 
         # If no data, report and return.
-        if dataListArray.size == 0:
+        if not np.any(good):
             self.messages.append(no_data_message)
             return
 
+        #Number the scans that have good data, and save the start time of each.
+        recInx      = recInx[good]
+        goodScans   = np.unique(scanInx[recInx])
+        dataScan    = np.searchsorted(goodScans,scanInx[recInx])
+        firstInx    = beamInx[np.append(True,np.diff(scanInx[beamInx]) != 0)]
+        scanStart   = np.minimum.reduceat(cols.time[beamInx],np.searchsorted(beamInx,firstInx))
+        timeArray   = scanStart[np.searchsorted(scanInx[firstInx],goodScans)]
+
+        dataBeam    = cols.beam['bmnum'][recInx]
+        dataGate    = cols.fit['slist'][good]
+
         #Figure out what size arrays we need and initialize the arrays...
-        nrTimes = int(np.max(dataListArray[:,scanInx]) + 1)
+        nrTimes = len(goodScans)
 
         if full_array:
             nrBeams = int(fov.beams.max() + 1)
             nrGates = int(fov.gates.max() + 1)
         else:
-            nrBeams = int(np.max(dataListArray[:,beamInx]) + 1)
-            nrGates = int(np.max(dataListArray[:,gateInx]) + 1)
+            nrBeams = int(np.max(dataBeam) + 1)
+            nrGates = int(np.max(dataGate) + 1)
 
         #Make sure the FOV is the same size as the data array.
         if len(fov.beams) != nrBeams:
@@ -730,11 +690,10 @@ class musicArray(object):
           fov.lonFull       = fov.lonFull[:,0:nrGates+1]
           fov.slantRFull    = fov.slantRFull[:,0:nrGates+1]
 
-        #Convert the dataListArray into a 3 dimensional array.
-        dataArray     = np.ndarray([nrTimes,nrBeams,nrGates])
+        #Scatter the data into a 3 dimensional array.
+        dataArray     = np.empty([nrTimes,nrBeams,nrGates])
         dataArray[:]  = np.nan
-        for inx in range(len(dataListArray)):
-            dataArray[int(dataListArray[inx,scanInx]),int(dataListArray[inx,beamInx]),int(dataListArray[inx,gateInx])] = dataListArray[inx,dataInx]
+        dataArray[dataScan,dataBeam,dataGate] = cols.fit[param][good]
 
         #Make metadata block to hold information about the processing.
         metadata = {}
@@ -788,6 +747,159 @@ class musicArray(object):
         dataSets.sort()
         return dataSets
 
+    def setMemoryBudget(self,memoryBudget=None,spillDir=None):
+        """Set the memory budget for the data cubes of this musicArray.
+
+        Parameters
+        ----------
+        memoryBudget : Optional[int]
+            Maximum number of bytes of data cubes to keep in memory.  None for no limit.
+        spillDir : Optional[str]
+            Directory to spill released data cubes to.  If None, released data cubes are dropped.
+
+        """
+        import os
+        if spillDir is not None and not os.path.isdir(spillDir):
+            os.makedirs(spillDir)
+        self.memoryBudget   = memoryBudget
+        self.spillDir       = spillDir
+
+    def dataBytes(self):
+        """Return the number of bytes of data cubes held in memory by all data sets.  Arrays shared between
+        data sets are counted once, and memory mapped (spilled) arrays are not counted.
+
+        Returns
+        -------
+        nBytes : int
+
+        """
+        seen    = set()
+        nBytes  = 0
+        for dataSet in self.get_data_sets():
+            data = getattr(self,dataSet).data
+            if not isinstance(data,np.ndarray) or isinstance(data,np.memmap) or id(data) in seen:
+                continue
+            seen.add(id(data))
+            nBytes += data.nbytes
+        return nBytes
+
+    def releaseData(self,dataSet):
+        """Release the data cube of a data set from memory.  If spillDir is set, the data cube is saved to
+        spillDir/<dataSetName>.npy and replaced by a copy-on-write memory map of that file.  Otherwise,
+        the data cube is dropped and the data attribute is set to None.  The time, fov, metadata and
+        history of the data set are kept.
+
+        Parameters
+        ----------
+        dataSet : str
+            which dataSet in the musicArray object to release
+
+        """
+        import os
+        currentData = getDataSet(self,dataSet)
+        name        = currentData.metadata['dataSetName']
+        if not isinstance(currentData.data,np.ndarray) or isinstance(currentData.data,np.memmap):
+            return
+
+        if self.spillDir is None:
+            logging.info('Dropping data of ' + name)
+            currentData.data = None
+        else:
+            fName = os.path.join(self.spillDir,name+'.npy')
+            logging.info('Spilling data of ' + name + ' to ' + fName)
+            np.save(fName,currentData.data)
+            currentData.data = np.load(fName,mmap_mode='c')
+
+    def enforceMemoryBudget(self,keep=None):
+        """Release the data cubes of the oldest data sets until the data cubes held in memory fit within
+        memoryBudget.  The active data set is never released.
+
+        Parameters
+        ----------
+        keep : Optional[list of str]
+            names of other data sets not to release
+
+        Returns
+        -------
+        released : list of str
+            names of the data sets that were released
+
+        """
+        released = []
+        if self.memoryBudget is None: return released
+
+        keepList = [] if keep is None else list(keep)
+        if hasattr(self,'active'): keepList.append(self.active.metadata['dataSetName'])
+
+        for dataSet in self.get_data_sets():
+            if self.dataBytes() <= self.memoryBudget: break
+            if dataSet in keepList: continue
+            data = getattr(self,dataSet).data
+            if not isinstance(data,np.ndarray) or isinstance(data,np.memmap): continue
+            if hasattr(self,'active') and data is self.active.data: continue
+            self.releaseData(dataSet)
+            released.append(dataSet)
+
+        if self.dataBytes() > self.memoryBudget:
+            logging.warning('Data sets still use ' + str(self.dataBytes()) + ' bytes, more than the memory budget of ' + str(self.memoryBudget) + ' bytes.')
+        return released
+
+def _maskedInterp(x,y,xNew,fill_value=np.nan):
+    """Linearly interpolate many data vectors that share the same x-vector, skipping non-finite values.
+    This gives the same result as calling scipy.interpolate.interp1d(x[good],y[good],bounds_error=False)
+    on each row, where good are the finite points of that row, but all rows are done at once.
+
+    Parameters
+    ----------
+    x : numpy.array
+        Increasing x-vector of shape (n,).
+    y : numpy.array
+        Data of shape (nRows,n).  NaN/inf values are treated as missing.
+    xNew : numpy.array
+        Increasing x-vector of shape (m,) to interpolate to.
+    fill_value : Optional[float]
+        Value for points of xNew outside of the span of the finite data of a row.
+
+    Returns
+    -------
+    yNew : numpy.array
+        Interpolated data of shape (nRows,m).  Rows with fewer than 2 finite values are set to 0.
+
+    """
+    x       = np.asarray(x,dtype=np.float64)
+    xNew    = np.asarray(xNew,dtype=np.float64)
+    y       = np.asarray(y,dtype=np.float64)
+    nRows, n = y.shape
+
+    valid   = np.isfinite(y)
+    inx     = np.arange(n)
+
+    #Index of the nearest finite value at or before/after each position of each row.
+    prevInx = np.maximum.accumulate(np.where(valid,inx,-1),axis=1)
+    nextInx = np.minimum.accumulate(np.where(valid,inx,n)[:,::-1],axis=1)[:,::-1]
+
+    #Position of each new x in the x-vector, such that x[pos] <= xNew < x[pos+1].
+    pos     = np.searchsorted(x,xNew,side='right') - 1
+    left    = np.where(pos >= 0, prevInx[:,np.clip(pos,0,n-1)], -1)
+    right   = np.where(pos+1 < n, nextInx[:,np.clip(pos+1,0,n-1)], n)
+
+    ll      = np.clip(left,0,n-1)
+    rr      = np.where(right < n, right, ll)
+    x0      = x[ll]
+    x1      = x[rr]
+    inBounds = np.logical_and(left >= 0, np.logical_or(right < n, x0 == xNew))
+
+    rowInx  = np.arange(nRows)[:,np.newaxis]
+    yFill   = np.where(valid,y,0.)
+    y0      = yFill[rowInx,ll]
+    y1      = yFill[rowInx,rr]
+    dx      = np.where(x1 > x0, x1-x0, 1.)
+    yNew    = y0 + (y1-y0)/dx * (xNew-x0)
+
+    yNew[np.logical_not(inBounds)] = fill_value
+    yNew[np.sum(valid,axis=1) < 2,:] = 0.
+    return yNew
+
 def beamInterpolation(dataObj,dataSet='active',newDataSetName='beamInterpolated',comment='Beam Linear Interpolation'):
     """Interpolates the data in a musicArray object along the beams of the radar.  This method will ensure that no
     rangegates are missing data.  Ranges outside of metadata['gateLimits'] will be set to 0.
@@ -807,36 +919,25 @@ def beamInterpolation(dataObj,dataSet='active',newDataSetName='beamInterpolated'
     Written by Nathaniel A. Frissell, Fall 2013
 
     """
-    from scipy.interpolate import interp1d
     currentData = getDataSet(dataObj,dataSet)
 
     nrTimes = len(currentData.time)
     nrBeams = len(currentData.fov.beams)
     nrGates = len(currentData.fov.gates)
 
+    #If metadata['gateLimits'], select only those measurements...
+    gateInx = np.arange(nrGates)
+    if currentData.metadata.has_key('gateLimits'):
+        limits = currentData.metadata['gateLimits']
+        gateInx = np.where(np.logical_and(currentData.fov.gates >= limits[0],currentData.fov.gates <= limits[1]))[0]
+
     interpArr = np.zeros([nrTimes,nrBeams,nrGates])
-    for tt in range(nrTimes):
+    if len(gateInx) >= 2:
+        #All times of a beam share the same range vector, so each beam is interpolated in one call.
         for bb in range(nrBeams):
             rangeVec  = currentData.fov.slantRCenter[bb,:]
-            input_x   = copy.copy(rangeVec)
-            input_y   = currentData.data[tt,bb,:]
+            interpArr[:,bb,:] = _maskedInterp(rangeVec[gateInx],currentData.data[:,bb,gateInx],rangeVec,fill_value=0)
 
-            #If metadata['gateLimits'], select only those measurements...
-            if currentData.metadata.has_key('gateLimits'):
-                limits = currentData.metadata['gateLimits']
-                gateInx = np.where(np.logical_and(currentData.fov.gates >= limits[0],currentData.fov.gates <= limits[1]))[0]
-
-                if len(gateInx) < 2: continue
-                input_x   = input_x[gateInx]
-                input_y   = input_y[gateInx]
-
-            good      = np.where(np.isfinite(input_y))[0]
-            if len(good) < 2: continue
-            input_x   = input_x[good]
-            input_y   = input_y[good]
-
-            intFn     = interp1d(input_x,input_y,bounds_error=False,fill_value=0)
-            interpArr[tt,bb,:] = intFn(rangeVec)
     newDataSet = currentData.copy(newDataSetName,comment)
     newDataSet.data = interpArr
     newDataSet.setActive()
@@ -1135,7 +1236,6 @@ def timeInterpolation(dataObj,dataSet='active',newDataSetName='timeInterpolated'
     Written by Nathaniel A. Frissell, Fall 2013
 
     """
-    from scipy.interpolate import interp1d
     from davitpy import utils 
     currentData = getDataSet(dataObj,dataSet)
 
@@ -1160,22 +1260,12 @@ def timeInterpolation(dataObj,dataSet='active',newDataSetName='timeInterpolated'
     nrBeams = len(currentData.fov.beams)
     nrGates = len(currentData.fov.gates)
 
-    interpArr = np.zeros([nrTimes,nrBeams,nrGates])
-
-    for rg in range(nrGates):
-        for bb in range(nrBeams):
-            input_x   = currentData.time[:]
-            input_y   = currentData.data[:,bb,rg]
-
-            good      = np.where(np.isfinite(input_y))[0]
-            if len(good) < 2: continue
-            input_x   = input_x[good]
-            input_y   = input_y[good]
+    #All cells share the same time vector, so they are interpolated together.
+    epochVec    = utils.datetimeToEpoch(currentData.time)
+    nrOldTimes  = len(currentData.time)
+    cellData    = np.reshape(currentData.data,(nrOldTimes,nrBeams*nrGates)).T
+    interpArr   = _maskedInterp(epochVec,cellData,newEpochVec).T.reshape(nrTimes,nrBeams,nrGates)
 
-            input_x   = utils.datetimeToEpoch(input_x)
-
-            intFn     = interp1d(input_x,input_y,bounds_error=False)#,fill_value=0)
-            interpArr[:,bb,rg] = intFn(newEpochVec)
     newDataSet = currentData.copy(newDataSetName,comment)
     newDataSet.time = newTimeVec
     newDataSet.data = interpArr
@@ -1721,7 +1811,7 @@ def calculateFFT(dataObj,dataSet='active',comment=None):
     currentData.dominantFreq = posFreqVec[np.argmax(avg_psd)]
     currentData.appendHistory('Calculated FFT')
   
-def calculateDlm(dataObj,dataSet='active',comment=None):
+def calculateDlm(dataObj,dataSet='active',comment=None,precision='double',maxBytes=None):
     """Calculate the cross-spectral matrix of a musicaArray object. FFT must already have been calculated.
 
     Parameters
@@ -1732,6 +1822,18 @@ def calculateDlm(dataObj,dataSet='active',comment=None):
         which dataSet in the musicArray object to process
     comment : Optional[str]
         String to be appended to the history of this object.  Set to None for the Default comment (recommended).
+    precision : Optional[str]
+        'double' to compute and store Dlm as complex128, or 'single' to use complex64, which halves the memory
+        and roughly doubles the speed for large fields-of-view.  (default='double')
+    maxBytes : Optional[int]
+        If set, Dlm is computed in blocks of rows whose temporary products use no more than about this many bytes,
+        and only the upper triangle is computed (Dlm is Hermitian).  Default is a single matrix product.
+
+    Notes
+    -----
+    With the positive frequency spectrum of all cells arranged as a matrix S of shape (nCells, nFreqs),
+    Dlm[l,m] = sum_f S[l,f] * conj(S[m,f]), i.e. Dlm = S . S^H.  Cells are ordered with the beam index varying
+    fastest, and llLookupTable holds [cell index, beam, gate, N-S distance, E-W distance] for each cell.
 
     Written by Nathaniel A. Frissell, Fall 2013
 
@@ -1739,36 +1841,61 @@ def calculateDlm(dataObj,dataSet='active',comment=None):
     currentData = getDataSet(dataObj,dataSet)
 
     nrTimes, nrBeams, nrGates = np.shape(currentData.data)
-
     nCells                    = nrBeams * nrGates
-    currentData.llLookupTable = np.zeros([5,nCells])
-    currentData.Dlm           = np.zeros([nCells,nCells],dtype=np.complex128)
 
-    #Only use positive frequencies...
-    posInx = np.where(currentData.freqVec > 0)[0]
+    assert precision in ['double','single'], logging.error("precision must be 'double' or 'single'")
+    dtype   = np.complex128 if precision == 'double' else np.complex64
 
-    #Explicitly write out gate/range indices...
+    #Explicitly write out gate/range indices, with the beam index varying fastest...
+    llInx   = np.arange(nCells)
+    bbInx   = llInx % nrBeams
+    ggInx   = llInx // nrBeams
+    currentData.llLookupTable = np.array([llInx,
+                                          np.asarray(currentData.fov.beams)[bbInx],
+                                          np.asarray(currentData.fov.gates)[ggInx],
+                                          currentData.fov.relative_y[bbInx,ggInx],
+                                          currentData.fov.relative_x[bbInx,ggInx]],dtype=np.float64)
 
-    llList = []
-    for gg in xrange(nrGates):
-        for bb in xrange(nrBeams):
-            llList.append((bb,gg))
+    #Only use positive frequencies...
+    posInx  = np.where(currentData.freqVec > 0)[0]
 
+    #Spectrum matrix of shape (nCells, nFreqs).
+    spect   = currentData.spectrum[posInx,:,:].astype(dtype)
+    spect   = np.transpose(spect,(2,1,0)).reshape(nCells,len(posInx))
+    spectH  = np.conj(spect).T
 
-    for ll in range(nCells):
-        llAI  = llList[ll]
-        ew_dist           = currentData.fov.relative_x[llAI]
-        ns_dist           = currentData.fov.relative_y[llAI]
-        currentData.llLookupTable[:,ll]  = [ll, currentData.fov.beams[llAI[0]], currentData.fov.gates[llAI[1]],ns_dist,ew_dist]
-        spectL            = currentData.spectrum[posInx,llAI[0],llAI[1]]
-        for mm in range(nCells):
-            mmAI  = llList[mm]
-            spectM          = currentData.spectrum[posInx,mmAI[0],mmAI[1]]
-            currentData.Dlm[ll,mm] = np.sum(spectL * np.conj(spectM))
+    if maxBytes is None:
+        currentData.Dlm = np.dot(spect,spectH)
+    else:
+        Dlm     = np.zeros([nCells,nCells],dtype=dtype)
+        block   = max(1,int(maxBytes // (np.dtype(dtype).itemsize * nCells)))
+        for ll0 in xrange(0,nCells,block):
+            ll1 = min(ll0+block,nCells)
+            Dlm[ll0:ll1,ll0:]   = np.dot(spect[ll0:ll1,:],spectH[:,ll0:])
+            Dlm[ll1:,ll0:ll1]   = np.conj(Dlm[ll0:ll1,ll1:]).T
+        currentData.Dlm = Dlm
 
     currentData.appendHistory('Calculated Cross-Spectral Matrix Dlm')
 
-def calculateKarr(dataObj,dataSet='active',kxMax=0.05,kyMax=0.05,dkx=0.001,dky=0.001,threshold=0.15):
+def _karrChunk(args):
+    """Evaluate 1/(u^H.P.u) for a block of kx rows of the k-array, where u is the steering vector of each
+    (kx, ky) pair and P = Vn.Vn^H is the projector onto the noise subspace.  Module level so that it can be
+    run in a multiprocessing pool.
+    """
+    kxVec, kyVec, xm, ym, noiseVecs = args
+
+    phsX    = np.exp(1j*np.outer(kxVec,xm))
+    phsY    = np.exp(1j*np.outer(kyVec,ym))
+    um      = phsX[:,np.newaxis,:] * phsY[np.newaxis,:,:]
+    um      = um.reshape(-1,len(xm))
+
+    #|conj(um).v|**2 summed over the noise eigenvectors v.
+    proj    = np.dot(np.conj(um),noiseVecs)
+    denom   = np.sum(np.abs(proj)**2,axis=1)
+    with np.errstate(divide='ignore'):
+        return (1. / denom).reshape(len(kxVec),len(kyVec))
+
+def calculateKarr(dataObj,dataSet='active',kxMax=0.05,kyMax=0.05,dkx=0.001,dky=0.001,threshold=0.15,maxBytes=64*1024**2,nproc=1):
     """Calculate the two-dimensional horizontal wavenumber array of a musicArray/musicDataObj object.
     Cross-spectrum array Dlm must already have been calculated.
 
@@ -1788,16 +1915,29 @@ def calculateKarr(dataObj,dataSet='active',kxMax=0.05,kyMax=0.05,dkx=0.001,dky=0
         ky resolution [rad/km]
     threshold : Optional[float]
         threshold of signals to detect as a fraction of the maximum eigenvalue
+    maxBytes : Optional[int]
+        approximate memory limit for the steering vectors of one block of kx rows.  The k-array is evaluated
+        one block at a time.  (default=64 MB)
+    nproc : Optional[int]
+        number of processes to spread the blocks over.  None for one per CPU core.  (default=1)
+
+    Notes
+    -----
+    For each (kx, ky) pair, kArr = 1 / sum_v |conj(um).v|**2 = 1 / (um^H.P.um), where um is the steering vector
+    exp(i(kx*x + ky*y)) over the cells and v are the noise eigenvectors of Dlm.  A block of kx rows is
+    evaluated as a single matrix product of the block's steering vectors with the noise eigenvectors.
 
     Written by Nathaniel A. Frissell, Fall 2013
 
     """
+    import multiprocessing
+
     currentData = getDataSet(dataObj,dataSet)
 
     nrTimes, nrBeams, nrGates = np.shape(currentData.data)
 
     #Calculate eigenvalues, eigenvectors
-    eVals,eVecs = np.linalg.eig(np.transpose(dataObj.active.Dlm))
+    eVals,eVecs = np.linalg.eig(np.transpose(currentData.Dlm))
 
     nkx     = np.ceil(2*kxMax/dkx)
     if (nkx % 2) == 0: nkx = nkx+1
@@ -1822,8 +1962,7 @@ def calculateKarr(dataObj,dataSet='active',kxMax=0.05,kyMax=0.05,dkx=0.001,dky=0
     nSigs       = np.size(maxEvalsInx)
 
     if cnt < 3:
-        logging.warning('Not enough small eigenvalues!')
-        import ipdb; ipdb.set_trace()
+        logging.warning('Not enough small eigenvalues!  Only ' + str(cnt) + ' noise eigenvectors will be used for kArr.')
 
     logging.info('K-Array: ' + str(nkx) + ' x ' + str(nky))
     logging.info('Kx Max: ' + str(kxMax))
@@ -1837,17 +1976,26 @@ def calculateKarr(dataObj,dataSet='active',kxMax=0.05,kyMax=0.05,dkx=0.001,dky=0
 
     logging.info('Starting kArr Calculation...')
     t0 = datetime.datetime.now()
-    def vCalc(um,v):
-        return np.dot( np.conj(um), v) * np.dot( np.conj(v), um)
-
-    vList = [eVecs[:,minEvalsInx[ee]] for ee in xrange(cnt)]
-    kArr  = np.zeros((nkx,nky),dtype=np.complex64)
-    for kk_kx in xrange(nkx):
-        kx  = kxVec[kk_kx]
-        for kk_ky in xrange(nky):
-            ky  = kyVec[kk_ky]
-            um  = np.exp(1j*(kx*xm + ky*ym))
-            kArr[kk_kx,kk_ky]= 1. / np.sum(map(lambda v: vCalc(um,v), vList))
+
+    noiseVecs   = eVecs[:,minEvalsInx]
+    nRows       = max(1,int(maxBytes // (nky * len(xm) * 16)))
+    jobs        = [(kxVec[kk:kk+nRows],kyVec,xm,ym,noiseVecs) for kk in xrange(0,nkx,nRows)]
+
+    if nproc is None:
+        nproc = multiprocessing.cpu_count()
+    nproc = max(1,min(nproc,len(jobs)))
+
+    if nproc == 1:
+        blocks = map(_karrChunk,jobs)
+    else:
+        pool = multiprocessing.Pool(nproc)
+        try:
+            blocks = pool.map(_karrChunk,jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+    kArr  = np.concatenate(blocks,axis=0).astype(np.complex64)
     t1 = datetime.datetime.now()
     logging.info('Finished kArr Calculation.  Total time: ' + str(t1-t0))
 
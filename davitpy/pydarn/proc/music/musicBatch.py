@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2012  VT SuperDARN Lab
+# Full license can be found in LICENSE.txt
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""musicBatch module
+
+Runs the MUSIC processing chain of the music module on a catalog of event windows (for example, a season of
+candidate MSTID periods) without any interaction, in parallel processes.
+
+Each window is processed in the stages listed in musicStages.  After each stage the musicArray is pickled to a
+checkpoint file in outDir/<window name>/.  The checkpoint file name contains a hash of the window and of the
+parameters of that stage and all earlier stages, so a window that failed, or whose parameters for a later stage
+were changed, resumes from the last checkpoint that is still valid instead of starting over.
+
+A catalog is a list of windows.  Each window is either a dictionary with the keys 'radar', 'sTime' and 'eTime'
+plus any of the keys of musicDefaults to override for that window, or a (radar, sTime, eTime[, params]) tuple.
+sTime and eTime are the times of interest; more data is loaded so that the filter covers them (see filterTimes).
+
+Functions
+--------------------------------------------------------------------------------------------------------------------------
+runMusicWindow              run the MUSIC processing chain on one window, resuming from checkpoints
+musicBatch                  run many windows in parallel processes and write a summary table
+readMusicCatalog            read a catalog from a CSV file
+writeMusicSummary           write a summary table of the detected signals to a CSV file
+--------------------------------------------------------------------------------------------------------------------------
+
+"""
+import datetime
+import logging
+
+# The default processing parameters.  Each can be overridden for a whole batch or for each window.
+musicDefaults = {
+        'fileType'      : 'fitex',
+        'src'           : None,
+        'channel'       : None,
+        'param'         : 'p_l',
+        'gscat'         : 1,
+        'fovModel'      : 'GS',
+        'fovElevation'  : None,
+        'fovCoords'     : 'geo',
+        'gateLimits'    : None,
+        'beamLimits'    : None,
+        'maxOffTime'    : 10,
+        'timeRes'       : 120,
+        'numtaps'       : 101,
+        'cutoff_low'    : 0.0003,
+        'cutoff_high'   : 0.0012,
+        'altitude'      : 250.,
+        'kxMax'         : 0.05,
+        'kyMax'         : 0.05,
+        'dkx'           : 0.001,
+        'dky'           : 0.001,
+        'threshold'     : 0.35,
+        'neighborhood'  : (10,10),
+        }
+
+# The processing stages, in order, and the parameters each depends on.
+musicStages = [
+        ('load',        ['fileType','src','channel','param','gscat','fovModel','fovElevation','fovCoords',
+                         'timeRes','numtaps']),
+        ('limits',      ['gateLimits','beamLimits','maxOffTime']),
+        ('beamInterp',  []),
+        ('timeInterp',  ['timeRes']),
+        ('filter',      ['numtaps','cutoff_low','cutoff_high','altitude']),
+        ('karr',        ['kxMax','kyMax','dkx','dky']),
+        ('detect',      ['threshold','neighborhood']),
+        ]
+
+# Signal information written to the summary table.
+summaryColumns = ['window','radar','sTime','eTime','status','goodPeriod',
+                  'order','kx','ky','k','lambda_x','lambda_y','lambda','azm','freq','period','vel','max','area']
+
+def _windowParams(window,params=None):
+    """Return (radar, sTime, eTime, params) of a catalog window, with params filled in from
+    musicDefaults, then the batch params, then the window's own params.
+    """
+    if isinstance(window,dict):
+        window  = dict(window)
+        radar   = window.pop('radar')
+        sTime   = window.pop('sTime')
+        eTime   = window.pop('eTime')
+        winPrm  = window
+    else:
+        radar, sTime, eTime = window[:3]
+        winPrm  = window[3] if len(window) > 3 else {}
+
+    prm = dict(musicDefaults)
+    if params is not None: prm.update(params)
+    prm.update(winPrm)
+
+    unknown = [key for key in prm if key not in musicDefaults]
+    assert len(unknown) == 0, logging.error('Unknown MUSIC parameters: ' + ', '.join(unknown))
+
+    return radar, sTime, eTime, prm
+
+def _windowName(radar,sTime,eTime):
+    """The name of a window, also used for its checkpoint directory."""
+    return '_'.join([radar,sTime.strftime('%Y%m%d.%H%M'),eTime.strftime('%Y%m%d.%H%M')])
+
+def _stageKeys(radar,sTime,eTime,prm):
+    """Return the checkpoint hash of each stage, which depends on the window and on the parameters of that
+    stage and of all of the stages before it.
+    """
+    import hashlib
+
+    keys    = []
+    key     = repr((radar,sTime,eTime))
+    for stage, names in musicStages:
+        stagePrm = [(name,prm[name]) for name in names]
+        key      = hashlib.md5(key + stage + repr(stagePrm)).hexdigest()
+        keys.append(key)
+    return keys
+
+def _checkpointName(outDir,name,stageInx,key):
+    import os
+    stage = musicStages[stageInx][0]
+    return os.path.join(outDir,name,'%d_%s_%s.p' % (stageInx,stage,key[:12]))
+
+def _runStage(stage,dataObj,radar,sTime,eTime,prm):
+    """Run one processing stage, returning the musicArray."""
+    from davitpy import pydarn
+    from davitpy.pydarn.proc.music import music
+
+    if stage == 'load':
+        loadTimes   = music.filterTimes(sTime,eTime,prm['timeRes'],prm['numtaps'])
+        myPtr       = pydarn.sdio.radDataOpen(loadTimes[0],radar,eTime=loadTimes[1],channel=prm['channel'],
+                                              fileType=prm['fileType'],src=prm['src'])
+        if myPtr is not None and myPtr.dType is None: myPtr = None
+        try:
+            dataObj = music.musicArray(myPtr,sTime=loadTimes[0],eTime=loadTimes[1],param=prm['param'],
+                                       gscat=prm['gscat'],fovElevation=prm['fovElevation'],
+                                       fovModel=prm['fovModel'],fovCoords=prm['fovCoords'])
+        finally:
+            if myPtr is not None: myPtr.close()
+
+    elif stage == 'limits':
+        loadTimes   = music.filterTimes(sTime,eTime,prm['timeRes'],prm['numtaps'])
+        music.defineLimits(dataObj,gateLimits=prm['gateLimits'],beamLimits=prm['beamLimits'],timeLimits=loadTimes)
+        music.checkDataQuality(dataObj,max_off_time=prm['maxOffTime'],sTime=sTime,eTime=eTime)
+        dataObj.active.applyLimits()
+
+    elif stage == 'beamInterp':
+        music.beamInterpolation(dataObj)
+
+    elif stage == 'timeInterp':
+        music.timeInterpolation(dataObj,timeRes=prm['timeRes'])
+
+    elif stage == 'filter':
+        music.determineRelativePosition(dataObj,altitude=prm['altitude'])
+        music.filter(dataObj,numtaps=prm['numtaps'],cutoff_low=prm['cutoff_low'],cutoff_high=prm['cutoff_high'])
+        dataObj.active.applyLimits()
+
+    elif stage == 'karr':
+        music.calculateFFT(dataObj)
+        music.calculateDlm(dataObj)
+        music.calculateKarr(dataObj,kxMax=prm['kxMax'],kyMax=prm['kyMax'],dkx=prm['dkx'],dky=prm['dky'])
+
+    elif stage == 'detect':
+        music.detectSignals(dataObj,threshold=prm['threshold'],neighborhood=prm['neighborhood'])
+
+    return dataObj
+
+def runMusicWindow(radar,sTime,eTime,outDir=None,**params):
+    """Run the MUSIC processing chain (load, limits, beam and time interpolation, filter, FFT, Dlm, kArr and
+    signal detection) on one window.
+
+    Parameters
+    ----------
+    radar : str
+        3-letter radar code
+    sTime : datetime.datetime
+        start of the time of interest
+    eTime : datetime.datetime
+        end of the time of interest
+    outDir : Optional[str]
+        Directory for the checkpoint files.  The checkpoints of this window are kept in a sub-directory named
+        after the window.  If None, no checkpoints are read or written.
+    **params :
+        any of the keys of musicDefaults
+
+    Returns
+    -------
+    dataObj : musicArray or None
+        The processed musicArray, or None if there was no data or a stage failed.
+    summary : dict
+        'window', 'radar', 'sTime', 'eTime', 'status' ('ok', 'nodata' or 'failed'), 'stage' (the last stage
+        run, or the one that failed), 'resumed' (the stage whose checkpoint was loaded, or None),
+        'goodPeriod', 'signals' (list of the signal information dictionaries of detectSignals), 'message'
+        and 'seconds'.
+
+    Example
+    -------
+        dataObj, summary = pydarn.proc.music.runMusicWindow('wal',datetime.datetime(2011,5,9,14),
+                datetime.datetime(2011,5,9,16),outDir='/data/music',gateLimits=[30,45])
+
+    """
+    import os
+    import time
+    import cPickle
+
+    radar, sTime, eTime, prm = _windowParams((radar,sTime,eTime,params))
+    name    = _windowName(radar,sTime,eTime)
+    keys    = _stageKeys(radar,sTime,eTime,prm)
+
+    summary = {'window':name,'radar':radar,'sTime':sTime,'eTime':eTime,'status':'ok','stage':None,
+               'resumed':None,'goodPeriod':None,'signals':[],'message':'','seconds':0.}
+    t0      = time.time()
+
+    #Find the last valid checkpoint.
+    dataObj = None
+    start   = 0
+    if outDir is not None:
+        winDir = os.path.join(outDir,name)
+        if not os.path.isdir(winDir): os.makedirs(winDir)
+        for stageInx in range(len(musicStages)-1,-1,-1):
+            fName = _checkpointName(outDir,name,stageInx,keys[stageInx])
+            if not os.path.exists(fName): continue
+            try:
+                with open(fName,'rb') as fl:
+                    dataObj = cPickle.load(fl)
+            except Exception, e:
+                logging.warning('Could not read checkpoint ' + fName + ': ' + str(e))
+                continue
+            start               = stageInx + 1
+            summary['resumed']  = musicStages[stageInx][0]
+            summary['stage']    = musicStages[stageInx][0]
+            logging.info(name + ': resuming after stage ' + summary['resumed'])
+            break
+
+    for stageInx in range(start,len(musicStages)):
+        stage = musicStages[stageInx][0]
+        summary['stage'] = stage
+        try:
+            dataObj = _runStage(stage,dataObj,radar,sTime,eTime,prm)
+        except Exception, e:
+            logging.exception(e)
+            summary['status']   = 'failed'
+            summary['message']  = str(e)
+            dataObj = None
+            break
+
+        if not hasattr(dataObj,'active'):
+            summary['status']   = 'nodata'
+            summary['message']  = '; '.join(dataObj.messages)
+            dataObj = None
+            break
+
+        if outDir is not None:
+            fName = _checkpointName(outDir,name,stageInx,keys[stageInx])
+            with open(fName,'wb') as fl:
+                cPickle.dump(dataObj,fl,cPickle.HIGHEST_PROTOCOL)
+
+    if dataObj is not None:
+        summary['goodPeriod'] = dataObj.active.metadata.get('good_period')
+        if hasattr(dataObj.active,'sigDetect'):
+            summary['signals'] = dataObj.active.sigDetect.info
+
+    summary['seconds'] = time.time() - t0
+    return dataObj, summary
+
+def _runJob(job):
+    """Run one window in a worker process, catching any error so that the rest of the batch carries on.
+    Only the summary is handed back.
+    """
+    window, outDir, params = job
+    try:
+        radar, sTime, eTime, prm = _windowParams(window,params)
+        dataObj, summary = runMusicWindow(radar,sTime,eTime,outDir=outDir,**prm)
+        return summary
+    except Exception, e:
+        logging.exception(e)
+        return {'window':str(window),'radar':None,'sTime':None,'eTime':None,'status':'failed','stage':None,
+                'resumed':None,'goodPeriod':None,'signals':[],'message':str(e),'seconds':0.}
+
+def musicBatch(catalog,outDir,nproc=None,summaryFile='musicSignals.csv',**params):
+    """Run the MUSIC processing chain on every window of a catalog, in parallel processes.  Each window is
+    checkpointed after every stage (see runMusicWindow), so running a batch again only computes the
+    stages that failed, have not been run, or whose parameters changed.
+
+    Parameters
+    ----------
+    catalog : list
+        the windows, each a dictionary with the keys 'radar', 'sTime' and 'eTime' and any parameters to
+        override for that window, or a (radar, sTime, eTime[, params]) tuple.  See readMusicCatalog.
+    outDir : str
+        directory for the checkpoints and the summary table
+    nproc : Optional[int]
+        the number of processes.  (default=None, one per CPU core)
+    summaryFile : Optional[str]
+        name of the summary table written to outDir, or None to not write it.
+    **params :
+        any of the keys of musicDefaults, used for all of the windows
+
+    Returns
+    -------
+    summaries : list of dict
+        the summary of each window (see runMusicWindow), in the order of the catalog
+
+    Example
+    -------
+        catalog = pydarn.proc.music.readMusicCatalog('mstid_2012.csv')
+        summaries = pydarn.proc.music.musicBatch(catalog,'/data/music',nproc=8,fileType='fitacf')
+
+    """
+    import os
+    import multiprocessing
+
+    if not os.path.isdir(outDir): os.makedirs(outDir)
+
+    jobs = [(window,outDir,params) for window in catalog]
+
+    if nproc is None:
+        nproc = multiprocessing.cpu_count()
+    nproc = max(1,min(nproc,len(jobs)))
+
+    summaries = []
+    if nproc == 1:
+        results = (_runJob(job) for job in jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(nproc)
+        results = pool.imap(_runJob,jobs)
+    try:
+        for summary in results:
+            summaries.append(summary)
+            logging.info('%d/%d %s: %s, %d signals, %.1f s' % (len(summaries),len(jobs),summary['window'],
+                         summary['status'],len(summary['signals']),summary['seconds']))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    if summaryFile is not None:
+        writeMusicSummary(summaries,os.path.join(outDir,summaryFile))
+    return summaries
+
+def writeMusicSummary(summaries,fileName):
+    """Write a summary table of a batch to a CSV file, with one row per detected signal.  Windows without
+    signals get one row with the signal columns left empty.
+
+    Parameters
+    ----------
+    summaries : list of dict
+        window summaries, from runMusicWindow or musicBatch
+    fileName : str
+        the CSV file to write
+
+    """
+    import csv
+
+    def fmt(value):
+        if value is None: return ''
+        if isinstance(value,datetime.datetime): return value.strftime('%Y-%m-%d %H:%M:%S')
+        return str(value)
+
+    with open(fileName,'wb') as fl:
+        writer = csv.writer(fl)
+        writer.writerow(summaryColumns)
+        for summary in summaries:
+            signals = sorted(summary['signals'],key=lambda sig: sig['order'])
+            if len(signals) == 0: signals = [{}]
+            for sig in signals:
+                row = [summary.get(col) for col in summaryColumns[:6]]
+                row = row + [sig.get(col) for col in summaryColumns[6:]]
+                writer.writerow([fmt(value) for value in row])
+
+def readMusicCatalog(fileName):
+    """Read a catalog of windows from a CSV file.  The file has a header line with at least the columns
+    radar, sTime and eTime (times as YYYY-MM-DD HH:MM[:SS]).  Any other columns are parameters (see
+    musicDefaults); their values are evaluated as python literals, and empty values are left out.
+
+    Parameters
+    ----------
+    fileName : str
+        the CSV file to read
+
+    Returns
+    -------
+    catalog : list of dict
+
+    """
+    import csv
+    import ast
+
+    def parseTime(value):
+        value = value.strip()
+        for fmt in ['%Y-%m-%d %H:%M:%S','%Y-%m-%d %H:%M','%Y%m%d.%H%M']:
+            try:
+                return datetime.datetime.strptime(value,fmt)
+            except ValueError:
+                pass
+        raise ValueError('Could not read time ' + value)
+
+    catalog = []
+    with open(fileName,'rb') as fl:
+        for row in csv.DictReader(fl):
+            window = {'radar':row.pop('radar').strip(),
+                      'sTime':parseTime(row.pop('sTime')),
+                      'eTime':parseTime(row.pop('eTime'))}
+            for key, value in row.items():
+                if value is None or value.strip() == '': continue
+                try:
+                    window[key.strip()] = ast.literal_eval(value.strip())
+                except (ValueError, SyntaxError):
+                    window[key.strip()] = value.strip()
+            catalog.append(window)
+    return catalog
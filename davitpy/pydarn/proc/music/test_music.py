@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# test_music.py
+#
+# Comments: Functions to test the data set handling of the music module
+#-----------------------------------------------------------------------------
+"""This module contains routines to test the copy-on-write data sets and the
+memory budget of musicArray
+
+Functions
+-------------------------------------------------------------------------------
+make_test_array       Build a musicArray holding a synthetic travelling wave
+test_copy_on_write    Check that processing a copy leaves its parent unchanged
+test_memory_budget    Check that the oldest data sets are released first
+-------------------------------------------------------------------------------
+"""
+import datetime as dt
+import numpy as np
+
+
+def make_test_array(sTime=dt.datetime(2011, 5, 9, 13, 0),
+                    eTime=dt.datetime(2011, 5, 9, 17, 0), nBeams=8,
+                    nGates=10, timeRes=60., **kwargs):
+    '''Build a musicArray, without reading any data, holding a travelling
+    wave (a 30 minute period and about 300 km wavelength) seen by a radar
+    with a simple field of view
+
+    Parameters
+    ----------
+    sTime : (datetime)
+        Time of the first scan (default=2011-05-09 13:00)
+    eTime : (datetime)
+        Time of the last scan (default=2011-05-09 17:00)
+    nBeams : (int)
+        Number of beams (default=8)
+    nGates : (int)
+        Number of range gates (default=10)
+    timeRes : (float)
+        Seconds between scans (default=60.0)
+    **kwargs :
+        Passed on to musicArray, e.g. memoryBudget
+
+    Returns
+    --------
+    dataObj : (musicArray)
+        The array, with the data set DS000_originalFit active
+    '''
+    from music import musicArray, musicDataObj, emptyObj
+
+    dataObj = musicArray(None, **kwargs)
+    dataObj.messages = []
+
+    fov = emptyObj()
+    fov.beams = np.arange(nBeams)
+    fov.gates = np.arange(nGates)
+    bFull, gFull = np.meshgrid(np.arange(nBeams + 1) - 0.5,
+                               np.arange(nGates + 1) - 0.5, indexing='ij')
+    fov.latFull = 60. + 0.4 * gFull
+    fov.lonFull = -100. + 1.2 * bFull + 0.1 * gFull
+    fov.slantRFull = 180. + 45. * (gFull + 0.5)
+    fov.latCenter = 60. + 0.4 * fov.gates[np.newaxis, :] + \
+        np.zeros((nBeams, 1))
+    fov.lonCenter = -100. + 1.2 * fov.beams[:, np.newaxis] + \
+        0.1 * fov.gates[np.newaxis, :]
+    fov.slantRCenter = 180. + 45. * (fov.gates[np.newaxis, :] + 0.5) + \
+        np.zeros((nBeams, 1))
+
+    nTimes = int((eTime - sTime).total_seconds() / timeRes) + 1
+    times = np.array([sTime + dt.timedelta(seconds=timeRes * i)
+                      for i in range(nTimes)])
+    secs = timeRes * np.arange(nTimes)
+    x = 111. * np.cos(np.radians(60.)) * (fov.lonCenter + 100.)
+    y = 111. * (fov.latCenter - 60.)
+    phase = 2. * np.pi * (secs[:, np.newaxis, np.newaxis] / 1800. -
+                          (0.6 * x + 0.8 * y)[np.newaxis, :, :] / 300.)
+    data = 10. + 3. * np.sin(phase)
+
+    metadata = {'dType': 'dmap', 'stid': 0, 'name': 'Test', 'code': 'tst',
+                'fType': 'fitex', 'cp': None, 'channel': None,
+                'sTime': sTime, 'eTime': eTime, 'param': 'p_l', 'gscat': 0,
+                'elevation': None, 'model': 'GS', 'coords': 'geo',
+                'dataSetName': 'DS000_originalFit', 'serial': 0}
+    dataObj.DS000_originalFit = musicDataObj(
+        times, data, fov=fov, parent=dataObj,
+        comment='[DS000_originalFit] Synthetic Data')
+    dataObj.DS000_originalFit.metadata = metadata
+    dataObj.DS000_originalFit.setActive()
+
+    prm = emptyObj()
+    prm.time = times
+    dataObj.prm = prm
+
+    return dataObj
+
+
+def test_copy_on_write():
+    '''Run processing steps that make new data sets, and check that the
+    data, time and field of view arrays of every earlier data set are left
+    as they were
+
+    Returns
+    --------
+    dataObj : (musicArray)
+        The processed array
+
+    Example
+    --------
+    In [1]: import test_music
+    In [2]: dataObj = test_music.test_copy_on_write()
+    '''
+    import copy
+    import music
+
+    dataObj = make_test_array()
+    orig = dataObj.DS000_originalFit
+    saved = dict([(name, copy.deepcopy(getattr(orig, name)))
+                  for name in ['data', 'time']])
+    fovNames = ['beams', 'gates', 'latCenter', 'lonCenter', 'slantRCenter',
+                'latFull', 'lonFull', 'slantRFull']
+    savedFov = dict([(name, getattr(orig.fov, name).copy())
+                     for name in fovNames])
+
+    # a bare copy shares the arrays, but not the fov, metadata or history
+    newData = orig.copy('copied', 'Copy')
+    assert newData is dataObj.DS001_copied
+    assert newData.data is orig.data
+    assert newData.fov is not orig.fov
+    assert newData.fov.latCenter is orig.fov.latCenter
+    newData.fov.latCenter = newData.fov.latCenter[:, 2:]
+    newData.metadata['param'] = 'v'
+    assert orig.metadata['param'] == 'p_l'
+    assert len(orig.history) == 1
+    delattr(dataObj, 'DS001_copied')
+
+    music.defineLimits(dataObj, gateLimits=[2, 7], beamLimits=[1, 6],
+                       timeLimits=[dt.datetime(2011, 5, 9, 13, 30),
+                                   dt.datetime(2011, 5, 9, 16, 30)])
+    limited = dataObj.active.applyLimits()
+    assert limited is not orig
+    assert limited.data.shape == (181, 6, 6)
+    music.beamInterpolation(dataObj)
+    music.timeInterpolation(dataObj, timeRes=120)
+    music.detrend(dataObj)
+    music.nan_to_num(dataObj)
+    music.windowData(dataObj)
+
+    dataSets = dataObj.get_data_sets()
+    assert len(dataSets) == 7
+    assert dataObj.active is getattr(dataObj, dataSets[-1])
+
+    np.testing.assert_array_equal(orig.data, saved['data'])
+    assert list(orig.time) == list(saved['time'])
+    for name in fovNames:
+        np.testing.assert_array_equal(getattr(orig.fov, name),
+                                      savedFov[name])
+
+    # each data set keeps its own result
+    assert limited.data.shape == (181, 6, 6)
+    assert limited.fov.latCenter.shape == (6, 6)
+    for dataSet in dataSets[1:]:
+        assert getattr(dataObj, dataSet).data is not orig.data
+
+    return dataObj
+
+
+def test_memory_budget():
+    '''Make a chain of data sets with a memory budget that holds three data
+    cubes, and check that the oldest intermediate data sets are released
+    first, that the active data set is never released, and that spilled
+    data sets still hold their values
+
+    Returns
+    --------
+    dataObj : (musicArray)
+        The processed array
+
+    Example
+    --------
+    In [1]: import test_music
+    In [2]: dataObj = test_music.test_memory_budget()
+    '''
+    import os
+    import shutil
+    import tempfile
+    import music
+
+    dataObj = make_test_array()
+    cubeBytes = dataObj.active.data.nbytes
+    assert dataObj.dataBytes() == cubeBytes
+
+    # data sets that share their array are counted once
+    dataObj.active.copy('shared', 'Shared copy')
+    assert dataObj.dataBytes() == cubeBytes
+    delattr(dataObj, 'DS001_shared')
+
+    spillDir = tempfile.mkdtemp()
+    try:
+        dataObj.setMemoryBudget(3 * cubeBytes, spillDir=spillDir)
+        saved = dict()
+        for i in range(5):
+            music.nan_to_num(dataObj, newDataSetName='step%d' % i)
+            saved[dataObj.active.metadata['dataSetName']] = \
+                np.array(dataObj.active.data)
+            assert dataObj.dataBytes() <= dataObj.memoryBudget
+            assert not isinstance(dataObj.active.data, np.memmap)
+
+        dataSets = dataObj.get_data_sets()
+        spilled = [ds for ds in dataSets
+                   if isinstance(getattr(dataObj, ds).data, np.memmap)]
+        # the three newest data sets are kept, the oldest three spilled
+        assert spilled == dataSets[:3], spilled
+        for dataSet in dataSets[1:]:
+            np.testing.assert_array_equal(getattr(dataObj, dataSet).data,
+                                          saved[dataSet])
+        assert sorted(os.listdir(spillDir)) == \
+            sorted([ds + '.npy' for ds in spilled])
+
+        # a budget below one cube releases everything but the active set
+        dataObj.setMemoryBudget(cubeBytes / 2)
+        released = dataObj.enforceMemoryBudget()
+        assert released == dataSets[3:5]
+        assert dataObj.DS004_step3.data is None
+        assert dataObj.dataBytes() == cubeBytes
+        assert dataObj.active is dataObj.DS005_step4
+        np.testing.assert_array_equal(dataObj.active.data,
+                                      saved['DS005_step4'])
+    finally:
+        shutil.rmtree(spillDir)
+
+    return dataObj
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# test_musicBatch.py
+#
+# Comments: Functions to test the MUSIC batch driver
+#-----------------------------------------------------------------------------
+"""This module contains routines to test the musicBatch routines on a
+synthetic musicArray, without reading any radar data
+
+Functions
+-------------------------------------------------------------------------------
+seed_window           Write a synthetic musicArray as the load checkpoint
+test_run_window       Run the processing chain on one window
+test_batch            Run a batch of two windows and write the summary table
+-------------------------------------------------------------------------------
+"""
+import datetime as dt
+import numpy as np
+
+# The parameters used for the test windows.  The short filter keeps the
+# loaded time span inside the synthetic data.
+test_params = {'timeRes': 120, 'numtaps': 31, 'gateLimits': [1, 8],
+               'beamLimits': [0, 7], 'dkx': 0.002, 'dky': 0.002}
+
+
+def seed_window(outDir, radar, sTime, eTime, params=test_params):
+    '''Write a synthetic musicArray (see test_music.make_test_array) as the
+    load stage checkpoint of a window, so that running the window starts
+    from it instead of reading radar data
+
+    Parameters
+    ----------
+    outDir : (str)
+        Directory of the checkpoints
+    radar : (str)
+        Radar code of the window
+    sTime : (datetime)
+        Start of the time of interest
+    eTime : (datetime)
+        End of the time of interest
+    params : (dict)
+        Processing parameters of the window (default=test_params)
+
+    Returns
+    --------
+    fName : (str)
+        The checkpoint file written
+    '''
+    import os
+    import cPickle
+    from musicBatch import _windowParams, _windowName, _stageKeys, \
+        _checkpointName
+    from music import filterTimes
+    from test_music import make_test_array
+
+    radar, sTime, eTime, prm = _windowParams((radar, sTime, eTime, params))
+    name = _windowName(radar, sTime, eTime)
+    keys = _stageKeys(radar, sTime, eTime, prm)
+    loadTimes = filterTimes(sTime, eTime, prm['timeRes'], prm['numtaps'])
+
+    dataObj = make_test_array(sTime=loadTimes[0] - dt.timedelta(minutes=5),
+                              eTime=loadTimes[1] + dt.timedelta(minutes=5))
+    winDir = os.path.join(outDir, name)
+    if not os.path.isdir(winDir):
+        os.makedirs(winDir)
+    fName = _checkpointName(outDir, name, 0, keys[0])
+    with open(fName, 'wb') as fl:
+        cPickle.dump(dataObj, fl, cPickle.HIGHEST_PROTOCOL)
+
+    return fName
+
+
+def test_run_window():
+    '''Run the processing chain on a window seeded with a synthetic
+    musicArray, and check the summary and the shapes of the results
+
+    Returns
+    --------
+    summary : (dict)
+        The summary of the window
+
+    Example
+    --------
+    In [1]: import test_musicBatch
+    In [2]: summary = test_musicBatch.test_run_window()
+    '''
+    import os
+    import shutil
+    import tempfile
+    from musicBatch import runMusicWindow, musicStages
+
+    sTime = dt.datetime(2011, 5, 9, 14, 0)
+    eTime = dt.datetime(2011, 5, 9, 16, 0)
+    outDir = tempfile.mkdtemp()
+    try:
+        seed_window(outDir, 'tst', sTime, eTime)
+        dataObj, summary = runMusicWindow('tst', sTime, eTime, outDir=outDir,
+                                          **test_params)
+        checkpoints = os.listdir(os.path.join(outDir, summary['window']))
+
+        # running again resumes from the last stage, without any work
+        dataObj2, summary2 = runMusicWindow('tst', sTime, eTime,
+                                            outDir=outDir, **test_params)
+    finally:
+        shutil.rmtree(outDir)
+
+    assert sorted(summary.keys()) == sorted(['window', 'radar', 'sTime',
+                                             'eTime', 'status', 'stage',
+                                             'resumed', 'goodPeriod',
+                                             'signals', 'message',
+                                             'seconds'])
+    assert summary['status'] == 'ok', summary['message']
+    assert summary['window'] == 'tst_20110509.1400_20110509.1600'
+    assert summary['resumed'] == 'load'
+    assert summary['stage'] == musicStages[-1][0]
+    assert summary['goodPeriod'] is True
+    assert len(checkpoints) == len(musicStages)
+    assert summary2['resumed'] == musicStages[-1][0]
+    assert summary2['status'] == 'ok'
+
+    # the limits leave 8 beams and 8 gates, and the filter the time of
+    # interest (to within a sample) at timeRes
+    active = dataObj.active
+    nTimes = len(active.time)
+    res = dt.timedelta(seconds=test_params['timeRes'])
+    assert abs(active.time[0] - sTime) <= res
+    assert abs(active.time[-1] - eTime) <= res
+    assert nTimes == 61
+    assert active.data.shape == (nTimes, 8, 8)
+    nCells = 8 * 8
+    assert active.Dlm.shape == (nCells, nCells)
+    assert active.karr.shape == (len(active.kxVec), len(active.kyVec))
+    assert len(active.kxVec) == 51 and len(active.kyVec) == 51
+
+    assert len(summary['signals']) > 0
+    for sig in summary['signals']:
+        for key in ['order', 'kx', 'ky', 'k', 'lambda', 'azm', 'freq',
+                    'period', 'vel', 'max', 'area']:
+            assert key in sig, key
+    assert [sig['order'] for sig in summary['signals']] == \
+        range(1, len(summary['signals']) + 1)
+
+    # the strongest signal is the synthetic wave
+    sig = summary['signals'][0]
+    np.testing.assert_allclose(sig['period'], 1800., rtol=1.0e-6)
+    np.testing.assert_allclose(sig['azm'], np.degrees(np.arctan2(0.6, 0.8)),
+                               atol=1.)
+    assert 250. < sig['lambda'] < 350.
+
+    return summary
+
+
+def test_batch():
+    '''Run a batch of a seeded window and a window with an unknown parameter,
+    and check the summaries and the summary table
+
+    Returns
+    --------
+    summaries : (list)
+        The summaries of the windows
+
+    Example
+    --------
+    In [1]: import test_musicBatch
+    In [2]: summaries = test_musicBatch.test_batch()
+    '''
+    import os
+    import csv
+    import shutil
+    import tempfile
+    from musicBatch import musicBatch, summaryColumns
+
+    window = {'radar': 'tst', 'sTime': dt.datetime(2011, 5, 9, 14, 0),
+              'eTime': dt.datetime(2011, 5, 9, 16, 0)}
+    # an unknown parameter fails its window, but not the batch
+    badWindow = ('tst', dt.datetime(2011, 5, 10, 14, 0),
+                 dt.datetime(2011, 5, 10, 16, 0), {'notAParam': 1})
+    outDir = tempfile.mkdtemp()
+    try:
+        seed_window(outDir, window['radar'], window['sTime'],
+                    window['eTime'])
+        summaries = musicBatch([window, badWindow], outDir, nproc=1,
+                               **test_params)
+        with open(os.path.join(outDir, 'musicSignals.csv'), 'rb') as fl:
+            rows = list(csv.reader(fl))
+    finally:
+        shutil.rmtree(outDir)
+
+    assert [s['status'] for s in summaries] == ['ok', 'failed']
+    nsig = len(summaries[0]['signals'])
+    assert nsig > 0
+    assert rows[0] == summaryColumns
+    assert len(rows) == 1 + nsig + 1
+    assert all([len(row) == len(summaryColumns) for row in rows])
+    assert [row[4] for row in rows[1:]] == ['ok'] * nsig + ['failed']
+    np.testing.assert_array_equal([int(row[6]) for row in rows[1:-1]],
+                                  np.arange(1, nsig + 1))
+
+    return summaries
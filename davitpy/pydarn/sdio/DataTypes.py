@@ -16,7 +16,7 @@
 
 """
 .. module:: DataTypes
-   :synopsis: the parent class needed for reading data (dmap, hdf5 (soon?))
+   :synopsis: the parent class needed for reading data (dmap, hdf5)
 .. moduleauthor:: Ashton Reimer, 20140822, generalized from radDataTypes.py by
 Jef Spaleta
 
@@ -94,10 +94,10 @@ class DataPtr(object):
     # method to use.
     #
     # To add support for another data type, one needs to do 2 things:
-    #     1) There are 5 methods that are data type specific:
-    #        read, createIndex, offsetSeek, offsetTell, and rewind
-    #        One must create a method for each one of these (see examples
-    #        at the end of this class).
+    #     1) There are 7 methods that are data type specific:
+    #        open, close, read, createIndex, offsetSeek, offsetTell, and
+    #        rewind.  One must create a method for each one of these (see
+    #        examples at the end of this class).
     #     2) Each method needs to be registered in the method dictionaries 
     #        in the __init__ of this class. The keys in each dictionary 
     #        are the data types and the values are the method names for 
@@ -115,11 +115,16 @@ class DataPtr(object):
         # specific methods to use credit to Adam Knox (github 
         # @aknox-va) for the idea.          
 
-        __read = {'dmap':self.__readDmap}
-        __createIndex = {'dmap':self.__createIndexDmap}
-        __offsetSeek = {'dmap':self.__offsetSeekDmap}
-        __offsetTell = {'dmap':self.__offsetTellDmap}
-        __rewind = {'dmap':self.__rewindDmap}
+        __open = {'dmap':self.__openDmap, 'hdf5':self.__openHdf5}
+        __close = {'dmap':self.__closeDmap, 'hdf5':self.__closeHdf5}
+        __read = {'dmap':self.__readDmap, 'hdf5':self.__readHdf5}
+        __createIndex = {'dmap':self.__createIndexDmap,
+                         'hdf5':self.__createIndexHdf5}
+        __offsetSeek = {'dmap':self.__offsetSeekDmap,
+                        'hdf5':self.__offsetSeekHdf5}
+        __offsetTell = {'dmap':self.__offsetTellDmap,
+                        'hdf5':self.__offsetTellHdf5}
+        __rewind = {'dmap':self.__rewindDmap, 'hdf5':self.__rewindHdf5}
         datatypelist = __read.keys()
 
         # Check input variables
@@ -142,6 +147,8 @@ class DataPtr(object):
         self._ptr =  None
 
         # Set the data Type specific methods
+        self.open = __open[datatype]
+        self.close = __close[datatype]
         self.read = __read[datatype]
         self.createIndex = __createIndex[datatype]
         self.offsetSeek = __offsetSeek[datatype]
@@ -152,33 +159,33 @@ class DataPtr(object):
     # FIRST, THE GENERAL COMMON METHODS
 
     def __del__(self):
-        self.close() 
+        if hasattr(self, 'close'):
+            self.close() 
 
     def __iter__(self):
         return self
-     
-    def open(self):
+
+
+    # BEGIN DATA TYPE SPECIFIC HIDDEN METHODS
+
+    ########################################
+    #                 DMAP
+    ########################################
+
+    # NOW ALL OF THE DMAP SPECIFIC METHODS
+    def __openDmap(self):
         """open the associated filename."""
         import os
         self._fd = os.open(self._filename, os.O_RDONLY)
         self._ptr = os.fdopen(self._fd)
  
-    def close(self):
+    def __closeDmap(self):
         """ Close the associated file.
         """
-        import os
         if self._ptr is not None:
             self._ptr.close()
             self._fd = None
 
-
-    # BEGIN DATA TYPE SPECIFIC HIDDEN METHODS
-
-    ########################################
-    #                 DMAP
-    ########################################
-
-    # NOW ALL OF THE DMAP SPECIFIC METHODS
     def __createIndexDmap(self):
         """ Create dictionary of offsets as a function of timestamp.
         """
@@ -295,12 +302,99 @@ class DataPtr(object):
               dt.datetime.utcfromtimestamp(dfile['time']) <= self.eTime):
                return dfile
 
+    ########################################
+    #                 HDF5
+    ########################################
+
+    # NOW ALL OF THE HDF5 SPECIFIC METHODS
+    # The file is a column store (see pydarn.sdio.columnStore), and the
+    # "offsets" are record numbers rather than byte offsets.
+    def __openHdf5(self):
+        """ Open the associated column store.
+        """
+        from davitpy.pydarn.sdio.columnStore import columnStoreReader
+        self._ptr = columnStoreReader(self._filename)
+
+    def __closeHdf5(self):
+        """ Close the associated column store.
+        """
+        if self._ptr is not None:
+            self._ptr.close()
+
+    def __createIndexHdf5(self):
+        """ Create dictionary of record numbers as a function of timestamp,
+        from the time index of the store.
+        """
+        recordDict, scanStartDict = self._ptr.createIndex(self.sTime,
+                                                          self.eTime,
+                                                          scanKey='scan')
+        self.recordIndex = recordDict
+        self.scanStartIndex = scanStartDict
+        return recordDict, scanStartDict
+
+    def __offsetSeekHdf5(self, offset, force=False):
+        """ Jump to the record with the supplied record number.
+        Require offset to be in record index list unless forced. 
+        """
+        if force:
+            return self._ptr.setOffset(offset)
+        else:
+            if self.recordIndex is None:        
+                self.__createIndexHdf5()
+
+            if offset in self.recordIndex.values():
+                return self._ptr.setOffset(offset)
+            else:
+                return self._ptr.getOffset()
+
+    def __offsetTellHdf5(self):
+        """ Current record number.
+        """
+        return self._ptr.getOffset()
+
+    def __rewindHdf5(self):
+        """ Jump to the first record of the store.
+        """
+        return self._ptr.setOffset(0)
+
+    def __readHdf5(self):
+        """ A function to read a single record of data from a column store.
+
+        Returns
+        --------
+        dfile : (dict/NoneType)
+            A dictionary with the data in the record, as it would be read
+            from a dmap file.  Will return None when finished reading
+        """
+        import datetime as dt
+
+        # check input
+        if self._ptr == None:
+            logging.error('your pointer does not point to any data')
+            return None
+
+        if self._ptr.closed:
+            logging.error('your file pointer is closed')
+            return None
+
+        # the time index lets us skip straight to the requested start time
+        dfile = self._ptr.readRec(sTime=self.sTime)
+        if(dfile == None or
+           dt.datetime.utcfromtimestamp(dfile['time']) > self.eTime):
+            logging.info('reached end of data')
+            return None
+        return dfile
+
     ########################################
     #    NEW DATATYPE TEMPLATE METHODS
     ########################################
 
     # NOW ALL OF THE NEW DATATYPE SPECIFIC METHODS
 
+    def __openNewDatatype(self):
+        pass
+    def __closeNewDatatype(self):
+        pass
     def __readNewDatatype(self):
         pass
     def __createIndexNewDatatype(self):
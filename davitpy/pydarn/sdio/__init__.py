@@ -10,6 +10,8 @@ radDataTypes
     defines the fundamental radar data types
 radDataRead
     contains the functions necessary for reading radar data
+radDataMerge
+    reads several radars as one time ordered stream
 sdDataTypes
     defines the map and grid data types
 sdDataRead
@@ -20,6 +22,10 @@ dbUtils
     general utilities for database maintenance
 fetchUtils
     routines to retrieve data files from local and remote locations
+columnStore
+    a time indexed, columnar HDF5 store for the records of dmap files
+storeConvert
+    converts dmap files into column stores, in parallel
 """
 import logging
 
@@ -28,6 +34,11 @@ try:
 except Exception,e:
     logging.exception(__file__+' -> pydarn.sdio.fetchUtils: ', str(e))
 
+try:
+    from columnStore import *
+except Exception,e:
+    logging.exception(__file__+' -> pydarn.sdio.columnStore: ', str(e))
+
 try:
     from DataTypes import *
 except Exception,e:
@@ -43,6 +54,11 @@ try:
 except Exception,e:
     logging.exception(__file__+' -> pydarn.sdio.radDataRead: ', str(e))
 
+try:
+    from radDataMerge import *
+except Exception,e:
+    logging.exception(__file__+' -> pydarn.sdio.radDataMerge: ', str(e))
+
 try:
     from sdDataTypes import *
 except Exception,e:
@@ -58,6 +74,11 @@ try:
 except Exception,e:
     logging.exception(__file__+' -> pydarn.sdio.fitexfilter: ', str(e))
 
+try:
+    from storeConvert import *
+except Exception,e:
+    logging.exception(__file__+' -> pydarn.sdio.storeConvert: ', str(e))
+
 try:
     from dbUtils import *
 except Exception,e:
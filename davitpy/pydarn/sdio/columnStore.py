@@ -0,0 +1,594 @@
+# Copyright (C) 2012  VT SuperDARN Lab
+# Full license can be found in LICENSE.txt
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+.. module:: columnStore
+   :synopsis: a chunked, compressed, time indexed HDF5 store for the records
+   of dmap files
+
+*********************
+**Module**: pydarn.sdio.columnStore
+*********************
+
+The records of a dmap file (fit, raw, iq, grid or map) are stored column by
+column in an HDF5 file, one dataset per dmap field, sorted by time.  The
+store keeps the record times in their own dataset, so that any time window
+can be found with a binary search and read without touching the records
+before it.  Records read back from a store are dictionaries with the same
+keys and value types as those returned by dmapio.readDmapRec, so the data
+pointers can read a store exactly as they read a dmap file.
+
+Layout of a store
+------------------
+time : (float64, nrec)
+    record times, epoch seconds, ascending.  For grid and map files this is
+    the start time of the record.
+scalars/<key> : (nrec)
+    one value per record
+arrays/<key> : (total length)
+    the arrays of all of the records, one after the other.  The 'width'
+    attribute is set for arrays of pairs, such as ltab.
+offsets/<key> : (int64, nrec+1)
+    record i of arrays/<key> is values[offsets[i]:offsets[i+1]]
+missing/<key> : (bool, nrec)
+    only written for fields that are not present in every record
+
+Classes
+---------
+  * :class:`pydarn.sdio.columnStore.columnStoreReader`
+  * :class:`pydarn.sdio.columnStore.columnStoreWriter`
+
+Functions
+-----------
+  * :func:`pydarn.sdio.columnStore.isColumnStore`
+  * :func:`pydarn.sdio.columnStore.recordEpoch`
+
+"""
+import logging
+import numpy as np
+
+# version of the store layout, written to the file attributes
+storeVersion = 1
+
+# file name extensions used for stores
+storeExtensions = ('.h5', '.hdf5')
+
+
+def isColumnStore(fileName):
+    """Check whether a file name refers to a column store rather than a dmap
+    file.
+
+    Parameters
+    ------------
+    fileName : (str)
+        the file name
+
+    Returns
+    ---------
+    (bool)
+        True if the name ends in one of storeExtensions
+
+    """
+    import os
+    return os.path.splitext(fileName)[1].lower() in storeExtensions
+
+
+def recordEpoch(adict):
+    """The time of a dmap record, in epoch seconds.
+
+    Parameters
+    ------------
+    adict : (dict)
+        a record, as returned by dmapio.readDmapRec
+
+    Returns
+    ---------
+    (float)
+        the start time for grid and map records, which carry their times in
+        the start.* fields, and the 'time' field for everything else
+
+    """
+    import datetime as dt
+
+    if 'start.year' in adict:
+        dtime = dt.datetime(adict['start.year'], adict['start.month'],
+                            adict['start.day'], adict['start.hour'],
+                            adict['start.minute'], int(adict['start.second']))
+        return (dtime - dt.datetime(1970, 1, 1)).total_seconds()
+    return adict['time']
+
+
+def _toEpoch(atime):
+    """datetime (or epoch seconds) to epoch seconds"""
+    import datetime as dt
+
+    if isinstance(atime, dt.datetime):
+        return (atime - dt.datetime(1970, 1, 1)).total_seconds()
+    return atime
+
+
+class columnStoreWriter():
+    """Write dmap records to a column store.
+
+    Parameters
+    ------------
+    fileName : (str)
+        the name of the store to write.  An existing file is replaced.
+    fType : (str/NoneType)
+        the file type of the records, e.g. 'fitacf' or 'map'.  Kept in the
+        store attributes.  (default=None)
+    compression : (str/NoneType)
+        the HDF5 compression filter, 'gzip' or 'lzf', or None for no
+        compression.  (default='gzip')
+    chunkSize : (int)
+        the number of values in a chunk of each dataset.  (default=16384)
+
+    Public Attributes
+    ------------------
+    attrs : (dict)
+        extra attributes to write to the store, e.g. the source file
+    nrec : (int)
+        the number of records appended
+    order : (numpy.ndarray/NoneType)
+        set by close: the append number of each record of the store, in
+        store (time) order
+
+    Methods
+    ---------
+    append
+        add a record
+    close
+        sort the records by time and write the store
+
+    Notes
+    -------
+    The records are kept as numpy arrays until close is called, when each
+    field is written as one dataset.  This keeps the data types of every
+    field fixed by its first non-empty value, and lets the records be put in
+    time order before they are written.
+
+    Example
+    ---------
+        w = pydarn.sdio.columnStoreWriter('20130101.bks.fitacf.h5',
+                                          fType='fitacf')
+        dfile = dmapio.readDmapRec(fd)
+        while dfile is not None:
+            w.append(dfile)
+            dfile = dmapio.readDmapRec(fd)
+        w.close()
+
+    """
+    def __init__(self, fileName, fType=None, compression='gzip',
+                 chunkSize=16384):
+        self.fileName = fileName
+        self.fType = fType
+        self.compression = compression
+        self.chunkSize = chunkSize
+        self.attrs = {}
+        self.nrec = 0
+        self.order = None
+        self.__time = []
+        self.__scalars = {}
+        self.__arrays = {}
+        self.__widths = {}
+
+    def append(self, adict, epoch=None):
+        """Add a record to the store.
+
+        Parameters
+        ------------
+        adict : (dict)
+            a record, as returned by dmapio.readDmapRec
+        epoch : (float/NoneType)
+            the record time in epoch seconds.  (default=None, use
+            recordEpoch(adict))
+
+        """
+        if epoch is None:
+            epoch = recordEpoch(adict)
+        self.__time.append(epoch)
+
+        for key, val in adict.iteritems():
+            if key == 'time':
+                continue
+            if isinstance(val, list):
+                if key not in self.__arrays:
+                    self.__arrays[key] = [None] * self.nrec
+                if len(val) > 0 and isinstance(val[0], list):
+                    self.__widths[key] = len(val[0])
+                self.__arrays[key].append(np.array(val).ravel())
+            else:
+                if key not in self.__scalars:
+                    self.__scalars[key] = [None] * self.nrec
+                self.__scalars[key].append(val)
+
+        self.nrec += 1
+        # fields that are missing from this record
+        for col in (self.__scalars, self.__arrays):
+            for key, vals in col.iteritems():
+                if len(vals) < self.nrec:
+                    vals.append(None)
+
+    def close(self):
+        """Sort the records by time and write the store.
+
+        Returns
+        ---------
+        nrec : (int)
+            the number of records written
+
+        """
+        import h5py
+
+        times = np.array(self.__time, dtype=np.float64)
+        order = np.argsort(times, kind='mergesort')
+        times = times[order]
+        self.order = order
+
+        f = h5py.File(self.fileName, 'w')
+        try:
+            f.attrs['storeVersion'] = storeVersion
+            f.attrs['nrec'] = self.nrec
+            if self.fType is not None:
+                f.attrs['fType'] = self.fType
+            for key, val in self.attrs.iteritems():
+                f.attrs[key] = val
+            self.__create(f, 'time', times)
+
+            for key, vals in self.__scalars.iteritems():
+                vals = [vals[i] for i in order]
+                present = np.array([v is not None for v in vals], dtype=bool)
+                kind = [v for v in vals if v is not None][0]
+                if isinstance(kind, basestring):
+                    dtype = h5py.special_dtype(vlen=str)
+                    vals = np.array([str(v) if v is not None else ''
+                                     for v in vals], dtype=object)
+                elif isinstance(kind, float):
+                    dtype = np.float64
+                    vals = np.array([v if v is not None else np.nan
+                                     for v in vals], dtype=dtype)
+                else:
+                    dtype = np.int32
+                    vals = np.array([v if v is not None else -1
+                                     for v in vals], dtype=dtype)
+                self.__create(f, 'scalars/' + key, vals, dtype=dtype)
+                if not present.all():
+                    self.__create(f, 'missing/' + key, ~present)
+
+            for key, vals in self.__arrays.iteritems():
+                vals = [vals[i] for i in order]
+                present = np.array([v is not None for v in vals], dtype=bool)
+                counts = np.array([len(v) if v is not None else 0
+                                   for v in vals], dtype=np.int64)
+                offsets = np.zeros(self.nrec + 1, dtype=np.int64)
+                offsets[1:] = np.cumsum(counts)
+                filled = [v for v in vals if v is not None and len(v) > 0]
+                if len(filled) > 0:
+                    values = np.concatenate(filled)
+                else:
+                    values = np.zeros(0, dtype=np.float32)
+                # dmapio hands back both single (DATAFLOAT) and double
+                # (DATADOUBLE) values as python floats, so only store a field
+                # as float32 if every one of its values survives the cast
+                if values.dtype.kind == 'f':
+                    single = values.astype(np.float32)
+                    if np.all((single == values) | np.isnan(values)):
+                        values = single
+                elif values.dtype.kind in 'iub':
+                    values = values.astype(np.int32)
+                self.__create(f, 'arrays/' + key, values)
+                if key in self.__widths:
+                    f['arrays/' + key].attrs['width'] = self.__widths[key]
+                self.__create(f, 'offsets/' + key, offsets)
+                if not present.all():
+                    self.__create(f, 'missing/' + key, ~present)
+        finally:
+            f.close()
+
+        # the columns are in the file now
+        self.__time = []
+        self.__scalars = {}
+        self.__arrays = {}
+        return self.nrec
+
+    def __create(self, f, name, vals, dtype=None):
+        """write one dataset, chunked and compressed when it is not empty"""
+        if dtype is None:
+            dtype = vals.dtype
+        if len(vals) == 0:
+            f.create_dataset(name, data=vals, dtype=dtype)
+            return
+        f.create_dataset(name, data=vals, dtype=dtype,
+                         chunks=(min(len(vals), self.chunkSize),),
+                         compression=self.compression,
+                         shuffle=self.compression is not None)
+
+
+class columnStoreReader():
+    """Read the records of a column store one at a time, like a dmap file,
+    or a time window of columns at once.
+
+    Parameters
+    ------------
+    fileName : (str)
+        the name of the store
+    blockSize : (int)
+        the number of records read from the file at a time by readRec.
+        (default=1000)
+
+    Public Attributes
+    ------------------
+    time : (numpy.ndarray)
+        the record times, in epoch seconds
+    nrec : (int)
+        the number of records
+    fType : (str/NoneType)
+        the file type the store was written from
+    attrs : (dict)
+        the attributes of the store
+    closed : (bool)
+        True once the store has been closed
+
+    Methods
+    ---------
+    readRec
+        read the record at the current position into a dictionary
+    readColumns
+        read whole columns for a range of records
+    getOffset
+        the current position (record number)
+    setOffset
+        move to a record number
+    timeRow
+        the first record at or after a time
+    createIndex
+        record numbers as a function of time
+    keys
+        the names of the fields in the store
+    close
+        close the store
+
+    Notes
+    -------
+    A position in a store is a record number, and plays the part of the byte
+    offset in a dmap file.
+
+    """
+    def __init__(self, fileName, blockSize=1000):
+        import h5py
+
+        self.fileName = fileName
+        self.blockSize = blockSize
+        self.__f = h5py.File(fileName, 'r')
+        self.closed = False
+        self.time = self.__f['time'][:]
+        self.nrec = len(self.time)
+        self.attrs = dict(self.__f.attrs.items())
+        self.fType = self.attrs.get('fType', None)
+        self.__scalarKeys = self.__groupKeys('scalars')
+        self.__arrayKeys = self.__groupKeys('arrays')
+        self.__offsets = {}
+        for key in self.__arrayKeys:
+            self.__offsets[key] = self.__f['offsets/' + key][:]
+        self.__missing = {}
+        for key in self.__groupKeys('missing'):
+            self.__missing[key] = self.__f['missing/' + key][:]
+        self.__widths = {}
+        for key in self.__arrayKeys:
+            if 'width' in self.__f['arrays/' + key].attrs:
+                self.__widths[key] = int(self.__f['arrays/' + key].attrs['width'])
+        self.__row = 0
+        self.__block = None
+
+    def __repr__(self):
+        return 'columnStoreReader: {:s}, {:d} records'.format(
+            self.fileName, self.nrec)
+
+    def __groupKeys(self, group):
+        if group not in self.__f:
+            return []
+        return list(self.__f[group].keys())
+
+    def keys(self):
+        """The names of the fields in the store.
+
+        Returns
+        ---------
+        (list)
+            the dmap field names, scalars and arrays
+
+        """
+        return self.__scalarKeys + self.__arrayKeys
+
+    def getOffset(self):
+        """The current position, as a record number."""
+        return self.__row
+
+    def setOffset(self, offset):
+        """Move to a record number.
+
+        Parameters
+        ------------
+        offset : (int)
+            the record number
+
+        Returns
+        ---------
+        (int)
+            the new position
+
+        """
+        self.__row = int(min(max(offset, 0), self.nrec))
+        return self.__row
+
+    def timeRow(self, atime):
+        """The number of the first record at or after a time.
+
+        Parameters
+        ------------
+        atime : (datetime/float)
+            the time, as a datetime or in epoch seconds
+
+        Returns
+        ---------
+        (int)
+            the record number (nrec if all of the records are earlier)
+
+        """
+        return int(np.searchsorted(self.time, _toEpoch(atime), side='left'))
+
+    def createIndex(self, sTime, eTime, scanKey=None):
+        """Record numbers as a function of time, for the records in a time
+        window.
+
+        Parameters
+        ------------
+        sTime : (datetime)
+            the start of the window
+        eTime : (datetime)
+            the end of the window
+        scanKey : (str/NoneType)
+            a field that is 1 for the first record of a scan, e.g. 'scan'.
+            (default=None)
+
+        Returns
+        ---------
+        recordDict : (dict)
+            record number for each record time
+        scanStartDict : (dict)
+            record number for each scan start time.  Empty if scanKey is None.
+
+        """
+        import datetime as dt
+
+        r0 = self.timeRow(sTime)
+        r1 = int(np.searchsorted(self.time, _toEpoch(eTime), side='right'))
+        recordDict = {}
+        scanStartDict = {}
+        if scanKey is not None and scanKey in self.__scalarKeys:
+            scans = self.__f['scalars/' + scanKey][r0:r1]
+        else:
+            scans = np.zeros(max(r1 - r0, 0), dtype=np.int32)
+        for i in range(r0, r1):
+            rectime = dt.datetime.utcfromtimestamp(self.time[i])
+            recordDict[rectime] = i
+            if scans[i - r0] == 1:
+                scanStartDict[rectime] = i
+        return recordDict, scanStartDict
+
+    def readRec(self, sTime=None):
+        """Read the record at the current position and move on to the next.
+
+        Parameters
+        ------------
+        sTime : (datetime/NoneType)
+            if the current record is earlier than this, skip straight to
+            the first record at or after it.  (default=None)
+
+        Returns
+        ---------
+        dfile : (dict/NoneType)
+            the record, as dmapio.readDmapRec would return it.  None at the
+            end of the store.
+
+        """
+        if sTime is not None and self.__row < self.nrec and \
+           self.time[self.__row] < _toEpoch(sTime):
+            self.__row = self.timeRow(sTime)
+        if self.__row >= self.nrec:
+            return None
+
+        if self.__block is None or not (self.__block[0] <= self.__row <
+                                        self.__block[1]):
+            self.__loadBlock(self.__row)
+        b0, b1, scalars, arrays = self.__block
+        i = self.__row - b0
+
+        dfile = {'time': float(self.time[self.__row])}
+        for key, vals in scalars.iteritems():
+            if key in self.__missing and self.__missing[key][self.__row]:
+                continue
+            dfile[key] = vals[i].item() if hasattr(vals[i], 'item') \
+                else vals[i]
+        for key, (vals, offsets) in arrays.iteritems():
+            if key in self.__missing and self.__missing[key][self.__row]:
+                continue
+            arr = vals[offsets[i] - offsets[0]:offsets[i + 1] - offsets[0]]
+            if key in self.__widths:
+                arr = arr.reshape(-1, self.__widths[key])
+            dfile[key] = arr.tolist()
+
+        self.__row += 1
+        return dfile
+
+    def __loadBlock(self, row):
+        """read blockSize records, starting at row, from every dataset"""
+        b0 = row
+        b1 = min(row + self.blockSize, self.nrec)
+        scalars = {}
+        for key in self.__scalarKeys:
+            scalars[key] = self.__f['scalars/' + key][b0:b1]
+        arrays = {}
+        for key in self.__arrayKeys:
+            offsets = self.__offsets[key][b0:b1 + 1]
+            arrays[key] = (self.__f['arrays/' + key][offsets[0]:offsets[-1]],
+                           offsets)
+        self.__block = (b0, b1, scalars, arrays)
+
+    def readColumns(self, keys=None, sTime=None, eTime=None):
+        """Read whole columns for the records in a time window.
+
+        Parameters
+        ------------
+        keys : (list/NoneType)
+            the fields to read.  (default=None, read all of them)
+        sTime : (datetime/NoneType)
+            the start of the window.  (default=None, the first record)
+        eTime : (datetime/NoneType)
+            the end of the window.  (default=None, the last record)
+
+        Returns
+        ---------
+        cols : (dict)
+            'time' and each scalar field map to a numpy array with one
+            value per record.  Each array field maps to a (values, offsets)
+            tuple, where record i is values[offsets[i]:offsets[i+1]].
+
+        """
+        r0 = 0 if sTime is None else self.timeRow(sTime)
+        r1 = self.nrec if eTime is None else \
+            int(np.searchsorted(self.time, _toEpoch(eTime), side='right'))
+        r1 = max(r0, r1)
+        if keys is None:
+            keys = self.keys()
+
+        cols = {'time': self.time[r0:r1]}
+        for key in keys:
+            if key in self.__scalarKeys:
+                cols[key] = self.__f['scalars/' + key][r0:r1]
+            elif key in self.__arrayKeys:
+                offsets = self.__offsets[key][r0:r1 + 1]
+                vals = self.__f['arrays/' + key][offsets[0]:offsets[-1]]
+                cols[key] = (vals, offsets - offsets[0])
+            else:
+                logging.warning('{:s} is not in the store'.format(key))
+        return cols
+
+    def close(self):
+        """Close the store."""
+        if not self.closed:
+            self.__f.close()
+            self.__block = None
+            self.closed = True
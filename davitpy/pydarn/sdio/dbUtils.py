@@ -14,6 +14,7 @@ getDbConn
 getDataConn
 updateDbDict
 readFromDb
+readColumnsFromDb
 mapDbFit
 """
 
@@ -23,6 +24,23 @@ import os
 from pymongo import MongoClient
 import davitpy
 
+# The names that beam document fields are stored under.  The short names
+# originally used on the VT server are not part of this package, so each
+# field is stored under its own name by default.  Entries can be changed to
+# read from a database that uses different names.
+cipher = dict([(key, key) for key in ['time', 'stid', 'channel', 'bmnum', 'cp',
+                                      'exflg', 'acflg', 'lmflg', 'rawflg',
+                                      'iqflg', 'prm', 'fitex', 'fitacf',
+                                      'lmfit', 'rawacf', 'iqdat']])
+
+# file type flag -> the beam document field holding that file type's data
+refArr = {'exflg':'fitex', 'acflg':'fitacf', 'lmflg':'lmfit',
+          'rawflg':'rawacf', 'iqflg':'iqdat'}
+
+# Server connections, kept so that later calls reuse the connection pool of
+# an existing MongoClient instead of opening a new one
+_serverConns = {}
+
 def getServerConn(username=davitpy.rcParams['SDBREADUSER'],
                   password=davitpy.rcParams['SDBREADPASS'],
                   dbAddress=davitpy.rcParams['SDDB']):
@@ -58,12 +76,27 @@ def getServerConn(username=davitpy.rcParams['SDBREADUSER'],
     --------
     mongodb hierarchy goes SERVER->DATABASE->COLLECTION
 
+    A MongoClient keeps its own pool of connections, so one client is made
+    for each username, password and dbAddress combination and returned by
+    all later calls with the same arguments.  Only a hash of the password is
+    kept with the client.
+
     Written by AJ 20130108
     """
 
+    import hashlib
+
+    # reuse an existing client (and its connection pool) if we have one.  The
+    # clients are looked up by a hash of the password, so that the password
+    # itself is not held on to
+    key = (username, hashlib.sha256(str(password)).hexdigest(), dbAddress)
+    if key in _serverConns:
+        return _serverConns[key]
+
     # get a server connection, checking for any errors
     try:
         sconn = MongoClient('mongodb://'+username+':'+password+'@'+dbAddress)
+        _serverConns[key] = sconn
     except Exception,e:
         logging.error(e)
         logging.error('problem connecting to server {}'.format(dbAddress))
@@ -272,8 +305,9 @@ def readFromDb(sTime=None, eTime=None, stid=None, channel=None, bmnum=None,
 
     Returns
     --------
-    qry : (list/None)
-        A list of pydarn.sdio.beamData objects in chronological order.
+    qry : (pymongo cursor/None)
+        A cursor over the matching beam documents.  See readColumnsFromDb for
+        reading large amounts of fitted data.
 
     Notes
     -------
@@ -284,8 +318,38 @@ def readFromDb(sTime=None, eTime=None, stid=None, channel=None, bmnum=None,
 
     Written by AJ 20130108
     """
-    t = dt.datetime.now()
-  
+    # build the query, leaving out the data of other file types
+    qrydict, exdict = _beamQuery(sTime=sTime, eTime=eTime, stid=stid,
+                                 channel=channel, bmnum=bmnum, cp=cp,
+                                 fileType=fileType, exactFlg=exactFlg)
+
+    # get a data connection for the mongodb database
+    beams = getDataConn()
+    if beams is None:
+        return None
+
+    # set up the query.  The query is sent to the server when the cursor is
+    # first iterated over, so no extra count request is made here.
+    try:
+        qry = beams.find(qrydict, exdict)
+    except Exception,e:
+        logging.error(e)
+        qry = None
+
+    return qry
+
+def _beamQuery(sTime=None, eTime=None, stid=None, channel=None, bmnum=None,
+               cp=None, fileType='fitex', exactFlg=False):
+    """Build the query and the excluded fields for a beam request.  See
+    readFromDb for the parameters.
+
+    Returns
+    --------
+    qrydict : (dict)
+        the query
+    exdict : (dict)
+        the fields holding the data of the other file types, set to 0
+    """
     # a list which will contain our query criteria
     qry_list = []
 
@@ -296,7 +360,7 @@ def readFromDb(sTime=None, eTime=None, stid=None, channel=None, bmnum=None,
 
     # if we want only a single exact time (useful for filling/updating database)
     if(exactFlg):
-        qry_list.append({"time": sTime})
+        qry_list.append({cipher["time"]: sTime})
     else:
         # if endtime is not provided, use a 24-hour window
         if(eTime == None): 
@@ -316,20 +380,8 @@ def readFromDb(sTime=None, eTime=None, stid=None, channel=None, bmnum=None,
     if(cp != None):
         qry_list.append({cipher["cp"]: cp})
 
-    # get a data connection for the mongodb database
-    beams = getDataConn()
-
     # some arrays for dealing with data types
-    if(fileType == 'fitex'):
-        flg = 'exflg'
-    elif(fileType == 'fitacf'):
-        flg = 'acflg'
-    elif(fileType == 'lmfit'):
-        flg = 'lmflg'
-    elif(fileType == 'rawacf'):
-        flg = 'rawflg'
-    elif(fileType == 'iqdat'):
-        flg = 'iqflg'
+    flg = _fileTypeFlag(fileType)
 
     # append the current file type to the query
     qry_list.append({cipher[flg]:1})
@@ -344,18 +396,128 @@ def readFromDb(sTime=None, eTime=None, stid=None, channel=None, bmnum=None,
         if(key != flg):
             exdict[cipher[val]] = 0
 
-    # do the actual query
-    qry = beams.find(qrydict, exdict)
+    return qrydict, exdict
 
-    # check if we have any results
-    try:
-        count = qry.count()
-    except Exception,e:
-        logging.error(e)
-        qry = None
+def _fileTypeFlag(fileType):
+    """The beam document flag marking that a file type is present"""
+    for key,val in refArr.iteritems():
+        if val == fileType:
+            return key
 
-    return qry
+    estr = "fileType must be one of: {:}".format(refArr.values())
+    logging.error(estr)
+    raise ValueError(estr)
+
+def readColumnsFromDb(sTime=None, eTime=None, stid=None, channel=None,
+                      bmnum=None, cp=None, fileType='fitex', fields=None,
+                      batchSize=1000, dataConn=None):
+    """Read fitted beam soundings from the mongodb database, in batches of
+    radColumnData objects
+
+    Examples
+    ---------
+    ::
+    for cols in readColumnsFromDb(sTime=stime, eTime=etime, stid=33,
+                                  fields=['v', 'p_l', 'gflg']):
+        vel = cols.gateArray('v', nrang=75)
+
+    Parameters
+    ----------
+    sTime : (datetime/NoneType)
+        A datetime object with the time to start reading.  If this is None,
+        sTime is defined as 00:00 UT on 1 Jan 2011. (default=None)
+    eTime : (datetime/NoneType)
+        A datetime object specifying the last record to read.  If this is
+        None, 24 hours of data are read.  (default=None)
+    stid : (int/NoneType)
+        The station id of the radar we want data for.  If this is None, all
+        available radars will be read.  (default=None)
+    channel : (str/NoneType)
+        The channel letter for which to read data.  If this is None, data from
+        all channels will be read.  (default=None)
+    bmnum : (int/NoneType)
+        The beam number for which to read data.  If this is None, data from all
+        beams will be read.  (default=None)
+    cp : (int/NoneType)
+        The control program for which to read data.  If this is None, data from
+        all control programs will be read.  (default=None)
+    fileType : (str)
+        The fitted file type to read, 'fitex', 'fitacf' or 'lmfit'.
+        (default='fitex')
+    fields : (list/NoneType)
+        The fitted parameters to read, e.g. ['v', 'p_l', 'gflg'].  Only these
+        (and slist) are requested from the server.  If None, all of the
+        fitted parameters are read.  (default=None)
+    batchSize : (int)
+        The number of beam soundings requested from the server at a time,
+        and held in each radColumnData object.  (default=1000)
+    dataConn : (collection/NoneType)
+        The collection to read from.  If None, the collection returned by
+        getDataConn is used.  Any object with the pymongo find interface may
+        be given, e.g. a mongomock collection.  (default=None)
+
+    Returns
+    --------
+    batches : (generator)
+        A generator of pydarn.sdio.radColumnData objects, each holding up to
+        batchSize beam soundings in chronological order.
 
+    Notes
+    -------
+    Only the beam parameters, the operating parameters and the requested
+    fitted parameters are sent by the server, and the documents are converted
+    a batch at a time without creating a beamData object for each sounding.
+    """
+    from davitpy.pydarn.sdio.radDataTypes import radColumnData, beamFields, \
+        fitFields, alpha
+
+    # the projection below already leaves out the other file types
+    qrydict, _ = _beamQuery(sTime=sTime, eTime=eTime, stid=stid,
+                            channel=channel, bmnum=bmnum, cp=cp,
+                            fileType=fileType)
+
+    # ask only for the fields that go into the columns
+    ftype = cipher[fileType]
+    projection = {'_id':0, cipher['time']:1, cipher['prm']:1}
+    for key, name, fmt in beamFields:
+        if name in cipher:
+            projection[cipher[name]] = 1
+    for key, name, fmt in fitFields:
+        if fields is None or name == 'slist' or name in fields:
+            projection['{:s}.{:s}'.format(ftype, name)] = 1
+
+    if dataConn is None:
+        dataConn = getDataConn()
+    if dataConn is None:
+        return
+
+    qry = dataConn.find(qrydict, projection)
+    qry = qry.sort(cipher['time'], 1).batch_size(batchSize)
+
+    cols = radColumnData(fType=fileType, fields=fields)
+    nbeam = 0
+    for doc in qry:
+        # flatten the beam, prm and fitted data into a single dictionary
+        beamDict = dict(doc.get(cipher['prm']) or {})
+        beamDict.update(doc.get(ftype) or {})
+        for key, name, fmt in beamFields:
+            if name in cipher and cipher[name] in doc:
+                beamDict[name] = doc[cipher[name]]
+        if isinstance(beamDict.get('channel'), basestring):
+            beamDict['channel'] = alpha.index(beamDict['channel']) + 1
+
+        cols.appendRecord(doc[cipher['time']], beamDict, attrNames=True)
+        nbeam += 1
+
+        if nbeam == batchSize:
+            cols.finish()
+            yield cols
+            cols = radColumnData(fType=fileType, fields=fields)
+            nbeam = 0
+
+    if nbeam > 0:
+        cols.finish()
+        yield cols
 
 def mapDbFit(date_str, rad, time=[0,2400], fileType='fitex'):
     """Put dmap data into the mongodb database
@@ -22,6 +22,11 @@ Filter fitexfiles natively in python
 Functions
 ----------
 combBeams
+filterWeights
+scanArrays
+filterScan
+writeFitRec
+readFitScans
 fitFilter
 doFilter
 
@@ -33,13 +38,13 @@ Gate : A class to hold limited fitted and interferometer values for a single
 
 Notes
 ---------
-This is very SLOW.   We recommend using the c version which is folded into
-the sdio function radDataRead.radDataOpen
+The filter works on (scan, beam, gate) arrays, so it is much faster than it
+used to be, but the c version which is folded into the sdio function
+radDataRead.radDataOpen is still the quickest option.
 """
 
 import numpy as np
 import datetime as dt
-from davitpy import utils
 import logging
 
 class Gate(object):
@@ -144,10 +149,368 @@ def combBeams(scan):
 
     return outscan
 
+# parameters that are median filtered
+filterParams = ['v', 'w_l', 'p_l', 'elv', 'phi0', 'pwr0']
+
+# dmap types (see dmap.h) of the fitacf record fields that can't be inferred
+# from the python values returned by readDmapRec
+_charScalars = ['radar.revision.major', 'radar.revision.minor', 'origin.code']
+_intScalars = ['time.us', 'intt.us', 'mxpwr', 'lvmax', 'fitacf.revision.major',
+               'fitacf.revision.minor']
+_floatScalars = ['noise.search', 'noise.mean', 'bmazm', 'noise.sky',
+                 'noise.lag0', 'noise.vel']
+_shortArrays = ['ptab', 'ltab', 'slist', 'nlag']
+_charArrays = ['qflg', 'gflg', 'x_qflg', 'x_gflg']
+
+# fitacf arrays indexed by slist, which are dropped from filtered records
+# unless they are filtered
+_gateArrays = ['nlag', 'qflg', 'gflg', 'p_l', 'p_l_e', 'p_s', 'p_s_e', 'v',
+               'v_e', 'w_l', 'w_l_e', 'w_s', 'w_s_e', 'sd_l', 'sd_s', 'sd_phi',
+               'x_qflg', 'x_gflg', 'x_p_l', 'x_p_l_e', 'x_p_s', 'x_p_s_e',
+               'x_v', 'x_v_e', 'x_w_l', 'x_w_l_e', 'x_w_s', 'x_w_s_e',
+               'x_sd_l', 'x_sd_s', 'x_sd_phi', 'phi0', 'phi0_e', 'elv',
+               'elv_low', 'elv_high']
+
+def filterWeights():
+    """This function returns the boxcar filter weights
+
+    Returns
+    --------
+    w : (numpy.ndarray)
+        A (3, 3, 3) array of integer weights indexed by time, beam, and gate
+        offset.  Every cell has a weight of one, plus one for each dimension
+        in which it sits at the centre, plus one more for the centre cell.
+    """
+    w = 1 + (np.indices((3, 3, 3)) == 1).sum(axis=0)
+    w[1, 1, 1] += 1
+    return w
+
+def _beamFit(beam):
+    """Return the beam number, number of range gates, and fit arrays of a
+    beamData object or a dmap record dictionary
+    """
+    if isinstance(beam, dict):
+        return beam['bmnum'], beam['nrang'], beam
+    else:
+        return beam.bmnum, beam.prm.nrang, beam.fit.__dict__
+
+def scanArrays(scan):
+    """This function converts a scan into beam by range gate arrays, combining
+    any repeated beams into a single beam
+
+    Parameters
+    -----------
+    scan : (list or sdio.scanData object)
+        A list of beams in a scan, either beamData objects or the dictionaries
+        returned by dmapio.readDmapRec
+
+    Returns
+    --------
+    arrs : (dict)
+        A dictionary with the boolean arrays 'beam' (nbeam) and 'occ'
+        (nbeam, ngate), which flag the beams in the scan and the cells with
+        scatter, and a (nbeam, ngate) float array for each of filterParams,
+        which is NaN where there is no scatter.  Elevation and phi0 values of
+        zero are treated as missing.  A gate of a repeated beam is kept if it
+        has scatter in more than half of the repeats, and the values are the
+        medians over those repeats.
+    """
+    fits = [_beamFit(b) for b in scan]
+    bmnums = np.array([f[0] for f in fits], dtype=int)
+    nbeam = bmnums.max() + 1
+    ngate = max(f[1] for f in fits)
+
+    # fill one row per record
+    occ = np.zeros((len(fits), ngate), dtype=bool)
+    vals = dict((p, np.empty((len(fits), ngate)) * np.nan)
+                for p in filterParams)
+    for i, (bmnum, nrang, fit) in enumerate(fits):
+        if fit.get('slist') is None or len(fit['slist']) == 0:
+            continue
+        slist = np.asarray(fit['slist'], dtype=int)
+        occ[i, slist] = True
+        for p in filterParams:
+            if fit.get(p) is None:
+                continue
+            v = np.asarray(fit[p], dtype=float)
+            vals[p][i, slist] = v[slist] if p == 'pwr0' else v
+        for p in ['elv', 'phi0']:
+            vals[p][i][vals[p][i] == 0.] = np.nan
+
+    # combine the records into one row per beam number
+    arrs = {'beam': np.zeros(nbeam, dtype=bool),
+            'occ': np.zeros((nbeam, ngate), dtype=bool)}
+    for p in filterParams:
+        arrs[p] = np.empty((nbeam, ngate)) * np.nan
+    for bmnum in np.unique(bmnums):
+        inds = np.where(bmnums == bmnum)[0]
+        arrs['beam'][bmnum] = True
+        if inds.size == 1:
+            arrs['occ'][bmnum] = occ[inds[0]]
+            for p in filterParams:
+                arrs[p][bmnum] = vals[p][inds[0]]
+            continue
+
+        good = occ[inds].mean(axis=0) > .5
+        arrs['occ'][bmnum] = good
+        for p in filterParams:
+            v = vals[p][inds][:, good]
+            v[~occ[inds][:, good]] = np.nan
+            arrs[p][bmnum, good] = _nanMedian(v)
+
+    return arrs
+
+def _nanMedian(v):
+    """Median over the first axis of v ignoring NaNs, NaN if there are none"""
+    v = np.sort(v, axis=0)
+    n = (~np.isnan(v)).sum(axis=0)
+    lo = np.clip((n - 1) // 2, 0, None)
+    hi = n // 2
+    cols = np.arange(v.shape[1])
+    med = (v[lo, cols] + v[np.clip(hi, 0, v.shape[0] - 1), cols]) / 2.
+    med[n == 0] = np.nan
+    return med
+
+def _weightedMedian(vals, weights):
+    """Median over the first axis of vals, where each value is repeated
+    weights times.  Matches np.median of the repeated values, and is NaN where
+    all of the weights are zero.
+    """
+    order = np.argsort(np.where(weights > 0, vals, np.inf), axis=0)
+    inds = np.ogrid[tuple(slice(n) for n in vals.shape[1:])]
+    vals = vals[tuple([order] + inds)]
+    cum = np.cumsum(weights[tuple([order] + inds)], axis=0)
+    n = cum[-1]
+
+    # positions of the middle value(s) in the repeated, sorted list
+    nmax = vals.shape[0] - 1
+    lo = np.minimum((cum <= (n - 1) // 2).sum(axis=0), nmax)
+    hi = np.minimum((cum <= n // 2).sum(axis=0), nmax)
+    med = (vals[tuple([lo] + inds)] + vals[tuple([hi] + inds)]) / 2.
+    med[n == 0] = np.nan
+    return med
+
+def filterScan(scans, thresh=.4):
+    """This function applies the 3-D median boxcar filter to the middle of
+    three consecutive scans
+
+    Parameters
+    -----------
+    scans : (list)
+        The arrays returned by scanArrays for 3 consecutive scans, sorted by
+        time.  The first and last may be None.
+    thresh : (float)
+        The filter threshold for turning on a R-B cell.  (default=0.4)
+
+    Returns
+    --------
+    filt : (dict)
+        A dictionary with the boolean (nbeam, ngate) array 'occ' flagging the
+        cells that passed the filter, a (nbeam, ngate) float array of the
+        weighted medians for each of filterParams, and the re-evaluated
+        groundscatter flags 'gflg'.  nbeam and ngate cover all three scans.
+
+    Notes
+    ------
+    A cell passes if the weighted number of its neighbours (in time, beam, and
+    gate) with scatter is at least thresh times the summed weight of its
+    neighbours that exist, where the weights are given by filterWeights.
+    Neighbouring gates outside of the range count as existing and empty, while
+    missing scans and beams are not counted.
+    """
+    nbeam = max(s['occ'].shape[0] for s in scans if s is not None)
+    ngate = max(s['occ'].shape[1] for s in scans if s is not None)
+
+    # stack the scans, padding with an empty beam and gate on either side
+    exists = np.zeros((3, nbeam + 2), dtype=bool)
+    occ = np.zeros((3, nbeam + 2, ngate + 2), dtype=bool)
+    vals = dict((p, np.zeros((3, nbeam + 2, ngate + 2)))
+                for p in filterParams)
+    for t, s in enumerate(scans):
+        if s is None:
+            continue
+        nb, ng = s['occ'].shape
+        exists[t, 1:nb + 1] = s['beam']
+        occ[t, 1:nb + 1, 1:ng + 1] = s['occ']
+        for p in filterParams:
+            vals[p][t, 1:nb + 1, 1:ng + 1] = s[p]
+
+    # gather the 27 neighbours of every cell
+    w = filterWeights()
+    offsets = [(t, b, g) for t in range(3) for b in range(3)
+               for g in range(3)]
+    wt = np.array([w[o] for o in offsets]).reshape(27, 1, 1)
+    nOcc = np.array([occ[t, b:b + nbeam, g:g + ngate]
+                     for t, b, g in offsets])
+    nExists = np.array([exists[t, b:b + nbeam] for t, b, g in offsets])
+
+    pts = (wt * nOcc).sum(axis=0)
+    tot = (wt[:, :, 0] * nExists).sum(axis=0)[:, np.newaxis]
+    centre = scans[1]
+    nb, ng = centre['occ'].shape
+    filt = {'occ': np.zeros((nbeam, ngate), dtype=bool)}
+    filt['occ'][:nb, :ng] = centre['beam'][:, np.newaxis]
+    filt['occ'] &= pts >= thresh * tot
+
+    for p in filterParams:
+        nVals = np.array([vals[p][t, b:b + nbeam, g:g + ngate]
+                          for t, b, g in offsets])
+        weights = wt * nOcc
+        if p in ['elv', 'phi0']:
+            weights = weights * ~np.isnan(nVals)
+        filt[p] = _weightedMedian(nVals, weights)
+        filt[p][~filt['occ']] = np.nan
+
+    # Re-evaluate the groundscatter flag
+    with np.errstate(invalid='ignore'):
+        filt['gflg'] = np.where(filt['w_l'] > -3.0 * filt['v'] + 90.0, 0, 1)
+
+    return filt
+
+def _filteredBeams(scan, filt):
+    """Yield the first beam of each beam number in a scan, along with its
+    filtered range gates and their fit values
+    """
+    seen = set()
+    for b in scan:
+        bmnum, nrang, fit = _beamFit(b)
+        if bmnum in seen:
+            continue
+        seen.add(bmnum)
+        slist = np.where(filt['occ'][bmnum, :nrang])[0]
+        fitVals = dict((p, filt[p][bmnum, slist]) for p in filterParams)
+        fitVals['gflg'] = filt['gflg'][bmnum, slist]
+        yield b, slist, fitVals
+
+def _filteredRec(rec, slist, fitVals):
+    """Return a copy of a dmap fit record holding the filtered values"""
+    out = dict((key, val) for key, val in rec.iteritems()
+               if key not in _gateArrays)
+    out['slist'] = slist.tolist()
+    out['qflg'] = [1] * len(slist)
+    out['gflg'] = fitVals['gflg'].tolist()
+    for p in ['v', 'w_l', 'p_l', 'elv', 'phi0']:
+        if rec.get(p) is not None:
+            out[p] = np.nan_to_num(fitVals[p]).tolist()
+    if rec.get('pwr0') is not None:
+        pwr0 = np.array(rec['pwr0'], dtype=float)
+        pwr0[slist] = fitVals['pwr0']
+        out['pwr0'] = pwr0.tolist()
+    return out
+
+def _dmapType(name, val):
+    """Pick the dmap type of a scalar, falling back on the python type"""
+    if name in _charScalars:
+        return 1
+    if name in _intScalars:
+        return 3
+    if name in _floatScalars or isinstance(val, float):
+        return 4
+    if isinstance(val, basestring):
+        return 9
+    return 2 if -32768 <= val < 32768 else 3
+
+def writeFitRec(rec, fd):
+    """This function writes a fit record to a dmap file
+
+    Parameters
+    -----------
+    rec : (dict)
+        A fit record, as returned by dmapio.readDmapRec
+    fd : (int)
+        The file descriptor of the output file
+
+    Returns
+    --------
+    size : (int)
+        The number of bytes written
+
+    Notes
+    ------
+    The record time is written as the time.* scalars, and any fields not in
+    the fitacf format are typed from their python values.  The lag table is
+    written as read with dmapio.readDmapRec(fd, 1); a table missing its last
+    entry has its last pair repeated.
+    """
+    from davitpy.pydarn import dmapio
+
+    t = dt.datetime(1970, 1, 1) + dt.timedelta(seconds=rec['time'])
+    scalars = [('time.yr', 2, t.year), ('time.mo', 2, t.month),
+               ('time.dy', 2, t.day), ('time.hr', 2, t.hour),
+               ('time.mt', 2, t.minute), ('time.sc', 2, t.second),
+               ('time.us', 3, t.microsecond)]
+    arrays = []
+    for name, val in sorted(rec.iteritems()):
+        if name == 'time' or val is None:
+            continue
+        if name == 'ltab' and len(val) > 0 and isinstance(val[0], list):
+            # the table has mplgs + 1 entries.  readDmapRec drops the last
+            # one unless asked to keep it, so repeat the last entry read
+            if len(val) == rec.get('mplgs'):
+                val = val + [val[-1]]
+            val = [v for pair in val for v in pair]
+            arrays.append((name, 2, (2, len(val) / 2), val))
+        elif isinstance(val, list):
+            if len(val) > 0 and isinstance(val[0], list):
+                logging.warning('skipping multi-dimensional array ' + name)
+                continue
+            if name in _charArrays:
+                typ = 1
+            elif name in _shortArrays:
+                typ = 2
+            elif len(val) > 0 and all(isinstance(v, int) for v in val):
+                typ = 2 if -32768 <= min(val) and max(val) < 32768 else 3
+            else:
+                typ = 4
+                val = [float(v) for v in val]
+            arrays.append((name, typ, (len(val),), val))
+        else:
+            typ = _dmapType(name, val)
+            if typ == 1 and isinstance(val, basestring):
+                val = ord(val)
+            scalars.append((name, typ, val))
+
+    return dmapio.writeDmapRec(fd, scalars, arrays)
+
+def readFitScans(fd):
+    """This generator reads a dmap fit file one scan at a time
+
+    Parameters
+    -----------
+    fd : (int)
+        The file descriptor of the input file
+
+    Returns
+    --------
+    scan : (list)
+        Yields a list of the record dictionaries returned by
+        dmapio.readDmapRec for each scan
+
+    Notes
+    ------
+    A new scan starts when the scan flag is set and the beam number is the
+    same as that of the first beam in the current scan, as in
+    radDataPtr.readScan.  Any records before the first scan flag are returned
+    as their own scan.
+    """
+    from davitpy.pydarn import dmapio
+
+    scan = []
+    while True:
+        # keep the whole lag table, so that writeFitRec writes it unchanged
+        rec = dmapio.readDmapRec(fd, 1)
+        if rec is None:
+            break
+        if len(scan) > 0 and rec['scan'] and \
+                (not scan[0]['scan'] or rec['bmnum'] == scan[0]['bmnum']):
+            yield scan
+            scan = []
+        scan.append(rec)
+    if len(scan) > 0:
+        yield scan
+
 def fitFilter(infile, outfile, thresh=0.4):
-    """This function applies a boxcar filter to a fitacf file.  Currently
-    hardwired to load Blackstone on 1-5-2010.  The fix to this is stored in
-    0.5-release_fitexFilter_change branch in aburrell's fork.
+    """This function applies a boxcar filter to a fitacf file.
 
     Parameters
     ------------
@@ -162,193 +525,93 @@ def fitFilter(infile, outfile, thresh=0.4):
     ---------
     Void
 
-    Note
-    -----
-    This is VERY slow
+    Notes
+    ------
+    The file is streamed through a ring buffer of three scans, so only those
+    are held in memory.  Each beam in the output holds the filtered v, w_l,
+    p_l, pwr0, elv, and phi0, with the other gate arrays dropped.
 
     written by AJ, 20130402
     """
-    from davitpy import pydarn
-    inp = pydarn.sdio.radDataOpen(dt.datetime(2010,5,1), 'bks', fileName=infile)
+    import os
 
-    outp = open(outfile, 'w')
+    inp = os.open(infile, os.O_RDONLY)
+    outp = os.open(outfile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0644)
 
+    # ring buffer of (records, arrays) for the previous, current, next scan
     scans = [None, None, None]
 
-    sc = pydarn.sdio.radDataReadScan(inp)
-    scans[1] = sc
-
-    sc = pydarn.sdio.radDataReadScan(inp)
-    scans[2] = sc
-
-    while sc != None:
-        tsc = doFilter(scans, thresh=thresh)
+    def writeScan():
+        recs = scans[1][0]
+        logging.info("processing: {:}".format(
+            dt.datetime(1970, 1, 1) + dt.timedelta(seconds=recs[0]['time'])))
+        filt = filterScan([None if s is None else s[1] for s in scans],
+                          thresh=thresh)
+        for rec, slist, fitVals in _filteredBeams(recs, filt):
+            writeFitRec(_filteredRec(rec, slist, fitVals), outp)
+
+    try:
+        for recs in readFitScans(inp):
+            scans = scans[1:] + [(recs, scanArrays(recs))]
+            if scans[1] is not None:
+                writeScan()
+        scans = scans[1:] + [None]
+        if scans[1] is not None:
+            writeScan()
+    finally:
+        os.close(inp)
+        os.close(outp)
 
-        for b in tsc:
-            logging.info("processing: {:}".format(b))
-            pydarn.dmapio.writeFitRec(b, utils.datetimeToEpoch(b.time), outp)
-
-        sc = pydarn.sdio.radDataReadScan(inp)
-        scans[0] = scans[1]
-        scans[1] = scans[2]
-        scans[2] = sc
-
-    tsc = doFilter(scans, thresh=thresh)
-    logging.info("current at time: {:}".format(tsc.time))
-
-    for b in tsc:
-        pydarn.dmapio.writeFitRec(b, utils.datetimeToEpoch(b.time), outp)
-
-    outp.close()
     return
 
 def doFilter(scans, thresh=.4):
     """This function applies a boxcar filter to consecutive scans
 
-    Note
-    -----
-    This is VERY slow.
-
     Parameters
     -----------
     scans : (list)
-        a list of 3 consecutive scans, sorted by time.
+        a list of 3 consecutive scans, sorted by time.  The first and last may
+        be None.
     thresh : (float)
         The filter threshold for turning on a R-B cell.  (default=0.4)
 
     Returns
     --------
     outscan : (list or radDataTypes.scanData object)
-        The filtered scan
+        The filtered scan, with one beam for each beam number
+
+    Notes
+    ------
+    See filterScan for the filter itself.
 
     written by AJ, 20130402
     """
+    import copy
     from davitpy import pydarn
 
-    scans = []
-    for s in scans:
-        if s == None:
-            scans.append(None)
-        else:
-            scans.append(combBeams(s))
+    filt = filterScan([None if s is None else scanArrays(s) for s in scans],
+                      thresh=thresh)
 
     outscan = pydarn.sdio.scanData()
-
-    # define the weigths array
-    w = [[[0.0 for i in range(3)] for j in range(3)] for k in range(3)]
-    for i in range(0,3):
-        for j in range(0,3):
-            for k in range(0,3):
-                tplus = 1 if k == 0 else 0
-                rplus = 1 if i == 0 else 0
-                bmplus = 1 if j == 0 else 0
-                centplus = 1 if i == 0 and j == 0 and k == 0 else 0
-
-                w[(i+1)%3][(j+1)%3][(k+1)%3] = 1+tplus+rplus+bmplus+centplus
-
-    for b in scans[1]:
-        bmnum = b.bmnum
-        # make a new beam
-        beam = pydarn.sdio.beamData()
-        beam.copyData(b)
-        for key,val in beam.fit.__dict__.iteritems(): 
-            setattr(beam.fit,key,[])
-
-        for r in range(0,b.prm.nrang):
-            # boxcar to hold the gates
-            box = [[[None for j in range(3)] for k in range(3)]
-                   for n in range(3)]
-
-            # iterate through time
-            for j in range(0,3):
-                # iterate through beam
-                for k in range(-1,2):
-                    # iterate through gate
-                    for n in range(-1,2):
-                        # get the scan we are working on
-                        s = scans[j]
-                        if s == None:
-                            continue
-
-                        # get the beam we are working on
-                        tbm = None
-                        for bm in s:
-                            if bm.bmnum == bmnum + k:
-                                tbm = bm
-                        if tbm == None:
-                            continue
-
-                        # check if target gate number is in the beam
-                        if r+n in tbm.fit.slist:
-                            ind = tbm.fit.slist.index(r + n)
-                            box[j][k+1][n+1] = Gate(tbm.fit, ind)
-                        else:
-                            box[j][k+1][n+1] = 0
-
-            pts = 0.0
-            tot = 0.0
-            v = list()
-            w_l = list()
-            p_l = list()
-            elv = list()
-            phi0 = list()
-            pwr0 = list()
-            # iterate through time
-            for j in range(0,3):
-                # iterate through beam
-                for k in range(0,3):
-                    # iterate through gate
-                    for n in range(0,3):
-                        bx = box[j][k][n]
-                        if bx == None:
-                            continue
-                        wt = w[j][k][n]
-                        tot += wt
-                        if bx != 0:
-                            pts += wt
-                            for m in range(0, wt):
-                                v.append(bx.v)
-                                pwr0.append(bx.pwr0)
-                                w_l.append(bx.w_l)
-                                p_l.append(bx.p_l)
-                                if bx.elv:
-                                    elv.append(bx.elv)
-                                if bx.phi0:
-                                    phi0.append(bx.phi0)
-
-            # check if we meet the threshold
-            if pts / tot >= thresh:
-                beam.fit.slist.append(r)
-                beam.fit.qflg.append(1)
-                beam.fit.v.append(np.median(v))
-                beam.fit.w_l.append(np.median(w_l))
-                beam.fit.p_l.append(np.median(p_l))
-                beam.fit.pwr0.append(np.median(pwr0))
-                if len(elv) > 0:
-                    beam.fit.elv.append(np.median(elv))
-                if len(phi0) > 0:
-                    beam.fit.phi0.append(np.median(phi0))
-
-                # Re-evaluate the groundscatter flag
-                gflg = 0 if np.median(w_l) > -3.0 * np.median(v) + 90.0 else 1
-                beam.fit.gflg.append(gflg)
+    for b, slist, fitVals in _filteredBeams(scans[1], filt):
+        # make a new beam, sharing everything but the fit with the old one
+        beam = copy.copy(b)
+        beam.fit = pydarn.sdio.fitData()
+        for key, val in beam.fit.__dict__.iteritems():
+            setattr(beam.fit, key, [])
+
+        beam.fit.slist = slist.tolist()
+        beam.fit.npnts = len(slist)
+        beam.fit.qflg = [1] * len(slist)
+        beam.fit.gflg = fitVals['gflg'].tolist()
+        for p in ['v', 'w_l', 'p_l', 'elv', 'phi0']:
+            if getattr(b.fit, p) is not None:
+                setattr(beam.fit, p, np.nan_to_num(fitVals[p]).tolist())
+        if b.fit.pwr0 is not None:
+            pwr0 = np.array(b.fit.pwr0, dtype=float)
+            pwr0[slist] = fitVals['pwr0']
+            beam.fit.pwr0 = pwr0.tolist()
 
         outscan.append(beam)
 
     return outscan
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
@@ -0,0 +1,219 @@
+# Copyright (C) 2012  VT SuperDARN Lab
+# Full license can be found in LICENSE.txt
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+.. module:: radDataMerge
+   :synopsis: read the data of many radars as one time ordered stream
+
+************************************
+**Module**: pydarn.sdio.radDataMerge
+************************************
+
+Classes
+---------
+  :class:`pydarn.sdio.radDataMerge.radMergePtr`
+"""
+import logging
+
+
+class radMergePtr():
+    """A pipeline that reads several radar data pointers at once and hands
+    back their beams (or scans) in time order, as if they came from a single
+    source.
+
+    The pointers are merged with a heap keyed on the time of the next record
+    of each pointer, so only a few records per radar are held in memory at
+    any time, however long the request.
+
+    Parameters
+    -----------
+    ptrs : Optional[list]
+        open :class:`pydarn.sdio.radDataTypes.radDataPtr` objects to merge.
+        These stay open, and are left for the caller to close.
+        (default=None, open one for each radar in radcodes)
+    sTime : Optional[datetime]
+        start time, used with radcodes.  (default=None)
+    radcodes : Optional[list]
+        3-letter radar codes to open pointers for, with
+        :func:`pydarn.sdio.radDataRead.radDataOpen`.  (default=None)
+    eTime : Optional[datetime]
+        end time, used with radcodes.  (default=None, 1 day after sTime)
+    unit : Optional[str]
+        'beam' to read beams (beamData) or 'scan' to read scans (scanData).
+        (default='beam')
+    prefetch : Optional[int]
+        the number of beams or scans read ahead from each pointer at a time.
+        (default=1)
+    **kwargs :
+        other keyword arguments for radDataOpen, e.g. fileType, channel or
+        src
+
+    Attributes
+    -----------
+    ptrs : (list)
+        the pointers being merged, radars without data are left out
+    unit : (str)
+        'beam' or 'scan'
+    lastSource : (int/NoneType)
+        index into ptrs of the pointer the last beam or scan came from
+
+    Methods
+    --------
+    next
+        the next beam or scan in time order
+    readRec
+        the next beam (unit='beam')
+    readScan
+        the next scan (unit='scan')
+    close
+        close the pointers opened from radcodes
+
+    Notes
+    ------
+    Records with the same time are handed back in the order of ptrs.  A scan
+    is placed by the time of its first beam.
+
+    Example
+    --------
+    ::
+
+    import datetime as dt
+    merged = pydarn.sdio.radMergePtr(sTime=dt.datetime(2013,1,1),
+                                     radcodes=['bks','fhe','fhw'],
+                                     eTime=dt.datetime(2013,1,1,2),
+                                     fileType='fitacf')
+    for beam in merged:
+        print beam.stid, beam.time
+    """
+    def __init__(self, ptrs=None, sTime=None, radcodes=None, eTime=None,
+                 unit='beam', prefetch=1, **kwargs):
+        import heapq
+        from davitpy.pydarn.sdio.radDataRead import radDataOpen
+
+        assert unit == 'beam' or unit == 'scan', \
+            logging.error("unit must be 'beam' or 'scan'")
+        assert isinstance(prefetch, int) and prefetch > 0, \
+            logging.error('prefetch must be a positive int')
+
+        # only the pointers opened here are closed by close
+        self.__owned = ptrs is None
+        if ptrs is None:
+            assert radcodes is not None and sTime is not None, \
+                logging.error('give either ptrs, or radcodes and sTime')
+            ptrs = []
+            for radcode in radcodes:
+                ptr = radDataOpen(sTime, radcode, eTime=eTime, **kwargs)
+                if ptr is None or ptr.dType is None:
+                    logging.warning('no data for {:s}'.format(radcode))
+                    continue
+                ptrs.append(ptr)
+
+        self.ptrs = list(ptrs)
+        self.unit = unit
+        self.prefetch = prefetch
+        self.lastSource = None
+        self.__buffers = [[] for ptr in self.ptrs]
+        self.__heap = []
+        for i in range(len(self.ptrs)):
+            self.__push(i)
+        heapq.heapify(self.__heap)
+
+    def __repr__(self):
+        return 'radMergePtr: {:d} pointers, unit={:s}\n'.format(len(self.ptrs),
+                                                                self.unit)
+
+    def __iter__(self):
+        return self
+
+    def __del__(self):
+        # nothing to close if __init__ did not get as far as the pointers
+        if hasattr(self, 'ptrs'):
+            self.close()
+
+    def __read(self, i):
+        """read the next beam or scan from pointer i"""
+        if self.unit == 'beam':
+            return self.ptrs[i].readRec()
+        try:
+            return self.ptrs[i].readScan()
+        except ValueError, e:
+            logging.error('{:}, stopped reading pointer {:d}'.format(e, i))
+            return None
+
+    def __push(self, i):
+        """put the next beam or scan of pointer i on the heap, refilling its
+        read ahead buffer if needed"""
+        import heapq
+
+        buf = self.__buffers[i]
+        if len(buf) == 0:
+            for j in range(self.prefetch):
+                item = self.__read(i)
+                if item is None:
+                    break
+                buf.append(item)
+            # reverse, so that the next item can be popped off the end
+            buf.reverse()
+        if len(buf) == 0:
+            return
+        item = buf.pop()
+        itime = item.time if self.unit == 'beam' else item[0].time
+        heapq.heappush(self.__heap, (itime, i, item))
+
+    def next(self):
+        """The next beam or scan, in time order.
+
+        Returns
+        --------
+        item : (beamData or scanData)
+
+        Raises
+        -------
+        StopIteration
+            when all of the pointers are finished
+        """
+        import heapq
+
+        if len(self.__heap) == 0:
+            raise StopIteration
+        itime, i, item = heapq.heappop(self.__heap)
+        self.lastSource = i
+        self.__push(i)
+        return item
+
+    def readRec(self):
+        """The next beam, in time order, or None when finished."""
+        assert self.unit == 'beam', logging.error("unit is not 'beam'")
+        try:
+            return self.next()
+        except StopIteration:
+            return None
+
+    def readScan(self):
+        """The next scan, in time order, or None when finished."""
+        assert self.unit == 'scan', logging.error("unit is not 'scan'")
+        try:
+            return self.next()
+        except StopIteration:
+            return None
+
+    def close(self):
+        """Stop reading, closing the pointers if they were opened from
+        radcodes.  Pointers given as ptrs are left open."""
+        if self.__owned:
+            for ptr in self.ptrs:
+                ptr.close()
+        self.__heap = []
+        self.__buffers = [[] for ptr in self.ptrs]
@@ -30,7 +30,9 @@ Functions
   :func:`pydarn.sdio.radDataRead.radDataReadRec`
   :func:`pydarn.sdio.radDataRead.radDataReadScan`
   :func:`pydarn.sdio.radDataRead.radDataReadAll`
+  :func:`pydarn.sdio.radDataRead.radDataReadChunks`
   :func:`pydarn.sdio.radDataRead.radDataCreateIndex`
+  :func:`pydarn.sdio.radDataRead.radDataFollow`
 """
 import logging
 
@@ -39,7 +41,7 @@ def radDataOpen(sTime, radcode, eTime=None, channel=None, bmnum=None, cp=None,
                 noCache=False, local_dirfmt=None, local_fnamefmt=None,
                 local_dict=None, remote_dirfmt=None, remote_fnamefmt=None,
                 remote_dict=None, remote_site=None, username=None,
-                password=None, port=None, tmpdir=None):
+                password=None, port=None, tmpdir=None, follow=False):
 
     """A function to establish a pipeline through which we can read radar data.
     first it tries the mongodb, then it tries to find local files, and lastly
@@ -120,6 +122,9 @@ def radDataOpen(sTime, radcode, eTime=None, channel=None, bmnum=None, cp=None,
     tmpdir : (str/NoneType)
         The directory in which to store temporary files. If None, the rcParam
         value DAVIT_TMPDIR will be used. (default=None)
+    follow : (bool)
+        If True, read fileName in place while it is still being written, see
+        :func:`radDataFollow`.  (default=False)
 
     Returns
     --------
@@ -166,7 +171,7 @@ def radDataOpen(sTime, radcode, eTime=None, channel=None, bmnum=None, cp=None,
                        remote_fnamefmt=remote_fnamefmt, remote_site=remote_site,
                        username=username, port=port, password=password,
                        stid=int(network().getRadarByCode(radcode).id),
-                       tmpdir=tmpdir)
+                       tmpdir=tmpdir, follow=follow)
     return myPtr
   
 def radDataReadRec(my_ptr):
@@ -334,3 +339,162 @@ def radDataReadAll(my_ptr):
     my_list = [beam for beam in my_ptr]
 
     return my_list
+
+def radDataReadChunks(my_ptr, maxRecords=None, timeSpan=None, maxBytes=None,
+                      columns=False, fields=None):
+    """A function to read a large amount (to the end of the request) of radar
+    data from a :class:`pydarn.sdio.radDataTypes.radDataPtr` object in
+    batches, so that only one batch is held in memory at a time
+
+    Parameters
+    -----------
+    my_ptr : (pydarn.sdio.radDataTypes.radDataPtr)
+        Contains the pipeline to the data we are after
+    maxRecords : (int/NoneType)
+        The largest number of beams in a batch.  (default=None)
+    timeSpan : (datetime.timedelta/float/NoneType)
+        The longest time (a timedelta, or seconds) from the first to the last
+        beam of a batch, which is less than timeSpan.  (default=None)
+    maxBytes : (int/NoneType)
+        The largest (approximate) size in bytes of the data values of the
+        beams in a batch.  (default=None)
+    columns : (bool)
+        If True, each batch is a pydarn.sdio.radDataTypes.radColumnData
+        object rather than a list of beams.  (default=False)
+    fields : (list/NoneType)
+        The fitted values to keep when columns is True, see radColumnData.
+        (default=None, keep all of them)
+
+    Returns
+    ----------
+    A generator of batches: lists of pydarn.sdio.radDataTypes.beamData
+    objects, or radColumnData objects.
+
+    Example
+    -----------
+    ::
+    
+    import datetime as dt
+    my_ptr = radDataOpen(dt.datetime(2011,1,1),'bks', \
+             eTime=dt.datetime(2011,1,8),fileType='fitacf')
+    for my_cols in radDataReadChunks(my_ptr, timeSpan=dt.timedelta(hours=1),
+                                     columns=True):
+        print my_cols.time[0], len(my_cols)
+
+    Notes
+    ------
+    A batch is closed as soon as adding the next beam would break any of the
+    limits given, and always holds at least one beam.  With no limits, all of
+    the data come in one batch, as with :func:`radDataReadAll`.
+    """
+    from davitpy.pydarn.sdio import radDataPtr
+    from davitpy.pydarn.sdio.radDataTypes import radColumnData
+
+    # check input
+    assert isinstance(my_ptr, radDataPtr), \
+      logging.error('input must be of type radDataPtr')
+
+    for batch in _readChunks(my_ptr.readRec, lambda beam: beam.time,
+                             maxRecords, timeSpan, maxBytes):
+        if not columns:
+            yield batch
+            continue
+        cols = radColumnData(fType=my_ptr.fType, fields=fields)
+        for beam in batch:
+            cols.appendRecord(beam.time, beam.recordDict)
+        cols.finish()
+        yield cols
+
+def _recordBytes(adict):
+    """The approximate size in bytes of the values in a record dictionary,
+    counting 8 bytes per number."""
+    size = 0
+    for val in adict.itervalues():
+        if isinstance(val, str):
+            size += len(val)
+        elif isinstance(val, (list, tuple)):
+            size += 8 * len(val)
+        else:
+            size += 8
+    return size
+
+def _readChunks(readRec, recTime, maxRecords=None, timeSpan=None,
+                maxBytes=None):
+    """Group the records returned by readRec (until it returns None) into
+    batches limited by a number of records, a time span and a byte budget.
+    Shared by radDataReadChunks and sdDataReadChunks."""
+    import datetime as dt
+
+    assert maxRecords is None or maxRecords > 0, \
+      logging.error('maxRecords must be positive')
+    assert maxBytes is None or maxBytes > 0, \
+      logging.error('maxBytes must be positive')
+    if timeSpan is not None and not isinstance(timeSpan, dt.timedelta):
+        timeSpan = dt.timedelta(seconds=timeSpan)
+
+    batch = []
+    nbytes = 0
+    while True:
+        rec = readRec()
+        if rec is None:
+            break
+        recBytes = 0 if maxBytes is None else _recordBytes(rec.recordDict)
+
+        if len(batch) > 0 and \
+           ((maxRecords is not None and len(batch) >= maxRecords) or
+            (timeSpan is not None and
+             recTime(rec) - recTime(batch[0]) >= timeSpan) or
+            (maxBytes is not None and nbytes + recBytes > maxBytes)):
+            yield batch
+            batch = []
+            nbytes = 0
+
+        batch.append(rec)
+        nbytes += recBytes
+
+    if len(batch) > 0:
+        yield batch
+
+def radDataFollow(my_ptr, unit='beam', pollInterval=0.5, timeout=None):
+    """A function to read radar data from a dmap file that is still being
+    written, through a :class:`pydarn.sdio.radDataTypes.radDataPtr` object
+    opened with follow=True
+
+    Parameters
+    -----------
+    my_ptr : (pydarn.sdio.radDataTypes.radDataPtr)
+        Contains the pipeline to the data we are after
+    unit : (str)
+        'beam' to get beams or 'scan' to get complete scans.  (default='beam')
+    pollInterval : (float)
+        Seconds between looks for new records.  (default=0.5)
+    timeout : (float/NoneType)
+        Stop after this many seconds without a new record.  (default=None,
+        never stop)
+
+    Returns
+    ----------
+    A generator of pydarn.sdio.radDataTypes.beamData (or scanData) objects,
+    handed back as the records are written.
+
+    Example
+    -----------
+    ::
+    
+    import datetime as dt
+    my_ptr = radDataOpen(dt.datetime(2011,1,1),'bks', \
+             fileName='/data/rt/20110101.bks.fitacf', follow=True)
+    for my_scan in radDataFollow(my_ptr, unit='scan', timeout=600.):
+        print my_scan[0].time
+
+    Notes
+    ------
+    See :meth:`pydarn.sdio.radDataTypes.radDataPtr.follow`
+    """
+    from davitpy.pydarn.sdio import radDataPtr
+  
+    # check input
+    assert isinstance(my_ptr, radDataPtr), \
+      logging.error('input must be of type radDataPtr')
+
+    return my_ptr.follow(unit=unit, pollInterval=pollInterval, timeout=timeout)
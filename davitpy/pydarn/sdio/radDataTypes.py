@@ -33,14 +33,79 @@ prmData
 fitData
 rawData
 iqData
+radColumnData
 """
 
 import davitpy
 import logging
+import numpy as np
 from davitpy.utils import twoWayDict
 alpha = ['a','b','c','d','e','f','g','h','i','j','k','l','m','n','o','p','q',
          'r','s','t','u','v','w','x','y','z']
 
+# The entries of a fit record used by radColumnData, given as
+# (dmap key, attribute name, numpy type).  beamFields hold one value per
+# beam sounding, fitFields one value per range gate with scatter.
+beamFields = [('stid', 'stid', 'i4'),
+              ('bmnum', 'bmnum', 'i4'),
+              ('channel', 'channel', 'i4'),
+              ('cp', 'cp', 'i4'),
+              ('scan', 'scan', 'i4'),
+              ('nave', 'nave', 'i4'),
+              ('lagfr', 'lagfr', 'i4'),
+              ('smsep', 'smsep', 'i4'),
+              ('bmazm', 'bmazm', 'f8'),
+              ('rxrise', 'rxrise', 'i4'),
+              ('intt.sc', 'inttsc', 'i4'),
+              ('intt.us', 'inttus', 'i4'),
+              ('mpinc', 'mpinc', 'i4'),
+              ('mppul', 'mppul', 'i4'),
+              ('mplgs', 'mplgs', 'i4'),
+              ('mplgexs', 'mplgexs', 'i4'),
+              ('nrang', 'nrang', 'i4'),
+              ('frang', 'frang', 'i4'),
+              ('rsep', 'rsep', 'i4'),
+              ('xcf', 'xcf', 'i4'),
+              ('tfreq', 'tfreq', 'i4'),
+              ('txpl', 'txpl', 'i4'),
+              ('ifmode', 'ifmode', 'i4'),
+              ('noise.mean', 'noisemean', 'f8'),
+              ('noise.sky', 'noisesky', 'f8'),
+              ('noise.search', 'noisesearch', 'f8')]
+fitFields = [('slist', 'slist', 'i4'),
+             ('nlag', 'nlag', 'i4'),
+             ('qflg', 'qflg', 'i4'),
+             ('gflg', 'gflg', 'i4'),
+             ('p_l', 'p_l', 'f8'),
+             ('p_l_e', 'p_l_e', 'f8'),
+             ('p_s', 'p_s', 'f8'),
+             ('p_s_e', 'p_s_e', 'f8'),
+             ('v', 'v', 'f8'),
+             ('v_e', 'v_e', 'f8'),
+             ('w_l', 'w_l', 'f8'),
+             ('w_l_e', 'w_l_e', 'f8'),
+             ('w_s', 'w_s', 'f8'),
+             ('w_s_e', 'w_s_e', 'f8'),
+             ('phi0', 'phi0', 'f8'),
+             ('phi0_e', 'phi0_e', 'f8'),
+             ('elv', 'elv', 'f8')]
+
+
+def _dmapRecordComplete(fd):
+    """Check whether the dmap record at the current offset of fd has been
+    written out completely, without moving the offset.  A dmap record starts
+    with its code and its total size in bytes (both int32)."""
+    import os
+    import struct
+
+    offset = os.lseek(fd, 0, os.SEEK_CUR)
+    header = os.read(fd, 8)
+    os.lseek(fd, offset, os.SEEK_SET)
+    if len(header) < 8:
+        return False
+    code, size = struct.unpack('<ii', header)
+    return os.fstat(fd).st_size - offset >= size
+
 class radDataPtr():
     """A class which contains a pipeline to a data source
 
@@ -62,6 +127,9 @@ class radDataPtr():
         control prog id of the request
     fType : (str)
         the file type, 'fitacf', 'rawacf', 'iqdat', 'fitex', 'lmfit'
+    dType : (str)
+        the file data type, 'dmap' or 'hdf5' (a column store, see
+        :mod:`pydarn.sdio.columnStore`)
     fBeam : (pydarn.sdio.radDataTypes.beamData)
         the first beam of the next scan, useful for when reading into scan
         objects
@@ -72,8 +140,8 @@ class radDataPtr():
 
     Private Attributes
     --------------------
-    ptr : (file or mongodb query object)
-        the data pointer (different depending on mongodo or dmap)
+    ptr : (file, columnStoreReader or mongodb query object)
+        the data pointer (different depending on mongodo, dmap or hdf5)
     fd : (int)
         the file descriptor 
     filtered : (bool)
@@ -82,6 +150,9 @@ class radDataPtr():
         do not use cached files, regenerate tmp files 
     src : (str)
         local or sftp 
+    follow : (bool)
+        the file is read in place while it is still being written, and
+        records that are not yet complete are left alone
 
     Methods
     ----------
@@ -103,6 +174,22 @@ class radDataPtr():
         read scan associated with current record
     readAll
         read all records
+    readColumns
+        read the fitted data in a time range into a radColumnData object
+    follow
+        read beams or scans as they are written to a growing file
+
+    Notes
+    -------
+    A fileName ending in .h5 or .hdf5 is read as a column store, in place.
+    The store is indexed by time, so reading starts at sTime without reading
+    the records before it, and the "byte offsets" used by offsetSeek,
+    offsetTell and the record indices are record numbers.
+
+    With follow=True an uncompressed fileName is also read in place, so that
+    records appended to it (e.g. by a realtime process) can be read with
+    follow.  readRec then returns None at a record that is only partly
+    written, and reads it on a later call once it is complete.
     
     Written by AJ 20130108
     """
@@ -112,12 +199,13 @@ class radDataPtr():
                  local_dirfmt=None, local_fnamefmt=None, local_dict=None,
                  remote_dirfmt=None, remote_fnamefmt=None, remote_dict=None,
                  remote_site=None, username=None, port=None, password=None,
-                 tmpdir=None):
+                 tmpdir=None, follow=False):
         import datetime as dt
-        import os,glob,string
+        import os,glob,string,tempfile
         from davitpy.pydarn.radar import network
         from davitpy import utils
         from davitpy.pydarn.sdio import fetchUtils as futils
+        from davitpy.pydarn.sdio.columnStore import isColumnStore
 
         self.sTime = sTime
         self.eTime = eTime
@@ -136,6 +224,8 @@ class radDataPtr():
         self.__src = src
         self.__fd = None
         self.__ptr =  None
+        self.__follow = follow
+        self.__waiting = False
 
         # check inputs
         estr = "fileType must be one of: rawacf, fitacf, fitex, lmfit, iqdat"
@@ -199,14 +289,33 @@ class radDataPtr():
                     estr = 'problem reading {:s} :file does '.format(fileName)
                     logging.error("{:s}not exist".format(estr))
                     return None
-                outname = tmpdir + \
-                          str(int(utils.datetimeToEpoch(dt.datetime.now())))
+                if isColumnStore(fileName):
+                    # column stores are read in place, no temporary copy
+                    self.__filename = fileName
+                    self.dType = 'hdf5'
+                    self.open()
+                    if self.__ptr.fType is not None:
+                        self.fType = self.__ptr.fType
+                    return None
+                if follow:
+                    # a file that is still being written is read in place
+                    if(string.find(fileName,'.bz2') != -1 or
+                       string.find(fileName,'.gz') != -1):
+                        logging.error('cannot follow a compressed file')
+                        return None
+                    self.__filename = fileName
+                    self.dType = 'dmap'
+                    self.open()
+                    return None
+                # a unique name, so that pointers opened within the same
+                # second (or on the same compressed file) don't overwrite
+                # each other's copies.  Compressed files are unpacked into it.
+                fd, outname = tempfile.mkstemp(dir=tmpdir)
+                os.close(fd)
                 if(string.find(fileName,'.bz2') != -1):
-                    outname = string.replace(fileName,'.bz2','')
                     logging.debug('bunzip2 -c '+fileName+' > '+outname+'\n')
                     os.system('bunzip2 -c '+fileName+' > '+outname)
                 elif(string.find(fileName,'.gz') != -1):
-                    outname = string.replace(fileName,'.gz','')
                     logging.debug('gunzip -c '+fileName+' > '+outname+'\n')
                     os.system('gunzip -c '+fileName+' > '+outname)
                 else:
@@ -557,15 +666,51 @@ class radDataPtr():
             return beam
 
     def open(self):
-        """open the associated dmap filename."""
+        """open the associated dmap filename (or column store)."""
         import os
+        if self.dType == 'hdf5':
+            from davitpy.pydarn.sdio.columnStore import columnStoreReader
+            self.__ptr = columnStoreReader(self.__filename)
+            return
         self.__fd = os.open(self.__filename,os.O_RDONLY)
         self.__ptr = os.fdopen(self.__fd)
 
+    def __getOffset(self):
+        """current dmap byte offset, or column store record number."""
+        if self.dType == 'hdf5':
+            return self.__ptr.getOffset()
+        from davitpy.pydarn.dmapio import getDmapOffset
+        return getDmapOffset(self.__fd)
+
+    def __setOffset(self, offset):
+        """set the dmap byte offset, or column store record number."""
+        if self.dType == 'hdf5':
+            return self.__ptr.setOffset(offset)
+        from davitpy.pydarn.dmapio import setDmapOffset
+        return setDmapOffset(self.__fd, offset)
+
+    def __readDict(self):
+        """read the next record into a dictionary (None at the end)."""
+        if self.dType == 'hdf5':
+            return self.__ptr.readRec(sTime=self.sTime)
+        from davitpy.pydarn.dmapio import readDmapRec
+        if self.__follow:
+            # leave a record that is still being written for later
+            self.__waiting = not _dmapRecordComplete(self.__fd)
+            if self.__waiting:
+                return None
+        return readDmapRec(self.__fd)
+
     def createIndex(self):
         import datetime as dt
-        from davitpy.pydarn.dmapio import getDmapOffset, readDmapRec
-        from davitpy.pydarn.dmapio import setDmapOffset
+
+        if self.dType == 'hdf5':
+            # the store already has a time index
+            recordDict, scanStartDict = \
+                self.__ptr.createIndex(self.sTime, self.eTime, scanKey='scan')
+            self.recordIndex = recordDict
+            self.scanStartIndex = scanStartDict
+            return recordDict, scanStartDict
 
         recordDict = {}
         scanStartDict = {}
@@ -575,8 +720,8 @@ class radDataPtr():
         self.rewind()
         while(1):
             # read the next record from the dmap file
-            offset= getDmapOffset(self.__fd)
-            dfile = readDmapRec(self.__fd)
+            offset = self.__getOffset()
+            dfile = self.__readDict()
             if(dfile is None):
                 #if we dont have valid data, clean up, get out
                 logging.info('reached end of data')
@@ -597,27 +742,24 @@ class radDataPtr():
         """jump to dmap record at supplied byte offset.
         Require offset to be in record index list unless forced. 
         """
-        from davitpy.pydarn.dmapio import setDmapOffset, getDmapOffset
         if force:
-            return setDmapOffset(self.__fd, offset)
+            return self.__setOffset(offset)
         else:
             if self.recordIndex is None:        
                 self.createIndex()
             if offset in self.recordIndex.values():
-                return setDmapOffset(self.__fd,offset)
+                return self.__setOffset(offset)
             else:
-                return getDmapOffset(self.__fd)
+                return self.__getOffset()
 
     def offsetTell(self):
         """jump to dmap record at supplied byte offset. 
         """
-        from davitpy.pydarn.dmapio import getDmapOffset
-        return getDmapOffset(self.__fd)
+        return self.__getOffset()
 
     def rewind(self):
         """jump to beginning of dmap file."""
-        from davitpy.pydarn.dmapio import setDmapOffset 
-        return setDmapOffset(self.__fd,0)
+        return self.__setOffset(0)
 
     def readScan(self, firstBeam=None, useEvery=None, warnNonStandard=True,
                  showBeams=False):
@@ -706,7 +848,7 @@ class radDataPtr():
         # get the rest of the beams in the scan
         while True:
             # get current offset (in case we have to revert) and next beam
-            offset = pydarn.dmapio.getDmapOffset(self.__fd)
+            offset = self.__getOffset()
             myBeam = self.readRec()
             if myBeam is None:
                 # no more data
@@ -723,7 +865,7 @@ class radDataPtr():
             if myBeam.prm.scan and myBeam.bmnum == firstBeamNum:
                 # if start of (next) scan revert offset to start of scan and
                 # break out of loop
-                pydarn.dmapio.setDmapOffset(self.__fd, offset)
+                self.__setOffset(offset)
                 break
             else:
                 # append beam to current scan
@@ -791,8 +933,8 @@ class radDataPtr():
         # do this until we reach the requested start time
         # and have a parameter match
         while(1):
-            offset=pydarn.dmapio.getDmapOffset(self.__fd)
-            dfile = pydarn.dmapio.readDmapRec(self.__fd)
+            offset = self.__getOffset()
+            dfile = self.__readDict()
             # check for valid data
             if(dfile == None or
                dt.datetime.utcfromtimestamp(dfile['time']) > self.eTime):
@@ -831,6 +973,184 @@ class radDataPtr():
                     myBeam.fit.slist = []
                 return myBeam
 
+    def readColumns(self, sTime=None, eTime=None, bmnum=None, fields=None):
+        """A function to read the fitted data in a time range into a single
+        radColumnData object, without creating a beamData object for each
+        record.
+
+        Parameters
+        ------------
+        sTime : Optional[datetime]
+            start of the time range.  (default=None, use self.sTime)
+        eTime : Optional[datetime]
+            end of the time range.  (default=None, use self.eTime)
+        bmnum : Optional[int]
+            only read this beam.  (default=None, use self.bmnum)
+        fields : Optional[list]
+            the fitted values to keep, see radColumnData.  (default=None,
+            keep all of them)
+
+        Returns
+        --------
+        cols : (radColumnData/NoneType)
+            The beam soundings, stored as columns.  None if the pointer does
+            not point to any data.
+
+        Notes
+        -------
+        The whole range is read, whatever the current file offset, and the
+        offset is left where it was.  If the record index has been built, it
+        is used to skip straight to the first record in the range.  Records
+        are matched on stid and cp as in readRec.  A column store is read
+        with radColumnData.fromStore, without going through dictionaries.
+        """
+        import datetime as dt
+
+        # check input
+        if self.__ptr is None:
+            logging.error('Your pointer does not point to any data')
+            return None
+        if self.__ptr.closed:
+            logging.error('Your file pointer is closed')
+            return None
+
+        if sTime is None:
+            sTime = self.sTime
+        if eTime is None:
+            eTime = self.eTime
+        if bmnum is None:
+            bmnum = self.bmnum
+
+        if self.dType == 'hdf5':
+            # the store is read column by column
+            cols = radColumnData.fromStore(self.__filename, sTime=sTime,
+                                           eTime=eTime, bmnum=bmnum,
+                                           fields=fields)
+            mask = np.ones(len(cols), dtype=bool)
+            if self.stid is not None:
+                mask &= cols.beam['stid'] == self.stid
+            if self.cp is not None:
+                mask &= cols.beam['cp'] == self.cp
+            return cols.select(mask)
+
+        starting_offset = self.offsetTell()
+        offsets = []
+        if self.recordIndex is not None:
+            offsets = [offset for rectime, offset
+                       in self.recordIndex.iteritems() if rectime >= sTime]
+        if len(offsets) > 0:
+            self.__setOffset(min(offsets))
+        else:
+            self.rewind()
+
+        cols = radColumnData(fType=self.fType, fields=fields)
+        while 1:
+            dfile = self.__readDict()
+            if dfile is None:
+                break
+            rectime = dt.datetime.utcfromtimestamp(dfile['time'])
+            if rectime > eTime:
+                break
+            if(rectime >= sTime and
+               (self.stid is None or self.stid == dfile['stid']) and
+               (bmnum is None or bmnum == dfile['bmnum']) and
+               (self.cp is None or self.cp == dfile['cp'])):
+                cols.appendRecord(rectime, dfile)
+
+        cols.finish()
+        self.offsetSeek(starting_offset, force=True)
+        return cols
+
+    def follow(self, unit='beam', pollInterval=0.5, timeout=None):
+        """A generator that reads a dmap file while it is still being
+        written, e.g. by a radar site's realtime process.  Records already
+        in the file are read first, then the file is polled for new ones.
+        A record is only read once it has been written out completely, and
+        recordIndex and scanStartIndex are extended as records come in.
+
+        Parameters
+        ----------
+        unit : (str)
+            'beam' to yield each beam (beamData) or 'scan' to yield each
+            complete scan (scanData).  (default='beam')
+        pollInterval : (float)
+            seconds to wait before looking for new records again, i.e. the
+            latency of the stream.  (default=0.5)
+        timeout : (float/NoneType)
+            stop when no new record has arrived for this many seconds.
+            (default=None, keep waiting)
+
+        Returns
+        -------
+        A generator of :class:`pydarn.sdio.radDataTypes.beamData` (or
+        :class:`pydarn.sdio.radDataTypes.scanData`) objects.  It stops at the
+        timeout, or once a record past eTime is read.
+
+        Notes
+        -----
+        The pointer must have been opened with follow=True.  A scan is only
+        yielded once the first beam of the next scan has arrived, or when the
+        generator stops.  Scans are not checked for patterns as in readScan.
+
+        Example
+        -------
+        ::
+
+        myPtr = pydarn.sdio.radDataPtr(sTime=dt.datetime(2013,1,1),
+                                       fileName='20130101.bks.fitacf',
+                                       follow=True)
+        for myScan in myPtr.follow(unit='scan', timeout=600.):
+            print myScan[0].time, len(myScan)
+        """
+        import time
+        from davitpy.pydarn.sdio import scanData
+
+        assert unit == 'beam' or unit == 'scan', \
+            logging.error("unit must be 'beam' or 'scan'")
+        if not self.__follow or self.dType != 'dmap':
+            logging.error('the pointer was not opened with follow=True')
+            return
+
+        if self.recordIndex is None:
+            self.recordIndex = {}
+            self.scanStartIndex = {}
+
+        myScan = scanData()
+        lastNew = time.time()
+        while True:
+            myBeam = self.readRec()
+            if myBeam is None:
+                if not self.__waiting:
+                    # past eTime, or the pointer was closed
+                    break
+                if timeout is not None and time.time() - lastNew >= timeout:
+                    logging.info('no new records for {:} s'.format(timeout))
+                    break
+                time.sleep(pollInterval)
+                continue
+
+            lastNew = time.time()
+            self.recordIndex[myBeam.time] = myBeam.offset
+            if myBeam.prm.scan == 1:
+                self.scanStartIndex[myBeam.time] = myBeam.offset
+
+            if unit == 'beam':
+                yield myBeam
+                continue
+
+            # the same scan detection as readScan
+            if myBeam.prm.scan and (len(myScan) == 0 or
+                                    myBeam.bmnum == myScan[0].bmnum):
+                if len(myScan) > 0:
+                    yield myScan
+                myScan = scanData()
+                myScan.append(myBeam)
+            elif len(myScan) > 0:
+                myScan.append(myBeam)
+
+        if len(myScan) > 0:
+            yield myScan
+
     def close(self):
         """close associated dmap file."""
         import os
@@ -1486,6 +1806,462 @@ class iqData(radBaseData):
             myStr += '%s = %s \n' % (key, var)
         return myStr
 
+class radColumnData():
+    """A class to hold many fitted beam soundings as columns, rather than as a
+    list of beamData objects
+
+    The per-beam values are kept in one structured array with a row per beam
+    sounding.  The per-gate fitted values of all the beams are kept in one
+    flat structured array, with an offsets array giving the rows of each
+    beam: the fitted data of beam i are fit[fitOffsets[i]:fitOffsets[i+1]].
+
+    Parameters
+    -----------
+    fType : Optional[str]
+        the file type, 'fitacf', 'fitex' or 'lmfit'
+    fields : Optional[list]
+        the names (attribute names, e.g. 'v', 'p_l') of the fitted values to
+        keep.  'slist' is always kept.  (default=None, keep all fitFields)
+
+    Attributes
+    -----------
+    fType : (str)
+        the file type
+    time : (numpy.ndarray)
+        time (datetime) of each beam sounding
+    beam : (numpy.ndarray)
+        structured array with a row per beam sounding and the columns in
+        beamFields (stid, bmnum, channel, cp, scan, nrang, tfreq, ...)
+    fit : (numpy.ndarray)
+        structured array with a row per range gate with scatter and the
+        requested columns of fitFields (slist, v, p_l, w_l, gflg, ...)
+    fitOffsets : (numpy.ndarray)
+        nbeam + 1 row offsets of each beam sounding into fit
+
+    Methods
+    --------
+    recordSlice
+        the fitted values of one beam sounding
+    counts
+        the number of range gates with scatter in each beam sounding
+    recordIndex
+        the beam sounding number of each row of fit
+    select
+        a new radColumnData holding some of the beam soundings
+    timeSlice
+        a new radColumnData holding the beam soundings in a time range
+    gateArray
+        a (beam sounding, range gate) array of a fitted parameter
+    scanIndex
+        the scan number of each beam sounding
+    concatenate
+        join several radColumnData objects together
+    fromStore
+        read beam soundings straight from a column store
+
+    Example
+    --------
+    ::
+
+    cols.gateArray('v', nrang=75)[cols.beam['bmnum'] == 7]
+    """
+    def __init__(self, fType=None, fields=None):
+        self.fType = fType
+        if fields is None:
+            self.fitFields = list(fitFields)
+        else:
+            self.fitFields = [f for f in fitFields
+                              if f[1] == 'slist' or f[1] in fields]
+        self.time = np.array([], dtype=object)
+        self.beam = np.empty(0, dtype=[(name, fmt) for key, name, fmt
+                                       in beamFields])
+        self.fit = np.empty(0, dtype=[(name, fmt) for key, name, fmt
+                                      in self.fitFields])
+        self.fitOffsets = np.zeros(1, dtype=int)
+
+        # Python lists that records are gathered into before being converted
+        self.__buffer = None
+
+    def __len__(self):
+        return len(self.time)
+
+    def __repr__(self):
+        my_str = 'radColumnData: {:d} {:} beams\n'.format(len(self),
+                                                         self.fType)
+        if len(self) > 0:
+            my_str = '{:s}from {:} to {:}\n'.format(my_str, self.time[0],
+                                                    self.time[-1])
+        my_str = '{:s}fit = {:d} rows of {:}\n'.format(my_str, len(self.fit),
+                                                       self.fit.dtype.names)
+        return my_str
+
+    def appendRecord(self, time, adict, attrNames=False):
+        """Add a beam sounding.  The columns are not updated until finish is
+        called.
+
+        Parameters
+        ------------
+        time : (datetime)
+            time of the beam sounding
+        adict : (dict)
+            the values of the beam sounding, e.g. a dictionary read from a
+            dmap file
+        attrNames : Optional[bool]
+            True if adict is keyed by the attribute names (e.g. 'inttsc')
+            rather than the dmap names (e.g. 'intt.sc').  (default=False)
+
+        Notes
+        -------
+        In general, users will not need to use this.
+        """
+        k = 1 if attrNames else 0
+        if self.__buffer is None:
+            self.__buffer = {'time':[], 'counts':[],
+                             'beam':dict([(f[1], []) for f in beamFields]),
+                             'fit':dict([(f[1], []) for f in self.fitFields])}
+        buf = self.__buffer
+        buf['time'].append(time)
+
+        for field in beamFields:
+            val = adict.get(field[k])
+            if val is None:
+                val = np.nan if field[2].startswith('f') else -1
+            buf['beam'][field[1]].append(val)
+
+        slist = adict.get('slist')
+        n = 0 if slist is None else len(slist)
+        for field in self.fitFields:
+            vals = adict.get(field[k])
+            if vals is not None and len(vals) == n:
+                buf['fit'][field[1]].extend(vals)
+            else:
+                # e.g. elv and phi0 are missing when there is no xcf data
+                buf['fit'][field[1]].extend(
+                    [np.nan if field[2].startswith('f') else -1] * n)
+        buf['counts'].append(n)
+
+    def finish(self):
+        """Convert the beam soundings added by appendRecord into the columns
+
+        Notes
+        -------
+        In general, users will not need to use this.
+        """
+        buf = self.__buffer
+        if buf is None:
+            return
+
+        self.time = np.array(buf['time'], dtype=object)
+        self.beam = np.empty(len(self.time), dtype=self.beam.dtype)
+        for name in self.beam.dtype.names:
+            self.beam[name] = buf['beam'][name]
+        self.fit = np.empty(sum(buf['counts']), dtype=self.fit.dtype)
+        for name in self.fit.dtype.names:
+            self.fit[name] = buf['fit'][name]
+        self.fitOffsets = np.zeros(len(self.time) + 1, dtype=int)
+        np.cumsum(buf['counts'], out=self.fitOffsets[1:])
+
+        self.__buffer = None
+
+    def recordSlice(self, i):
+        """The fitted values of a single beam sounding
+
+        Parameters
+        ------------
+        i : (int)
+            the beam sounding number
+
+        Returns
+        ---------
+        rows : (numpy.ndarray)
+            a view of fit
+        """
+        return self.fit[self.fitOffsets[i]:self.fitOffsets[i + 1]]
+
+    def counts(self):
+        """The number of range gates with scatter in each beam sounding
+
+        Returns
+        ---------
+        counts : (numpy.ndarray)
+        """
+        return np.diff(self.fitOffsets)
+
+    def recordIndex(self):
+        """The beam sounding number of each row of fit, for use with numpy
+        reductions and fancy indexing
+
+        Returns
+        ---------
+        index : (numpy.ndarray)
+        """
+        return np.repeat(np.arange(len(self)), self.counts())
+
+    def select(self, mask):
+        """Select some of the beam soundings
+
+        Parameters
+        ------------
+        mask : (numpy.ndarray)
+            boolean array with one element per beam sounding, e.g.
+            cols.beam['bmnum'] == 7
+
+        Returns
+        ---------
+        cols : (radColumnData)
+            a new object holding the selected beam soundings
+        """
+        mask = np.asarray(mask, dtype=bool)
+        cols = radColumnData(fType=self.fType)
+        cols.fitFields = self.fitFields
+        cols.time = self.time[mask]
+        cols.beam = self.beam[mask]
+        cols.fit = self.fit[mask[self.recordIndex()]]
+        cols.fitOffsets = np.zeros(len(cols.time) + 1, dtype=int)
+        np.cumsum(self.counts()[mask], out=cols.fitOffsets[1:])
+        return cols
+
+    def timeSlice(self, sTime=None, eTime=None):
+        """Select the beam soundings between sTime and eTime
+
+        Parameters
+        ------------
+        sTime : Optional[datetime]
+            earliest time to keep.  (default=None, no limit)
+        eTime : Optional[datetime]
+            latest time to keep.  (default=None, no limit)
+
+        Returns
+        ---------
+        cols : (radColumnData)
+            a new object.  If the beam soundings are in time order (as when
+            read from a file) its arrays are views of this object's arrays.
+        """
+        if len(self) > 1 and np.any(self.time[1:] < self.time[:-1]):
+            mask = np.ones(len(self), dtype=bool)
+            if sTime is not None:
+                mask &= self.time >= sTime
+            if eTime is not None:
+                mask &= self.time <= eTime
+            return self.select(mask)
+
+        i0 = 0 if sTime is None else np.searchsorted(self.time, sTime,
+                                                     side='left')
+        i1 = len(self) if eTime is None else np.searchsorted(self.time, eTime,
+                                                             side='right')
+        cols = radColumnData(fType=self.fType)
+        cols.fitFields = self.fitFields
+        cols.time = self.time[i0:i1]
+        cols.beam = self.beam[i0:i1]
+        offsets = self.fitOffsets[i0:i1 + 1]
+        cols.fit = self.fit[offsets[0]:offsets[-1]]
+        cols.fitOffsets = offsets - offsets[0]
+        return cols
+
+    def gateArray(self, param, nrang=None, fill=np.nan):
+        """Scatter a fitted parameter into a (beam sounding, range gate)
+        array
+
+        Parameters
+        ------------
+        param : (str)
+            the fitted parameter, e.g. 'v', 'p_l', 'w_l', 'gflg'
+        nrang : Optional[int]
+            the number of range gates.  (default=None, use the largest nrang
+            of the beam soundings)
+        fill : Optional[float]
+            the value of gates without scatter.  (default=numpy.nan)
+
+        Returns
+        ---------
+        data : (numpy.ndarray)
+            len(self) x nrang array
+        """
+        if nrang is None:
+            nrang = max(self.beam['nrang'].max() if len(self) > 0 else 0,
+                        self.fit['slist'].max() + 1 if len(self.fit) > 0
+                        else 0)
+        data = np.empty((len(self), nrang), dtype=float)
+        data.fill(fill)
+        good = (self.fit['slist'] >= 0) & (self.fit['slist'] < nrang)
+        data[self.recordIndex()[good],
+             self.fit['slist'][good]] = self.fit[param][good]
+        return data
+
+    def scanIndex(self, warnNonStandard=True):
+        """The scan number of each beam sounding, with scans found as by
+        radDataPtr.readScan
+
+        Parameters
+        ------------
+        warnNonStandard : Optional[bool]
+            log the scan pattern of scans that are not standard, as readScan
+            does.  (default=True)
+
+        Returns
+        ---------
+        index : (numpy.ndarray)
+            the scan number (counting from 0) of each beam sounding.  -1 for
+            the beam soundings before the first scan flag and for those left
+            out of a patterned scan.
+
+        Raises
+        -------
+        ValueError
+            if the pattern of a scan can not be found, as in readScan
+
+        Notes
+        -------
+        A scan starts at a beam sounding with the scan flag set and the same
+        beam number as the first beam of the previous scan.  The beam
+        soundings must be in time order, as read from a file.
+        """
+        import itertools
+
+        index = np.empty(len(self), dtype=int)
+        index.fill(-1)
+
+        scanNr = -1
+        firstBeamNum = None
+        bmnums = self.beam['bmnum'].tolist()
+        for i, flag in enumerate(self.beam['scan'].tolist()):
+            if flag and (scanNr < 0 or bmnums[i] == firstBeamNum):
+                scanNr += 1
+                firstBeamNum = bmnums[i]
+            index[i] = scanNr
+
+        # keep the standard subset of patterned scans, e.g. beam numbers
+        # [5, 0, 5, 1, 5, 2, ...]
+        bmnums = self.beam['bmnum']
+        starts = np.searchsorted(index, np.arange(scanNr + 2))
+        for s in xrange(scanNr + 1):
+            inx = np.arange(starts[s], starts[s + 1])
+            diffs = np.diff(bmnums[inx])
+            if np.all(diffs == 1) or np.all(diffs == -1):
+                continue
+            for firstBeam, useEvery in itertools.product(range(24),
+                                                         range(1, 24)):
+                diffs = np.diff(bmnums[inx[firstBeam::useEvery]])
+                if np.all(diffs == 1) or np.all(diffs == -1):
+                    break
+            else:
+                estr = 'Auto-detection of scan pattern failed, set pattern '
+                raise ValueError('{:s}manually using readScan'.format(estr))
+            if warnNonStandard:
+                estr = 'Auto-detected scan pattern with firstBeam='
+                estr = '{:s}{}, useEvery={}'.format(estr, firstBeam, useEvery)
+                logging.info(estr)
+            index[inx] = -1
+            index[inx[firstBeam::useEvery]] = s
+        return index
+
+    @staticmethod
+    def concatenate(colsList):
+        """Join several radColumnData objects, in the order given
+
+        Parameters
+        ------------
+        colsList : (list)
+            radColumnData objects with the same fitted fields
+
+        Returns
+        ---------
+        cols : (radColumnData)
+        """
+        colsList = [c for c in colsList if c is not None]
+        if len(colsList) == 0:
+            return radColumnData()
+
+        cols = radColumnData(fType=colsList[0].fType)
+        cols.fitFields = colsList[0].fitFields
+        cols.time = np.concatenate([c.time for c in colsList])
+        cols.beam = np.concatenate([c.beam for c in colsList])
+        cols.fit = np.concatenate([c.fit for c in colsList])
+        cols.fitOffsets = np.zeros(len(cols.time) + 1, dtype=int)
+        np.cumsum(np.concatenate([c.counts() for c in colsList]),
+                  out=cols.fitOffsets[1:])
+        return cols
+
+    @staticmethod
+    def fromStore(fileName, sTime=None, eTime=None, bmnum=None, fields=None):
+        """Read fitted beam soundings straight from a column store (see
+        :mod:`pydarn.sdio.columnStore`) into columns, without going through
+        dictionaries one record at a time
+
+        Parameters
+        ------------
+        fileName : (str)
+            the name of the store
+        sTime : Optional[datetime]
+            earliest time to read.  (default=None, no limit)
+        eTime : Optional[datetime]
+            latest time to read.  (default=None, no limit)
+        bmnum : Optional[int]
+            only keep this beam.  (default=None, keep all beams)
+        fields : Optional[list]
+            the fitted values to keep, as for radColumnData.  (default=None,
+            keep all fitFields)
+
+        Returns
+        ---------
+        cols : (radColumnData)
+
+        Example
+        --------
+        ::
+
+        files = pydarn.sdio.storeFiles('/data/store', sTime, eTime, 'bks',
+                                       'fitacf')
+        cols = radColumnData.concatenate(
+            [radColumnData.fromStore(f, bmnum=7, fields=['v']) for f in files])
+        """
+        from davitpy.pydarn.sdio.columnStore import columnStoreReader
+
+        store = columnStoreReader(fileName)
+        try:
+            cols = radColumnData(fType=store.fType, fields=fields)
+            keys = [f[0] for f in beamFields] + [f[0] for f in cols.fitFields]
+            data = store.readColumns([k for k in keys if k in store.keys()],
+                                     sTime=sTime, eTime=eTime)
+        finally:
+            store.close()
+
+        nbeam = len(data['time'])
+        mask = np.ones(nbeam, dtype=bool)
+        if bmnum is not None and 'bmnum' in data:
+            mask = data['bmnum'] == bmnum
+
+        # epoch seconds to datetimes, through numpy's datetime64
+        cols.time = (np.round(data['time'][mask] * 1.e6).astype(np.int64)
+                     .astype('datetime64[us]').astype(object))
+        cols.beam = np.empty(mask.sum(), dtype=cols.beam.dtype)
+        for key, name, fmt in beamFields:
+            if key in data:
+                cols.beam[name] = data[key][mask]
+            else:
+                cols.beam[name] = np.nan if fmt.startswith('f') else -1
+
+        if 'slist' in data:
+            slist, offsets = data['slist']
+            counts = np.diff(offsets)
+        else:
+            slist, counts = np.zeros(0, dtype=int), np.zeros(nbeam, dtype=int)
+        keep = np.repeat(mask, counts)
+        cols.fit = np.empty(keep.sum(), dtype=cols.fit.dtype)
+        for key, name, fmt in cols.fitFields:
+            col = np.empty(len(slist), dtype=fmt)
+            col.fill(np.nan if fmt.startswith('f') else -1)
+            if key in data:
+                vals, voffsets = data[key]
+                vcounts = np.diff(voffsets)
+                # e.g. elv and phi0 are missing when there is no xcf data
+                good = vcounts == counts
+                col[np.repeat(good, counts)] = vals[np.repeat(good, vcounts)]
+            cols.fit[name] = col[keep]
+        cols.fitOffsets = np.zeros(len(cols.time) + 1, dtype=int)
+        np.cumsum(counts[mask], out=cols.fitOffsets[1:])
+        return cols
+
 if __name__=="__main__":
     import os
     import datetime
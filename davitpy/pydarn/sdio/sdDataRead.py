@@ -26,7 +26,10 @@ Functions
 ------------
 sdDataOpen
 sdDataReadRec
+sdDataCreateIndex
 sdDataReadAll
+sdDataReadColumns
+sdDataReadChunks
 """
 
 import logging
@@ -242,3 +245,103 @@ def sdDataReadAll(my_ptr):
 
     my_list = [beam for beam in my_ptr]
     return my_list
+
+def sdDataReadChunks(my_ptr, maxRecords=None, timeSpan=None, maxBytes=None,
+                     columns=False):
+    """A function to read a large amount (to the end of the request) of grid
+    or map data from a sdDataPtr object in batches, so that only one batch is
+    held in memory at a time
+
+    Parameters
+    -----------
+    my_ptr : (sdDataPtr)
+        Contains the pipeline to the data we are after
+    maxRecords : (int or NoneType)
+        The largest number of records in a batch.  (default=None)
+    timeSpan : (datetime.timedelta, float or NoneType)
+        The longest time (a timedelta, or seconds) from the start of the first
+        to the start of the last record of a batch, which is less than
+        timeSpan.  (default=None)
+    maxBytes : (int or NoneType)
+        The largest (approximate) size in bytes of the data values of the
+        records in a batch.  (default=None)
+    columns : (bool)
+        If True, each batch is a sdColumnData object rather than a list of
+        records.  (default=False)
+
+    Returns
+    ---------
+    A generator of batches: lists of gridData or mapData objects, or
+    sdColumnData objects.
+
+    Notes
+    -------
+    A batch is closed as soon as adding the next record would break any of
+    the limits given, and always holds at least one record.  With no limits,
+    all of the data come in one batch, as with sdDataReadAll.
+
+    Examples
+    ---------
+    ::
+    import datetime as dt
+    my_ptr = sdDataOpen(dt.datetime(2011,1,1), 'south',
+                        eTime=dt.datetime(2011,2,1), fileType='mapex')
+    for my_cols in sdDataReadChunks(my_ptr, timeSpan=86400., columns=True):
+        print my_cols.sTime[0], my_cols.scalars['potdrop'].max()
+    """
+    from davitpy.pydarn.sdio.sdDataTypes import sdDataPtr, sdColumnData
+    from davitpy.pydarn.sdio.radDataRead import _readChunks
+
+    # check input
+    assert isinstance(my_ptr, sdDataPtr), \
+        logging.error('input must be of type sdDataPtr')
+
+    for batch in _readChunks(my_ptr.readRec, lambda rec: rec.sTime,
+                             maxRecords, timeSpan, maxBytes):
+        if not columns:
+            yield batch
+            continue
+        cols = sdColumnData(fType=my_ptr.fType, hemi=my_ptr.hemi)
+        for rec in batch:
+            cols.appendRecord(rec.sTime, rec.eTime, rec.recordDict)
+        cols.finish()
+        yield cols
+
+def sdDataReadColumns(my_ptr, sTime=None, eTime=None):
+    """A function to read a time range of grid or map data into columns from
+    a sdDataPtr object
+
+    Parameters
+    -----------
+    my_ptr : (sdDataPtr)
+        Contains the pipeline to the data we are after
+    sTime : (datetime or NoneType)
+        The beginning of the time range.  If None, the start time of my_ptr
+        is used.  (default=None)
+    eTime : (datetime or NoneType)
+        The end of the time range.  If None, the end time of my_ptr is used.
+        (default=None)
+
+    Returns
+    ---------
+    my_cols : (sdColumnData or NoneType)
+        An object holding the per-record scalars and the flattened radar,
+        vector, model, coefficient and boundary arrays of every record, with
+        offsets giving the rows of each record.  Will return None if the
+        pointer does not point to any data.
+
+    Examples
+    ---------
+    ::
+    import datetime as dt
+    my_ptr = sdDataOpen(dt.datetime(2011,1,1), 'south', fileType='mapex')
+    my_cols = sdDataReadColumns(my_ptr)
+    cpcp = my_cols.scalars['potdrop']
+    """
+    from davitpy.pydarn.sdio.sdDataTypes import sdDataPtr
+
+    # check input
+    assert isinstance(my_ptr, sdDataPtr), \
+        logging.error('input must be of type sdDataPtr')
+
+    return my_ptr.readColumns(sTime=sTime, eTime=eTime)
@@ -29,14 +29,73 @@ sdDataPtr
 sdBaseData
 gridData
 mapData
+sdVector
+sdModel
+sdColumnData
 """
 
 import logging
+import numpy as np
 from davitpy.utils import twoWayDict
 
 alpha = ['a','b','c','d','e','f','g','h','i','j','k','l','m','n','o','p','q',
          'r','s','t','u','v','w','x','y','z']
 
+# The per-vector and per-model columns of grid and map records, given as
+# (dmap key, attribute name, numpy type).  These are loaded into numpy
+# structured arrays rather than being set one key at a time.
+vectorFields = [('vector.mlat', 'mlat', 'f8'),
+                ('vector.mlon', 'mlon', 'f8'),
+                ('vector.kvect', 'kvect', 'f8'),
+                ('vector.stid', 'stid', 'i4'),
+                ('vector.channel', 'channel', 'i4'),
+                ('vector.index', 'index', 'i4'),
+                ('vector.vel.median', 'velmedian', 'f8'),
+                ('vector.vel.sd', 'velsd', 'f8'),
+                ('vector.pwr.median', 'pwrmedian', 'f8'),
+                ('vector.pwr.sd', 'pwrsd', 'f8'),
+                ('vector.wdt.median', 'wdtmedian', 'f8'),
+                ('vector.wdt.sd', 'wdtsd', 'f8')]
+modelFields = [('model.mlat', 'mlat', 'f8'),
+               ('model.mlon', 'mlon', 'f8'),
+               ('model.kvect', 'kvect', 'f8'),
+               ('model.vel.median', 'velmedian', 'f8')]
+boundaryFields = [('boundary.mlat', 'boundarymlat', 'f8'),
+                  ('boundary.mlon', 'boundarymlon', 'f8')]
+
+# The remaining array valued entries of grid and map records, which hold
+# one element per radar or one per fit coefficient.
+radarFields = [('stid', 'stid', 'i4'),
+               ('channel', 'channel', 'i4'),
+               ('nvec', 'nvec', 'i4'),
+               ('freq', 'freq', 'f8'),
+               ('program.id', 'programid', 'i4'),
+               ('noise.mean', 'noisemean', 'f8'),
+               ('noise.sd', 'noisesd', 'f8'),
+               ('gsct', 'gsct', 'i4'),
+               ('v.min', 'vmin', 'f8'),
+               ('v.max', 'vmax', 'f8'),
+               ('p.min', 'pmin', 'f8'),
+               ('p.max', 'pmax', 'f8'),
+               ('w.min', 'wmin', 'f8'),
+               ('w.max', 'wmax', 'f8'),
+               ('ve.min', 'vemin', 'f8'),
+               ('ve.max', 'vemax', 'f8')]
+coeffFields = [('N', 'N', 'f8'),
+               ('N+1', 'Np1', 'f8'),
+               ('N+2', 'Np2', 'f8'),
+               ('N+3', 'Np3', 'f8')]
+
+# The ragged groups of an sdColumnData object, and the fields in each
+columnGroups = [('radar', radarFields),
+                ('vector', vectorFields),
+                ('model', modelFields),
+                ('coeff', coeffFields),
+                ('boundary', boundaryFields)]
+
+# dmap key -> attribute name look up tables, one per sdBaseData subclass
+_keyAttrMaps = {}
+
 class sdDataPtr():
     """A class which contains a pipeline to a data source
 
@@ -99,13 +158,16 @@ class sdDataPtr():
         hemisphere of data interested in
     fType : str
         the file type, 'grd', 'map', 'grdex' or 'mapex'
+    dType : (str)
+        the file data type, 'dmap' or 'hdf5' (a column store, see
+        :mod:`pydarn.sdio.columnStore`)
     recordIndex : (dict)
         look up dictionary for file offsets for scan times
 
     Private Attributes
     --------------------
-    ptr : (file or mongodb query object)
-        the data pointer (different depending on mongodo or dmap)
+    ptr : (file, columnStoreReader or mongodb query object)
+        the data pointer (different depending on mongodo, dmap or hdf5)
     fd : (int)
         the file descriptor 
     fileName : (str)
@@ -134,6 +196,15 @@ class sdDataPtr():
         read scan associated with current record
     readAll
         read all records
+    readColumns
+        read all records in a time range into an sdColumnData object
+
+    Notes
+    -------
+    A fileName ending in .h5 or .hdf5 is read as a column store, in place.
+    The store is indexed by time, so reading starts at sTime without reading
+    the records before it, and the "byte offsets" used by offsetSeek,
+    offsetTell and the record index are record numbers.
 
     Written by AJ 20130607
     """
@@ -143,13 +214,14 @@ class sdDataPtr():
                  remote_fnamefmt=None, remote_dict=None, remote_site=None,
                  username=None, password=None, port=None, tmpdir=None):
 #        from davitpy.pydarn.sdio import sdDataPtr
-        from davitpy.utils.timeUtils import datetimeToEpoch
         import datetime as dt
         import os
         import glob
         import string
+        import tempfile
         from davitpy.pydarn.radar import network
         import davitpy.pydarn.sdio.fetchUtils as futils
+        from davitpy.pydarn.sdio.columnStore import isColumnStore
         import davitpy
 
         self.sTime = sTime
@@ -215,14 +287,23 @@ class sdDataPtr():
                     estr = 'problem reading [{:}]: file does '.format(fileName)
                     logging.error('{:s}not exist'.format(estr))
                     return None
+                if isColumnStore(fileName):
+                    # column stores are read in place, no temporary copy
+                    self.__filename = fileName
+                    self.dType = 'hdf5'
+                    self.open()
+                    if self.__ptr.fType is not None:
+                        self.fType = self.__ptr.fType
+                    return None
 
-                epoch = int(datetimeToEpoch(dt.datetime.now()))
-                outname = "{:s}{:d}".format(tmpdir, epoch)
+                # a unique name, so that pointers opened within the same
+                # second (or on the same compressed file) don't overwrite
+                # each other's copies.  Compressed files are unpacked into it.
+                fd, outname = tempfile.mkstemp(dir=tmpdir)
+                os.close(fd)
                 if(string.find(fileName, '.bz2') != -1):
-                    outname = string.replace(fileName, '.bz2', '')
                     command = 'bunzip2 -c {:s} > {:s}'.format(fileName, outname)
                 elif(string.find(fileName,'.gz') != -1):
-                    outname = string.replace(fileName, '.gz', '')
                     command = 'gunzip -c {:s} > {:s}'.format(fileName, outname)
                 else:
                     command = 'cp {:s} {:s}'.format(fileName, outname)
@@ -508,14 +589,44 @@ class sdDataPtr():
             return beam
 
     def open(self):
-        """open the associated dmap filename."""
+        """open the associated dmap filename (or column store)."""
         import os
+        if self.dType == 'hdf5':
+            from davitpy.pydarn.sdio.columnStore import columnStoreReader
+            self.__ptr = columnStoreReader(self.__filename)
+            return
         self.__fd = os.open(self.__filename, os.O_RDONLY)
         self.__ptr = os.fdopen(self.__fd)
 
+    def __getOffset(self):
+        """current dmap byte offset, or column store record number."""
+        if self.dType == 'hdf5':
+            return self.__ptr.getOffset()
+        from davitpy.pydarn.dmapio import getDmapOffset
+        return getDmapOffset(self.__fd)
+
+    def __setOffset(self, offset):
+        """set the dmap byte offset, or column store record number."""
+        if self.dType == 'hdf5':
+            return self.__ptr.setOffset(offset)
+        from davitpy.pydarn.dmapio import setDmapOffset
+        return setDmapOffset(self.__fd, offset)
+
+    def __readDict(self):
+        """read the next record into a dictionary (None at the end)."""
+        if self.dType == 'hdf5':
+            return self.__ptr.readRec(sTime=self.sTime)
+        from davitpy.pydarn.dmapio import readDmapRec
+        return readDmapRec(self.__fd)
+
     def createIndex(self):
         import datetime as dt
-        import davitpy.pydarn.dmapio as dmapio
+
+        if self.dType == 'hdf5':
+            # the store already has a time index
+            recordDict, _ = self.__ptr.createIndex(self.sTime, self.eTime)
+            self.recordIndex = recordDict
+            return recordDict
 
         recordDict = {}
         starting_offset = self.offsetTell()
@@ -524,8 +635,8 @@ class sdDataPtr():
         self.rewind()
         while 1:
             # read the next record from the dmap file
-            offset = dmapio.getDmapOffset(self.__fd)
-            dfile = dmapio.readDmapRec(self.__fd)
+            offset = self.__getOffset()
+            dfile = self.__readDict()
             if dfile is None:
                 # if we dont have valid data, clean up, get out
                 logging.info('reached end of data')
@@ -559,29 +670,25 @@ class sdDataPtr():
         """jump to dmap record at supplied byte offset.
            Require offset to be in record index list unless forced. 
         """
-        from davitpy.pydarn.dmapio import setDmapOffset, getDmapOffset
-
         if force:
-            return dmapio.setDmapOffset(self.__fd, offset)
+            return self.__setOffset(offset)
         else:
             if self.recordIndex is None:        
                 self.createIndex()
 
             if offset in self.recordIndex.values():
-                return setDmapOffset(self.__fd, offset)
+                return self.__setOffset(offset)
             else:
-                return getDmapOffset(self.__fd)
+                return self.__getOffset()
 
     def offsetTell(self):
         """jump to dmap record at supplied byte offset. 
         """
-        from davitpy.pydarn.dmapio import getDmapOffset
-        return getDmapOffset(self.__fd)
+        return self.__getOffset()
   
     def rewind(self):
         """jump to beginning of dmap file."""
-        from davitpy.pydarn.dmapio import setDmapOffset 
-        return setDmapOffset(self.__fd, 0)
+        return self.__setOffset(0)
   
     def readRec(self):
         """A function to read a single record of radar data from a radDataPtr
@@ -591,9 +698,11 @@ class sdDataPtr():
         --------
         mydata : (gridData, mapData, or NoneType)
             An object filled with the specified type of data.  Will return None
-            when there is no more data in the pointer to read.
+            when there is no more data in the pointer to read.  The vector and
+            model columns are returned as numpy structured arrays, available
+            as mydata.vector.table (mydata.grid.vector.table for map data) and
+            mydata.model.table.
         """
-        import davitpy.pydarn.dmapio as dmapio
         import datetime as dt
 
         # check input
@@ -608,8 +717,8 @@ class sdDataPtr():
         # do this until we reach the requested start time
         # and have a parameter match
         while 1:
-            offset = dmapio.getDmapOffset(self.__fd)
-            dfile = dmapio.readDmapRec(self.__fd)
+            offset = self.__getOffset()
+            dfile = self.__readDict()
             # check for valid data
             try:
                 dtime = dt.datetime(dfile['start.year'], dfile['start.month'],
@@ -624,16 +733,14 @@ class sdDataPtr():
                 logging.warning('problem reading time from file')
                 break
 
-            if(dfile == None or
-               dt.datetime.utcfromtimestamp(dfile['time']) > self.eTime):
+            if dfile == None or dtime > self.eTime:
                 # if we dont have valid data, clean up, get out
                 logging.info('reached end of data')
                 return None
 
             # check that we're in the time window, and that we have a 
             # match for the desired params  
-            if(dt.datetime.utcfromtimestamp(dfile['time']) >= self.sTime and
-               dt.datetime.utcfromtimestamp(dfile['time']) <= self.eTime):
+            if dtime >= self.sTime and dtime <= self.eTime:
                 # fill the beamdata object, checking the file type
                 if self.fType == 'grd' or self.fType == 'grdex':
                     mydata = gridData(dataDict=dfile)
@@ -650,6 +757,87 @@ class sdDataPtr():
   
                 return mydata
 
+    def readColumns(self, sTime=None, eTime=None):
+        """A function to read all of the records in a time range into a
+        single sdColumnData object, without creating a gridData or mapData
+        object for each record.
+
+        Parameters
+        ------------
+        sTime : Optional[datetime]
+            start of the time range.  (default=None, use self.sTime)
+        eTime : Optional[datetime]
+            end of the time range.  (default=None, use self.eTime)
+
+        Returns
+        --------
+        cols : (sdColumnData or NoneType)
+            The records, stored as columns.  None if the pointer does not
+            point to any data.
+
+        Notes
+        -------
+        The whole range is read, whatever the current file offset, and the
+        offset is left where it was.  If the record index has been built, it
+        is used to skip straight to the first record in the range.
+        """
+        import datetime as dt
+
+        # check input
+        if self.__ptr == None:
+            logging.error('the pointer does not point to any data')
+            return None
+
+        if self.__ptr.closed:
+            logging.error('the file pointer is closed')
+            return None
+
+        if sTime is None:
+            sTime = self.sTime
+        if eTime is None:
+            eTime = self.eTime
+
+        starting_offset = self.offsetTell()
+        offsets = []
+        if self.recordIndex is not None:
+            offsets = [offset for rectime, offset
+                       in self.recordIndex.iteritems() if rectime >= sTime]
+        if self.dType == 'hdf5':
+            self.__setOffset(self.__ptr.timeRow(sTime))
+        elif len(offsets) > 0:
+            self.__setOffset(min(offsets))
+        else:
+            self.rewind()
+
+        cols = sdColumnData(fType=self.fType, hemi=self.hemi)
+        while 1:
+            dfile = self.__readDict()
+            if dfile is None:
+                break
+
+            try:
+                dtime = dt.datetime(dfile['start.year'], dfile['start.month'],
+                                    dfile['start.day'], dfile['start.hour'],
+                                    dfile['start.minute'],
+                                    int(dfile['start.second']))
+                etime = dt.datetime(dfile['end.year'], dfile['end.month'],
+                                    dfile['end.day'], dfile['end.hour'],
+                                    dfile['end.minute'],
+                                    int(dfile['end.second']))
+            except Exception, e:
+                logging.warning(e)
+                logging.warning('problem reading time from file')
+                break
+
+            if dtime > eTime:
+                break
+            if dtime >= sTime:
+                cols.appendRecord(dtime, etime, dfile)
+
+        cols.finish()
+        self.offsetSeek(starting_offset, force=True)
+        return cols
+
     def close(self):
         """close associated dmap file."""
         import os
@@ -735,6 +923,67 @@ class sdDataPtr():
 
         return valid
 
+def _keyAttrName(obj, key):
+    """Find the attribute of an sdBaseData object that a dmap key fills
+
+    Parameters
+    ------------
+    obj : (sdBaseData)
+        the object being filled
+    key : (str)
+        the dmap key, e.g. 'pot.drop' or 'N+1'
+
+    Returns
+    ---------
+    name : (str or NoneType)
+        the attribute name, or None if the key is not stored as an attribute
+        (start and end times, vector and model columns, unknown keys)
+    """
+    if key.startswith('start.') or key.startswith('end.'):
+        return None
+    if 'vector.' in key or 'model.' in key:
+        return None
+    name = key.replace('+', 'p') if '+' in key else key.replace('.', '')
+    if hasattr(obj, name):
+        return name
+    return None
+
+def _fillTable(obj, adict, fields):
+    """Load a set of equal length dmap arrays into a numpy structured array
+    and point the matching attributes of obj at its columns
+
+    Parameters
+    ------------
+    obj : (sdBaseData)
+        the object whose attributes will reference the table columns
+    adict : (dict)
+        the dictionary read from the dmap file
+    fields : (list)
+        (dmap key, attribute name, numpy type) tuples, e.g. vectorFields
+
+    Returns
+    ---------
+    table : (numpy.ndarray or NoneType)
+        structured array with one row per element and one named column per
+        field.  Columns missing from the record are NaN (floats) or -1
+        (integers) and leave their attribute as None.  None is returned if
+        none of the keys are in the record.
+    """
+    present = [(key, name) for key, name, fmt in fields if key in adict]
+    if len(present) == 0:
+        return None
+
+    table = np.empty(len(adict[present[0][0]]),
+                     dtype=[(name, fmt) for key, name, fmt in fields])
+    for key, name, fmt in fields:
+        table[name] = np.nan if fmt.startswith('f') else -1
+    for key, name in present:
+        table[name] = adict[key]
+        # field access returns a view, so the attributes share the table data
+        setattr(obj, name, table[name])
+
+    return table
+
 class sdBaseData():
     """A base class for the processed SD data types.  This allows for single
     definition of common routines
@@ -761,74 +1010,39 @@ class sdBaseData():
 
         Notes
         -------
-        In general, users will not need to use this.
+        In general, users will not need to use this.  The attribute name
+        belonging to each dmap key is only worked out the first time a key is
+        seen for a given class, see _keyAttrName.
 
         Written by AJ 20121130
         """
         import datetime as dt
 
-        syr = 1
-        smo = 1
-        sdy = 1
-        shr = 1
-        smt = 1
-        ssc = 1
-        eyr = 1
-        emo = 1
-        edy = 1
-        ehr = 1
-        emt = 1
-        esc = 1
-
-        for key,val in adict.iteritems():
-            if key == 'start.year':
-                syr = adict['start.year']
-            elif key == 'start.month':
-                smo = adict['start.month']
-            elif key == 'start.day':
-                sdy = adict['start.day']
-            elif key == 'start.hour':
-                shr = adict['start.hour']
-            elif key == 'start.minute':
-                smt = adict['start.minute']
-            elif key == 'start.second':
-                ssc = int(adict['start.second'])
-            elif key == 'end.year':
-                eyr = adict['end.year']
-            elif key == 'end.month':
-                emo = adict['end.month']
-            elif key == 'end.day':
-                edy = adict['end.day']
-            elif key == 'end.hour':
-                ehr = adict['end.hour']
-            elif key == 'end.minute':
-                emt = adict['end.minute']
-            elif key == 'end.second':
-                esc = int(adict['end.second'])
-            elif 'vector.' in key:
-                if isinstance(self, sdVector):
-                    name = key.replace('vector.', '')
-                    name = name.replace('.', '')
-                    if hasattr(self, name):
-                        setattr(self, name, val)
-            elif 'model.' in key:
-                if isinstance(self, sdModel):
-                    name = key.replace('model.', '')
-                    name = name.replace('.', '')
-                    if hasattr(self, name):
-                        setattr(self, name, val)
-            elif '+' in key:
-                name = key.replace('+', 'p')
-                if hasattr(self, name):
-                    setattr(self, name, val)
-            else:
-                name = key.replace('.', '')
-                if hasattr(self, name):
-                    setattr(self, name, val)
+        keymap = _keyAttrMaps.setdefault(self.__class__, {})
+
+        for key, val in adict.iteritems():
+            try:
+                name = keymap[key]
+            except KeyError:
+                name = _keyAttrName(self, key)
+                keymap[key] = name
+
+            if name is not None:
+                setattr(self, name, val)
 
         if isinstance(self, gridData) or isinstance(self, mapData):
-            self.sTime = dt.datetime(syr, smo, sdy, shr, smt, ssc)
-            self.eTime = dt.datetime(eyr, emo, edy, ehr, emt, esc)
+            self.sTime = dt.datetime(adict.get('start.year', 1),
+                                     adict.get('start.month', 1),
+                                     adict.get('start.day', 1),
+                                     adict.get('start.hour', 1),
+                                     adict.get('start.minute', 1),
+                                     int(adict.get('start.second', 1)))
+            self.eTime = dt.datetime(adict.get('end.year', 1),
+                                     adict.get('end.month', 1),
+                                     adict.get('end.day', 1),
+                                     adict.get('end.hour', 1),
+                                     adict.get('end.minute', 1),
+                                     int(adict.get('end.second', 1)))
 
     def __repr__(self):
         mystr = ''
@@ -1043,6 +1257,9 @@ class sdVector(sdBaseData):
         the median spectral width of the vector
     wdtsd : (string)
         the standard devation on the spectral width of the vector
+    table : (numpy.ndarray)
+        structured array holding one row per vector, with a column for each
+        of the attributes above.  The attributes are views of its columns.
 
     Written by AJ 20130607
     """
@@ -1060,10 +1277,21 @@ class sdVector(sdBaseData):
         self.pwrsd = None
         self.wdtmedian = None
         self.wdtsd = None
+        self.table = None
 
         if(dataDict != None):
             self.updateValsFromDict(dataDict)
 
+    def updateValsFromDict(self, adict):
+        """Fill the vector table from the vector.* entries of a dmap record
+
+        Parameters
+        ------------
+        adict : (dict)
+            the dictionary containing the grid or map data
+        """
+        self.table = _fillTable(self, adict, vectorFields)
+
 class sdModel(sdBaseData):
     """ a class to contain model records of map poential data, extends
     sdBaseData
@@ -1080,6 +1308,10 @@ class sdModel(sdBaseData):
         Bounding magnetic latitude
     boundarymlon : (int)
         Bounding magnetic longitude
+    table : (numpy.ndarray)
+        structured array holding one row per model vector, with mlat, mlon,
+        kvect and velmedian columns.  Those attributes are views of its
+        columns.
 
     Written by AJ 20130607
     """
@@ -1091,10 +1323,322 @@ class sdModel(sdBaseData):
         self.velmedian = None
         self.boundarymlat = None
         self.boundarymlon = None
+        self.table = None
 
         if(dataDict != None):
             self.updateValsFromDict(dataDict)
 
+    def updateValsFromDict(self, adict):
+        """Fill the model table and the boundary from the model.* and
+        boundary.* entries of a dmap record
+
+        Parameters
+        ------------
+        adict : (dict)
+            the dictionary containing the map data
+        """
+        self.table = _fillTable(self, adict, modelFields)
+        for key, name, fmt in boundaryFields:
+            if key in adict:
+                setattr(self, name, np.array(adict[key], dtype=fmt))
+
+class sdColumnData():
+    """A class to hold many grid or map records as columns, rather than as a
+    list of gridData or mapData objects
+
+    Each array valued part of a record (the per-radar entries, the vectors,
+    the model vectors, the fit coefficients and the boundary) is stored as
+    one flat numpy structured array covering all of the records, together
+    with an offsets array.  The rows belonging to record i of group 'vector'
+    are vector[vectorOffsets[i]:vectorOffsets[i+1]].
+
+    Parameters
+    -----------
+    fType : Optional[str]
+        the file type, 'grd', 'map', 'grdex' or 'mapex'
+    hemi : Optional[str]
+        hemisphere of the data
+
+    Attributes
+    -----------
+    fType : (str)
+        the file type, 'grd', 'map', 'grdex' or 'mapex'
+    hemi : (str)
+        hemisphere of the data
+    sTime : (numpy.ndarray)
+        start time (datetime) of each record
+    eTime : (numpy.ndarray)
+        end time (datetime) of each record
+    scalars : (dict)
+        one array per scalar dmap entry, holding its value for each record.
+        Keys are the dmap names without '.' and with '+' replaced by 'p', as
+        for the attributes of mapData, e.g. 'potdrop', 'IMFBz', 'fitorder'.
+    radar, vector, model, coeff, boundary : (numpy.ndarray)
+        flat structured arrays, with the columns given by radarFields,
+        vectorFields, modelFields, coeffFields and boundaryFields
+    radarOffsets, vectorOffsets, modelOffsets, coeffOffsets,
+    boundaryOffsets : (numpy.ndarray)
+        nrec + 1 row offsets of each record into the matching group
+
+    Methods
+    --------
+    recordSlice
+        the rows of a group that belong to one record
+    recordIndex
+        the record number of each row of a group
+    counts
+        the number of rows of a group in each record
+    timeSlice
+        a new sdColumnData holding the records in a time range
+    selectStations
+        a new sdColumnData holding only the rows from some radars
+
+    Example
+    --------
+    ::
+
+    import datetime as dt
+    myPtr = sdDataOpen(dt.datetime(2011,1,1), 'north', fileType='mapex')
+    cols = myPtr.readColumns()
+    cpcp = cols.scalars['potdrop']
+    nvec = cols.selectStations([65]).counts('vector')
+    """
+    def __init__(self, fType=None, hemi=None):
+        self.fType = fType
+        self.hemi = hemi
+        self.sTime = np.array([], dtype=object)
+        self.eTime = np.array([], dtype=object)
+        self.scalars = {}
+        for group, fields in columnGroups:
+            setattr(self, group, np.empty(0, dtype=[(name, fmt) for key, name,
+                                                    fmt in fields]))
+            setattr(self, group + 'Offsets', np.zeros(1, dtype=int))
+
+        # Python lists that records are gathered into before being converted
+        self.__buffer = None
+
+    def __len__(self):
+        return len(self.sTime)
+
+    def __repr__(self):
+        my_str = 'sdColumnData: {:d} {:} records\n'.format(len(self),
+                                                         self.fType)
+        if len(self) > 0:
+            my_str = '{:s}from {:} to {:}\n'.format(my_str, self.sTime[0],
+                                                    self.eTime[-1])
+        for group, fields in columnGroups:
+            my_str = '{:s}{:s} = {:d} rows\n'.format(my_str, group,
+                                                     len(getattr(self, group)))
+        my_str = '{:s}scalars = {:}\n'.format(my_str,
+                                              sorted(self.scalars.keys()))
+        return my_str
+
+    def appendRecord(self, sTime, eTime, adict):
+        """Add a record read from a dmap file.  The columns are not updated
+        until finish is called.
+
+        Parameters
+        ------------
+        sTime : (datetime)
+            start time of the record
+        eTime : (datetime)
+            end time of the record
+        adict : (dict)
+            the dictionary read from the dmap file
+
+        Notes
+        -------
+        In general, users will not need to use this.
+        """
+        if self.__buffer is None:
+            self.__buffer = {'sTime':[], 'eTime':[], 'scalars':{}}
+            for group, fields in columnGroups:
+                self.__buffer[group] = dict([(key, []) for key, name, fmt
+                                             in fields])
+                self.__buffer[group + 'Counts'] = []
+
+        buf = self.__buffer
+        nrec = len(buf['sTime'])
+        buf['sTime'].append(sTime)
+        buf['eTime'].append(eTime)
+
+        for group, fields in columnGroups:
+            cols = buf[group]
+            n = 0
+            for key, name, fmt in fields:
+                if key in adict:
+                    n = len(adict[key])
+                    break
+            for key, name, fmt in fields:
+                if key in adict:
+                    cols[key].extend(adict[key])
+                else:
+                    cols[key].extend([np.nan if fmt.startswith('f') else -1]
+                                     * n)
+            buf[group + 'Counts'].append(n)
+
+        for key, val in adict.iteritems():
+            # 'time' is added by dmapio from time.* entries, which grid and
+            # map records do not have
+            if isinstance(val, list) or key.startswith('start.') or \
+                    key.startswith('end.') or key == 'time':
+                continue
+            name = key.replace('+', 'p').replace('.', '')
+            if name not in buf['scalars']:
+                # pad records read before this entry first appeared
+                buf['scalars'][name] = [None] * nrec
+            buf['scalars'][name].append(val)
+
+        for name, vals in buf['scalars'].iteritems():
+            if len(vals) == nrec:
+                vals.append(None)
+
+    def finish(self):
+        """Convert the records added by appendRecord into the columns
+
+        Notes
+        -------
+        In general, users will not need to use this.
+        """
+        buf = self.__buffer
+        if buf is None:
+            return
+
+        self.sTime = np.array(buf['sTime'], dtype=object)
+        self.eTime = np.array(buf['eTime'], dtype=object)
+        self.scalars = dict([(name, np.array(vals)) for name, vals
+                             in buf['scalars'].iteritems()])
+        for group, fields in columnGroups:
+            table = np.empty(sum(buf[group + 'Counts']),
+                             dtype=[(name, fmt) for key, name, fmt in fields])
+            for key, name, fmt in fields:
+                table[name] = buf[group][key]
+            offsets = np.zeros(len(self.sTime) + 1, dtype=int)
+            np.cumsum(buf[group + 'Counts'], out=offsets[1:])
+            setattr(self, group, table)
+            setattr(self, group + 'Offsets', offsets)
+
+        self.__buffer = None
+
+    def recordSlice(self, i, group='vector'):
+        """The rows of a group that belong to a single record
+
+        Parameters
+        ------------
+        i : (int)
+            the record number
+        group : Optional[str]
+            one of 'radar', 'vector', 'model', 'coeff' or 'boundary'.
+            (default='vector')
+
+        Returns
+        ---------
+        rows : (numpy.ndarray)
+            a view of the group's structured array
+        """
+        offsets = getattr(self, group + 'Offsets')
+        return getattr(self, group)[offsets[i]:offsets[i + 1]]
+
+    def counts(self, group='vector'):
+        """The number of rows of a group in each record, e.g. the number of
+        vectors per record
+
+        Parameters
+        ------------
+        group : Optional[str]
+            one of 'radar', 'vector', 'model', 'coeff' or 'boundary'.
+            (default='vector')
+
+        Returns
+        ---------
+        counts : (numpy.ndarray)
+            nrec long array of row counts
+        """
+        return np.diff(getattr(self, group + 'Offsets'))
+
+    def recordIndex(self, group='vector'):
+        """The record number of each row of a group, for use with numpy
+        reductions such as numpy.bincount
+
+        Parameters
+        ------------
+        group : Optional[str]
+            one of 'radar', 'vector', 'model', 'coeff' or 'boundary'.
+            (default='vector')
+
+        Returns
+        ---------
+        index : (numpy.ndarray)
+            array with one record number per row of the group
+        """
+        return np.repeat(np.arange(len(self)), self.counts(group))
+
+    def timeSlice(self, sTime=None, eTime=None):
+        """Select the records with start times between sTime and eTime
+
+        Parameters
+        ------------
+        sTime : Optional[datetime]
+            earliest record start time to keep.  (default=None, no limit)
+        eTime : Optional[datetime]
+            latest record start time to keep.  (default=None, no limit)
+
+        Returns
+        ---------
+        cols : (sdColumnData)
+            a new object.  As the records are stored in time order, the group
+            arrays are views of this object's arrays.
+        """
+        i0 = 0 if sTime is None else np.searchsorted(self.sTime, sTime,
+                                                     side='left')
+        i1 = len(self) if eTime is None else np.searchsorted(self.sTime, eTime,
+                                                             side='right')
+
+        cols = sdColumnData(fType=self.fType, hemi=self.hemi)
+        cols.sTime = self.sTime[i0:i1]
+        cols.eTime = self.eTime[i0:i1]
+        cols.scalars = dict([(name, vals[i0:i1]) for name, vals
+                             in self.scalars.iteritems()])
+        for group, fields in columnGroups:
+            offsets = getattr(self, group + 'Offsets')[i0:i1 + 1]
+            setattr(cols, group, getattr(self, group)[offsets[0]:offsets[-1]])
+            setattr(cols, group + 'Offsets', offsets - offsets[0])
+
+        return cols
+
+    def selectStations(self, stids):
+        """Keep only the radar and vector rows from the given radars
+
+        Parameters
+        ------------
+        stids : (int or list)
+            station id or ids to keep
+
+        Returns
+        ---------
+        cols : (sdColumnData)
+            a new object with the same records, times and scalars.  The
+            model, coeff and boundary groups are shared with this object.
+        """
+        cols = sdColumnData(fType=self.fType, hemi=self.hemi)
+        cols.sTime = self.sTime
+        cols.eTime = self.eTime
+        cols.scalars = self.scalars
+        for group, fields in columnGroups:
+            table = getattr(self, group)
+            offsets = getattr(self, group + 'Offsets')
+            if group in ['radar', 'vector']:
+                keep = np.in1d(table['stid'], stids)
+                counts = np.bincount(self.recordIndex(group)[keep],
+                                     minlength=len(self))
+                table = table[keep]
+                offsets = np.zeros(len(self) + 1, dtype=int)
+                np.cumsum(counts, out=offsets[1:])
+            setattr(cols, group, table)
+            setattr(cols, group + 'Offsets', offsets)
+
+        return cols
+
 # TESTING CODE
 if __name__=="__main__":
     import os
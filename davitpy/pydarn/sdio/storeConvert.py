@@ -0,0 +1,556 @@
+# Copyright (C) 2012  VT SuperDARN Lab
+# Full license can be found in LICENSE.txt
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+.. module:: storeConvert
+   :synopsis: convert dmap files into column stores
+
+*********************
+**Module**: pydarn.sdio.storeConvert
+*********************
+
+Convert dmap fit, raw, iq, grid and map files into column stores (see
+:mod:`pydarn.sdio.columnStore`), one store per radar (or hemisphere) per
+day, so that later analyses can read any time window without parsing the
+dmap files again.
+
+Conversions are idempotent: a store is written under a temporary name and
+only renamed once it is complete (and, by default, verified against its
+source), and a store that is already up to date is skipped.  Many files or
+radar-days can be converted at once, in parallel processes.
+
+The module can be run from the command line, e.g.::
+
+    python -m davitpy.pydarn.sdio.storeConvert --radar bks,fhe \\
+        --ftype fitacf --start 20130101 --end 20130131 --outdir /data/store
+    python -m davitpy.pydarn.sdio.storeConvert --outdir /data/store \\
+        20130101.00.bks.fitacf.bz2 20130102.00.bks.fitacf.bz2
+
+Functions
+-----------
+  * :func:`pydarn.sdio.storeConvert.storeFileName`
+  * :func:`pydarn.sdio.storeConvert.storeFiles`
+  * :func:`pydarn.sdio.storeConvert.convertDmapFile`
+  * :func:`pydarn.sdio.storeConvert.convertDay`
+  * :func:`pydarn.sdio.storeConvert.convertBatch`
+  * :func:`pydarn.sdio.storeConvert.main`
+
+"""
+import logging
+
+# file types that are read with sdDataPtr rather than radDataPtr
+sdFileTypes = ['grd', 'grdex', 'map', 'mapex']
+
+
+def storeFileName(outDir, day, fileType, site, channel=None):
+    """The name of the store for one radar (or hemisphere) and day.
+
+    Parameters
+    ------------
+    outDir : (str)
+        the top directory of the stores
+    day : (datetime)
+        the day
+    fileType : (str)
+        the file type, e.g. 'fitacf' or 'map'
+    site : (str)
+        the 3-letter radar code, or the hemisphere for grid and map files
+    channel : (str/NoneType)
+        the 1-letter UAF channel.  (default=None)
+
+    Returns
+    ---------
+    (str)
+        outDir/YYYY/fileType/site/YYYYMMDD.site[.channel].fileType.h5
+
+    """
+    import os
+
+    name = '{:s}.{:s}'.format(day.strftime('%Y%m%d'), site)
+    if channel is not None:
+        name = '{:s}.{:s}'.format(name, channel)
+    name = '{:s}.{:s}.h5'.format(name, fileType)
+    return os.path.join(outDir, day.strftime('%Y'), fileType, site, name)
+
+
+def storeFiles(outDir, sTime, eTime, site, fileType, channel=None):
+    """The existing stores that cover a time range.
+
+    Parameters
+    ------------
+    outDir : (str)
+        the top directory of the stores
+    sTime : (datetime)
+        the start of the range
+    eTime : (datetime)
+        the end of the range
+    site : (str)
+        the 3-letter radar code, or the hemisphere for grid and map files
+    fileType : (str)
+        the file type, e.g. 'fitacf' or 'map'
+    channel : (str/NoneType)
+        the 1-letter UAF channel.  (default=None)
+
+    Returns
+    ---------
+    files : (list)
+        the store names, in time order
+
+    Example
+    ---------
+        files = pydarn.sdio.storeFiles('/data/store', dt.datetime(2013,1,1),
+                                       dt.datetime(2013,2,1), 'bks', 'fitacf')
+        cols = pydarn.sdio.radColumnData.concatenate(
+            [pydarn.sdio.radColumnData.fromStore(f, bmnum=7) for f in files])
+
+    """
+    import os
+    import datetime as dt
+
+    files = []
+    day = dt.datetime(sTime.year, sTime.month, sTime.day)
+    while day <= eTime:
+        name = storeFileName(outDir, day, fileType, site, channel=channel)
+        if os.path.isfile(name):
+            files.append(name)
+        day += dt.timedelta(days=1)
+    return files
+
+
+def _dmapRecords(fileName):
+    """Generate the records of a dmap file, which may be bzip2 or gzip
+    compressed."""
+    import os
+    import bz2
+    import gzip
+    import shutil
+    import tempfile
+    from davitpy.pydarn.dmapio import readDmapRec
+
+    tmpName = None
+    if fileName.endswith('.bz2') or fileName.endswith('.gz'):
+        opener = bz2.BZ2File if fileName.endswith('.bz2') else gzip.open
+        fd, tmpName = tempfile.mkstemp(suffix='.dmap')
+        with os.fdopen(fd, 'wb') as out:
+            src = opener(fileName, 'rb')
+            shutil.copyfileobj(src, out)
+            src.close()
+        fileName = tmpName
+
+    fd = os.open(fileName, os.O_RDONLY)
+    try:
+        while True:
+            dfile = readDmapRec(fd)
+            if dfile is None:
+                break
+            yield dfile
+    finally:
+        os.close(fd)
+        if tmpName is not None:
+            os.remove(tmpName)
+
+
+def _sameValue(a, b):
+    """True if two record values are equal, counting nan as equal to nan"""
+    import numpy as np
+
+    if isinstance(a, list) or isinstance(b, list):
+        a = np.asarray(a)
+        b = np.asarray(b)
+        if a.shape != b.shape:
+            return False
+        if a.dtype.kind == 'f' or b.dtype.kind == 'f':
+            return bool(np.all((a == b) | (np.isnan(a) & np.isnan(b))))
+        return bool(np.all(a == b))
+    if isinstance(a, float) and isinstance(b, float):
+        return a == b or (a != a and b != b)
+    return a == b
+
+
+def _verify(storeName, records, order):
+    """Compare the records of a store with those it was written from.
+
+    Parameters
+    ------------
+    storeName : (str)
+        the store
+    records : (iterable)
+        the source records, in the order they were appended
+    order : (numpy.ndarray)
+        the append number of each store record (columnStoreWriter.order)
+
+    Returns
+    ---------
+    (str/NoneType)
+        a description of the first difference, or None if there is none
+
+    """
+    import numpy as np
+    from davitpy.pydarn.sdio.columnStore import columnStoreReader, recordEpoch
+
+    rows = np.argsort(order)
+    store = columnStoreReader(storeName)
+    try:
+        n = 0
+        for i, dfile in enumerate(records):
+            if i >= store.nrec:
+                return 'the store has only {:d} records'.format(store.nrec)
+            store.setOffset(rows[i])
+            rec = store.readRec()
+            if rec['time'] != recordEpoch(dfile):
+                return 'record {:d}: times differ'.format(i)
+            keys = set(dfile.keys()) - set(['time'])
+            if keys != set(rec.keys()) - set(['time']):
+                return 'record {:d}: fields differ'.format(i)
+            for key in keys:
+                if not _sameValue(dfile[key], rec[key]):
+                    return 'record {:d}: {:s} differs'.format(i, key)
+            n += 1
+        if n != store.nrec:
+            return 'the store has {:d} records, not {:d}'.format(store.nrec, n)
+    finally:
+        store.close()
+    return None
+
+
+def _summary(source, store, status, nrec=0, seconds=0., message=None):
+    return {'source':source, 'store':store, 'status':status, 'nrec':nrec,
+            'seconds':seconds, 'message':message}
+
+
+def convertDmapFile(fileName, storeName, fileType=None, overwrite=False,
+                    verify=True, compression='gzip'):
+    """Convert a dmap file into a column store.
+
+    Parameters
+    ------------
+    fileName : (str)
+        the dmap file, which may be bzip2 (.bz2) or gzip (.gz) compressed
+    storeName : (str)
+        the store to write.  Its directory is created if needed.
+    fileType : (str/NoneType)
+        the file type, e.g. 'fitacf', kept in the store.  (default=None)
+    overwrite : (bool)
+        convert even if the store is up to date.  (default=False)
+    verify : (bool)
+        read the store back and compare it with the dmap file before
+        keeping it.  (default=True)
+    compression : (str/NoneType)
+        the HDF5 compression filter.  (default='gzip')
+
+    Returns
+    ---------
+    summary : (dict)
+        'source', 'store', 'status' ('converted', 'skipped', 'nodata' or
+        'failed'), 'nrec', 'seconds' and 'message'
+
+    Notes
+    -------
+    A store is up to date if it records the size and modification time of
+    the current dmap file.
+
+    """
+    import os
+    import time
+    from davitpy.pydarn.sdio.columnStore import columnStoreWriter
+    from davitpy.pydarn.sdio.columnStore import columnStoreReader
+
+    t0 = time.time()
+    stat = os.stat(fileName)
+    if not overwrite and os.path.isfile(storeName):
+        try:
+            store = columnStoreReader(storeName)
+            attrs = store.attrs
+            store.close()
+            if(attrs.get('sourceSize') == stat.st_size and
+               attrs.get('sourceMtime') == int(stat.st_mtime)):
+                return _summary(fileName, storeName, 'skipped',
+                                nrec=int(attrs.get('nrec', 0)))
+        except Exception, e:
+            logging.warning('rewriting unreadable store {:s}'.format(storeName))
+
+    writer = columnStoreWriter(storeName + '.tmp', fType=fileType,
+                               compression=compression)
+    writer.attrs['source'] = os.path.basename(fileName)
+    writer.attrs['sourceSize'] = stat.st_size
+    writer.attrs['sourceMtime'] = int(stat.st_mtime)
+    for dfile in _dmapRecords(fileName):
+        writer.append(dfile)
+    if writer.nrec == 0:
+        return _summary(fileName, storeName, 'nodata',
+                        seconds=time.time() - t0)
+
+    return _finish(writer, storeName, fileName, _dmapRecords(fileName),
+                   verify, t0)
+
+
+def _finish(writer, storeName, source, records, verify, t0):
+    """Write, verify and rename a store"""
+    import os
+    import time
+
+    d = os.path.dirname(storeName)
+    if d != '' and not os.path.exists(d):
+        try:
+            os.makedirs(d)
+        except OSError:
+            # another process made it first
+            pass
+    tmpName = writer.fileName
+    nrec = writer.close()
+    if verify:
+        message = _verify(tmpName, records, writer.order)
+        if message is not None:
+            os.remove(tmpName)
+            logging.error('{:s}: round trip failed, {:s}'.format(source,
+                                                                 message))
+            return _summary(source, storeName, 'failed', nrec=nrec,
+                            seconds=time.time() - t0, message=message)
+    os.rename(tmpName, storeName)
+    return _summary(source, storeName, 'converted', nrec=nrec,
+                    seconds=time.time() - t0)
+
+
+def convertDay(day, site, fileType, outDir, channel=None, overwrite=False,
+               verify=True, compression='gzip', ptrArgs=None):
+    """Convert a day of data from one radar (or hemisphere) into a column
+    store, finding the files the way radDataPtr (or sdDataPtr) does.
+
+    Parameters
+    ------------
+    day : (datetime)
+        the day
+    site : (str)
+        the 3-letter radar code, or the hemisphere ('north' or 'south') for
+        grid and map files
+    fileType : (str)
+        'fitacf', 'fitex', 'lmfit', 'rawacf', 'iqdat', 'grd', 'grdex', 'map'
+        or 'mapex'
+    outDir : (str)
+        the top directory of the stores (see storeFileName)
+    channel : (str/NoneType)
+        the 1-letter UAF channel.  (default=None)
+    overwrite : (bool)
+        convert even if the store already exists.  (default=False)
+    verify : (bool)
+        read the store back and compare it with the data pointer before
+        keeping it.  (default=True)
+    compression : (str/NoneType)
+        the HDF5 compression filter.  (default='gzip')
+    ptrArgs : (dict/NoneType)
+        other keyword arguments for radDataPtr or sdDataPtr, e.g. src,
+        local_dirfmt or tmpdir.  (default=None)
+
+    Returns
+    ---------
+    summary : (dict)
+        as for convertDmapFile
+
+    """
+    import os
+    import time
+    import datetime as dt
+    from davitpy.pydarn.sdio.columnStore import columnStoreWriter
+
+    t0 = time.time()
+    day = dt.datetime(day.year, day.month, day.day)
+    storeName = storeFileName(outDir, day, fileType, site, channel=channel)
+    source = '{:s} {:s} {:s}'.format(day.strftime('%Y%m%d'), site, fileType)
+    if not overwrite and os.path.isfile(storeName):
+        return _summary(source, storeName, 'skipped')
+
+    if ptrArgs is None:
+        ptrArgs = {}
+    # the end is just short of midnight, so the next day's first record is
+    # not written twice
+    eTime = day + dt.timedelta(days=1) - dt.timedelta(microseconds=1)
+    if fileType in sdFileTypes:
+        from davitpy.pydarn.sdio.sdDataTypes import sdDataPtr
+        ptr = sdDataPtr(day, site, fileType, eTime=eTime, **ptrArgs)
+    else:
+        from davitpy.pydarn.sdio.radDataTypes import radDataPtr
+        ptr = radDataPtr(day, site, eTime=eTime, channel=channel,
+                         fileType=fileType, **ptrArgs)
+    if ptr.dType is None:
+        return _summary(source, storeName, 'nodata', seconds=time.time() - t0)
+
+    try:
+        writer = columnStoreWriter(storeName + '.tmp', fType=ptr.fType,
+                                   compression=compression)
+        writer.attrs['source'] = source
+        for rec in ptr:
+            writer.append(rec.recordDict)
+        if writer.nrec == 0:
+            return _summary(source, storeName, 'nodata',
+                            seconds=time.time() - t0)
+
+        ptr.rewind()
+        return _finish(writer, storeName, source,
+                       (rec.recordDict for rec in ptr), verify, t0)
+    finally:
+        ptr.close()
+
+
+def _runJob(job):
+    """Run one conversion in a worker process, catching any error so that
+    the rest of the batch carries on."""
+    kind, args, kwargs = job
+    try:
+        if kind == 'file':
+            return convertDmapFile(*args, **kwargs)
+        return convertDay(*args, **kwargs)
+    except Exception, e:
+        logging.exception(e)
+        return _summary(str(args[0]), None, 'failed', message=str(e))
+
+
+def convertBatch(jobs, nproc=None):
+    """Run many conversions, in parallel processes.
+
+    Parameters
+    ------------
+    jobs : (list)
+        the conversions, each a ('file', args, kwargs) tuple for
+        convertDmapFile or a ('day', args, kwargs) tuple for convertDay
+    nproc : (int/NoneType)
+        the number of processes.  (default=None, one per CPU core)
+
+    Returns
+    ---------
+    summaries : (list)
+        the summary of each conversion, in the order they finished
+
+    Example
+    ---------
+        jobs = [('day', (day, 'bks', 'fitacf', '/data/store'), {})
+                for day in days]
+        summaries = pydarn.sdio.convertBatch(jobs, nproc=4)
+
+    """
+    import multiprocessing
+
+    if nproc is None:
+        nproc = multiprocessing.cpu_count()
+    nproc = max(1, min(nproc, len(jobs)))
+
+    summaries = []
+    if nproc == 1:
+        results = (_runJob(job) for job in jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(nproc)
+        results = pool.imap_unordered(_runJob, jobs)
+    try:
+        for summary in results:
+            summaries.append(summary)
+            logging.info('{:d}/{:d} {:s}: {:s}, {:d} records, '
+                         '{:.1f} s'.format(len(summaries), len(jobs),
+                                           summary['source'],
+                                           summary['status'], summary['nrec'],
+                                           summary['seconds']))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return summaries
+
+
+def main(argv=None):
+    """The command line interface.  Run with --help for the options.
+
+    Returns
+    ---------
+    (int)
+        0 if every conversion succeeded (or was skipped), 1 otherwise
+
+    """
+    import os
+    import argparse
+    import datetime as dt
+
+    parser = argparse.ArgumentParser(
+        description='Convert dmap files into time indexed HDF5 column '
+                    'stores.  Give either dmap files, or --radar (or --hemi), '
+                    '--ftype, --start and --end to convert radar-days found '
+                    'the way radDataPtr finds them.')
+    parser.add_argument('files', nargs='*', help='dmap files to convert')
+    parser.add_argument('--outdir', required=True,
+                        help='directory to write the stores to')
+    parser.add_argument('--radar', help='comma separated 3-letter radar codes')
+    parser.add_argument('--hemi', help='comma separated hemispheres, for grid '
+                        'and map files')
+    parser.add_argument('--ftype', help='file type, e.g. fitacf or map')
+    parser.add_argument('--channel', help='1-letter UAF channel')
+    parser.add_argument('--start', help='first day, YYYYMMDD')
+    parser.add_argument('--end', help='last day, YYYYMMDD (default: start)')
+    parser.add_argument('--src', choices=['local', 'sftp'],
+                        help='where to look for the radar-day files')
+    parser.add_argument('--nproc', type=int, default=None,
+                        help='number of processes (default: one per core)')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='convert even if the store is up to date')
+    parser.add_argument('--no-verify', dest='verify', action='store_false',
+                        help='do not compare the stores with their sources')
+    parser.add_argument('--compression', default='gzip',
+                        choices=['gzip', 'lzf', 'none'])
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose
+                                 else logging.WARNING)
+    compression = None if args.compression == 'none' else args.compression
+    kwargs = {'overwrite':args.overwrite, 'verify':args.verify,
+              'compression':compression}
+
+    jobs = []
+    for fileName in args.files:
+        base = os.path.basename(fileName)
+        for ext in ('.bz2', '.gz'):
+            if base.endswith(ext):
+                base = base[:-len(ext)]
+        jobs.append(('file', (fileName, os.path.join(args.outdir, base + '.h5'),
+                              args.ftype), dict(kwargs)))
+
+    sites = args.radar if args.radar is not None else args.hemi
+    if sites is not None:
+        if args.ftype is None or args.start is None:
+            parser.error('--ftype and --start are needed with --radar/--hemi')
+        sDay = dt.datetime.strptime(args.start, '%Y%m%d')
+        eDay = dt.datetime.strptime(args.end, '%Y%m%d') \
+            if args.end is not None else sDay
+        ptrArgs = {} if args.src is None else {'src':args.src}
+        day = sDay
+        while day <= eDay:
+            for site in sites.split(','):
+                dayArgs = dict(kwargs)
+                dayArgs['channel'] = args.channel
+                dayArgs['ptrArgs'] = ptrArgs
+                jobs.append(('day', (day, site, args.ftype, args.outdir),
+                             dayArgs))
+            day += dt.timedelta(days=1)
+
+    if len(jobs) == 0:
+        parser.error('nothing to convert')
+
+    summaries = convertBatch(jobs, nproc=args.nproc)
+    failed = [s for s in summaries if s['status'] == 'failed']
+    for s in failed:
+        logging.error('{:s} failed: {:}'.format(s['source'], s['message']))
+    return 1 if len(failed) > 0 else 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# test_columnStore.py
+#
+# Comments: Functions to test the column store reader and writer
+#-----------------------------------------------------------------------------
+"""This module contains routines to test the column store
+
+Functions
+-------------------------------------------------------------------------------
+test_double_roundtrip   Write and read back map-like records with double arrays
+-------------------------------------------------------------------------------
+"""
+import os
+import tempfile
+import numpy as np
+
+
+def test_double_roundtrip():
+    '''Write records holding single and double precision arrays to a column
+    store and check that every value reads back exactly
+
+    Returns
+    --------
+    recs : (list)
+        The records read back from the store
+
+    Example
+    --------
+    In [1]: import test_columnStore
+    In [2]: recs = test_columnStore.test_double_roundtrip()
+    '''
+    from columnStore import columnStoreWriter, columnStoreReader
+
+    # N+2 holds map fit coefficients, which are DATADOUBLE in the dmap file,
+    # while vector.vel.median values are DATAFLOAT (exact in float32)
+    inrecs = [{'time': 1357000000.0, 'stid': 65,
+               'N+2': [1234.56789012345, -0.1234567891234],
+               'vector.vel.median': [float(np.float32(321.7)), 2.5]},
+              {'time': 1357000120.0, 'stid': 65,
+               'N+2': [1.0e-17, np.nan, 98765.4321098765],
+               'vector.vel.median': [float(np.float32(-12.3))]}]
+
+    fd, name = tempfile.mkstemp(suffix='.h5')
+    os.close(fd)
+    try:
+        writer = columnStoreWriter(name, fType='map')
+        for rec in inrecs:
+            writer.append(rec, epoch=rec['time'])
+        writer.close()
+
+        store = columnStoreReader(name)
+        recs = [store.readRec() for rec in inrecs]
+        assert store.readRec() is None
+        cols = store.readColumns(keys=['N+2', 'vector.vel.median'])
+        store.close()
+    finally:
+        os.remove(name)
+
+    assert cols['N+2'][0].dtype == np.float64
+    assert cols['vector.vel.median'][0].dtype == np.float32
+    for rec, inrec in zip(recs, inrecs):
+        assert sorted(rec.keys()) == sorted(inrec.keys())
+        assert rec['time'] == inrec['time']
+        assert rec['stid'] == inrec['stid']
+        for key in ['N+2', 'vector.vel.median']:
+            np.testing.assert_array_equal(rec[key], inrec[key])
+
+    return recs
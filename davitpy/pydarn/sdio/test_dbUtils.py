@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# test_dbUtils.py
+#
+# Comments: Functions to test the mongodb column reader against mongomock
+#-----------------------------------------------------------------------------
+"""This module contains routines to test readColumnsFromDb with a mongomock
+collection.  The tests are skipped when mongomock is not installed.
+
+Functions
+-------------------------------------------------------------------------------
+make_test_collection   Fill a mongomock collection with fitted beam documents
+test_read_columns      Read the beams in batches and check the columns
+test_read_projection   Check the fields requested from the server
+test_read_empty        Read from a query that matches no beams
+-------------------------------------------------------------------------------
+"""
+import datetime as dt
+import unittest
+import numpy as np
+
+t0 = dt.datetime(2012, 5, 1)
+
+
+class _recordingColl(object):
+    '''A collection that passes find on to another, remembering the query
+    and projection it was given'''
+    def __init__(self, coll):
+        self.coll = coll
+        self.calls = []
+
+    def find(self, qrydict, projection):
+        self.calls.append((qrydict, projection))
+        return self.coll.find(qrydict, projection)
+
+
+def make_test_collection(nbeam=5):
+    '''Fill a mongomock collection with fitted beam documents, stored under
+    the names in dbUtils.cipher
+
+    Parameters
+    ----------
+    nbeam : (int)
+        Number of beam soundings to store (default=5)
+
+    Returns
+    --------
+    coll : (mongomock.Collection)
+        The filled collection.  Beam i has i + 1 gates with scatter.
+    '''
+    try:
+        import mongomock
+    except ImportError:
+        raise unittest.SkipTest('mongomock is not installed')
+    from dbUtils import cipher
+
+    coll = mongomock.MongoClient().radData.beams
+    # insert the beams out of time order, the reader sorts them
+    for i in range(nbeam)[::-1]:
+        slist = range(10, 11 + i)
+        doc = {cipher['time']: t0 + dt.timedelta(seconds=3 * i),
+               cipher['stid']: 33, cipher['channel']: 'a',
+               cipher['bmnum']: i, cipher['cp']: 153, cipher['exflg']: 1,
+               cipher['acflg']: 1,
+               cipher['prm']: {'nrang': 75, 'frang': 180, 'rsep': 45,
+                               'tfreq': 10500 + i},
+               cipher['fitex']: {'slist': slist,
+                                 'v': [100. * i + g for g in slist],
+                                 'p_l': [3. * g for g in slist],
+                                 'gflg': [g % 2 for g in slist]},
+               cipher['fitacf']: {'slist': slist,
+                                  'v': [-1. for g in slist]}}
+        coll.insert_one(doc)
+    # a beam of another radar, which the query leaves out
+    coll.insert_one({cipher['time']: t0, cipher['stid']: 65,
+                     cipher['exflg']: 1, cipher['prm']: {},
+                     cipher['fitex']: {'slist': [1]}})
+
+    return coll
+
+
+def test_read_columns(batchSize=2):
+    '''Read the beams of one radar from a mongomock collection in batches,
+    and check the converted columns
+
+    Parameters
+    ----------
+    batchSize : (int)
+        Number of beams in each batch (default=2)
+
+    Returns
+    --------
+    batches : (list)
+        The radColumnData objects read
+
+    Example
+    --------
+    In [1]: import test_dbUtils
+    In [2]: batches = test_dbUtils.test_read_columns()
+    '''
+    from dbUtils import readColumnsFromDb
+
+    nbeam = 5
+    coll = make_test_collection(nbeam)
+    batches = list(readColumnsFromDb(sTime=t0,
+                                     eTime=t0 + dt.timedelta(minutes=1),
+                                     stid=33, fileType='fitex',
+                                     fields=['v', 'gflg'],
+                                     batchSize=batchSize, dataConn=coll))
+
+    assert [len(cols) for cols in batches] == [2, 2, 1]
+    i = 0
+    for cols in batches:
+        assert cols.fType == 'fitex'
+        assert cols.fit.dtype.names == ('slist', 'gflg', 'v')
+        for j in range(len(cols)):
+            assert cols.time[j] == t0 + dt.timedelta(seconds=3 * i)
+            assert cols.beam['stid'][j] == 33
+            assert cols.beam['bmnum'][j] == i
+            assert cols.beam['channel'][j] == 1
+            assert cols.beam['cp'][j] == 153
+            assert cols.beam['tfreq'][j] == 10500 + i
+            assert cols.beam['nrang'][j] == 75
+            # beam values that are not stored are filled in
+            assert cols.beam['scan'][j] == -1
+            assert np.isnan(cols.beam['noisesky'][j])
+
+            slist = np.arange(10, 11 + i)
+            fit = cols.recordSlice(j)
+            np.testing.assert_array_equal(fit['slist'], slist)
+            np.testing.assert_array_equal(fit['v'], 100. * i + slist)
+            np.testing.assert_array_equal(fit['gflg'], slist % 2)
+            i += 1
+    assert i == nbeam
+
+    return batches
+
+
+def test_read_projection():
+    '''Check that only the beam values, the operating parameters and the
+    requested fitted values of the requested file type are asked for
+
+    Returns
+    --------
+    projection : (dict)
+        The projection given to find
+
+    Example
+    --------
+    In [1]: import test_dbUtils
+    In [2]: projection = test_dbUtils.test_read_projection()
+    '''
+    from dbUtils import readColumnsFromDb, cipher
+    from radDataTypes import beamFields, fitFields
+
+    coll = _recordingColl(make_test_collection())
+    batches = list(readColumnsFromDb(sTime=t0, stid=33, fileType='fitacf',
+                                     fields=['v'], dataConn=coll))
+
+    assert len(coll.calls) == 1
+    qrydict, projection = coll.calls[0]
+    assert {cipher['acflg']: 1} in qrydict['$and']
+    assert {cipher['stid']: 33} in qrydict['$and']
+
+    assert projection['_id'] == 0
+    assert all([val == 1 for key, val in projection.iteritems()
+                if key != '_id'])
+    expected = ['_id', cipher['time'], cipher['prm'], 'fitacf.slist',
+                'fitacf.v']
+    expected.extend([cipher[f[1]] for f in beamFields if f[1] in cipher])
+    assert sorted(projection.keys()) == sorted(expected)
+
+    # the fitex values of the documents are not read
+    assert len(batches) == 1
+    assert batches[0].fit.dtype.names == ('slist', 'v')
+    assert (batches[0].fit['v'] == -1.).all()
+
+    return projection
+
+
+def test_read_empty():
+    '''Read from a query that matches no beams, which gives no batches
+
+    Returns
+    --------
+    batches : (list)
+        The (empty) list of radColumnData objects read
+
+    Example
+    --------
+    In [1]: import test_dbUtils
+    In [2]: batches = test_dbUtils.test_read_empty()
+    '''
+    from dbUtils import readColumnsFromDb
+
+    coll = make_test_collection()
+    batches = list(readColumnsFromDb(sTime=t0 + dt.timedelta(days=2),
+                                     stid=33, dataConn=coll))
+    assert batches == []
+
+    return batches
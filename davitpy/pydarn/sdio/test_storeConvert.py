@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#-----------------------------------------------------------------------------
+# test_storeConvert.py
+#
+# Comments: Functions to test the dmap to column store converter
+#-----------------------------------------------------------------------------
+"""This module contains routines to test the dmap to column store converter.
+The test map file is written with dmapio.writeDmapRec, so the tests are
+skipped when the dmapio extension is not built or does not have it.
+
+Functions
+-------------------------------------------------------------------------------
+write_test_map         Write a small map file with double precision fit values
+test_convert_map       Convert a map file with verify on and check the store
+-------------------------------------------------------------------------------
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+# dmap type codes, from dmap.h
+DATASHORT = 2
+DATAINT = 3
+DATAFLOAT = 4
+DATADOUBLE = 8
+
+
+def write_test_map(fileName, nrec=3):
+    '''Write a small map file, with the fit coefficients stored as doubles
+
+    Parameters
+    ----------
+    fileName : (str)
+        Name of the file to write
+    nrec : (int)
+        Number of two minute records to write (default=3)
+
+    Returns
+    --------
+    coeffs : (list)
+        The N+2 coefficients written to each record
+    '''
+    try:
+        from davitpy.pydarn import dmapio
+    except ImportError:
+        raise unittest.SkipTest('the dmapio extension is not built')
+    if not hasattr(dmapio, 'writeDmapRec'):
+        raise unittest.SkipTest('dmapio has no writeDmapRec')
+
+    coeffs = []
+    fd = os.open(fileName, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0644)
+    try:
+        for i in range(nrec):
+            scalars = [('start.year', DATASHORT, 2013),
+                       ('start.month', DATASHORT, 1),
+                       ('start.day', DATASHORT, 1),
+                       ('start.hour', DATASHORT, 0),
+                       ('start.minute', DATASHORT, 2 * i),
+                       ('start.second', DATADOUBLE, 0.),
+                       ('end.year', DATASHORT, 2013),
+                       ('end.month', DATASHORT, 1),
+                       ('end.day', DATASHORT, 1),
+                       ('end.hour', DATASHORT, 0),
+                       ('end.minute', DATASHORT, 2 * i + 2),
+                       ('end.second', DATADOUBLE, 0.),
+                       ('hemisphere', DATASHORT, 1),
+                       ('fit.order', DATASHORT, 1),
+                       ('latmin', DATAFLOAT, 60.)]
+            coeff = [1234.56789012345 * (i + 1), -0.1234567891234,
+                     1.0e-17, 98765.4321098765]
+            coeffs.append(coeff)
+            arrays = [('stid', DATASHORT, (2,), [65, 33]),
+                      ('N', DATADOUBLE, (4,), [0., 0., 1., 1.]),
+                      ('N+1', DATADOUBLE, (4,), [0., 1., 1., 1.]),
+                      ('N+2', DATADOUBLE, (4,), coeff),
+                      ('N+3', DATADOUBLE, (4,), [1.5e-3, 0., 0., 0.]),
+                      ('vector.vel.median', DATAFLOAT, (2,), [321.5, -12.25])]
+            dmapio.writeDmapRec(fd, scalars, arrays)
+    finally:
+        os.close(fd)
+
+    return coeffs
+
+
+def test_convert_map():
+    '''Convert a map file into a column store with verify on, so the
+    conversion fails if any value (including the doubles) changes
+
+    Returns
+    --------
+    summary : (dict)
+        The summary returned by convertDmapFile
+
+    Example
+    --------
+    In [1]: import test_storeConvert
+    In [2]: summary = test_storeConvert.test_convert_map()
+    '''
+    from storeConvert import convertDmapFile
+    from columnStore import columnStoreReader
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        mapName = os.path.join(tmpdir, '20130101.north.map')
+        storeName = os.path.join(tmpdir, '20130101.north.map.h5')
+        coeffs = write_test_map(mapName)
+
+        summary = convertDmapFile(mapName, storeName, fileType='map',
+                                  verify=True)
+        assert summary['status'] == 'converted', summary['message']
+        assert summary['nrec'] == len(coeffs)
+
+        store = columnStoreReader(storeName)
+        recs = [store.readRec() for coeff in coeffs]
+        store.close()
+    finally:
+        shutil.rmtree(tmpdir)
+
+    for rec, coeff in zip(recs, coeffs):
+        np.testing.assert_array_equal(rec['N+2'], coeff)
+
+    return summary
@@ -5,8 +5,8 @@ This subpackage contains methods for various solar calculations
 
 Methods
 ----------------------------------------------------------------------------
-getJD                       calculate the julian date from a python datetime
-                            object
+getJD                       calculate the julian date from python datetime
+                            object(s)
 JulianCent                  convert Julian Day to centuries since J2000.0.
 calcGeomMeanLongSun         calculate the Geometric Mean Longitude of the Sun
                             (in degrees)
@@ -45,6 +45,8 @@ calcSunRiseSetUTC           calculate sunrise/sunset the given day at the
                             given location on earth (in minutes since 0 UTC)
 calcSunRiseSet              calculate sunrise/sunset the given day at the
                             given location on earth (in minutes)
+solar_zenith                calculate the solar zenith angle for arrays of
+                            times and locations
 calcTerminator              calculate terminator position and solar zenith
                             angle for a given julian date-time within
                             latitude/longitude limits note that for plotting
@@ -53,6 +55,9 @@ calcTerminator              calculate terminator position and solar zenith
 
 Note
 ----
+The calc* functions take numpy arrays as well as scalars, e.g. calcAzEl for
+a whole grid of latitudes and longitudes, or getJD for a list of times.
+
 Source: http://www.esrl.noaa.gov/gmd/grad/solcalc/
 Translated to Python by Sebastien de Larquier
 
@@ -73,10 +78,7 @@ def calcGeomMeanLongSun( t ):
     """Calculate the Geometric Mean Longitude of the Sun (in degrees)
     """
     L0 = 280.46646 + t * ( 36000.76983 + t*0.0003032 )
-    while L0 > 360.0:
-        L0 -= 360.0
-    while L0 < 0.0:
-        L0 += 360.0
+    L0 = numpy.mod(L0, 360.0)
     return L0 # in degrees
 
 
@@ -165,7 +167,7 @@ def calcSunRtAscension( t ):
     SunLong = calcSunApparentLong(t)
     tananum = ( numpy.cos(numpy.radians(e)) * numpy.sin(numpy.radians(SunLong)) )
     tanadenom = numpy.cos(numpy.radians(SunLong))
-    alpha = numpy.degrees(anumpy.arctan2(tananum, tanadenom))
+    alpha = numpy.degrees(numpy.arctan2(tananum, tanadenom))
     return alpha # in degrees
 
 
@@ -209,67 +211,63 @@ def calcHourAngleSunrise( lat, solarDec ):
     return HA # in radians (for sunset, use -HA)
 
 
-def calcAzEl( t, localtime, latitude, longitude, zone ):
-    """Calculate sun azimuth and zenith angle
+def _calcZenith( t, localtime, latitude, longitude, zone ):
+    """Calculate the geometric sun zenith angle (in degrees), the hour angle
+    (in degrees) and the declination (in degrees), for scalars or arrays
     """
     eqTime = calcEquationOfTime(t)
     theta  = calcSunDeclination(t)
 
     solarTimeFix = eqTime + 4.0 * longitude - 60.0 * zone
-    earthRadVec = calcSunRadVector(t)
-
     trueSolarTime = localtime + solarTimeFix
-    while trueSolarTime > 1440:
-        trueSolarTime -= 1440.
 
-    hourAngle = trueSolarTime / 4.0 - 180.0
-    if hourAngle < -180.: 
-        hourAngle += 360.0
+    # hour angle in [-180, 180)
+    hourAngle = numpy.mod(trueSolarTime / 4.0, 360.0) - 180.0
 
     haRad = numpy.radians(hourAngle)
     csz = numpy.sin(numpy.radians(latitude)) * numpy.sin(numpy.radians(theta)) + numpy.cos(numpy.radians(latitude)) * numpy.cos(numpy.radians(theta)) * numpy.cos(haRad)
-    if csz > 1.0: 
-        csz = 1.0 
-    elif csz < -1.0: 
-        csz = -1.0
-    zenith = numpy.degrees(numpy.arccos(csz))
-    azDenom = numpy.cos(numpy.radians(latitude)) * numpy.sin(numpy.radians(zenith))
-    if abs(azDenom) > 0.001: 
+    zenith = numpy.degrees(numpy.arccos(numpy.clip(csz, -1.0, 1.0)))
+    return zenith, hourAngle, theta
+
+
+def _scalar( x ):
+    """Return 0-d arrays as numpy scalars"""
+    x = numpy.asarray(x)
+    return x[()] if x.ndim == 0 else x
+
+
+def calcAzEl( t, localtime, latitude, longitude, zone ):
+    """Calculate sun azimuth and zenith angle (in degrees, corrected for
+    atmospheric refraction).  All arguments may be numpy arrays that
+    broadcast together.
+    """
+    zenith, hourAngle, theta = _calcZenith(t, localtime, latitude, longitude, zone)
+    latitude = numpy.asarray(latitude, dtype=float)
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        azDenom = numpy.cos(numpy.radians(latitude)) * numpy.sin(numpy.radians(zenith))
         azRad = (( numpy.sin(numpy.radians(latitude)) * numpy.cos(numpy.radians(zenith)) ) - numpy.sin(numpy.radians(theta))) / azDenom
-        if abs(azRad) > 1.0: 
-            if azRad < 0.: 
-                azRad = -1.0 
-            else:
-                azRad = 1.0
-        
+        azRad = numpy.clip(azRad, -1.0, 1.0)
         azimuth = 180.0 - numpy.degrees(numpy.arccos(azRad))
-        if hourAngle > 0.0: 
-            azimuth = -azimuth
-    else:
-        if latitude > 0.0: 
-            azimuth = 180.0 
-        else:
-            azimuth = 0.0
-    if azimuth < 0.0: 
-        azimuth += 360.0
-    exoatmElevation = 90.0 - zenith
-
-    # Atmospheric Refraction correction
-    if exoatmElevation > 85.0: 
-        refractionCorrection = 0.0
-    else:
+        azimuth = numpy.where(hourAngle > 0.0, -azimuth, azimuth)
+        azimuth = numpy.where(numpy.abs(azDenom) > 0.001, azimuth,
+                              numpy.where(latitude > 0.0, 180.0, 0.0))
+        azimuth = numpy.where(azimuth < 0.0, azimuth + 360.0, azimuth)
+
+        # Atmospheric Refraction correction
+        exoatmElevation = 90.0 - zenith
         te = numpy.tan(numpy.radians(exoatmElevation))
-        if exoatmElevation > 5.0: 
-            refractionCorrection = 58.1 / te - 0.07 / (te*te*te) + 0.000086 / (te*te*te*te*te) 
-        elif exoatmElevation > -0.575: 
-            refractionCorrection = 1735.0 + exoatmElevation * (-518.2 + exoatmElevation * (103.4 + exoatmElevation * (-12.79 + exoatmElevation * 0.711) ) ) 
-        else:
-            refractionCorrection = -20.774 / te
-        refractionCorrection = refractionCorrection / 3600.0
+        refractionCorrection = numpy.select(
+            [exoatmElevation > 85.0, exoatmElevation > 5.0,
+             exoatmElevation > -0.575],
+            [0.0,
+             58.1 / te - 0.07 / (te*te*te) + 0.000086 / (te*te*te*te*te),
+             1735.0 + exoatmElevation * (-518.2 + exoatmElevation * (103.4 + exoatmElevation * (-12.79 + exoatmElevation * 0.711) ) )],
+            -20.774 / te) / 3600.0
 
     solarZen = zenith - refractionCorrection
-    
-    return azimuth, solarZen
+
+    return _scalar(azimuth), _scalar(solarZen)
 
 
 def calcSolNoonUTC( jd, longitude ):
@@ -317,22 +315,12 @@ def calcSunRiseSet( jd, latitude, longitude, timezone, dst ):
     rnewTimeUTC, snewTimeUTC = calcSunRiseSetUTC(jd + rtimeUTC/1440.0, latitude, longitude)
     rtimeLocal = rnewTimeUTC + (timezone * 60.0)
     rtimeLocal += 60.0 if dst else 0.0
-    if rtimeLocal < 0.0 or rtimeLocal >= 1440.0: 
-        jday = jd
-        increment = 1. if rtimeLocal < 0. else -1.
-        while rtimeLocal < 0.0 or rtimeLocal >= 1440.0:
-            rtimeLocal += increment * 1440.0
-            jday -= increment
+    rtimeLocal = numpy.mod(rtimeLocal, 1440.0)
     # calculate local sunset time (in minutes)
     rnewTimeUTC, snewTimeUTC = calcSunRiseSetUTC(jd + stimeUTC/1440.0, latitude, longitude)
     stimeLocal = snewTimeUTC + (timezone * 60.0)
     stimeLocal += 60.0 if dst else 0.0
-    if stimeLocal < 0.0 or stimeLocal >= 1440.0: 
-        jday = jd
-        increment = 1. if stimeLocal < 0. else -1.
-        while stimeLocal < 0.0 or stimeLocal >= 1440.0:
-            stimeLocal += increment * 1440.0
-            jday -= increment
+    stimeLocal = numpy.mod(stimeLocal, 1440.0)
     # return
     return rtimeLocal, stimeLocal
 
@@ -343,15 +331,13 @@ def calcTerminator( date, latitudes, longitudes,nlats=50,nlons=50 ):
     """
     jd = getJD(date)
     t = calcTimeJulianCent(jd)
-    ut = ( jd - (int(jd - 0.5) + 0.5) )*1440.
-    zen  = numpy.zeros((nlats,nlons))
+    ut = ( jd - (numpy.floor(jd - 0.5) + 0.5) )*1440.
     lats = numpy.linspace(latitudes[0],  latitudes[1],  num=nlats)
     lons = numpy.linspace(longitudes[0], longitudes[1], num=nlons)
+    # the whole grid in one call
+    az, zen = calcAzEl(t, ut, lats[:,numpy.newaxis], lons[numpy.newaxis,:], 0.)
     term = []
     for ilat in range(1,nlats+1):
-        for ilon in range(nlons):
-            az,el = calcAzEl(t, ut, lats[-ilat], lons[ilon], 0.) 
-            zen[-ilat,ilon] = el
         a = (90 - zen[-ilat,:])
         mins = numpy.r_[False, a[1:]*a[:-1] <= 0] | \
             numpy.r_[a[1:]*a[:-1] <= 0, False] 
@@ -367,17 +353,65 @@ def calcTerminator( date, latitudes, longitudes,nlats=50,nlons=50 ):
 
 
 def getJD(date):
-    """Calculate the julian date from a python datetime object.
+    """Calculate the julian date from a python datetime object, or from a
+    list or numpy array of datetime objects (any tzinfo is ignored) or
+    numpy datetime64 values.
     """
+    date = numpy.asarray(date)
+    if date.dtype.kind == 'M':
+        epoch = date.astype('datetime64[us]').astype(numpy.int64) / 1.e6
+    else:
+        import datetime as dt
+        t0 = dt.datetime(1970, 1, 1)
+        epoch = numpy.array([(d.replace(tzinfo=None) - t0).total_seconds()
+                             for d in date.ravel()]).reshape(date.shape)
+
+    # julian date of the unix epoch
+    jd = 2440587.5 + epoch / 86400.
+    return _scalar(jd)
+
+
+def solar_zenith(times, lats, lons, refraction=False):
+    """Calculate the solar zenith angle (in degrees) at many times and
+    locations at once
+
+    Parameters
+    ----------
+    times : datetime, list or numpy.ndarray
+        UT time(s), as datetime objects (any tzinfo is ignored) or numpy
+        datetime64 values
+    lats : float or numpy.ndarray
+        geographic latitude(s) (in degrees)
+    lons : float or numpy.ndarray
+        geographic longitude(s) (in degrees), with the same shape as lats
+    refraction : Optional[bool]
+        correct for atmospheric refraction, as calcAzEl does.
+        (default=False, the geometric zenith angle)
+
+    Returns
+    -------
+    zenith : numpy.ndarray
+        the solar zenith angle, with shape times.shape + lats.shape
+
+    Example
+    -------
+        zen = solar_zenith(times, fov.latCenter[7], fov.lonCenter[7])
+        daylight = zen < 90.
+    """
+    lats = numpy.asarray(lats, dtype=float)
+    lons = numpy.asarray(lons, dtype=float)
 
-    from dateutil.relativedelta import relativedelta
-    
-    if date.month < 2: 
-        date.replace(year=date.year-1)
-        date += relativedelta(month=12)
-
-    A = numpy.floor(date.year/100.)
-    B = 2. - A + numpy.floor(A/4.)
-    jd = numpy.floor(365.25*(date.year + 4716.)) + numpy.floor(30.6001*(date.month+1)) + date.day + B - 1524.5
-    jd = jd + date.hour/24.0 + date.minute/1440.0 + date.second/86400.0
-    return jd
+    jd = numpy.asarray(getJD(times))
+    t = calcTimeJulianCent(jd)
+    # UT in minutes of the day
+    ut = ( jd - (numpy.floor(jd - 0.5) + 0.5) )*1440.
+
+    # broadcast times against locations
+    tshape = jd.shape + (1,) * lats.ndim
+    t = t.reshape(tshape)
+    ut = ut.reshape(tshape)
+    if refraction:
+        az, zenith = calcAzEl(t, ut, lats, lons, 0.)
+    else:
+        zenith, hourAngle, theta = _calcZenith(t, ut, lats, lons, 0.)
+    return numpy.asarray(zenith)
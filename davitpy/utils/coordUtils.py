@@ -309,15 +309,14 @@ def coord_conv(lon, lat, start, end, altitude=None, date_time=None,
             ############################################################
             # MLT TO conversions.
             if end == "mlt":
-                for num, el in enumerate(lon):
-                    # Find MLT from magnetic lon and datetime.
-                    lon[num] = aacgm.mltFromYmdhms(date_time.year, 
-                                                   date_time.month, 
-                                                   date_time.day, 
-                                                   date_time.hour, 
-                                                   date_time.minute, 
-                                                   date_time.second, 
-                                                   el)
+                # Find MLT of 0 magnetic lon.
+                mlt_0 = aacgm.mltFromYmdhms(date_time.year, date_time.month,
+                                            date_time.day, date_time.hour,
+                                            date_time.minute, date_time.second,
+                                            0.)
+                # MLT goes up by an hour every 15 degrees of magnetic lon,
+                # so all of the lons are done at once.
+                lon = (mlt_0 + np.asarray(lon, dtype=float) / 15.) % 24.
                 # Convert hours to degrees.
                 lon *= 360./24.
                 # Convert from (0,360) to (-180,180).
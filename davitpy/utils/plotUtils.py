@@ -159,6 +159,8 @@ class mapObj(basemap.Basemap):
         self._gridLabels=gridLabels
         self._gridLatRes=gridLatRes
         self._coordsDict, self._coords_string = get_coord_dict()
+        # Set while Basemap reads coastlines etc., see _readboundarydata
+        self._readingBoundary = False
 
         if datetime is None and dateTime is None:
           logging.warning("datetime/dateTime not specified, using current time.")
@@ -255,32 +257,45 @@ class mapObj(basemap.Basemap):
                                    fmt=lonfmt, color='.6', zorder=10)
       
     def __call__(self, x, y, inverse=False, coords=None, altitude=0.):
-        from copy import deepcopy
-        import numpy as np
-        import inspect
-    
+        """Convert lon/lat to map projection coordinates (or back, with
+        inverse=True).
+
+        Parameters
+        ----------
+        x : float, list or numpy.ndarray
+            longitude(s), or map x coordinate(s) if inverse is True
+        y : float, list or numpy.ndarray
+            latitude(s), or map y coordinate(s) if inverse is True
+        inverse : Optional[bool]
+            convert map x/y to lon/lat.  (default=False)
+        coords : Optional[str]
+            the coordinate system of the lon/lat, if it is not the one of
+            the map, e.g. 'geo', 'mag' or 'mlt'.  (default=None)
+        altitude : Optional[float]
+            altitude (km) for the coordinate conversion.  (default=0.)
+
+        Returns
+        -------
+        x, y
+            with the same shape as the input
+
+        Notes
+        -----
+        Arrays of any shape are converted and projected in one call each, so
+        e.g. all of the cell corners of a fan plot can be projected at once.
+        """
         from davitpy.utils import coord_conv
     
-        # First we need to check and see if drawcoastlines() or a similar 
-        # method is calling because if we are in a coordinate system 
-        # differing from 'geo' then the coastlines will get plotted 
-        # in the wrong location...
-        try:
-          callerFile, _, callerName = \
-                  inspect.getouterframes(inspect.currentframe())[1][1:4]
-        except:
-          return basemap.Basemap.__call__(self, x, y, inverse=inverse)
-    
-        # If call was from drawcoastlines, etc. then we do something different
-        if 'mpl_toolkits' in callerFile and callerName is '_readboundarydata':
+        # Coastlines etc. are read by Basemap in geographic coordinates, so
+        # they are converted to those of the map first.  The flag is set by
+        # _readboundarydata.
+        if self._readingBoundary:
           x, y = coord_conv(x, y, "geo", self.coords, altitude=0.,
                             date_time=self.datetime)
           return basemap.Basemap.__call__(self, x, y, inverse=False)
     
-        # If the call was not from drawcoastlines, etc. do the conversion.
-    
         # If we aren't changing between lat/lon coordinate systems:
-        elif coords is None:
+        elif coords is None or coords == self.coords:
           return basemap.Basemap.__call__(self, x, y, inverse=inverse)
     
         # If inverse is true do the calculation of x,y map coords first, 
@@ -312,9 +327,15 @@ class mapObj(basemap.Basemap):
         oldgeom = deepcopy(self._boundarypolyll)
         newgeom = _geoslib.Polygon(b).fix()
         self._boundarypolyll = newgeom
-        out = basemap.Basemap._readboundarydata(self, name,
-                                                as_polygons=as_polygons)
-        self._boundarypolyll = oldgeom
+        # Basemap projects the boundary data with self(), which converts
+        # them from geographic coordinates while this is set.
+        self._readingBoundary = True
+        try:
+            out = basemap.Basemap._readboundarydata(self, name,
+                                                    as_polygons=as_polygons)
+        finally:
+            self._readingBoundary = False
+            self._boundarypolyll = oldgeom
         return out
 
 